@@ -39,6 +39,32 @@ class CollectorConfig(BaseModel):
         default_factory=lambda: float(os.getenv("CLARION_COLLECTOR_BATCH_INTERVAL", "5.0"))
     )
     
+    # Backend wire format: "json" (POST /api/netflow/netflow) or "columnar"
+    # (binary column arrays to /api/netflow/netflow/batch; needs a backend
+    # with the batch endpoint)
+    wire_format: str = Field(
+        default_factory=lambda: os.getenv("CLARION_COLLECTOR_WIRE_FORMAT", "json").lower()
+    )
+    wire_compression: bool = Field(
+        default_factory=lambda: os.getenv("CLARION_COLLECTOR_WIRE_COMPRESSION", "true").lower() == "true"
+    )
+
+    # What the native collector sends: "flows" (every record) or "sketches"
+    # (per-endpoint edge sketches, pushed as changed-sketch snapshots;
+    # needs the clarion_edge package)
+    aggregation_mode: str = Field(
+        default_factory=lambda: os.getenv("CLARION_COLLECTOR_AGGREGATION", "flows").lower()
+    )
+    sketch_push_interval_seconds: float = Field(
+        default_factory=lambda: float(os.getenv("CLARION_COLLECTOR_SKETCH_PUSH_INTERVAL", "60"))
+    )
+    sketch_max_endpoints: int = Field(
+        default_factory=lambda: int(os.getenv("CLARION_COLLECTOR_SKETCH_MAX_ENDPOINTS", "10000"))
+    )
+    sketch_push_batch_size: int = Field(
+        default_factory=lambda: int(os.getenv("CLARION_COLLECTOR_SKETCH_PUSH_BATCH", "500"))
+    )
+
     # Switch ID mapping (optional - can be derived from source IP)
     switch_id_from_source_ip: bool = Field(
         default_factory=lambda: os.getenv("CLARION_COLLECTOR_SWITCH_ID_FROM_IP", "true").lower() == "true"
@@ -49,11 +75,46 @@ class CollectorConfig(BaseModel):
         default_factory=lambda: os.getenv("CLARION_COLLECTOR_LOG_LEVEL", "INFO")
     )
     
+    # Worker processes for the native collector (each binds its own
+    # SO_REUSEPORT sockets and keeps its own template state)
+    workers: int = Field(
+        default_factory=lambda: int(os.getenv("CLARION_COLLECTOR_WORKERS", "1"))
+    )
+    
     # Socket buffer sizes (requires privileges)
     udp_rcvbuf_size: Optional[int] = Field(
         default_factory=lambda: int(os.getenv("CLARION_COLLECTOR_UDP_RCVBUF", "0")) or None
     )
     
+    # Batched UDP receive: datagrams drained per wakeup and bytes per datagram
+    recv_ring_slots: int = Field(
+        default_factory=lambda: int(os.getenv("CLARION_COLLECTOR_RECV_RING_SLOTS", "64"))
+    )
+    recv_buffer_size: int = Field(
+        default_factory=lambda: int(os.getenv("CLARION_COLLECTOR_RECV_BUFFER_SIZE", "65535"))
+    )
+    
+    # Records buffered in memory before spilling to the spool (or dropping
+    # the oldest when no spool is configured)
+    max_pending_records: int = Field(
+        default_factory=lambda: int(os.getenv("CLARION_COLLECTOR_MAX_PENDING_RECORDS", "100000"))
+    )
+    
+    # On-disk spool for batches the backend has not accepted (disabled when
+    # unset; defaults to $CLARION_COLLECTOR_DATA_DIR/spool)
+    spool_dir: Optional[str] = Field(
+        default_factory=lambda: os.getenv("CLARION_COLLECTOR_SPOOL_DIR") or (
+            os.path.join(os.environ["CLARION_COLLECTOR_DATA_DIR"], "spool")
+            if os.getenv("CLARION_COLLECTOR_DATA_DIR") else None
+        )
+    )
+    spool_max_bytes: int = Field(
+        default_factory=lambda: int(os.getenv("CLARION_COLLECTOR_SPOOL_MAX_BYTES", str(1 << 30)))
+    )
+    spool_segment_bytes: int = Field(
+        default_factory=lambda: int(os.getenv("CLARION_COLLECTOR_SPOOL_SEGMENT_BYTES", str(64 << 20)))
+    )
+    
     # Retry settings
     retry_max_attempts: int = Field(
         default_factory=lambda: int(os.getenv("CLARION_COLLECTOR_RETRY_ATTEMPTS", "3"))
@@ -5,13 +5,13 @@ Implements template-based parsing for IPFIX according to RFC 5101, RFC 5102.
 """
 
 import struct
-import ipaddress
 import time
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import logging
 
 from .netflow_parser import NetFlowRecord
+from .record_layout import RecordLayout
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +41,9 @@ IPFIX_IES = {
 CISCO_ENTERPRISE_ID = 9  # Cisco Systems
 # Enterprise-specific IEs are in format: (enterprise_id << 16) | ie_id
 
+# IEs holding IPv4 addresses (decoded to dotted-quad strings)
+IPFIX_IPV4_IES = (8, 12, 15)
+
 
 class IPFIXTemplate:
     """Represents an IPFIX template."""
@@ -60,11 +63,22 @@ class IPFIXTemplate:
         self.fields = fields  # List of (ie_id, field_length, enterprise_id)
         self.created_at = time.time()
         self.last_used = time.time()
-        # Calculate total record size (with padding)
-        self.record_size = sum(length for _, length, _ in fields)
-        # Add padding to 4-byte boundary
-        if self.record_size % 4 != 0:
-            self.record_size += 4 - (self.record_size % 4)
+        # Compile the whole-record decoder once; records are packed back to
+        # back and enterprise IEs are keyed by (ie_id, enterprise_id) with the
+        # enterprise bit cleared
+        try:
+            self.layout: Optional[RecordLayout] = RecordLayout(
+                [
+                    ((ie_id & 0x7FFF, enterprise_id) if enterprise_id else ie_id, length)
+                    for ie_id, length, enterprise_id in fields
+                ],
+                ipv4_keys=IPFIX_IPV4_IES,
+            )
+            self.record_size = self.layout.record_size
+        except ValueError as e:
+            logger.warning(f"IPFIX template {template_id} cannot be decoded: {e}")
+            self.layout = None
+            self.record_size = 0
     
     def is_expired(self, max_age: int = 1800) -> bool:
         """Check if template is expired (default 30 minutes)."""
@@ -124,8 +138,10 @@ class IPFIXTemplateManager:
 class IPFIXParser:
     """Parser for IPFIX (IETF standard)."""
     
-    HEADER_FORMAT = "!HHIIII"
-    HEADER_SIZE = 20
+    # Message header (RFC 7011): version, length, export time, sequence,
+    # observation domain ID
+    HEADER_FORMAT = "!HHIII"
+    HEADER_SIZE = 16
     
     # Set header format
     SET_HEADER_FORMAT = "!HH"
@@ -298,74 +314,18 @@ class IPFIXParser:
         export_time: int,
         source_ip: str
     ) -> List[NetFlowRecord]:
-        """Parse a data set using a template."""
-        records = []
-        offset = 0
+        """Parse a data set using the template's compiled record layout."""
+        if template.layout is None:
+            logger.debug(f"Skipping data set for undecodable IPFIX template {template.template_id}")
+            return []
         
-        # Parse records until we run out of data
-        while offset + template.record_size <= len(data):
-            record_data = data[offset:offset + template.record_size]
-            
-            # Parse fields according to template
-            field_values = {}
-            field_offset = 0
-            
-            for ie_id, field_length, enterprise_id in template.fields:
-                if field_offset + field_length > len(record_data):
-                    logger.warning(f"Field extends beyond record data")
-                    break
-                
-                field_data = record_data[field_offset:field_offset + field_length]
-                
-                # Parse based on field type
-                value = self._parse_field(ie_id, field_length, field_data, enterprise_id)
-                if value is not None:
-                    # Store with enterprise context if applicable
-                    key = (ie_id, enterprise_id) if enterprise_id else ie_id
-                    field_values[key] = value
-                
-                field_offset += field_length
-                # Align to 4-byte boundary if needed
-                if field_offset % 4 != 0:
-                    field_offset += 4 - (field_offset % 4)
-            
-            # Convert to NetFlowRecord
+        records = []
+        for field_values in template.layout.decode(data):
             record = self._field_values_to_record(field_values, export_time, source_ip)
             if record:
                 records.append(record)
-            
-            offset += template.record_size
-            # Align to 4-byte boundary
-            if offset % 4 != 0:
-                offset += 4 - (offset % 4)
-        
         return records
     
-    def _parse_field(self, ie_id: int, field_length: int, data: bytes, enterprise_id: Optional[int] = None):
-        """Parse a field value based on IE ID and length."""
-        try:
-            # Parse based on length
-            if field_length == 1:
-                return struct.unpack("!B", data)[0]
-            elif field_length == 2:
-                return struct.unpack("!H", data)[0]
-            elif field_length == 4:
-                return struct.unpack("!I", data)[0]
-            elif field_length == 8:
-                return struct.unpack("!Q", data)[0]
-            elif field_length == 6:
-                # MAC address
-                return ':'.join(f'{b:02x}' for b in data)
-            elif field_length == 16:
-                # IPv6 address (skip for now)
-                return None
-            else:
-                # Variable length or unknown
-                return data.hex() if len(data) <= 16 else None
-        except Exception as e:
-            logger.debug(f"Error parsing IE {ie_id}: {e}")
-            return None
-    
     def _field_values_to_record(
         self,
         field_values: Dict,
@@ -377,19 +337,13 @@ class IPFIXParser:
         record.switch_id = source_ip
         
         # Map IPFIX IEs to record
-        # sourceIPv4Address (8)
+        # sourceIPv4Address (8), already dotted-quad
         if 8 in field_values:
-            try:
-                record.src_ip = str(ipaddress.IPv4Address(field_values[8]))
-            except:
-                pass
+            record.src_ip = field_values[8]
         
-        # destinationIPv4Address (12)
+        # destinationIPv4Address (12), already dotted-quad
         if 12 in field_values:
-            try:
-                record.dst_ip = str(ipaddress.IPv4Address(field_values[12]))
-            except:
-                pass
+            record.dst_ip = field_values[12]
         
         # sourceTransportPort (7)
         if 7 in field_values:
@@ -14,6 +14,7 @@ from typing import Optional
 from .config import CollectorConfig
 from .native_collector import NativeNetFlowCollector
 from .agent_collector import AgentCollector
+from .workers import CollectorSupervisor
 
 
 def setup_logging(level: str = "INFO"):
@@ -26,7 +27,11 @@ def setup_logging(level: str = "INFO"):
 
 
 async def run_native_collector(config: CollectorConfig, http_port: int = 8081):
-    """Run the native NetFlow collector."""
+    """Run the native NetFlow collector (multi-process if config.workers > 1)."""
+    if config.workers > 1:
+        supervisor = CollectorSupervisor(config)
+        await supervisor.start(http_port=http_port)
+        return
     collector = NativeNetFlowCollector(config)
     await collector.start(http_port=http_port)
 
@@ -71,6 +76,17 @@ async def main():
         default=8080,
         help="Agent collector HTTP port (default: 8080)"
     )
+    parser.add_argument(
+        "--native-http-port",
+        type=int,
+        default=8081,
+        help="Native collector health/metrics HTTP port (default: 8081)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Native collector worker processes sharing the UDP ports via SO_REUSEPORT (default: 1)"
+    )
     parser.add_argument(
         "--log-level",
         type=str,
@@ -88,6 +104,31 @@ async def main():
         type=float,
         help="Batch interval in seconds (default: 5.0)"
     )
+    parser.add_argument(
+        "--aggregation",
+        choices=["flows", "sketches"],
+        help="Send every flow record, or per-endpoint sketches pushed on an interval (default: flows)"
+    )
+    parser.add_argument(
+        "--wire-format",
+        choices=["json", "columnar"],
+        help="Backend wire format for NetFlow batches (default: json)"
+    )
+    parser.add_argument(
+        "--udp-rcvbuf",
+        type=int,
+        help="UDP receive buffer size in bytes (requires privileges)"
+    )
+    parser.add_argument(
+        "--retry-attempts",
+        type=int,
+        help="Maximum retry attempts for backend requests (default: 3)"
+    )
+    parser.add_argument(
+        "--retry-backoff",
+        type=float,
+        help="Retry backoff factor (default: 1.5)"
+    )
     
     args = parser.parse_args()
     
@@ -108,8 +149,14 @@ async def main():
         config.batch_size = args.batch_size
     if args.batch_interval:
         config.batch_interval_seconds = args.batch_interval
+    if args.workers:
+        config.workers = args.workers
     if args.log_level:
         config.log_level = args.log_level
+    if args.aggregation:
+        config.aggregation_mode = args.aggregation
+    if args.wire_format:
+        config.wire_format = args.wire_format
     if args.udp_rcvbuf:
         config.udp_rcvbuf_size = args.udp_rcvbuf
     if args.retry_attempts:
@@ -121,6 +168,8 @@ async def main():
     logger.info("Starting Clarion Collector")
     logger.info(f"Mode: {args.mode}")
     logger.info(f"Backend URL: {config.backend_url}")
+    if config.workers > 1:
+        logger.info(f"Native collector workers: {config.workers}")
     
     # Run collectors based on mode
     try:
@@ -3,9 +3,14 @@ Native NetFlow Collector - Receives NetFlow/IPFIX/sFlow from switches.
 """
 
 import asyncio
+import gzip
+import json
+import os
 import socket
 import logging
-from typing import Dict, List, Optional
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
 from datetime import datetime
 import httpx
 from fastapi import FastAPI, Request
@@ -13,11 +18,75 @@ from fastapi.responses import JSONResponse
 import uvicorn
 
 from .config import CollectorConfig
-from .netflow_parser import parse_netflow_packet, NetFlowRecord
+from .flow_batch import FLOW_BATCH_CONTENT_TYPE, encode_flow_batch, is_flow_batch
+from .netflow_parser import FlowPacketParser, NetFlowRecord
 from .retry import retry_with_backoff
+from .sketch_aggregator import SketchAggregator, encode_sketch_batch
+from .spool import BatchSpool
+from .udp_receiver import BatchedUDPReceiver
+from .worker_metrics import WorkerMetricsTable
 
 logger = logging.getLogger(__name__)
 
+# How often a worker publishes its metrics to the shared table
+METRICS_PUBLISH_INTERVAL = 1.0
+
+# Spool replay backoff while the backend is down (seconds)
+SPOOL_RETRY_INITIAL = 1.0
+SPOOL_RETRY_MAX = 30.0
+
+# Window for the spool replay rate metric (seconds)
+SPOOL_REPLAY_RATE_WINDOW = 60.0
+
+WIRE_FORMATS = ("json", "columnar")
+
+# Backend endpoints per wire format
+JSON_ENDPOINT = "/api/netflow/netflow"
+FLOW_BATCH_ENDPOINT = "/api/netflow/netflow/batch"
+
+AGGREGATION_MODES = ("flows", "sketches")
+SKETCH_ENDPOINT = "/api/edge/sketches/binary"
+
+
+def create_udp_socket(config: CollectorConfig, port: int, log: bool = True) -> socket.socket:
+    """
+    Create a non-blocking UDP socket bound with SO_REUSEPORT.
+    
+    Args:
+        config: Collector configuration (bind host, receive buffer size)
+        port: UDP port to bind
+        log: Log SO_REUSEPORT / buffer outcomes (once per port is enough)
+        
+    Returns:
+        Bound socket
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Enable SO_REUSEPORT for horizontal scaling (Linux 3.9+)
+    # Allows multiple sockets to bind to same port - OS load balances UDP packets
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        if log:
+            logger.info(f"SO_REUSEPORT enabled on port {port} - collector can be scaled horizontally")
+    except (AttributeError, OSError):
+        # SO_REUSEPORT not available (Windows, older Linux)
+        if log:
+            logger.warning("SO_REUSEPORT not available - single instance only")
+    
+    # Set UDP receive buffer size if configured (requires privileges)
+    if config.udp_rcvbuf_size:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, config.udp_rcvbuf_size)
+            if log:
+                logger.info(f"UDP receive buffer set to {config.udp_rcvbuf_size} bytes")
+        except (OSError, PermissionError) as e:
+            if log:
+                logger.warning(f"Could not set UDP receive buffer size: {e} (may require root/privileges)")
+    
+    sock.bind((config.bind_host, port))
+    sock.setblocking(False)
+    return sock
+
 
 class NativeNetFlowCollector:
     """
@@ -29,14 +98,60 @@ class NativeNetFlowCollector:
     - 6343: sFlow (future)
     """
     
-    def __init__(self, config: CollectorConfig):
+    def __init__(
+        self,
+        config: CollectorConfig,
+        worker_id: Optional[int] = None,
+        metrics_table: Optional[WorkerMetricsTable] = None,
+    ):
+        """
+        Initialize collector.
+        
+        Args:
+            config: Collector configuration
+            worker_id: Worker index when running as one of several worker
+                       processes (None for a standalone collector)
+            metrics_table: Shared table to publish metrics to (workers only)
+        
+        Raises:
+            ValueError: If config.wire_format or config.aggregation_mode is unknown
+        """
+        if config.wire_format not in WIRE_FORMATS:
+            raise ValueError(
+                f"Unknown wire format {config.wire_format!r}, expected one of {', '.join(WIRE_FORMATS)}"
+            )
+        if config.aggregation_mode not in AGGREGATION_MODES:
+            raise ValueError(
+                f"Unknown aggregation mode {config.aggregation_mode!r}, "
+                f"expected one of {', '.join(AGGREGATION_MODES)}"
+            )
         self.config = config
+        self.worker_id = worker_id
+        self.metrics_table = metrics_table
         self.backend_client: Optional[httpx.AsyncClient] = None
+        # Template state is owned by this collector (one per worker process)
+        self.parser = FlowPacketParser()
         self.batch: List[NetFlowRecord] = []
         self.batch_lock = asyncio.Lock()
+        self.total_packets = 0
+        self.receivers: List[BatchedUDPReceiver] = []
         self.total_received = 0
         self.total_sent = 0
         self.total_errors = 0
+        self.dropped_records = 0
+        self.bytes_sent = 0
+        self._flush_event = asyncio.Event()
+        # On-disk spool (opened in start()) and its replay state
+        self.spool: Optional[BatchSpool] = None
+        self._spool_event = asyncio.Event()
+        self.spool_replayed_records = 0
+        self._replay_window: Deque[Tuple[float, int]] = deque()
+        # Sketch aggregation mode: records are folded into sketches instead of batched
+        self.sketches: Optional[SketchAggregator] = None
+        if config.aggregation_mode == "sketches":
+            self.sketches = SketchAggregator(max_endpoints=config.sketch_max_endpoints)
+        self.sketches_pushed = 0
+        self.sketch_push_bytes = 0
         self._shutdown = False
         self.app: Optional[FastAPI] = None
         self._setup_http_routes()
@@ -63,16 +178,39 @@ class NativeNetFlowCollector:
                 "errors": self.total_errors,
                 "batch_size": self.config.batch_size,
                 "batch_interval_seconds": self.config.batch_interval_seconds,
+                "wire_format": self.config.wire_format,
+                "aggregation_mode": self.config.aggregation_mode,
             }
         
-    async def start(self, http_port: int = 8081):
-        """Start the collector."""
-        logger.info(f"Starting Native NetFlow Collector")
+    async def start(
+        self,
+        http_port: int = 8081,
+        sockets: Optional[Tuple[socket.socket, socket.socket]] = None,
+        serve_http: bool = True,
+    ):
+        """
+        Start the collector.
+        
+        Args:
+            http_port: Port for the health/metrics HTTP server
+            sockets: Pre-bound (netflow, ipfix) sockets; bound here if None
+            serve_http: Run the health/metrics HTTP server (workers leave
+                        this to the supervisor)
+        """
+        name = "Native NetFlow Collector"
+        if self.worker_id is not None:
+            name += f" worker {self.worker_id}"
+        logger.info(f"Starting {name}")
         logger.info(f"  Backend URL: {self.config.backend_url}")
         logger.info(f"  NetFlow port: {self.config.netflow_port}")
         logger.info(f"  IPFIX port: {self.config.ipfix_port}")
         logger.info(f"  Batch size: {self.config.batch_size}")
         logger.info(f"  Batch interval: {self.config.batch_interval_seconds}s")
+        if self.sketches is not None:
+            logger.info(
+                f"  Aggregation: sketches (push every {self.config.sketch_push_interval_seconds}s, "
+                f"max {self.config.sketch_max_endpoints} endpoints per exporter)"
+            )
         
         # Create HTTP client for backend
         self.backend_client = httpx.AsyncClient(
@@ -81,63 +219,45 @@ class NativeNetFlowCollector:
         )
         
         # Create UDP sockets
-        loop = asyncio.get_event_loop()
-        
-        # NetFlow socket
-        netflow_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        netflow_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        # Enable SO_REUSEPORT for horizontal scaling (Linux 3.9+)
-        # Allows multiple instances to bind to same port - OS load balances UDP packets
-        try:
-            netflow_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
-            logger.info("SO_REUSEPORT enabled - collector can be scaled horizontally")
-        except (AttributeError, OSError):
-            # SO_REUSEPORT not available (Windows, older Linux)
-            logger.warning("SO_REUSEPORT not available - single instance only")
-        
-        # Set UDP receive buffer size if configured (requires privileges)
-        if self.config.udp_rcvbuf_size:
-            try:
-                netflow_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.config.udp_rcvbuf_size)
-                logger.info(f"UDP receive buffer set to {self.config.udp_rcvbuf_size} bytes")
-            except (OSError, PermissionError) as e:
-                logger.warning(f"Could not set UDP receive buffer size: {e} (may require root/privileges)")
-        
-        netflow_sock.bind((self.config.bind_host, self.config.netflow_port))
-        netflow_sock.setblocking(False)
-        
-        # IPFIX socket
-        ipfix_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        ipfix_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        try:
-            ipfix_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
-        except (AttributeError, OSError):
-            pass  # Already logged for NetFlow socket
-        
-        # Set UDP receive buffer size if configured
-        if self.config.udp_rcvbuf_size:
-            try:
-                ipfix_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.config.udp_rcvbuf_size)
-            except (OSError, PermissionError):
-                pass  # Already logged for NetFlow socket
-        
-        ipfix_sock.bind((self.config.bind_host, self.config.ipfix_port))
-        ipfix_sock.setblocking(False)
+        if sockets:
+            netflow_sock, ipfix_sock = sockets
+        else:
+            netflow_sock = create_udp_socket(self.config, self.config.netflow_port)
+            ipfix_sock = create_udp_socket(self.config, self.config.ipfix_port, log=False)
         
         # Start UDP listeners
         netflow_task = asyncio.create_task(
-            self._udp_listener(netflow_sock, self._handle_netflow_packet)
+            self._udp_listener(netflow_sock, self._handle_netflow_datagrams)
         )
         ipfix_task = asyncio.create_task(
-            self._udp_listener(ipfix_sock, self._handle_ipfix_packet)
+            self._udp_listener(ipfix_sock, self._handle_ipfix_datagrams)
         )
         
+        # Open the spool and replay anything left from a previous run
+        replay_task = None
+        if self.config.spool_dir:
+            self.spool = BatchSpool(
+                os.path.join(self.config.spool_dir, f"worker-{self.worker_id or 0}"),
+                max_bytes=self.config.spool_max_bytes,
+                segment_bytes=self.config.spool_segment_bytes,
+            )
+            logger.info(f"  Spool: {self.spool.directory} ({self.spool.depth_records} records pending)")
+            replay_task = asyncio.create_task(self._spool_replayer())
+        
         # Start batch processing task
         batch_task = asyncio.create_task(self._batch_processor())
+        sketch_task = None
+        if self.sketches is not None:
+            sketch_task = asyncio.create_task(self._sketch_pusher())
+        
+        # Publish metrics for the supervisor when running as a worker
+        metrics_task = None
+        if self.metrics_table is not None:
+            metrics_task = asyncio.create_task(self._metrics_publisher())
         
         # Start HTTP server for health/metrics
         http_task = None
-        if self.app:
+        if self.app and serve_http:
             http_config = uvicorn.Config(
                 self.app,
                 host=self.config.bind_host,
@@ -151,82 +271,131 @@ class NativeNetFlowCollector:
         try:
             # Wait for tasks
             tasks = [netflow_task, ipfix_task, batch_task]
+            if replay_task:
+                tasks.append(replay_task)
+            if sketch_task:
+                tasks.append(sketch_task)
+            if metrics_task:
+                tasks.append(metrics_task)
             if http_task:
                 tasks.append(http_task)
             await asyncio.gather(*tasks)
         except asyncio.CancelledError:
             logger.info("Shutting down Native NetFlow Collector...")
             self._shutdown = True
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
             netflow_sock.close()
             ipfix_sock.close()
-            netflow_task.cancel()
-            ipfix_task.cancel()
-            batch_task.cancel()
-            if http_task:
-                http_task.cancel()
+            await self._flush_on_shutdown()
+            if self.sketches is not None:
+                await self._push_sketches()
+            if self.spool is not None:
+                self.spool.close()
             if self.backend_client:
                 await self.backend_client.aclose()
     
     async def _udp_listener(self, sock: socket.socket, handler):
-        """Generic UDP listener."""
+        """
+        Batched UDP listener.
+        
+        Waits for the socket to become readable, drains every pending
+        datagram into the receiver's ring and hands the batch to the
+        handler. Ring slots are reused on the next wakeup, so the handler
+        finishes with the batch before the next drain.
+        """
         loop = asyncio.get_event_loop()
+        receiver = BatchedUDPReceiver(
+            sock,
+            ring_slots=self.config.recv_ring_slots,
+            slot_size=self.config.recv_buffer_size,
+        )
+        self.receivers.append(receiver)
+        readable = asyncio.Event()
+        loop.add_reader(sock.fileno(), readable.set)
+        try:
+            while not self._shutdown:
+                try:
+                    await readable.wait()
+                    readable.clear()
+                    datagrams = receiver.drain()
+                    if datagrams:
+                        self.total_packets += len(datagrams)
+                        await handler(datagrams)
+                except asyncio.CancelledError:
+                    break
+                except Exception as e:
+                    logger.error(f"Error in UDP listener: {e}", exc_info=True)
+        finally:
+            loop.remove_reader(sock.fileno())
+    
+    async def _handle_netflow_datagrams(self, datagrams: List[Tuple[memoryview, str]]):
+        """Handle NetFlow v5/v9 packets (version auto-detected)."""
+        await self._handle_datagrams(datagrams, version=None, kind="NetFlow")
+    
+    async def _handle_ipfix_datagrams(self, datagrams: List[Tuple[memoryview, str]]):
+        """Handle IPFIX packets (IPFIX is version 10)."""
+        await self._handle_datagrams(datagrams, version=10, kind="IPFIX")
+    
+    async def _handle_datagrams(
+        self,
+        datagrams: List[Tuple[memoryview, str]],
+        version: Optional[int],
+        kind: str,
+    ):
+        """Parse a drained batch of datagrams and add the records to the batch."""
+        parsed: List[NetFlowRecord] = []
+        for data, source_ip in datagrams:
+            try:
+                records = self.parser.parse(data, source_ip, version)
+            except Exception as e:
+                logger.error(f"Error handling {kind} packet from {source_ip}: {e}", exc_info=True)
+                continue
+            
+            # Set switch_id from source IP if configured
+            if records and self.config.switch_id_from_source_ip:
+                for record in records:
+                    if not record.switch_id:
+                        record.switch_id = source_ip
+            parsed.extend(records)
+        
+        if parsed and self.sketches is not None:
+            self.sketches.add_records(parsed)
+            self.total_received += len(parsed)
+        elif parsed:
+            # Add to batch
+            async with self.batch_lock:
+                self.batch.extend(parsed)
+                self.total_received += len(parsed)
+                if len(self.batch) >= self.config.batch_size:
+                    self._flush_event.set()
+                self._enforce_pending_limit()
+    
+    async def _metrics_publisher(self):
+        """Periodically publish this worker's metrics to the shared table."""
         while not self._shutdown:
             try:
-                data, addr = await loop.sock_recvfrom(sock, 65535)
-                if data:
-                    await handler(data, addr[0])
+                self.metrics_table.publish(self.worker_id, self.get_metrics())
+                await asyncio.sleep(METRICS_PUBLISH_INTERVAL)
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"Error in UDP listener: {e}", exc_info=True)
-    
-    async def _handle_netflow_packet(self, data: bytes, source_ip: str):
-        """Handle NetFlow v5/v9 packets."""
-        try:
-            # Parse packet (auto-detect version)
-            records = parse_netflow_packet(data, source_ip)
-            
-            if records:
-                # Set switch_id from source IP if configured
-                if self.config.switch_id_from_source_ip:
-                    for record in records:
-                        if not record.switch_id:
-                            record.switch_id = source_ip
-                
-                # Add to batch
-                async with self.batch_lock:
-                    self.batch.extend(records)
-                    self.total_received += len(records)
-                    
-        except Exception as e:
-            logger.error(f"Error handling NetFlow packet from {source_ip}: {e}", exc_info=True)
-    
-    async def _handle_ipfix_packet(self, data: bytes, source_ip: str):
-        """Handle IPFIX packets."""
-        try:
-            # Parse packet (IPFIX is version 10)
-            records = parse_netflow_packet(data, source_ip, version=10)
-            
-            if records:
-                # Set switch_id from source IP if configured
-                if self.config.switch_id_from_source_ip:
-                    for record in records:
-                        if not record.switch_id:
-                            record.switch_id = source_ip
-                
-                # Add to batch
-                async with self.batch_lock:
-                    self.batch.extend(records)
-                    self.total_received += len(records)
-                    
-        except Exception as e:
-            logger.error(f"Error handling IPFIX packet from {source_ip}: {e}", exc_info=True)
+                logger.error(f"Error publishing worker metrics: {e}", exc_info=True)
+                await asyncio.sleep(METRICS_PUBLISH_INTERVAL)
     
     async def _batch_processor(self):
-        """Process batches and send to backend."""
+        """Send batches to the backend every interval, or as soon as one is full."""
         while not self._shutdown:
             try:
-                await asyncio.sleep(self.config.batch_interval_seconds)
+                try:
+                    await asyncio.wait_for(
+                        self._flush_event.wait(),
+                        timeout=self.config.batch_interval_seconds,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._flush_event.clear()
                 
                 async with self.batch_lock:
                     if not self.batch:
@@ -235,88 +404,310 @@ class NativeNetFlowCollector:
                     # Get batch
                     batch_to_send = self.batch[:self.config.batch_size]
                     self.batch = self.batch[self.config.batch_size:]
+                    if len(self.batch) >= self.config.batch_size:
+                        self._flush_event.set()
                 
                 # Send to backend
                 if batch_to_send and self.backend_client:
                     await self._send_batch(batch_to_send)
+                if self.spool is not None:
+                    self.spool.sync()
                     
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Error in batch processor: {e}", exc_info=True)
+    
+    def _enforce_pending_limit(self):
+        """
+        Bound the in-memory batch (call with batch_lock held).
         
-        # Send remaining batch on shutdown
-        async with self.batch_lock:
-            if self.batch and self.backend_client:
-                await self._send_batch(self.batch)
-                self.batch = []
+        Past max_pending_records the whole backlog moves to the spool, keeping
+        order; without a spool the oldest records are dropped.
+        """
+        overflow = len(self.batch) - self.config.max_pending_records
+        if overflow <= 0:
+            return
+        if self.spool is not None:
+            backlog, self.batch = self.batch, []
+            self._spool_records(backlog)
+            logger.warning(f"Backend not keeping up: spooled {len(backlog)} pending records")
+        else:
+            del self.batch[:overflow]
+            self.dropped_records += overflow
+            logger.error(
+                f"Pending records exceeded {self.config.max_pending_records}: dropped {overflow} oldest "
+                f"(configure CLARION_COLLECTOR_SPOOL_DIR to buffer on disk)"
+            )
+    
+    def _encode_batches(self, records: List[NetFlowRecord]) -> List[Tuple[bytes, int, str]]:
+        """
+        Serialize records in the configured wire format.
+        
+        Returns:
+            (body, record count, label for logs) per request: one columnar
+            batch, or one JSON payload per switch_id
+        """
+        if self.config.wire_format == "columnar":
+            try:
+                body = encode_flow_batch(
+                    records,
+                    default_switch_id="unknown",
+                    compress=self.config.wire_compression,
+                )
+                return [(body, len(records), "columnar batch")]
+            except ValueError as e:
+                logger.debug(f"Sending batch as JSON, not columnar: {e}")
+        
+        # Group by switch_id for batching
+        switch_batches: Dict[str, List[Dict]] = {}
+        for record in records:
+            record_dict = record.to_dict()
+            switch_id = record_dict.get("switch_id") or "unknown"
+            if switch_id not in switch_batches:
+                switch_batches[switch_id] = []
+            switch_batches[switch_id].append(record_dict)
+        return [
+            (
+                json.dumps({"records": switch_records, "switch_id": switch_id}).encode(),
+                len(switch_records),
+                switch_id,
+            )
+            for switch_id, switch_records in switch_batches.items()
+        ]
+    
+    async def _post_body(self, body: bytes) -> httpx.Response:
+        """POST an encoded batch to the endpoint for its format."""
+        if is_flow_batch(body):
+            endpoint, content_type = FLOW_BATCH_ENDPOINT, FLOW_BATCH_CONTENT_TYPE
+        else:
+            endpoint, content_type = JSON_ENDPOINT, "application/json"
+        return await self.backend_client.post(
+            endpoint,
+            content=body,
+            headers={"Content-Type": content_type},
+        )
+    
+    def _spool_body(self, body: bytes, count: int, label: str) -> bool:
+        """Append an encoded batch to the spool; False if it could not be written."""
+        try:
+            self.spool.append(body, count)
+        except OSError as e:
+            self.total_errors += 1
+            self.dropped_records += count
+            logger.error(f"Failed to spool batch ({label}), records lost: {e}")
+            return False
+        self._spool_event.set()
+        return True
+    
+    def _spool_records(self, records: List[NetFlowRecord]):
+        """Encode and spool records in batch_size chunks."""
+        for start in range(0, len(records), self.config.batch_size):
+            for body, count, label in self._encode_batches(records[start:start + self.config.batch_size]):
+                self._spool_body(body, count, label)
     
     async def _send_batch(self, records: List[NetFlowRecord]):
-        """Send a batch of records to the backend."""
+        """Send a batch of records to the backend, spooling what it does not accept."""
         if not records:
             return
         
         try:
-            # Convert to API format
-            records_dict = [r.to_dict() for r in records]
+            batches = self._encode_batches(records)
+        except Exception as e:
+            self.total_errors += 1
+            logger.error(f"Error preparing batch for backend: {e}", exc_info=True)
+            return
+        
+        # Send each encoded batch with retry logic
+        for body, count, label in batches:
+            # Queue behind spooled batches so the backend sees them in order
+            if self.spool is not None and len(self.spool):
+                self._spool_body(body, count, label)
+                continue
             
-            # Group by switch_id for batching
-            switch_batches: Dict[str, List[Dict]] = {}
-            for record in records_dict:
-                switch_id = record.get("switch_id") or "unknown"
-                if switch_id not in switch_batches:
-                    switch_batches[switch_id] = []
-                switch_batches[switch_id].append(record)
+            async def send_request():
+                response = await self._post_body(body)
+                response.raise_for_status()
+                return response
             
-            # Send each switch's batch with retry logic
-            for switch_id, switch_records in switch_batches.items():
-                payload = {
-                    "records": switch_records,
-                    "switch_id": switch_id,
-                }
+            try:
+                await retry_with_backoff(
+                    send_request,
+                    max_attempts=self.config.retry_max_attempts,
+                    backoff_factor=self.config.retry_backoff_factor,
+                )
                 
-                async def send_request():
-                    response = await self.backend_client.post(
-                        "/api/netflow/netflow",
-                        json=payload,
-                    )
-                    response.raise_for_status()
-                    return response
+                self.total_sent += count
+                self.bytes_sent += len(body)
+                logger.info(
+                    f"Sent {count} NetFlow records ({label}, {len(body)} bytes) "
+                    f"(total sent: {self.total_sent})"
+                )
+            except Exception as e:
+                if self.spool is not None:
+                    logger.warning(f"Backend unavailable, spooling {count} records ({label}): {e}")
+                    self._spool_body(body, count, label)
+                    continue
+                self.total_errors += 1
+                self.dropped_records += count
+                logger.error(
+                    f"Failed to send batch ({label}) after retries, records lost "
+                    f"(configure CLARION_COLLECTOR_SPOOL_DIR to buffer on disk): {e}",
+                    exc_info=True
+                )
+    
+    async def _spool_replayer(self):
+        """Replay spooled batches in order, one at a time, as the backend accepts them."""
+        delay = SPOOL_RETRY_INITIAL
+        while not self._shutdown:
+            try:
+                entry = self.spool.peek()
+                if entry is None:
+                    self._spool_event.clear()
+                    await self._spool_event.wait()
+                    continue
                 
-                try:
-                    await retry_with_backoff(
-                        send_request,
-                        max_attempts=self.config.retry_max_attempts,
-                        backoff_factor=self.config.retry_backoff_factor,
+                response = await self._post_body(entry.payload)
+                if response.is_client_error and response.status_code not in (408, 429):
+                    # The backend will never accept this batch; do not block the spool on it
+                    self.total_errors += 1
+                    self.dropped_records += entry.record_count
+                    logger.error(
+                        f"Backend rejected spooled batch ({response.status_code}), "
+                        f"dropping {entry.record_count} records"
                     )
-                    
-                    self.total_sent += len(switch_records)
-                    logger.info(
-                        f"Sent {len(switch_records)} NetFlow records from {switch_id} "
-                        f"(total sent: {self.total_sent})"
+                    self.spool.ack(entry)
+                    continue
+                response.raise_for_status()
+            except asyncio.CancelledError:
+                break
+            except httpx.HTTPError as e:
+                logger.warning(
+                    f"Spool replay failed ({self.spool.depth_batches} batches pending): {e}; "
+                    f"retrying in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * self.config.retry_backoff_factor, SPOOL_RETRY_MAX)
+                continue
+            except Exception as e:
+                logger.error(f"Error replaying spool: {e}", exc_info=True)
+                await asyncio.sleep(delay)
+                continue
+            
+            self.spool.ack(entry)
+            delay = SPOOL_RETRY_INITIAL
+            self.total_sent += entry.record_count
+            self.bytes_sent += len(entry.payload)
+            self.spool_replayed_records += entry.record_count
+            self._replay_window.append((time.monotonic(), entry.record_count))
+    
+    async def _flush_on_shutdown(self):
+        """Spool (or, without a spool, try to send) records still in memory."""
+        async with self.batch_lock:
+            remaining, self.batch = self.batch, []
+        if not remaining:
+            return
+        if self.spool is not None:
+            self._spool_records(remaining)
+            logger.info(f"Spooled {len(remaining)} pending records for replay after restart")
+        elif self.backend_client:
+            await self._send_batch(remaining)
+    
+    async def _sketch_pusher(self):
+        """Push changed sketches to the backend every sketch push interval."""
+        while not self._shutdown:
+            try:
+                await asyncio.sleep(self.config.sketch_push_interval_seconds)
+                await self._push_sketches()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error pushing sketches: {e}", exc_info=True)
+    
+    async def _push_sketches(self):
+        """
+        Send every sketch changed since the last push, per switch.
+        
+        Sketches from a failed request are re-queued and go out (with any
+        newer changes) on the next push.
+        """
+        if self.backend_client is None:
+            return
+        chunk_size = max(self.config.sketch_push_batch_size, 1)
+        for switch_id, sketches in self.sketches.take_dirty().items():
+            for start in range(0, len(sketches), chunk_size):
+                chunk = sketches[start:start + chunk_size]
+                body = gzip.compress(encode_sketch_batch(chunk), compresslevel=1)
+                try:
+                    response = await self.backend_client.post(
+                        SKETCH_ENDPOINT,
+                        content=body,
+                        headers={
+                            "Content-Type": "application/octet-stream",
+                            "Content-Encoding": "gzip",
+                            "X-Switch-ID": switch_id,
+                            "X-Sketch-Count": str(len(chunk)),
+                        },
                     )
-                except Exception as e:
+                    if response.is_client_error and response.status_code not in (408, 429):
+                        # Resending the same sketches will not help
+                        self.total_errors += 1
+                        logger.error(
+                            f"Backend rejected {len(chunk)} sketches from {switch_id} "
+                            f"({response.status_code}), dropping them"
+                        )
+                        continue
+                    response.raise_for_status()
+                except httpx.HTTPError as e:
                     self.total_errors += 1
-                    logger.error(
-                        f"Failed to send batch from {switch_id} after retries: {e}",
-                        exc_info=True
+                    self.sketches.mark_dirty(switch_id, sketches[start:])
+                    logger.warning(
+                        f"Sketch push for {switch_id} failed, {len(sketches) - start} sketches "
+                        f"queued for the next push: {e}"
                     )
-                    # Note: Records are lost here - consider adding persistence layer
-                
-        except Exception as e:
-            self.total_errors += 1
-            logger.error(f"Error preparing batch for backend: {e}", exc_info=True)
+                    break
+                self.sketches_pushed += len(chunk)
+                self.sketch_push_bytes += len(body)
+            else:
+                logger.info(f"Pushed {len(sketches)} sketches from {switch_id}")
+    
+    def _replay_rate(self) -> float:
+        """Records per second replayed from the spool over the last window."""
+        cutoff = time.monotonic() - SPOOL_REPLAY_RATE_WINDOW
+        while self._replay_window and self._replay_window[0][0] < cutoff:
+            self._replay_window.popleft()
+        return round(sum(n for _, n in self._replay_window) / SPOOL_REPLAY_RATE_WINDOW, 1)
     
     def get_metrics(self) -> Dict:
         """Get collector metrics (synchronous, safe to call from HTTP handlers)."""
         # Get pending count - this is safe because list length is atomic in Python
         # We don't need the lock for just reading the length
         pending = len(self.batch)
+        spool = self.spool
         
-        return {
+        metrics = {
+            "packets_received": self.total_packets,
+            "recv_batches": sum(r.recv_batches for r in self.receivers),
+            "kernel_drops": sum(r.kernel_drops() for r in self.receivers),
+            "truncated_datagrams": sum(r.truncated_datagrams for r in self.receivers),
             "total_received": self.total_received,
             "total_sent": self.total_sent,
+            "bytes_sent": self.bytes_sent,
             "pending": pending,
             "errors": self.total_errors,
+            "dropped_records": self.dropped_records + (spool.dropped_records if spool else 0),
+            "templates": self.parser.template_count(),
+            "spool_depth_batches": spool.depth_batches if spool else 0,
+            "spool_depth_records": spool.depth_records if spool else 0,
+            "spool_bytes": spool.disk_bytes if spool else 0,
+            "spool_replayed_records": self.spool_replayed_records,
+            "spool_replay_rate": self._replay_rate(),
+            "sketch_endpoints": self.sketches.endpoint_count if self.sketches else 0,
+            "sketches_dirty": self.sketches.dirty_count if self.sketches else 0,
+            "sketches_pushed": self.sketches_pushed,
+            "sketch_push_bytes": self.sketch_push_bytes,
         }
+        if self.worker_id is not None:
+            metrics["worker_id"] = self.worker_id
+        return metrics
 
@@ -195,9 +195,65 @@ from .ipfix_parser import IPFIXParser, IPFIXTemplateManager
 # But use the full implementation from ipfix_parser module
 
 
-# Global template managers (shared across packets from same source)
-_v9_template_manager = NetFlowV9TemplateManager()
-_ipfix_template_manager = IPFIXTemplateManager()
+class FlowPacketParser:
+    """
+    Packet parser that owns its template state.
+    
+    Holds one NetFlow v9 and one IPFIX parser, and therefore one template
+    cache and exporter map, for the lifetime of a collector (or collector
+    worker process). Templates learned from an exporter stay valid for
+    every later packet from that exporter handled by the same instance.
+    """
+    
+    def __init__(self, template_expiry: int = 1800):
+        """
+        Initialize parser.
+        
+        Args:
+            template_expiry: Template expiry time in seconds
+        """
+        self.v9_parser = NetFlowV9Parser(NetFlowV9TemplateManager(template_expiry))
+        self.ipfix_parser = IPFIXParser(IPFIXTemplateManager(template_expiry))
+    
+    def parse(self, data: bytes, source_ip: str, version: Optional[int] = None) -> List[NetFlowRecord]:
+        """
+        Parse a NetFlow packet (auto-detect version or use specified).
+        
+        Args:
+            data: Raw UDP packet data
+            source_ip: Source IP address of the packet
+            version: Optional version hint (5, 9, or 10 for IPFIX)
+            
+        Returns:
+            List of NetFlowRecord objects
+        """
+        if len(data) < 2:
+            return []
+        
+        # Detect version if not specified
+        if version is None:
+            version = struct.unpack("!H", data[:2])[0]
+        
+        if version == 5:
+            return NetFlowV5Parser.parse(data, source_ip)
+        elif version == 9:
+            return self.v9_parser.parse(data, source_ip)
+        elif version == 10:  # IPFIX
+            return self.ipfix_parser.parse(data, source_ip)
+        else:
+            logger.warning(f"Unsupported NetFlow version: {version}")
+            return []
+    
+    def template_count(self) -> int:
+        """Number of cached v9 and IPFIX templates."""
+        return (
+            len(self.v9_parser.template_manager.templates)
+            + len(self.ipfix_parser.template_manager.templates)
+        )
+
+
+# Process-wide parser (shared template state) for parse_netflow_packet()
+_default_parser = FlowPacketParser()
 
 
 def parse_netflow_packet(
@@ -208,6 +264,9 @@ def parse_netflow_packet(
     """
     Parse a NetFlow packet (auto-detect version or use specified).
     
+    Uses a process-wide FlowPacketParser; collectors that need isolated
+    template state create their own.
+    
     Args:
         data: Raw UDP packet data
         source_ip: Source IP address of the packet
@@ -216,22 +275,4 @@ def parse_netflow_packet(
     Returns:
         List of NetFlowRecord objects
     """
-    if len(data) < 2:
-        return []
-    
-    # Detect version if not specified
-    if version is None:
-        version = struct.unpack("!H", data[:2])[0]
-    
-    if version == 5:
-        return NetFlowV5Parser.parse(data, source_ip)
-    elif version == 9:
-        parser = NetFlowV9Parser(template_manager=_v9_template_manager)
-        return parser.parse(data, source_ip)
-    elif version == 10:  # IPFIX
-        parser = IPFIXParser(template_manager=_ipfix_template_manager)
-        return parser.parse(data, source_ip)
-    else:
-        logger.warning(f"Unsupported NetFlow version: {version}")
-        return []
-
+    return _default_parser.parse(data, source_ip, version)
@@ -5,13 +5,13 @@ Implements template-based parsing for NetFlow v9 according to RFC 3954.
 """
 
 import struct
-import ipaddress
 import time
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import logging
 
 from .netflow_parser import NetFlowRecord
+from .record_layout import RecordLayout
 
 logger = logging.getLogger(__name__)
 
@@ -57,6 +57,9 @@ CISCO_FIELDS = {
     # We'll detect them by field length and position in template
 }
 
+# Field types holding IPv4 addresses (decoded to dotted-quad strings)
+NF9_IPV4_FIELDS = (8, 12, 15)
+
 
 class NetFlowV9Template:
     """Represents a NetFlow v9 template."""
@@ -75,8 +78,13 @@ class NetFlowV9Template:
         self.fields = fields  # List of (field_type, field_length)
         self.created_at = time.time()
         self.last_used = time.time()
-        # Calculate total record size
-        self.record_size = sum(length for _, length in fields)
+        for field_type, field_length in fields:
+            expected = NF9_FIELD_TYPES.get(field_type)
+            if expected and field_length != expected[1]:
+                logger.debug(f"Field type {field_type} length mismatch: expected {expected[1]}, got {field_length}")
+        # Compile the whole-record decoder once; fields are packed back to back
+        self.layout = RecordLayout(fields, ipv4_keys=NF9_IPV4_FIELDS)
+        self.record_size = self.layout.record_size
     
     def is_expired(self, max_age: int = 1800) -> bool:
         """Check if template is expired (default 30 minutes)."""
@@ -299,77 +307,14 @@ class NetFlowV9Parser:
         sys_uptime: int,
         source_ip: str
     ) -> List[NetFlowRecord]:
-        """Parse a data flow set using a template."""
+        """Parse a data flow set using the template's compiled record layout."""
         records = []
-        offset = 0
-        
-        # Parse records until we run out of data
-        while offset + template.record_size <= len(data):
-            record_data = data[offset:offset + template.record_size]
-            
-            # Parse fields according to template
-            field_values = {}
-            field_offset = 0
-            
-            for field_type, field_length in template.fields:
-                if field_offset + field_length > len(record_data):
-                    logger.warning(f"Field extends beyond record data")
-                    break
-                
-                field_data = record_data[field_offset:field_offset + field_length]
-                
-                # Parse based on field type
-                value = self._parse_field(field_type, field_length, field_data)
-                if value is not None:
-                    field_values[field_type] = value
-                
-                field_offset += field_length
-                # Align to 4-byte boundary if needed
-                if field_offset % 4 != 0:
-                    field_offset += 4 - (field_offset % 4)
-            
-            # Convert to NetFlowRecord
+        for field_values in template.layout.decode(data):
             record = self._field_values_to_record(field_values, base_timestamp, sys_uptime, source_ip)
             if record:
                 records.append(record)
-            
-            offset += template.record_size
-            # Align to 4-byte boundary
-            if offset % 4 != 0:
-                offset += 4 - (offset % 4)
-        
         return records
     
-    def _parse_field(self, field_type: int, field_length: int, data: bytes):
-        """Parse a field value based on type and length."""
-        try:
-            if field_type in NF9_FIELD_TYPES:
-                expected_length = NF9_FIELD_TYPES[field_type][1]
-                if field_length != expected_length:
-                    logger.debug(f"Field type {field_type} length mismatch: expected {expected_length}, got {field_length}")
-            
-            # Parse based on length
-            if field_length == 1:
-                return struct.unpack("!B", data)[0]
-            elif field_length == 2:
-                return struct.unpack("!H", data)[0]
-            elif field_length == 4:
-                return struct.unpack("!I", data)[0]
-            elif field_length == 8:
-                return struct.unpack("!Q", data)[0]
-            elif field_length == 6:
-                # MAC address
-                return ':'.join(f'{b:02x}' for b in data)
-            elif field_length == 16:
-                # IPv6 address (skip for now, we only support IPv4)
-                return None
-            else:
-                # Variable length or unknown
-                return data.hex() if len(data) <= 16 else None
-        except Exception as e:
-            logger.debug(f"Error parsing field type {field_type}: {e}")
-            return None
-    
     def _field_values_to_record(
         self,
         field_values: Dict[int, any],
@@ -382,19 +327,13 @@ class NetFlowV9Parser:
         record.switch_id = source_ip
         
         # Map NetFlow v9 fields to record
-        # IPV4_SRC_ADDR (8)
+        # IPV4_SRC_ADDR (8), already dotted-quad
         if 8 in field_values:
-            try:
-                record.src_ip = str(ipaddress.IPv4Address(field_values[8]))
-            except:
-                pass
+            record.src_ip = field_values[8]
         
-        # IPV4_DST_ADDR (12)
+        # IPV4_DST_ADDR (12), already dotted-quad
         if 12 in field_values:
-            try:
-                record.dst_ip = str(ipaddress.IPv4Address(field_values[12]))
-            except:
-                pass
+            record.dst_ip = field_values[12]
         
         # L4_SRC_PORT (7)
         if 7 in field_values:
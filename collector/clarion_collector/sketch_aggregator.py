@@ -0,0 +1,158 @@
+"""
+Flow-to-sketch aggregation for switches without an edge container
+(--aggregation sketches).
+
+Instead of forwarding every flow record, the collector folds records
+into the edge agent's EdgeSketch structures (one EdgeSketchStore per
+exporter) and periodically pushes only the sketches that changed, in
+the edge binary format, to POST /api/edge/sketches/binary. The backend
+treats each upload as the latest snapshot of that endpoint on that
+switch, so re-sending a sketch after a failed push is always safe.
+
+Records are attributed the way the edge agent attributes them: to the
+source endpoint (src_mac, or src_ip when the exporter sends no MAC) as
+outbound traffic, so sketches from collector-fed and edge-fed switches
+are comparable.
+
+Requires the clarion_edge package (edge/ in the repository) on the
+Python path.
+"""
+
+import struct
+from typing import TYPE_CHECKING, Dict, Iterable, List
+
+from .netflow_parser import NetFlowRecord
+
+if TYPE_CHECKING:
+    from clarion_edge.sketch import EdgeSketch, EdgeSketchStore
+
+_U32 = struct.Struct("<I")
+
+# Protocol names as used by the edge agent's flow sources
+PROTOCOL_NAMES = {1: "icmp", 6: "tcp", 17: "udp", 47: "gre", 50: "esp", 58: "icmpv6", 132: "sctp"}
+
+
+def encode_sketch_batch(sketches: Iterable["EdgeSketch"]) -> bytes:
+    """
+    Frame sketches for /api/edge/sketches/binary.
+
+    Same layout as EdgeAgent.get_serialized_sketches(): uint32 count,
+    then uint32 length-prefixed EdgeSketch.to_bytes() frames.
+    """
+    frames = [sketch.to_bytes() for sketch in sketches]
+    parts = [_U32.pack(len(frames))]
+    for frame in frames:
+        parts.append(_U32.pack(len(frame)))
+        parts.append(frame)
+    return b"".join(parts)
+
+
+class SketchAggregator:
+    """
+    Per-exporter EdgeSketchStores with change tracking.
+
+    Not thread-safe; each collector process owns its aggregator (an
+    exporter always reaches the same worker, so per-switch sketches are
+    never split across workers).
+    """
+
+    def __init__(self, max_endpoints: int = 10000):
+        """
+        Initialize aggregator.
+
+        Args:
+            max_endpoints: Sketches kept per exporter before the
+                           least-recently-seen endpoint is evicted
+
+        Raises:
+            RuntimeError: If clarion_edge is not importable
+        """
+        try:
+            # Only needed in sketch aggregation mode
+            from clarion_edge.sketch import EdgeSketchStore
+        except ImportError as e:
+            raise RuntimeError(
+                "Sketch aggregation requires the clarion_edge package "
+                "(add the repository's edge/ directory to PYTHONPATH)"
+            ) from e
+        self._store_class = EdgeSketchStore
+        self.max_endpoints = max_endpoints
+        self.stores: Dict[str, "EdgeSketchStore"] = {}
+        # Sketches changed since the last take_dirty(), per switch
+        self._dirty: Dict[str, Dict[str, "EdgeSketch"]] = {}
+        self.records_aggregated = 0
+        self.records_skipped = 0
+
+    def add_records(self, records: Iterable[NetFlowRecord]) -> int:
+        """
+        Fold flow records into their exporters' sketches.
+
+        Args:
+            records: Parsed records (switch_id identifies the exporter)
+
+        Returns:
+            Number of records aggregated
+        """
+        added = 0
+        for record in records:
+            endpoint_id = record.src_mac or record.src_ip
+            if not endpoint_id or not record.dst_ip:
+                self.records_skipped += 1
+                continue
+            switch_id = record.switch_id or "unknown"
+            store = self.stores.get(switch_id)
+            if store is None:
+                store = self.stores[switch_id] = self._store_class(
+                    max_endpoints=self.max_endpoints, switch_id=switch_id
+                )
+                self._dirty[switch_id] = {}
+
+            sketch = store.get_or_create(endpoint_id)
+            protocol = record.protocol or 0
+            sketch.record_flow(
+                dst_ip=record.dst_ip,
+                dst_port=record.dst_port or 0,
+                proto=PROTOCOL_NAMES.get(protocol, str(protocol)),
+                bytes_count=record.bytes or 0,
+                is_outbound=True,
+                timestamp=record.flow_start or None,
+            )
+            self._dirty[switch_id][endpoint_id] = sketch
+            added += 1
+        self.records_aggregated += added
+        return added
+
+    def take_dirty(self) -> Dict[str, List["EdgeSketch"]]:
+        """
+        Sketches changed since the last call, per switch, and reset tracking.
+
+        Sketches evicted since they changed are still returned with their
+        last state.
+        """
+        dirty = {
+            switch_id: list(sketches.values())
+            for switch_id, sketches in self._dirty.items() if sketches
+        }
+        for sketches in self._dirty.values():
+            sketches.clear()
+        return dirty
+
+    def mark_dirty(self, switch_id: str, sketches: Iterable["EdgeSketch"]):
+        """Re-queue sketches whose push failed (newer changes take precedence)."""
+        pending = self._dirty.setdefault(switch_id, {})
+        for sketch in sketches:
+            pending.setdefault(sketch.endpoint_id, sketch)
+
+    @property
+    def endpoint_count(self) -> int:
+        """Sketches held across all exporters."""
+        return sum(len(store) for store in self.stores.values())
+
+    @property
+    def dirty_count(self) -> int:
+        """Sketches waiting to be pushed."""
+        return sum(len(sketches) for sketches in self._dirty.values())
+
+    def memory_bytes(self) -> int:
+        """Estimated sketch memory across all exporters."""
+        return sum(store.memory_bytes() for store in self.stores.values())
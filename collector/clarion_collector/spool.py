@@ -0,0 +1,374 @@
+"""
+Durable on-disk spool for collector batches.
+
+When the backend is slow or down, batches are appended to a bounded
+spool of segment files instead of being dropped or piling up in memory,
+and replayed in order once the backend accepts them again.
+
+Layout (one directory per collector process):
+
+    0000000000000001.seg   append-only segment files
+    0000000000000002.seg
+    cursor                 {"segment": id, "offset": n} of the oldest
+                           unacknowledged frame (written atomically)
+
+Each frame is a 16-byte header (magic "CSPF", payload length, record
+count, CRC32 of the payload) followed by the payload. On open, segments
+are scanned from the cursor; a torn or corrupt frame ends its segment
+(the rest is discarded and counted). Fully acknowledged segments are
+deleted. When the spool would exceed max_bytes the oldest segment is
+dropped and its unsent records are counted as dropped.
+"""
+
+import json
+import logging
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"CSPF"
+_FRAME = struct.Struct("<4sIII")
+_SEGMENT_SUFFIX = ".seg"
+_CURSOR_FILE = "cursor"
+
+
+@dataclass
+class SpoolEntry:
+    """One spooled batch, as returned by BatchSpool.peek()."""
+
+    segment: int
+    offset: int
+    payload: bytes
+    record_count: int
+
+    @property
+    def frame_size(self) -> int:
+        return _FRAME.size + len(self.payload)
+
+
+@dataclass
+class _Segment:
+    """Bookkeeping for one segment file."""
+
+    segment_id: int
+    path: str
+    size: int = 0              # Bytes of valid frames
+    pending_frames: int = 0    # Frames not yet acknowledged
+    pending_records: int = 0
+    pending_bytes: int = 0
+
+
+class BatchSpool:
+    """
+    Bounded, append-only spool of batches with in-order replay.
+
+    Not thread-safe; a collector process owns its spool directory.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 1 << 30,
+        segment_bytes: int = 64 << 20,
+    ):
+        """
+        Open (or create) a spool.
+
+        Args:
+            directory: Spool directory (created if missing)
+            max_bytes: Upper bound on segment bytes kept on disk
+            segment_bytes: Segment size before rolling to a new file
+
+        Raises:
+            ValueError: If the size limits are inconsistent
+        """
+        if segment_bytes <= _FRAME.size or max_bytes < segment_bytes:
+            raise ValueError(
+                f"Spool needs segment_bytes > {_FRAME.size} and max_bytes >= segment_bytes, "
+                f"got {segment_bytes} / {max_bytes}"
+            )
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.dropped_batches = 0
+        self.dropped_records = 0
+        self.corrupt_frames = 0
+        self._segments: Dict[int, _Segment] = {}
+        self._cursor_segment = 0
+        self._cursor_offset = 0
+        self._writer = None
+        self._unsynced = False
+        self._reader = None
+        self._reader_segment: Optional[int] = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    # ========== Recovery ==========
+
+    def _segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.directory, f"{segment_id:016d}{_SEGMENT_SUFFIX}")
+
+    def _recover(self):
+        """Load the cursor and rebuild segment bookkeeping from disk."""
+        segment_ids = sorted(
+            int(name[:-len(_SEGMENT_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.endswith(_SEGMENT_SUFFIX) and name[:-len(_SEGMENT_SUFFIX)].isdigit()
+        )
+        cursor_path = os.path.join(self.directory, _CURSOR_FILE)
+        try:
+            with open(cursor_path) as f:
+                cursor = json.load(f)
+            self._cursor_segment = int(cursor["segment"])
+            self._cursor_offset = int(cursor["offset"])
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable spool cursor {cursor_path}: {e}")
+
+        for segment_id in segment_ids:
+            path = self._segment_path(segment_id)
+            if segment_id < self._cursor_segment:
+                os.remove(path)  # Fully acknowledged before the last shutdown
+                continue
+            start = self._cursor_offset if segment_id == self._cursor_segment else 0
+            self._segments[segment_id] = self._scan_segment(segment_id, path, start)
+
+        if self._segments:
+            first = next(iter(self._segments))
+            if first != self._cursor_segment:
+                self._cursor_segment, self._cursor_offset = first, 0
+            # Drop a torn tail so appends continue from a frame boundary
+            last = self._segments[max(self._segments)]
+            if os.path.getsize(last.path) != last.size:
+                with open(last.path, "r+b") as f:
+                    f.truncate(last.size)
+        if self.depth_batches:
+            logger.info(
+                f"Recovered spool {self.directory}: {self.depth_batches} batches, "
+                f"{self.depth_records} records pending replay"
+            )
+
+    def _scan_segment(self, segment_id: int, path: str, start: int) -> _Segment:
+        """Validate a segment's frames, counting those at or after `start`."""
+        segment = _Segment(segment_id, path)
+        with open(path, "rb") as f:
+            offset = 0
+            while True:
+                header = f.read(_FRAME.size)
+                if not header:
+                    break
+                frame = self._read_frame(f, header)
+                if frame is None:
+                    self.corrupt_frames += 1
+                    logger.warning(f"Corrupt or torn spool frame in {path} at offset {offset}; discarding rest of segment")
+                    break
+                payload, record_count = frame
+                size = _FRAME.size + len(payload)
+                if offset >= start:
+                    segment.pending_frames += 1
+                    segment.pending_records += record_count
+                    segment.pending_bytes += size
+                offset += size
+            segment.size = offset
+        return segment
+
+    @staticmethod
+    def _read_frame(f, header: bytes):
+        """Read and verify one frame body; None if torn or corrupt."""
+        if len(header) < _FRAME.size:
+            return None
+        magic, length, record_count, checksum = _FRAME.unpack(header)
+        if magic != _MAGIC:
+            return None
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return None
+        return payload, record_count
+
+    # ========== Writing ==========
+
+    def append(self, payload: bytes, record_count: int):
+        """
+        Append a batch.
+
+        The write is flushed to the OS before returning; call sync() to
+        force it to stable storage.
+
+        Args:
+            payload: Serialized batch
+            record_count: Records in the batch (for depth metrics)
+        """
+        size = _FRAME.size + len(payload)
+        writer_segment = self._writer_segment(size)
+        self._enforce_limit(size)
+
+        self._writer.write(_FRAME.pack(_MAGIC, len(payload), record_count, zlib.crc32(payload)))
+        self._writer.write(payload)
+        self._writer.flush()
+        self._unsynced = True
+        writer_segment.size += size
+        writer_segment.pending_frames += 1
+        writer_segment.pending_records += record_count
+        writer_segment.pending_bytes += size
+
+    def _writer_segment(self, frame_size: int) -> _Segment:
+        """Current segment to append to, rolling when it is full."""
+        if self._segments:
+            last = self._segments[max(self._segments)]
+            if last.size == 0 or last.size + frame_size <= self.segment_bytes:
+                if self._writer is None:
+                    self._writer = open(last.path, "ab")
+                return last
+            if self._writer is not None:
+                self._writer.flush()
+                os.fsync(self._writer.fileno())
+                self._writer.close()
+            segment_id = last.segment_id + 1
+        else:
+            segment_id = max(self._cursor_segment, 1)
+            self._cursor_segment, self._cursor_offset = segment_id, 0
+
+        segment = _Segment(segment_id, self._segment_path(segment_id))
+        self._segments[segment_id] = segment
+        self._writer = open(segment.path, "ab")
+        return segment
+
+    def _enforce_limit(self, incoming: int):
+        """Drop oldest segments until the incoming frame fits in max_bytes."""
+        while self.disk_bytes + incoming > self.max_bytes and len(self._segments) > 1:
+            oldest = self._segments.pop(next(iter(self._segments)))
+            self.dropped_batches += oldest.pending_frames
+            self.dropped_records += oldest.pending_records
+            logger.error(
+                f"Spool full ({self.max_bytes} bytes): dropped {oldest.pending_records} records "
+                f"from segment {oldest.segment_id}"
+            )
+            self._close_reader(oldest.segment_id)
+            os.remove(oldest.path)
+            self._cursor_segment, self._cursor_offset = next(iter(self._segments)), 0
+            self._save_cursor()
+
+    def sync(self):
+        """Force appended frames to stable storage (no-op if nothing new)."""
+        if self._writer is not None and self._unsynced:
+            self._writer.flush()
+            os.fsync(self._writer.fileno())
+            self._unsynced = False
+
+    # ========== Replay ==========
+
+    def peek(self) -> Optional[SpoolEntry]:
+        """
+        Oldest unacknowledged batch, or None if the spool is empty.
+
+        Returns the same entry until ack() is called for it.
+        """
+        while self._segments:
+            segment = self._segments.get(self._cursor_segment)
+            if segment is None or self._cursor_offset >= segment.size:
+                if segment is not None and segment.segment_id == max(self._segments):
+                    return None  # Caught up with the writer
+                self._finish_segment(self._cursor_segment)
+                continue
+
+            reader = self._open_reader(segment)
+            reader.seek(self._cursor_offset)
+            frame = self._read_frame(reader, reader.read(_FRAME.size))
+            if frame is None:
+                self.corrupt_frames += 1
+                logger.error(
+                    f"Corrupt spool frame in {segment.path} at offset {self._cursor_offset}; "
+                    f"skipping {segment.pending_records} records"
+                )
+                self.dropped_batches += segment.pending_frames
+                self.dropped_records += segment.pending_records
+                segment.pending_frames = segment.pending_records = segment.pending_bytes = 0
+                self._cursor_offset = segment.size
+                continue
+            payload, record_count = frame
+            return SpoolEntry(segment.segment_id, self._cursor_offset, payload, record_count)
+        return None
+
+    def ack(self, entry: SpoolEntry):
+        """Mark a peeked batch as delivered and advance the cursor."""
+        if (entry.segment, entry.offset) != (self._cursor_segment, self._cursor_offset):
+            raise ValueError("Spool entries must be acknowledged in order")
+        segment = self._segments[entry.segment]
+        segment.pending_frames -= 1
+        segment.pending_records -= entry.record_count
+        segment.pending_bytes -= entry.frame_size
+        self._cursor_offset += entry.frame_size
+        if self._cursor_offset >= segment.size and entry.segment != max(self._segments):
+            self._finish_segment(entry.segment)
+        self._save_cursor()
+
+    def _finish_segment(self, segment_id: int):
+        """Delete a fully replayed segment and move the cursor past it."""
+        segment = self._segments.pop(segment_id, None)
+        if segment is not None:
+            self._close_reader(segment_id)
+            os.remove(segment.path)
+        later = [s for s in self._segments if s > segment_id]
+        self._cursor_segment = min(later) if later else segment_id + 1
+        self._cursor_offset = 0
+        self._save_cursor()
+
+    def _open_reader(self, segment: _Segment):
+        if self._reader_segment != segment.segment_id:
+            self._close_reader(self._reader_segment)
+            self._reader = open(segment.path, "rb")
+            self._reader_segment = segment.segment_id
+        return self._reader
+
+    def _close_reader(self, segment_id: Optional[int]):
+        if self._reader is not None and self._reader_segment == segment_id:
+            self._reader.close()
+            self._reader = None
+            self._reader_segment = None
+
+    def _save_cursor(self):
+        """Persist the cursor atomically (write + rename)."""
+        path = os.path.join(self.directory, _CURSOR_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"segment": self._cursor_segment, "offset": self._cursor_offset}, f)
+        os.replace(tmp, path)
+
+    # ========== Metrics ==========
+
+    @property
+    def depth_batches(self) -> int:
+        """Batches waiting for replay."""
+        return sum(s.pending_frames for s in self._segments.values())
+
+    @property
+    def depth_records(self) -> int:
+        """Records waiting for replay."""
+        return sum(s.pending_records for s in self._segments.values())
+
+    @property
+    def depth_bytes(self) -> int:
+        """Bytes of frames waiting for replay."""
+        return sum(s.pending_bytes for s in self._segments.values())
+
+    @property
+    def disk_bytes(self) -> int:
+        """Bytes held in segment files (including replayed frames not yet deleted)."""
+        return sum(s.size for s in self._segments.values())
+
+    def __len__(self) -> int:
+        return self.depth_batches
+
+    def close(self):
+        """Flush and close file handles."""
+        if self._writer is not None:
+            self.sync()
+            self._writer.close()
+            self._writer = None
+        self._close_reader(self._reader_segment)
@@ -0,0 +1,110 @@
+"""
+Per-worker metrics shared between collector worker processes.
+
+Each worker owns one fixed-size slot in a shared-memory array and
+overwrites it periodically; the supervisor reads all slots to serve an
+aggregated /metrics response. Workers never touch each other's slots,
+so no locking is needed on the hot path.
+"""
+
+import multiprocessing
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+
+# Numeric fields of NativeNetFlowCollector.get_metrics() that are published
+WORKER_METRIC_FIELDS = (
+    "packets_received",
+    "recv_batches",
+    "kernel_drops",
+    "truncated_datagrams",
+    "total_received",
+    "total_sent",
+    "bytes_sent",
+    "pending",
+    "errors",
+    "dropped_records",
+    "templates",
+    "spool_depth_batches",
+    "spool_depth_records",
+    "spool_bytes",
+    "spool_replayed_records",
+    "spool_replay_rate",
+    "sketch_endpoints",
+    "sketches_dirty",
+    "sketches_pushed",
+    "sketch_push_bytes",
+)
+
+# Bookkeeping stored after the metric fields in each slot
+_SLOT_EXTRA = ("pid", "updated_at")
+
+
+class WorkerMetricsTable:
+    """
+    Shared-memory table of worker metrics (one row per worker).
+
+    Must be created before the workers are forked so every process maps
+    the same memory.
+    """
+
+    def __init__(
+        self,
+        n_workers: int,
+        fields: Sequence[str] = WORKER_METRIC_FIELDS,
+        ctx: Optional[multiprocessing.context.BaseContext] = None,
+    ):
+        """
+        Initialize table.
+
+        Args:
+            n_workers: Number of worker slots
+            fields: Metric names stored per worker
+            ctx: Multiprocessing context (default: fork)
+        """
+        ctx = ctx or multiprocessing.get_context("fork")
+        self.n_workers = n_workers
+        self.fields = tuple(fields)
+        self._stride = len(self.fields) + len(_SLOT_EXTRA)
+        self._values = ctx.Array("d", n_workers * self._stride, lock=False)
+
+    def publish(self, worker_id: int, metrics: Dict[str, float]):
+        """Overwrite a worker's slot with its current metrics."""
+        base = worker_id * self._stride
+        for i, name in enumerate(self.fields):
+            self._values[base + i] = float(metrics.get(name) or 0)
+        extra = base + len(self.fields)
+        self._values[extra] = os.getpid()
+        self._values[extra + 1] = time.time()
+
+    def clear(self, worker_id: int):
+        """Reset a worker's slot (e.g. before respawning it)."""
+        base = worker_id * self._stride
+        for i in range(self._stride):
+            self._values[base + i] = 0.0
+
+    def worker(self, worker_id: int) -> Dict:
+        """Read one worker's last published metrics."""
+        base = worker_id * self._stride
+        row = self._values[base:base + self._stride]
+        metrics = {
+            name: int(value) if value.is_integer() else value
+            for name, value in zip(self.fields, row)
+        }
+        pid, updated_at = row[len(self.fields):]
+        metrics["worker_id"] = worker_id
+        metrics["pid"] = int(pid) or None
+        metrics["updated_at"] = updated_at or None
+        return metrics
+
+    def snapshot(self) -> Dict:
+        """
+        Aggregate all workers.
+
+        Returns:
+            Summed metric fields plus a "workers" list of per-worker rows
+        """
+        workers: List[Dict] = [self.worker(i) for i in range(self.n_workers)]
+        totals = {name: sum(w[name] for w in workers) for name in self.fields}
+        return {**totals, "workers": workers}
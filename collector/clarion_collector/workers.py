@@ -0,0 +1,236 @@
+"""
+Multi-process native collector (--workers N).
+
+Parsing NetFlow/IPFIX is CPU-bound, so one asyncio loop caps a collector
+at one core. The supervisor binds N SO_REUSEPORT socket pairs (NetFlow,
+IPFIX) and forks N workers; each worker runs a full NativeNetFlowCollector
+on its own socket pair with its own template state, batcher and backend
+client. Nothing is shared on the packet path.
+
+Template correctness: the kernel hashes each exporter's (address, port)
+to one socket of the REUSEPORT group, so an exporter's templates and data
+sets reach the same worker. The supervisor keeps every socket open for
+its lifetime, so a crashed worker is replaced on the same socket and the
+kernel's exporter-to-socket mapping never changes.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import signal
+import socket
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+import uvicorn
+
+from .config import CollectorConfig
+from .native_collector import NativeNetFlowCollector, create_udp_socket
+from .worker_metrics import WorkerMetricsTable
+
+logger = logging.getLogger(__name__)
+
+# Seconds between worker liveness checks
+MONITOR_INTERVAL = 1.0
+
+# Seconds to wait for workers to exit on shutdown before killing them
+SHUTDOWN_TIMEOUT = 10.0
+
+
+def _run_worker(
+    config: CollectorConfig,
+    worker_id: int,
+    sockets: Tuple[socket.socket, socket.socket],
+    other_sockets: List[socket.socket],
+    metrics_table: WorkerMetricsTable,
+):
+    """Worker process entry point (runs in the forked child)."""
+    # The supervisor keeps the other workers' sockets open; this process
+    # only reads its own
+    for sock in other_sockets:
+        sock.close()
+    # Ctrl-C reaches the whole process group; the supervisor turns it into SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    async def run():
+        collector = NativeNetFlowCollector(
+            config, worker_id=worker_id, metrics_table=metrics_table
+        )
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGTERM, asyncio.current_task().cancel
+        )
+        await collector.start(sockets=sockets, serve_http=False)
+
+    try:
+        asyncio.run(run())
+    except asyncio.CancelledError:
+        pass
+
+
+class CollectorSupervisor:
+    """
+    Runs N native collector worker processes and serves their aggregated
+    health and metrics over HTTP.
+    """
+
+    def __init__(self, config: CollectorConfig, n_workers: Optional[int] = None):
+        """
+        Initialize supervisor.
+
+        Args:
+            config: Collector configuration
+            n_workers: Number of worker processes (default: config.workers)
+        """
+        self.config = config
+        self.n_workers = n_workers or config.workers
+        if self.n_workers < 1:
+            raise ValueError(f"Worker count must be at least 1, got {self.n_workers}")
+        self._ctx = multiprocessing.get_context("fork")
+        self.metrics_table = WorkerMetricsTable(self.n_workers, ctx=self._ctx)
+        self.sockets: List[Tuple[socket.socket, socket.socket]] = []
+        self.processes: List[Optional[multiprocessing.process.BaseProcess]] = [None] * self.n_workers
+        self.restarts = [0] * self.n_workers
+        self._shutdown = False
+        self.app: Optional[FastAPI] = None
+        self._setup_http_routes()
+
+    def _setup_http_routes(self):
+        """Set up HTTP routes for health checks and aggregated metrics."""
+        self.app = FastAPI(title="Clarion Native NetFlow Collector")
+
+        @self.app.get("/health")
+        async def health():
+            """Health check endpoint."""
+            alive = self.workers_alive()
+            return {
+                "status": "healthy" if alive == self.n_workers else "degraded",
+                "service": "native-netflow-collector",
+                "backend_url": self.config.backend_url,
+                "workers": self.n_workers,
+                "workers_alive": alive,
+            }
+
+        @self.app.get("/metrics")
+        async def metrics():
+            """Collector metrics summed across workers, plus per-worker rows."""
+            return {
+                **self.get_metrics(),
+                "batch_size": self.config.batch_size,
+                "batch_interval_seconds": self.config.batch_interval_seconds,
+                "wire_format": self.config.wire_format,
+                "aggregation_mode": self.config.aggregation_mode,
+            }
+
+    def bind_sockets(self):
+        """Bind one (NetFlow, IPFIX) SO_REUSEPORT socket pair per worker."""
+        for worker_id in range(self.n_workers):
+            first = worker_id == 0
+            self.sockets.append((
+                create_udp_socket(self.config, self.config.netflow_port, log=first),
+                create_udp_socket(self.config, self.config.ipfix_port, log=False),
+            ))
+        logger.info(f"Bound {self.n_workers} SO_REUSEPORT socket pairs")
+
+    def _spawn(self, worker_id: int):
+        """Fork a worker process on its socket pair."""
+        own = self.sockets[worker_id]
+        others = [
+            sock
+            for i, pair in enumerate(self.sockets) if i != worker_id
+            for sock in pair
+        ]
+        self.metrics_table.clear(worker_id)
+        process = self._ctx.Process(
+            target=_run_worker,
+            args=(self.config, worker_id, own, others, self.metrics_table),
+            name=f"clarion-collector-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        self.processes[worker_id] = process
+        logger.info(f"Started collector worker {worker_id} (pid {process.pid})")
+
+    def workers_alive(self) -> int:
+        """Number of running worker processes."""
+        return sum(1 for p in self.processes if p is not None and p.is_alive())
+
+    async def start(self, http_port: int = 8081):
+        """Bind sockets, fork workers and supervise them until cancelled."""
+        logger.info(f"Starting Native NetFlow Collector with {self.n_workers} workers")
+        self.bind_sockets()
+        for worker_id in range(self.n_workers):
+            self._spawn(worker_id)
+
+        http_task = None
+        if self.app:
+            http_config = uvicorn.Config(
+                self.app,
+                host=self.config.bind_host,
+                port=http_port,
+                log_level=self.config.log_level.lower(),
+            )
+            http_server = uvicorn.Server(http_config)
+            http_task = asyncio.create_task(http_server.serve())
+            logger.info(f"HTTP server started on {self.config.bind_host}:{http_port}")
+
+        monitor_task = asyncio.create_task(self._monitor())
+        try:
+            tasks = [monitor_task]
+            if http_task:
+                tasks.append(http_task)
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            logger.info("Shutting down collector workers...")
+            monitor_task.cancel()
+            if http_task:
+                http_task.cancel()
+        finally:
+            self.stop()
+
+    async def _monitor(self):
+        """Respawn workers that exit unexpectedly."""
+        while not self._shutdown:
+            try:
+                await asyncio.sleep(MONITOR_INTERVAL)
+                for worker_id, process in enumerate(self.processes):
+                    if self._shutdown or process is None or process.is_alive():
+                        continue
+                    self.restarts[worker_id] += 1
+                    logger.warning(
+                        f"Collector worker {worker_id} (pid {process.pid}) exited "
+                        f"with code {process.exitcode}, restarting"
+                    )
+                    self._spawn(worker_id)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error supervising collector workers: {e}", exc_info=True)
+
+    def stop(self):
+        """Terminate workers and close the sockets."""
+        self._shutdown = True
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            if process is None:
+                continue
+            process.join(SHUTDOWN_TIMEOUT)
+            if process.is_alive():
+                logger.warning(f"Collector worker pid {process.pid} did not exit, killing")
+                process.kill()
+                process.join()
+        for pair in self.sockets:
+            for sock in pair:
+                sock.close()
+        self.sockets = []
+
+    def get_metrics(self) -> Dict:
+        """Aggregated worker metrics (counters reset when a worker restarts)."""
+        metrics = self.metrics_table.snapshot()
+        for row, process, restarts in zip(metrics["workers"], self.processes, self.restarts):
+            row["alive"] = process is not None and process.is_alive()
+            row["restarts"] = restarts
+        metrics["worker_count"] = self.n_workers
+        metrics["workers_alive"] = self.workers_alive()
+        return metrics
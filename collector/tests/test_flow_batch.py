@@ -0,0 +1,69 @@
+"""
+Tests for the columnar batch encoder.
+"""
+
+import struct
+import time
+import zlib
+
+import pytest
+from clarion_collector.flow_batch import encode_flow_batch, is_flow_batch
+from clarion_collector.netflow_parser import NetFlowRecord
+
+
+def _record(**fields):
+    record = NetFlowRecord()
+    record.src_ip = "10.1.2.3"
+    record.dst_ip = "10.4.5.6"
+    for key, value in fields.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_encode_layout():
+    """Header, column widths and the string table match the wire format."""
+    records = [
+        _record(src_port=1234, dst_port=443, protocol=6, bytes=1 << 40, packets=7,
+                flow_start=100, flow_end=200, src_sgt=5, src_mac="aa:bb:cc:dd:ee:ff"),
+        _record(protocol=17, flow_start=100, flow_end=200, switch_id="SW-1"),
+    ]
+    payload = encode_flow_batch(records, default_switch_id="unknown", compress=False)
+
+    assert is_flow_batch(payload)
+    magic, version, flags, _, count, body_length = struct.unpack_from("<4sBBHII", payload)
+    assert (magic, version, flags, count) == (b"CNFB", 1, 0, 2)
+    body = payload[16:]
+    assert len(body) == body_length
+
+    # 2 records x (4+4+2+2+1+8+8+4+4 + 6*4) bytes of columns, then the string table
+    assert body[:8] == bytes([10, 1, 2, 3, 10, 1, 2, 3])
+    assert struct.unpack_from("<2H", body, 16) == (1234, 0)
+    assert struct.unpack_from("<2Q", body, 26) == (1 << 40, 0)
+    src_sgt = struct.unpack_from("<2i", body, 74)
+    assert src_sgt == (5, -1)
+    src_mac, dst_mac, switch_id = (struct.unpack_from("<2i", body, 98 + 8 * i) for i in range(3))
+    assert src_mac == (0, -1)
+    assert dst_mac == (-1, -1)
+    assert switch_id == (1, 2)
+    table = b"aa:bb:cc:dd:ee:ff\x00unknown\x00SW-1"
+    assert body[122:] == struct.pack("<II", 3, len(table)) + table
+
+
+def test_encode_compressed_defaults_timestamps():
+    """Missing timestamps become the current time; the body is zlib-compressed."""
+    before = int(time.time())
+    payload = encode_flow_batch([_record()])
+
+    flags = payload[5]
+    assert flags & 0x01
+    body = zlib.decompress(payload[16:])
+    flow_start, = struct.unpack_from("<I", body, 4 + 4 + 2 + 2 + 1 + 8 + 8)
+    assert flow_start >= before
+
+
+def test_encode_rejects_unencodable_records():
+    """IPv6 and out-of-range values raise ValueError so callers can fall back to JSON."""
+    with pytest.raises(ValueError):
+        encode_flow_batch([_record(src_ip="2001:db8::1")])
+    with pytest.raises(ValueError):
+        encode_flow_batch([_record(src_port=70000)])
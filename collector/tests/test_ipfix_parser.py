@@ -0,0 +1,89 @@
+"""
+Tests for IPFIX parser.
+"""
+
+import struct
+from clarion_collector.netflow_parser import IPFIXParser
+from clarion_collector.ipfix_parser import CISCO_ENTERPRISE_ID
+
+
+def _ipfix_packet(sets):
+    """Build an IPFIX message from (set_id, payload) pairs."""
+    body = b"".join(struct.pack("!HH", set_id, 4 + len(payload)) + payload for set_id, payload in sets)
+    header = struct.pack("!HHIII", 10, 16 + len(body), 1700000000, 1, 7)
+    return header + body
+
+
+def _template_set(template_id, fields):
+    """Template record; fields are (ie_id, length, enterprise_id or None)."""
+    payload = struct.pack("!HH", template_id, len(fields))
+    for ie_id, length, enterprise_id in fields:
+        if enterprise_id is None:
+            payload += struct.pack("!HH", ie_id, length)
+        else:
+            payload += struct.pack("!HHI", ie_id | 0x8000, length, enterprise_id)
+    return payload
+
+
+def test_ipfix_data_set_decoding():
+    """Data records are decoded with the template's compiled layout."""
+    fields = [
+        (8, 4, None), (12, 4, None), (7, 2, None), (11, 2, None), (4, 1, None),
+        (85, 8, None), (86, 8, None), (152, 8, None), (153, 8, None),
+        (411, 2, None), (412, 2, None), (58, 2, None),
+    ]
+    record_format = "!4s4sHHBQQQQHHH"
+    data = b"".join(
+        struct.pack(
+            record_format,
+            bytes([10, 0, 0, i]), bytes([10, 0, 1, i]), 40000 + i, 53, 17,
+            100 * i, i, 1700000000000, 1700000005000, 10, 20, 100,
+        )
+        for i in range(1, 5)
+    )
+    packet = _ipfix_packet([(2, _template_set(300, fields)), (300, data + b"\x00\x00")])
+    
+    records = IPFIXParser().parse(packet, "10.1.1.1")
+    
+    assert len(records) == 4
+    last = records[-1]
+    assert last.src_ip == "10.0.0.4"
+    assert last.dst_ip == "10.0.1.4"
+    assert last.src_port == 40004
+    assert last.dst_port == 53
+    assert last.protocol == 17
+    assert last.bytes == 400
+    assert last.packets == 4
+    assert last.flow_start == 1700000000
+    assert last.flow_end == 1700000005
+    assert last.src_sgt == 10
+    assert last.dst_sgt == 20
+    assert last.vlan_id == 100
+
+
+def test_ipfix_enterprise_sgt_fields():
+    """Cisco enterprise SGT IEs map to the record's SGT fields."""
+    fields = [
+        (8, 4, None), (12, 4, None),
+        (411, 2, CISCO_ENTERPRISE_ID), (412, 2, CISCO_ENTERPRISE_ID),
+        (27, 16, None),  # IPv6 source address is skipped
+    ]
+    data = struct.pack("!4s4sHH16s", bytes([10, 0, 0, 9]), bytes([10, 0, 0, 10]), 5, 6, b"\x00" * 16)
+    packet = _ipfix_packet([(2, _template_set(301, fields)), (301, data)])
+    
+    records = IPFIXParser().parse(packet, "10.1.1.1")
+    
+    assert len(records) == 1
+    assert records[0].src_sgt == 5
+    assert records[0].dst_sgt == 6
+
+
+def test_ipfix_variable_length_template_skipped():
+    """Templates with variable-length fields are not decoded."""
+    fields = [(8, 4, None), (12, 4, None), (82, 65535, None)]
+    packet = _ipfix_packet([
+        (2, _template_set(302, fields)),
+        (302, struct.pack("!4s4sB", b"\x0a\x00\x00\x01", b"\x0a\x00\x00\x02", 0)),
+    ])
+    
+    assert IPFIXParser().parse(packet, "10.1.1.1") == []
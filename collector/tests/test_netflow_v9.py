@@ -72,3 +72,76 @@ def test_netflow_v9_invalid_version():
     records = parser.parse(header, "192.168.1.1")
     assert len(records) == 0
 
+
+
+def _v9_packet(flowsets):
+    """Build a NetFlow v9 packet from (flowset_id, payload) pairs."""
+    body = b""
+    for flowset_id, payload in flowsets:
+        padding = (-len(payload)) % 4
+        body += struct.pack("!HH", flowset_id, 4 + len(payload) + padding) + payload + b"\x00" * padding
+    header = struct.pack("!HHIIII", 9, len(flowsets), 60000, 1234567890, 1, 0)
+    return header + body
+
+
+def test_netflow_v9_data_flowset_decoding():
+    """Data records are decoded with the template's compiled layout."""
+    # IPV4_SRC_ADDR, IPV4_DST_ADDR, L4_SRC_PORT, L4_DST_PORT, PROTOCOL,
+    # IN_BYTES, IN_PKTS, FIRST_SWITCHED, LAST_SWITCHED, SRC_MAC
+    fields = [(8, 4), (12, 4), (7, 2), (11, 2), (4, 1), (1, 8), (2, 4), (22, 4), (21, 4), (56, 6)]
+    template = struct.pack("!HH", 256, len(fields)) + b"".join(
+        struct.pack("!HH", field_type, length) for field_type, length in fields
+    )
+    record_format = "!4s4sHHBQIII6s"
+    data = b"".join(
+        struct.pack(
+            record_format,
+            bytes([10, 0, 0, i]), bytes([10, 0, 1, i]),
+            50000 + i, 443, 6, 1000 * i, i, 10000, 50000,
+            bytes([0, 0x11, 0x22, 0x33, 0x44, i]),
+        )
+        for i in range(1, 4)
+    )
+    packet = _v9_packet([(0, template), (256, data)])
+    
+    parser = NetFlowV9Parser()
+    records = parser.parse(packet, "192.168.1.1")
+    
+    assert len(records) == 3
+    first = records[0]
+    assert first.src_ip == "10.0.0.1"
+    assert first.dst_ip == "10.0.1.1"
+    assert first.src_port == 50001
+    assert first.dst_port == 443
+    assert first.protocol == 6
+    assert first.bytes == 1000
+    assert first.packets == 1
+    assert first.flow_start == 1234567890 - 60000 + 10
+    assert first.flow_end == 1234567890 - 60000 + 50
+    assert first.src_mac == "00:11:22:33:44:01"
+    assert first.switch_id == "192.168.1.1"
+    assert [r.src_ip for r in records] == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    
+    source_id = parser._get_source_id("192.168.1.1")
+    compiled = parser.template_manager.get_template(source_id, 256)
+    assert compiled.record_size == struct.calcsize(record_format)
+
+
+def test_flow_packet_parser_keeps_templates_per_exporter():
+    """Exporters reusing a template ID keep separate templates."""
+    from clarion_collector.netflow_parser import FlowPacketParser
+    
+    def template(fields):
+        return struct.pack("!HH", 256, len(fields)) + b"".join(struct.pack("!HH", *f) for f in fields)
+    
+    parser = FlowPacketParser()
+    parser.parse(_v9_packet([(0, template([(8, 4), (12, 4), (11, 2)]))]), "192.168.1.1")
+    parser.parse(_v9_packet([(0, template([(12, 4), (8, 4), (7, 2)]))]), "192.168.1.2")
+    assert parser.template_count() == 2
+    
+    data = struct.pack("!4s4sH", bytes([10, 0, 0, 1]), bytes([10, 0, 0, 2]), 443)
+    first = parser.parse(_v9_packet([(256, data)]), "192.168.1.1")[0]
+    second = parser.parse(_v9_packet([(256, data)]), "192.168.1.2")[0]
+    
+    assert (first.src_ip, first.dst_ip, first.dst_port) == ("10.0.0.1", "10.0.0.2", 443)
+    assert (second.src_ip, second.dst_ip, second.src_port) == ("10.0.0.2", "10.0.0.1", 443)
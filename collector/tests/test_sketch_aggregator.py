@@ -0,0 +1,90 @@
+"""
+Tests for flow-to-sketch aggregation.
+"""
+
+import struct
+import sys
+from pathlib import Path
+
+# Sketch aggregation builds on the edge agent's sketches
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "edge"))
+from clarion_edge.sketch import EdgeSketch
+
+from clarion_collector.netflow_parser import NetFlowRecord
+from clarion_collector.sketch_aggregator import SketchAggregator, encode_sketch_batch
+
+
+def _record(src_ip, dst_ip="10.9.9.9", dst_port=443, switch_id="10.0.0.254", **fields):
+    record = NetFlowRecord()
+    record.src_ip = src_ip
+    record.dst_ip = dst_ip
+    record.dst_port = dst_port
+    record.protocol = 6
+    record.bytes = 1000
+    record.flow_start = 1_700_000_000
+    record.switch_id = switch_id
+    for key, value in fields.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_records_fold_into_per_exporter_sketches():
+    """Records update the source endpoint's sketch on its exporter's store."""
+    aggregator = SketchAggregator(max_endpoints=100)
+    added = aggregator.add_records([
+        _record("10.1.1.1", src_mac="aa:bb:cc:00:00:01"),
+        _record("10.1.1.1", dst_ip="10.9.9.8", dst_port=53, protocol=17, src_mac="aa:bb:cc:00:00:01"),
+        _record("10.1.1.2"),
+        _record("10.2.2.2", switch_id="10.0.1.254"),
+        _record(None),
+    ])
+
+    assert added == 4
+    assert aggregator.records_skipped == 1
+    assert aggregator.endpoint_count == 3
+
+    dirty = aggregator.take_dirty()
+    assert sorted(dirty) == ["10.0.0.254", "10.0.1.254"]
+    by_id = {s.endpoint_id: s for s in dirty["10.0.0.254"]}
+    assert set(by_id) == {"aa:bb:cc:00:00:01", "10.1.1.2"}
+    mac_sketch = by_id["aa:bb:cc:00:00:01"]
+    assert mac_sketch.switch_id == "10.0.0.254"
+    assert mac_sketch.flow_count == 2
+    assert mac_sketch.bytes_out == 2000
+    assert mac_sketch.unique_peers.count() == 2
+    assert mac_sketch.port_frequency.count("udp/53") >= 1
+
+
+def test_only_changed_sketches_are_pushed():
+    """take_dirty() returns sketches changed since the last call; failures re-queue."""
+    aggregator = SketchAggregator()
+    aggregator.add_records([_record("10.1.1.1"), _record("10.1.1.2")])
+    first = aggregator.take_dirty()
+    assert len(first["10.0.0.254"]) == 2
+    assert aggregator.take_dirty() == {}
+
+    aggregator.add_records([_record("10.1.1.2")])
+    assert [s.endpoint_id for s in aggregator.take_dirty()["10.0.0.254"]] == ["10.1.1.2"]
+
+    aggregator.mark_dirty("10.0.0.254", first["10.0.0.254"])
+    assert aggregator.dirty_count == 2
+
+
+def test_encode_sketch_batch_frames():
+    """Batches use the edge binary framing: count, then length-prefixed sketches."""
+    aggregator = SketchAggregator()
+    aggregator.add_records([_record("10.1.1.1"), _record("10.1.1.2")])
+    sketches = aggregator.take_dirty()["10.0.0.254"]
+
+    payload = encode_sketch_batch(sketches)
+
+    count, = struct.unpack_from("<I", payload)
+    assert count == 2
+    offset, decoded = 4, []
+    for _ in range(count):
+        length, = struct.unpack_from("<I", payload, offset)
+        decoded.append(EdgeSketch.from_bytes(payload[offset + 4:offset + 4 + length]))
+        offset += 4 + length
+    assert offset == len(payload)
+    assert [s.endpoint_id for s in decoded] == ["10.1.1.1", "10.1.1.2"]
+    assert decoded[0].flow_count == 1
@@ -0,0 +1,88 @@
+"""
+Tests for the on-disk batch spool.
+"""
+
+import os
+from clarion_collector.spool import BatchSpool
+
+
+def _drain(spool):
+    payloads = []
+    while True:
+        entry = spool.peek()
+        if entry is None:
+            return payloads
+        payloads.append(entry.payload)
+        spool.ack(entry)
+
+
+def test_spool_replays_in_order_across_segments(tmp_path):
+    """Batches come back in append order and replayed segments are deleted."""
+    spool = BatchSpool(str(tmp_path), max_bytes=10_000, segment_bytes=200)
+    for i in range(10):
+        spool.append(f"batch-{i}".encode() * 5, record_count=i)
+    
+    assert spool.depth_batches == 10
+    assert spool.depth_records == 45
+    assert len([n for n in os.listdir(tmp_path) if n.endswith(".seg")]) > 1
+    
+    assert _drain(spool) == [f"batch-{i}".encode() * 5 for i in range(10)]
+    assert spool.depth_batches == 0
+    assert len([n for n in os.listdir(tmp_path) if n.endswith(".seg")]) == 1
+
+
+def test_spool_peek_is_idempotent_until_ack(tmp_path):
+    """A failed replay sees the same batch again."""
+    spool = BatchSpool(str(tmp_path))
+    spool.append(b"first", 1)
+    spool.append(b"second", 1)
+    
+    assert spool.peek().payload == b"first"
+    assert spool.peek().payload == b"first"
+    spool.ack(spool.peek())
+    assert spool.peek().payload == b"second"
+
+
+def test_spool_recovers_cursor_after_restart(tmp_path):
+    """Acknowledged batches are not replayed after reopening."""
+    spool = BatchSpool(str(tmp_path), max_bytes=10_000, segment_bytes=100)
+    for i in range(6):
+        spool.append(f"b{i}".encode() * 10, 1)
+    for _ in range(4):
+        spool.ack(spool.peek())
+    spool.close()
+    
+    reopened = BatchSpool(str(tmp_path), max_bytes=10_000, segment_bytes=100)
+    assert reopened.depth_batches == 2
+    reopened.append(b"b6" * 10, 1)
+    assert _drain(reopened) == [b"b4" * 10, b"b5" * 10, b"b6" * 10]
+
+
+def test_spool_discards_torn_tail(tmp_path):
+    """A partially written last frame is dropped on recovery."""
+    spool = BatchSpool(str(tmp_path))
+    spool.append(b"complete", 1)
+    spool.append(b"torn-frame-payload", 1)
+    spool.close()
+    segment = [n for n in os.listdir(tmp_path) if n.endswith(".seg")][0]
+    path = tmp_path / segment
+    path.write_bytes(path.read_bytes()[:-5])
+    
+    reopened = BatchSpool(str(tmp_path))
+    assert reopened.corrupt_frames == 1
+    reopened.append(b"after", 1)
+    assert _drain(reopened) == [b"complete", b"after"]
+
+
+def test_spool_drops_oldest_segment_when_full(tmp_path):
+    """The spool stays within max_bytes by dropping its oldest segment."""
+    spool = BatchSpool(str(tmp_path), max_bytes=300, segment_bytes=100)
+    for i in range(12):
+        spool.append(bytes([i]) * 34, record_count=10)
+    
+    assert spool.disk_bytes <= 300
+    assert spool.dropped_records > 0
+    assert spool.dropped_records + spool.depth_records == 120
+    replayed = _drain(spool)
+    assert replayed[-1] == bytes([11]) * 34
+    assert [p[0] for p in replayed] == sorted(p[0] for p in replayed)
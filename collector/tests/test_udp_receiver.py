@@ -0,0 +1,94 @@
+"""
+Tests for the batched UDP receiver.
+"""
+
+import socket
+import sys
+import time
+import pytest
+from clarion_collector.udp_receiver import BatchedUDPReceiver, read_proc_udp_drops
+
+
+@pytest.fixture
+def udp_pair():
+    """Bound non-blocking receiver socket and a sender socket."""
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.setblocking(False)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    yield receiver, sender
+    receiver.close()
+    sender.close()
+
+
+def _wait_for_data(sock, timeout=2.0):
+    import select
+    select.select([sock], [], [], timeout)
+
+
+def test_drain_returns_all_pending_datagrams(udp_pair):
+    """One drain returns every queued datagram as views into the ring."""
+    sock, sender = udp_pair
+    rx = BatchedUDPReceiver(sock, ring_slots=16, slot_size=2048)
+    for i in range(5):
+        sender.sendto(bytes([i]) * (100 + i), sock.getsockname())
+    _wait_for_data(sock)
+    time.sleep(0.05)
+    
+    datagrams = rx.drain()
+    
+    assert [len(view) for view, _ in datagrams] == [100, 101, 102, 103, 104]
+    assert all(isinstance(view, memoryview) for view, _ in datagrams)
+    assert bytes(datagrams[3][0]) == bytes([3]) * 103
+    assert {source for _, source in datagrams} == {"127.0.0.1"}
+    assert rx.datagrams_received == 5
+    assert rx.recv_batches == 1
+    assert rx.drain() == []
+
+
+def test_drain_is_bounded_by_ring(udp_pair):
+    """A drain stops at the ring size; the rest stays queued."""
+    sock, sender = udp_pair
+    rx = BatchedUDPReceiver(sock, ring_slots=4, slot_size=64)
+    for i in range(6):
+        sender.sendto(b"x" * 10, sock.getsockname())
+    _wait_for_data(sock)
+    time.sleep(0.05)
+    
+    assert len(rx.drain()) == 4
+    assert len(rx.drain()) == 2
+
+
+def test_truncated_datagrams_are_counted(udp_pair):
+    """Datagrams larger than a slot are truncated and counted."""
+    sock, sender = udp_pair
+    rx = BatchedUDPReceiver(sock, ring_slots=2, slot_size=32)
+    sender.sendto(b"y" * 100, sock.getsockname())
+    _wait_for_data(sock)
+    
+    datagrams = rx.drain()
+    
+    assert len(datagrams[0][0]) == 32
+    if hasattr(sock, "recvmsg_into"):
+        assert rx.truncated_datagrams == 1
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="kernel drop counters are Linux-only")
+def test_kernel_drops_are_reported(udp_pair):
+    """Overflowing the socket queue shows up in kernel_drops()."""
+    sock, sender = udp_pair
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    rx = BatchedUDPReceiver(sock, ring_slots=64, slot_size=2048)
+    for _ in range(500):
+        sender.sendto(b"z" * 1000, sock.getsockname())
+    _wait_for_data(sock)
+    
+    while rx.drain():
+        pass
+    # A datagram after the drops carries the cumulative SO_RXQ_OVFL count
+    sender.sendto(b"z", sock.getsockname())
+    _wait_for_data(sock)
+    rx.drain()
+    
+    assert rx.kernel_drops() > 0
+    assert read_proc_udp_drops(sock) == rx.kernel_drops()
@@ -0,0 +1,43 @@
+"""
+Tests for the shared per-worker metrics table.
+"""
+
+import multiprocessing
+from clarion_collector.worker_metrics import WorkerMetricsTable, WORKER_METRIC_FIELDS
+
+
+def _publish(table, worker_id, received):
+    table.publish(worker_id, {"total_received": received, "packets_received": 1, "pending": None})
+
+
+def test_worker_metrics_aggregate_across_processes():
+    """Slots written by forked workers are visible to the parent and summed."""
+    table = WorkerMetricsTable(3)
+    ctx = multiprocessing.get_context("fork")
+    processes = [ctx.Process(target=_publish, args=(table, i, 10 * (i + 1))) for i in range(3)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join(10)
+        assert p.exitcode == 0
+    
+    snapshot = table.snapshot()
+    assert snapshot["total_received"] == 60
+    assert snapshot["packets_received"] == 3
+    assert snapshot["pending"] == 0
+    assert set(WORKER_METRIC_FIELDS) <= set(snapshot)
+    rows = snapshot["workers"]
+    assert [row["total_received"] for row in rows] == [10, 20, 30]
+    assert [row["pid"] for row in rows] == [p.pid for p in processes]
+
+
+def test_worker_metrics_clear():
+    """Clearing a slot drops it from the totals."""
+    table = WorkerMetricsTable(2)
+    table.publish(0, {"errors": 2})
+    table.publish(1, {"errors": 3})
+    table.clear(0)
+    
+    snapshot = table.snapshot()
+    assert snapshot["errors"] == 3
+    assert snapshot["workers"][0]["pid"] is None
@@ -11,6 +11,7 @@ Coordinates:
 from __future__ import annotations
 
 import asyncio
+import gzip
 import json
 import logging
 import math
@@ -31,7 +32,10 @@ class EdgeConfig:
     switch_id: str = "edge-001"
     
     # Memory limits
-    max_endpoints: int = 500  # ~2.5 MB for sketches
+    max_endpoints: int = 1000  # ~19 MB for sketches (array-backed CMS)
+    eviction_policy: str = "lru"  # lru, lowest_flow_count or spill
+    spill_dir: Optional[str] = None  # Defaults to data_dir/spill
+    spill_max_files: int = 100_000  # Oldest spilled sketches expire beyond this
     
     # Clustering
     enable_clustering: bool = True
@@ -200,9 +204,15 @@ class EdgeAgent:
     def __init__(self, config: EdgeConfig):
         """Initialize the agent."""
         self.config = config
+        spill_dir = config.spill_dir
+        if config.eviction_policy == "spill" and not spill_dir:
+            spill_dir = f"{config.data_dir}/spill"
         self.store = EdgeSketchStore(
             max_endpoints=config.max_endpoints,
             switch_id=config.switch_id,
+            eviction_policy=config.eviction_policy,
+            spill_dir=spill_dir,
+            spill_max_files=config.spill_max_files,
         )
         self.clusterer = LightweightKMeans(n_clusters=config.n_clusters)
         
@@ -210,6 +220,9 @@ class EdgeAgent:
         self._flow_count = 0
         self._last_cluster_time = 0
         self._last_sync_time = 0
+        self._full_resync = False
+        self._sketches_synced = 0
+        self._sync_bytes = 0
         self._start_time = time.time()
         
         # Callbacks
@@ -269,8 +282,9 @@ class EdgeAgent:
         # Assign labels back to sketches
         for endpoint_id, label in zip(endpoint_ids, labels):
             sketch = self.store._sketches.get(endpoint_id)
-            if sketch:
+            if sketch and sketch.local_cluster_id != label:
                 sketch.local_cluster_id = label
+                sketch.version += 1
         
         # Count cluster sizes
         cluster_sizes = {}
@@ -291,9 +305,15 @@ class EdgeAgent:
         """Get sketches ready for syncing to backend."""
         return [s.to_dict() for s in self.store]
     
-    def get_serialized_sketches(self) -> bytes:
-        """Get serialized sketches for efficient network transfer."""
-        sketches = self.store.get_all_sketches()
+    def get_serialized_sketches(self, sketches: Optional[List[EdgeSketch]] = None) -> bytes:
+        """
+        Get serialized sketches for efficient network transfer.
+        
+        Args:
+            sketches: Sketches to serialize (defaults to the whole store)
+        """
+        if sketches is None:
+            sketches = self.store.get_all_sketches()
         
         # Simple framing: count + concatenated sketch bytes
         parts = [len(sketches).to_bytes(4, 'little')]
@@ -304,9 +324,19 @@ class EdgeAgent:
         
         return b''.join(parts)
     
+    def request_full_resync(self) -> None:
+        """Send every sketch on the next sync, changed or not."""
+        self._full_resync = True
+    
     async def sync_to_backend(self) -> bool:
         """
-        Sync sketches to backend.
+        Sync changed sketches to backend.
+        
+        Only sketches changed since their last acknowledged sync are sent,
+        binary-encoded and gzip-compressed, to /api/edge/sketches/binary.
+        Every sketch is sent after request_full_resync() or when the backend
+        answered the previous sync with resync_required (it holds fewer of
+        this switch's endpoints than the store, e.g. after a reset).
         
         Returns:
             True if sync was successful
@@ -318,22 +348,42 @@ class EdgeAgent:
         try:
             import httpx
             
-            sketches = self.get_sketches_for_sync()
+            full = self._full_resync
+            sketches = self.store.get_all_sketches() if full else self.store.get_changed_sketches()
+            # Versions as sent; flows recorded during the request stay dirty
+            versions = [s.version for s in sketches]
+            data = gzip.compress(self.get_serialized_sketches(sketches))
             
             async with httpx.AsyncClient() as client:
                 response = await client.post(
-                    f"{self.config.backend_url}/api/edge/sketches",
-                    json={
-                        "switch_id": self.config.switch_id,
-                        "sketches": sketches,
-                        "timestamp": int(time.time()),
+                    f"{self.config.backend_url}/api/edge/sketches/binary",
+                    content=data,
+                    headers={
+                        "Content-Type": "application/octet-stream",
+                        "Content-Encoding": "gzip",
+                        "X-Switch-ID": self.config.switch_id,
+                        "X-Sketch-Count": str(len(sketches)),
+                        "X-Sketch-Total": str(len(self.store)),
+                        "X-Sync-Mode": "full" if full else "delta",
                     },
                     timeout=30.0,
                 )
                 response.raise_for_status()
             
-            logger.info(f"Synced {len(sketches)} sketches to backend")
+            for sketch, version in zip(sketches, versions):
+                sketch.synced_version = version
+            self._full_resync = False
+            if response.json().get("resync_required"):
+                logger.info("Backend requested a full resync")
+                self._full_resync = True
+            
+            logger.info(
+                f"Synced {len(sketches)}/{len(self.store)} sketches to backend "
+                f"({'full' if full else 'delta'}, {len(data)} bytes)"
+            )
             self._last_sync_time = time.time()
+            self._sketches_synced += len(sketches)
+            self._sync_bytes += len(data)
             
             if self._on_sync_complete:
                 self._on_sync_complete(len(sketches))
@@ -358,6 +408,13 @@ class EdgeAgent:
             "flows_per_second": self._flow_count / max(uptime, 1),
             "endpoints_tracked": len(self.store),
             "memory_kb": self.store.memory_bytes() / 1024,
+            "evictions": self.store.evictions,
+            "sketches_spilled": self.store.spilled_count,
+            "sketches_restored": self.store.restored,
+            "sketches_spill_expired": self.store.spill_expired,
+            "sketches_dirty": len(self.store.get_changed_sketches()),
+            "sketches_synced": self._sketches_synced,
+            "sync_bytes": self._sync_bytes,
             "last_cluster_seconds_ago": time.time() - self._last_cluster_time if self._last_cluster_time else None,
             "last_sync_seconds_ago": time.time() - self._last_sync_time if self._last_sync_time else None,
         }
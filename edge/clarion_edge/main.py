@@ -26,6 +26,7 @@ from pathlib import Path
 
 from clarion_edge.agent import EdgeAgent, EdgeConfig
 from clarion_edge.simulator import FlowSimulator, SimulatorConfig
+from clarion_edge.sketch import EVICTION_POLICIES
 from clarion_edge.streaming import StreamConfig, SketchStreamer
 
 # Configure logging
@@ -104,6 +105,21 @@ def parse_args():
         help="Data directory for state persistence",
     )
     
+    parser.add_argument(
+        "--eviction-policy",
+        choices=list(EVICTION_POLICIES),
+        default=os.environ.get("CLARION_EDGE_EVICTION_POLICY", "lru"),
+        help="How to evict endpoints when the sketch store is full "
+             "(spill writes them to <data-dir>/spill)",
+    )
+    
+    parser.add_argument(
+        "--spill-max-files",
+        type=int,
+        default=int(os.environ.get("CLARION_EDGE_SPILL_MAX_FILES", "100000")),
+        help="Spilled sketches kept on disk before the oldest expire (0 = unlimited)",
+    )
+    
     # Clustering options
     parser.add_argument(
         "--clusters",
@@ -137,7 +153,9 @@ def run_simulator_mode(args) -> None:
     # Configure edge agent
     edge_config = EdgeConfig(
         switch_id=args.switch_id,
-        max_endpoints=500,
+        max_endpoints=1000,
+        eviction_policy=args.eviction_policy,
+        spill_max_files=args.spill_max_files,
         enable_clustering=True,
         n_clusters=args.clusters,
         cluster_interval_seconds=args.cluster_interval,
@@ -225,7 +243,9 @@ def run_api_mode(args) -> None:
     # Create agent
     edge_config = EdgeConfig(
         switch_id=args.switch_id,
-        max_endpoints=500,
+        max_endpoints=1000,
+        eviction_policy=args.eviction_policy,
+        spill_max_files=args.spill_max_files,
         enable_clustering=True,
         n_clusters=args.clusters,
         cluster_interval_seconds=args.cluster_interval,
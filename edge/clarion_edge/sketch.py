@@ -8,20 +8,59 @@ Uses pure Python implementations to minimize dependencies.
 from __future__ import annotations
 
 import hashlib
+import heapq
 import math
+import operator
+import os
 import struct
+import sys
 import time
+from array import array
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple, Any
 import json
 
 
+# Memoized item hashes: peers and port keys repeat heavily in flow
+# streams, so most adds skip hashing entirely
+_HASH_CACHE: Dict[str, int] = {}
+_HASH_CACHE_MAX = 1 << 16
+
+# array typecode for uint32 counters (C unsigned int is 4 bytes on all
+# supported platforms, but fall back to unsigned long if not)
+_U32_TYPECODE = "I" if array("I").itemsize == 4 else "L"
+_BIG_ENDIAN_HOST = sys.byteorder == "big"
+
+# EdgeSketchStore eviction policies
+EVICTION_POLICIES = ("lru", "lowest_flow_count", "spill")
+
+
+def hash64(item: Any) -> int:
+    """
+    Stable 64-bit hash of str(item).
+    
+    One blake2b(digest_size=8) call per distinct item. Unlike hash(),
+    the value is identical in every process and on every device, so
+    sketches built on different switches can be merged.
+    """
+    key = item if isinstance(item, str) else str(item)
+    h = _HASH_CACHE.get(key)
+    if h is None:
+        if len(_HASH_CACHE) >= _HASH_CACHE_MAX:
+            _HASH_CACHE.clear()
+        h = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+        _HASH_CACHE[key] = h
+    return h
+
+
 class EdgeHyperLogLog:
     """
     Lightweight HyperLogLog for cardinality estimation.
     
     Uses 4KB of memory (2^10 registers) for ~2% error rate.
     Pure Python implementation - no external dependencies.
+    Items are hashed once with hash64().
     """
     
     def __init__(self, precision: int = 10):
@@ -35,6 +74,7 @@ class EdgeHyperLogLog:
         self.num_registers = 1 << precision
         self.registers = bytearray(self.num_registers)
         self._alpha = self._get_alpha()
+        self._max_rank = 64 - precision + 1
     
     def _get_alpha(self) -> float:
         """Get alpha correction factor."""
@@ -48,24 +88,19 @@ class EdgeHyperLogLog:
         else:
             return 0.7213 / (1 + 1.079 / m)
     
-    def _hash(self, item: Any) -> int:
-        """Hash an item to 64-bit integer."""
-        h = hashlib.md5(str(item).encode()).digest()
-        return struct.unpack('<Q', h[:8])[0]
-    
     def add(self, item: Any) -> None:
         """Add an item to the sketch."""
-        h = self._hash(item)
+        self.add_hash(hash64(item))
+    
+    def add_hash(self, h: int) -> None:
+        """Add an item by its hash64() value."""
         idx = h & (self.num_registers - 1)
         remaining = h >> self.precision
         
-        # Count leading zeros + 1
-        rho = 1
-        while remaining & 1 == 0 and rho <= 64 - self.precision:
-            rho += 1
-            remaining >>= 1
-        
-        self.registers[idx] = max(self.registers[idx], rho)
+        # Rank = position of the lowest set bit (trailing zeros + 1)
+        rho = (remaining & -remaining).bit_length() or self._max_rank
+        if rho > self.registers[idx]:
+            self.registers[idx] = rho
     
     def count(self) -> int:
         """Estimate cardinality."""
@@ -86,8 +121,7 @@ class EdgeHyperLogLog:
         if self.num_registers != other.num_registers:
             raise ValueError("Cannot merge HLLs with different precision")
         
-        for i in range(self.num_registers):
-            self.registers[i] = max(self.registers[i], other.registers[i])
+        self.registers = bytearray(map(max, self.registers, other.registers))
     
     def memory_bytes(self) -> int:
         """Return memory usage in bytes."""
@@ -112,6 +146,10 @@ class EdgeCountMinSketch:
     
     Uses ~16KB of memory (4 hash functions, 1024 counters each).
     Pure Python implementation - no external dependencies.
+    Row columns are derived from a single hash64() by double hashing.
+    
+    Counters live in one flat array('I') (row-major, depth x width), so
+    memory is 4 bytes per counter and serialization is a buffer copy.
     """
     
     def __init__(self, width: int = 1024, depth: int = 4):
@@ -124,27 +162,31 @@ class EdgeCountMinSketch:
         """
         self.width = width
         self.depth = depth
-        self.counters = [[0] * width for _ in range(depth)]
+        self.counters = array(_U32_TYPECODE, bytes(4 * width * depth))
         self._total = 0
     
-    def _hash(self, item: Any, seed: int) -> int:
-        """Hash an item with a seed."""
-        h = hashlib.md5(f"{seed}:{item}".encode()).digest()
-        return struct.unpack('<I', h[:4])[0] % self.width
+    def _indexes(self, h: int) -> List[int]:
+        """Flat counter index per row from one 64-bit hash (double hashing)."""
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        width = self.width
+        return [i * width + (h1 + i * h2) % width for i in range(self.depth)]
     
     def add(self, item: Any, count: int = 1) -> None:
         """Add an item with optional count."""
-        for i in range(self.depth):
-            idx = self._hash(item, i)
-            self.counters[i][idx] += count
+        self.add_hash(hash64(item), count)
+    
+    def add_hash(self, h: int, count: int = 1) -> None:
+        """Add an item by its hash64() value."""
+        counters = self.counters
+        for idx in self._indexes(h):
+            counters[idx] += count
         self._total += count
     
     def count(self, item: Any) -> int:
         """Estimate count of an item."""
-        return min(
-            self.counters[i][self._hash(item, i)]
-            for i in range(self.depth)
-        )
+        counters = self.counters
+        return min(counters[idx] for idx in self._indexes(hash64(item)))
     
     def total(self) -> int:
         """Return total count."""
@@ -155,39 +197,38 @@ class EdgeCountMinSketch:
         if self.width != other.width or self.depth != other.depth:
             raise ValueError("Cannot merge CMS with different dimensions")
         
-        for i in range(self.depth):
-            for j in range(self.width):
-                self.counters[i][j] += other.counters[i][j]
+        # Element-wise add in C (map + operator.add), no per-counter bytecode
+        self.counters = array(_U32_TYPECODE, map(operator.add, self.counters, other.counters))
         self._total += other._total
     
     def memory_bytes(self) -> int:
         """Return memory usage in bytes."""
-        # Each counter is 4 bytes (int32)
-        return self.width * self.depth * 4
+        return len(self.counters) * self.counters.itemsize
     
     def to_bytes(self) -> bytes:
-        """Serialize to bytes."""
+        """Serialize to bytes (header + little-endian uint32 counters)."""
         header = struct.pack('<HH', self.width, self.depth)
-        data = b''.join(
-            struct.pack(f'<{self.width}I', *row)
-            for row in self.counters
-        )
-        return header + data
+        if _BIG_ENDIAN_HOST:
+            counters = array(_U32_TYPECODE, self.counters)
+            counters.byteswap()
+            return header + counters.tobytes()
+        return header + self.counters.tobytes()
     
     @classmethod
     def from_bytes(cls, data: bytes) -> "EdgeCountMinSketch":
         """Deserialize from bytes."""
         width, depth = struct.unpack('<HH', data[:4])
+        size = 4 * width * depth
+        if len(data) < 4 + size:
+            raise ValueError(f"CMS data too short: {len(data)} bytes for {depth}x{width} counters")
         cms = cls(width=width, depth=depth)
-        
-        offset = 4
-        for i in range(depth):
-            row = struct.unpack(f'<{width}I', data[offset:offset + width * 4])
-            cms.counters[i] = list(row)
-            offset += width * 4
+        cms.counters = array(_U32_TYPECODE)
+        cms.counters.frombytes(data[4:4 + size])
+        if _BIG_ENDIAN_HOST:
+            cms.counters.byteswap()
         
         # Recalculate total
-        cms._total = sum(cms.counters[0])
+        cms._total = sum(cms.counters[:width])
         
         return cms
 
@@ -198,7 +239,7 @@ class EdgeSketch:
     Lightweight behavioral sketch for an endpoint.
     
     Designed for edge deployment with minimal memory:
-    - ~5KB per endpoint (vs 50KB+ for full sketches)
+    - ~19KB per endpoint (two 1KB HLLs, one 16KB uint32 CMS)
     - No numpy dependency
     - Serializable for network transfer
     """
@@ -227,6 +268,11 @@ class EdgeSketch:
     # Local cluster assignment (from edge K-means)
     local_cluster_id: int = -1
     
+    # Change tracking for delta sync (local only, not serialized):
+    # the sketch needs syncing while version != synced_version
+    version: int = field(default=0, compare=False, repr=False)
+    synced_version: int = field(default=0, compare=False, repr=False)
+    
     def record_flow(
         self,
         dst_ip: str,
@@ -245,12 +291,11 @@ class EdgeSketch:
             self.first_seen = timestamp
         self.last_seen = timestamp
         
-        # Update cardinality
-        self.unique_peers.add(dst_ip)
-        self.unique_ports.add(f"{proto}/{dst_port}")
-        
-        # Update frequency
-        self.port_frequency.add(f"{proto}/{dst_port}")
+        # Update cardinality and frequency (one hash per item)
+        port_hash = hash64(f"{proto}/{dst_port}")
+        self.unique_peers.add_hash(hash64(dst_ip))
+        self.unique_ports.add_hash(port_hash)
+        self.port_frequency.add_hash(port_hash)
         
         # Update byte counts
         if is_outbound:
@@ -264,6 +309,7 @@ class EdgeSketch:
         from datetime import datetime
         hour = datetime.fromtimestamp(timestamp).hour
         self.active_hours |= (1 << hour)
+        self.version += 1
     
     def get_feature_vector(self) -> List[float]:
         """
@@ -318,6 +364,7 @@ class EdgeSketch:
         self.first_seen = min(self.first_seen, other.first_seen) or max(self.first_seen, other.first_seen)
         self.last_seen = max(self.last_seen, other.last_seen)
         self.active_hours |= other.active_hours
+        self.version += 1
     
     def to_dict(self) -> Dict:
         """Convert to dictionary for JSON serialization."""
@@ -403,45 +450,188 @@ class EdgeSketchStore:
     """
     In-memory store for edge sketches.
     
-    Memory-constrained: evicts least-recently-seen sketches when full.
+    Memory-constrained: evicts a sketch when full, according to the
+    eviction policy:
+    - "lru": least-recently-used endpoint (O(1), the default)
+    - "lowest_flow_count": endpoint with the fewest flows (lazy min-heap)
+    - "spill": least-recently-used endpoint, written to spill_dir and
+      restored transparently when the endpoint is seen again; beyond
+      spill_max_files the oldest spill files are deleted
+    
+    Recency is tracked by get_or_create(), which flow sources call
+    before every record_flow().
     """
     
-    def __init__(self, max_endpoints: int = 500, switch_id: str = "unknown"):
+    def __init__(
+        self,
+        max_endpoints: int = 500,
+        switch_id: str = "unknown",
+        eviction_policy: str = "lru",
+        spill_dir: Optional[str] = None,
+        spill_max_files: int = 100_000,
+    ):
         """
         Initialize the store.
         
         Args:
             max_endpoints: Maximum number of endpoints to track
             switch_id: Identifier for this switch
+            eviction_policy: One of EVICTION_POLICIES
+            spill_dir: Directory for evicted sketches (required for "spill")
+            spill_max_files: Spill files kept before the oldest expire
+                            (0 = unlimited)
+            
+        Raises:
+            ValueError: If the policy is unknown or "spill" has no spill_dir
         """
+        if eviction_policy not in EVICTION_POLICIES:
+            raise ValueError(
+                f"Unknown eviction policy {eviction_policy!r}, "
+                f"expected one of {', '.join(EVICTION_POLICIES)}"
+            )
+        if eviction_policy == "spill" and not spill_dir:
+            raise ValueError("The spill eviction policy requires spill_dir")
+        
         self.max_endpoints = max_endpoints
         self.switch_id = switch_id
-        self._sketches: Dict[str, EdgeSketch] = {}
+        self.eviction_policy = eviction_policy
+        self.spill_dir = spill_dir
+        self.spill_max_files = spill_max_files
+        # Insertion/access order doubles as the LRU index
+        self._sketches: "OrderedDict[str, EdgeSketch]" = OrderedDict()
+        # (flow_count, seq, endpoint_id, sketch) for lowest_flow_count
+        self._flow_heap: List[Tuple[int, int, str, EdgeSketch]] = []
+        self._heap_seq = 0
+        # Spill file names currently on disk, oldest first
+        self._spilled: "OrderedDict[str, None]" = OrderedDict()
+        
+        self.evictions = 0
+        self.spilled = 0
+        self.restored = 0
+        self.spill_expired = 0
+        
+        if eviction_policy == "spill":
+            os.makedirs(spill_dir, exist_ok=True)
+            names = [name for name in os.listdir(spill_dir) if name.endswith(".sketch")]
+            names.sort(key=lambda name: os.path.getmtime(os.path.join(spill_dir, name)))
+            self._spilled = OrderedDict.fromkeys(names)
+            self._expire_spilled()
     
     def get_or_create(self, endpoint_id: str) -> EdgeSketch:
-        """Get or create a sketch for an endpoint."""
-        if endpoint_id not in self._sketches:
-            # Check capacity
-            if len(self._sketches) >= self.max_endpoints:
-                self._evict_oldest()
-            
-            self._sketches[endpoint_id] = EdgeSketch(
+        """Get or create a sketch for an endpoint (marks it most recently used)."""
+        sketch = self._sketches.get(endpoint_id)
+        if sketch is not None:
+            self._sketches.move_to_end(endpoint_id)
+            return sketch
+        
+        # Restore before evicting, so the spill cap never expires the
+        # sketch being restored
+        sketch = self._restore(endpoint_id) if self._spilled else None
+        
+        # Check capacity
+        if len(self._sketches) >= self.max_endpoints:
+            self._evict()
+        
+        if sketch is None:
+            sketch = EdgeSketch(
                 endpoint_id=endpoint_id,
                 switch_id=self.switch_id,
             )
+        self._sketches[endpoint_id] = sketch
+        
+        if self.eviction_policy == "lowest_flow_count":
+            self._heap_seq += 1
+            heapq.heappush(
+                self._flow_heap,
+                (sketch.flow_count, self._heap_seq, endpoint_id, sketch),
+            )
         
-        return self._sketches[endpoint_id]
+        return sketch
     
-    def _evict_oldest(self) -> None:
-        """Evict the least-recently-seen sketch."""
+    def _evict(self) -> None:
+        """Evict one sketch according to the eviction policy."""
         if not self._sketches:
             return
         
-        oldest_id = min(
-            self._sketches.keys(),
-            key=lambda k: self._sketches[k].last_seen
-        )
-        del self._sketches[oldest_id]
+        if self.eviction_policy == "lowest_flow_count":
+            endpoint_id = self._pop_lowest_flow_count()
+            sketch = self._sketches.pop(endpoint_id)
+        else:
+            endpoint_id, sketch = self._sketches.popitem(last=False)
+        
+        if self.eviction_policy == "spill":
+            self._spill(sketch)
+        self.evictions += 1
+    
+    def _pop_lowest_flow_count(self) -> str:
+        """
+        Pop the endpoint with the fewest flows.
+        
+        Heap keys are flow counts at push time; since counts only grow,
+        a stale entry is re-pushed with its current count and the next
+        minimum is tried.
+        """
+        heap = self._flow_heap
+        while True:
+            flow_count, _, endpoint_id, sketch = heapq.heappop(heap)
+            if self._sketches.get(endpoint_id) is not sketch:
+                continue
+            if sketch.flow_count == flow_count:
+                return endpoint_id
+            self._heap_seq += 1
+            heapq.heappush(heap, (sketch.flow_count, self._heap_seq, endpoint_id, sketch))
+    
+    def _spill_name(self, endpoint_id: str) -> str:
+        """File name for an endpoint's spilled sketch (ids may contain '/' or ':')."""
+        return hashlib.blake2b(endpoint_id.encode(), digest_size=16).hexdigest() + ".sketch"
+    
+    def _spill(self, sketch: EdgeSketch) -> None:
+        """Write an evicted sketch to spill_dir."""
+        name = self._spill_name(sketch.endpoint_id)
+        path = os.path.join(self.spill_dir, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(sketch.to_bytes())
+        os.replace(tmp_path, path)
+        self._spilled[name] = None
+        self._spilled.move_to_end(name)
+        self.spilled += 1
+        self._expire_spilled()
+    
+    def _expire_spilled(self) -> None:
+        """Delete the oldest spill files beyond spill_max_files."""
+        if self.spill_max_files <= 0:
+            return
+        while len(self._spilled) > self.spill_max_files:
+            name, _ = self._spilled.popitem(last=False)
+            try:
+                os.remove(os.path.join(self.spill_dir, name))
+            except OSError:
+                pass
+            self.spill_expired += 1
+    
+    def _restore(self, endpoint_id: str) -> Optional[EdgeSketch]:
+        """Load and remove a spilled sketch, if this endpoint has one."""
+        name = self._spill_name(endpoint_id)
+        if name not in self._spilled:
+            return None
+        del self._spilled[name]
+        path = os.path.join(self.spill_dir, name)
+        try:
+            with open(path, "rb") as f:
+                sketch = EdgeSketch.from_bytes(f.read())
+            os.remove(path)
+        except (OSError, ValueError, struct.error):
+            return None
+        # Changes made before the spill may not have been synced yet
+        sketch.version = sketch.synced_version + 1
+        self.restored += 1
+        return sketch
+    
+    @property
+    def spilled_count(self) -> int:
+        """Sketches currently spilled to disk."""
+        return len(self._spilled)
     
     def __len__(self) -> int:
         return len(self._sketches)
@@ -453,6 +643,10 @@ class EdgeSketchStore:
         """Get all sketches."""
         return list(self._sketches.values())
     
+    def get_changed_sketches(self) -> List[EdgeSketch]:
+        """Get sketches changed since their last acknowledged sync."""
+        return [s for s in self._sketches.values() if s.version != s.synced_version]
+    
     def get_feature_matrix(self) -> Tuple[List[List[float]], List[str]]:
         """
         Get feature matrix for clustering.
@@ -475,6 +669,8 @@ class EdgeSketchStore:
             "switch_id": self.switch_id,
             "endpoint_count": len(self._sketches),
             "max_endpoints": self.max_endpoints,
+            "eviction_policy": self.eviction_policy,
+            "evictions": self.evictions,
             "memory_kb": self.memory_bytes() / 1024,
             "total_flows": sum(s.flow_count for s in self._sketches.values()),
         }
@@ -18,11 +18,40 @@ from clarion_edge.sketch import (
     EdgeCountMinSketch,
     EdgeSketch,
     EdgeSketchStore,
+    hash64,
 )
 from clarion_edge.simulator import FlowSimulator, SimulatorConfig, create_test_csv
 from clarion_edge.agent import EdgeAgent, EdgeConfig, LightweightKMeans
 
 
+class TestHash64:
+    """Tests for the shared sketch hash."""
+    
+    def test_stable_across_processes(self):
+        """Hash is fixed (not PYTHONHASHSEED-dependent) so sketches merge across switches."""
+        assert hash64("10.0.0.1") == 0xe6034de146f68e53
+        assert hash64(443) == hash64("443")
+    
+    def test_add_hash_matches_add(self):
+        """Adding by precomputed hash is equivalent to adding the item."""
+        hll1, hll2 = EdgeHyperLogLog(), EdgeHyperLogLog()
+        cms1, cms2 = EdgeCountMinSketch(), EdgeCountMinSketch()
+        for i in range(200):
+            hll1.add(f"item{i}")
+            hll2.add_hash(hash64(f"item{i}"))
+            cms1.add(f"item{i % 7}", i)
+            cms2.add_hash(hash64(f"item{i % 7}"), i)
+        
+        assert hll1.registers == hll2.registers
+        assert cms1.counters == cms2.counters
+    
+    def test_cms_rows_use_distinct_columns(self):
+        """Double hashing spreads one item over different columns per row."""
+        cms = EdgeCountMinSketch(width=1024, depth=4)
+        columns = cms._indexes(hash64("tcp/443"))
+        assert len(set(columns)) == 4
+
+
 class TestEdgeHyperLogLog:
     """Tests for EdgeHyperLogLog."""
     
@@ -141,9 +170,26 @@ class TestEdgeCountMinSketch:
         
         data = cms.to_bytes()
         restored = EdgeCountMinSketch.from_bytes(data)
-        
+
         assert cms.count("test") == restored.count("test")
 
+    def test_flat_counter_layout(self):
+        """Counters are one uint32 array; the wire format is header + counters."""
+        cms = EdgeCountMinSketch(width=64, depth=4)
+        cms.add("tcp/443", 7)
+
+        assert len(cms.counters) == 64 * 4
+        assert cms.memory_bytes() == 4 * 64 * 4
+
+        data = cms.to_bytes()
+        assert len(data) == 4 + 4 * 64 * 4
+        restored = EdgeCountMinSketch.from_bytes(data)
+        assert list(restored.counters) == list(cms.counters)
+        assert restored.total() == 7
+
+        with pytest.raises(ValueError):
+            EdgeCountMinSketch.from_bytes(data[:-1])
+
 
 class TestEdgeSketch:
     """Tests for EdgeSketch."""
@@ -294,7 +340,109 @@ class TestEdgeSketchStore:
         assert len(store) == 5
         # Oldest (last_seen=0) should be evicted
         assert "aa:bb:cc:dd:ee:00" not in [s.endpoint_id for s in store]
-    
+        assert store.evictions == 1
+
+    def test_lru_eviction_follows_access(self):
+        """Recently accessed endpoints survive eviction."""
+        store = EdgeSketchStore(max_endpoints=3, switch_id="test")
+        for endpoint_id in ("a", "b", "c"):
+            store.get_or_create(endpoint_id)
+        store.get_or_create("a")  # touch
+        store.get_or_create("d")
+
+        assert [s.endpoint_id for s in store] == ["c", "a", "d"]
+
+    def test_lowest_flow_count_eviction(self):
+        """The endpoint with the fewest flows is evicted."""
+        store = EdgeSketchStore(
+            max_endpoints=3, switch_id="test", eviction_policy="lowest_flow_count"
+        )
+        for endpoint_id, flows in (("a", 5), ("b", 1), ("c", 3)):
+            s = store.get_or_create(endpoint_id)
+            for _ in range(flows):
+                s.record_flow("10.0.1.1", 443, "tcp", 100, True)
+        store.get_or_create("d")
+
+        assert sorted(s.endpoint_id for s in store) == ["a", "c", "d"]
+
+    def test_spill_eviction_restores(self):
+        """Spilled sketches come back when the endpoint reappears."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = EdgeSketchStore(
+                max_endpoints=2, switch_id="test",
+                eviction_policy="spill", spill_dir=tmpdir,
+            )
+            s = store.get_or_create("aa:01")
+            s.record_flow("10.0.1.1", 443, "tcp", 1000, True)
+            store.get_or_create("aa:02")
+            store.get_or_create("aa:03")  # spills aa:01
+
+            assert store.spilled_count == 1
+            restored = store.get_or_create("aa:01")  # spills aa:02
+            assert restored.flow_count == 1
+            assert restored.bytes_out == 1000
+            assert store.restored == 1
+            assert store.evictions == 2
+            assert store.spilled_count == 1
+
+            # A new store picks up sketches spilled before a restart
+            reopened = EdgeSketchStore(
+                max_endpoints=2, switch_id="test",
+                eviction_policy="spill", spill_dir=tmpdir,
+            )
+            assert reopened.spilled_count == 1
+
+    def test_spill_files_expire_oldest_first(self):
+        """Spill files beyond spill_max_files are deleted, oldest first."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = EdgeSketchStore(
+                max_endpoints=1, switch_id="test",
+                eviction_policy="spill", spill_dir=tmpdir, spill_max_files=2,
+            )
+            for i in range(5):
+                store.get_or_create(f"aa:{i:02x}")  # spills the previous one
+
+            assert store.spilled == 4
+            assert store.spilled_count == 2
+            assert store.spill_expired == 2
+            assert len(os.listdir(tmpdir)) == 2
+
+            # aa:00 expired; aa:03 is still on disk
+            store.get_or_create("aa:00")
+            assert store.restored == 0
+            store.get_or_create("aa:03")
+            assert store.restored == 1
+
+            # A restarted store applies the cap to files already on disk
+            reopened = EdgeSketchStore(
+                max_endpoints=1, switch_id="test",
+                eviction_policy="spill", spill_dir=tmpdir, spill_max_files=1,
+            )
+            assert reopened.spilled_count == 1
+            assert reopened.spill_expired == 1
+
+    def test_changed_sketches(self):
+        """Only sketches changed since their last sync are returned."""
+        store = EdgeSketchStore(max_endpoints=100, switch_id="test")
+        for i in range(3):
+            s = store.get_or_create(f"aa:{i:02x}")
+            s.record_flow("10.0.1.1", 443, "tcp", 1000, True)
+
+        assert len(store.get_changed_sketches()) == 3
+        for s in store:
+            s.synced_version = s.version
+        assert store.get_changed_sketches() == []
+
+        store.get_or_create("aa:01").record_flow("10.0.1.2", 22, "tcp", 10, True)
+        assert [s.endpoint_id for s in store.get_changed_sketches()] == ["aa:01"]
+
+    def test_unknown_eviction_policy(self):
+        """Unknown policies and spill without a directory are rejected."""
+        with pytest.raises(ValueError):
+            EdgeSketchStore(eviction_policy="random")
+        with pytest.raises(ValueError):
+            EdgeSketchStore(eviction_policy="spill")
+
     def test_get_feature_matrix(self):
         """Test feature matrix extraction."""
         store = EdgeSketchStore(max_endpoints=100, switch_id="test")
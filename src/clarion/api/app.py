@@ -47,8 +47,12 @@ def create_app() -> FastAPI:
     """
     # Initialize database on startup
     db_path = os.environ.get("CLARION_DB_PATH", "clarion.db")
-    init_database(db_path)
+    db = init_database(db_path)
     logger.info(f"Database initialized at {db_path}")
+    if db.start_maintenance():
+        logger.info(
+            f"Database maintenance every {db.settings.maintenance_interval_seconds}s"
+        )
     
     app = FastAPI(
         title="Clarion TrustSec Policy Copilot API",
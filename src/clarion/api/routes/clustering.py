@@ -18,7 +18,7 @@ from clarion.clustering.sgt_mapper import generate_sgt_taxonomy
 from clarion.clustering.incremental import IncrementalClusterer
 from clarion.clustering.features import FeatureExtractor
 from clarion.storage import get_database
-from clarion.policy.matrix import build_policy_matrix
+from clarion.policy.matrix import PolicyMatrix, build_policy_matrix, load_policy_matrix
 from clarion.sketches import EndpointSketch
 
 logger = logging.getLogger(__name__)
@@ -206,6 +206,27 @@ async def get_cluster_users(cluster_id: int):
 _matrix_cache: Optional[Dict[str, Any]] = None
 
 
+def _matrix_to_json(matrix: PolicyMatrix) -> Dict[str, Any]:
+    """Convert a PolicyMatrix to the JSON shape served by /matrix."""
+    cells = []
+    for (src_sgt, dst_sgt), cell in matrix.cells.items():
+        cells.append({
+            "src_sgt": src_sgt,
+            "src_sgt_name": cell.src_sgt_name,
+            "dst_sgt": dst_sgt,
+            "dst_sgt_name": cell.dst_sgt_name,
+            "total_flows": cell.total_flows,
+            "total_bytes": cell.total_bytes,
+            "top_ports": ", ".join([p[0] for p in cell.top_ports(3)]),
+        })
+    
+    return {
+        "cells": cells,
+        "sgt_values": matrix.sgt_values,
+        "n_cells": matrix.n_cells,
+    }
+
+
 @router.post("/matrix/build")
 async def build_matrix():
     """Build SGT matrix from current data."""
@@ -235,23 +256,7 @@ async def build_matrix():
         matrix = build_policy_matrix(dataset, store, result, taxonomy)
         
         # Convert to JSON-serializable format
-        cells = []
-        for (src_sgt, dst_sgt), cell in matrix.cells.items():
-            cells.append({
-                "src_sgt": src_sgt,
-                "src_sgt_name": cell.src_sgt_name,
-                "dst_sgt": dst_sgt,
-                "dst_sgt_name": cell.dst_sgt_name,
-                "total_flows": cell.total_flows,
-                "total_bytes": cell.total_bytes,
-                "top_ports": ", ".join([p[0] for p in cell.top_ports(3)]),
-            })
-        
-        _matrix_cache = {
-            "cells": cells,
-            "sgt_values": matrix.sgt_values,
-            "n_cells": matrix.n_cells,
-        }
+        _matrix_cache = _matrix_to_json(matrix)
         
         return {
             "status": "success",
@@ -264,14 +269,37 @@ async def build_matrix():
 
 
 @router.get("/matrix")
-async def get_matrix():
-    """Get the built SGT matrix."""
-    if _matrix_cache is None:
+async def get_matrix(
+    window: Optional[str] = Query(
+        None, description="Live matrix window: hour, day or week"
+    ),
+):
+    """
+    Get the SGT matrix.
+    
+    With a window, or when no matrix has been built, returns the live
+    matrix maintained at NetFlow ingest (no rebuild); otherwise the
+    matrix from the last POST /matrix/build.
+    """
+    if window is None and _matrix_cache is not None:
+        return _matrix_cache
+    
+    try:
+        matrix = load_policy_matrix(get_database(), window=window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if window is None and matrix.n_cells == 0:
         raise HTTPException(
             status_code=404,
             detail="Matrix not built. Call POST /api/clustering/matrix/build first."
         )
-    return _matrix_cache
+    
+    return {
+        **_matrix_to_json(matrix),
+        "source": "live",
+        "window": window,
+    }
 
 
 class IncrementalAssignmentRequest(BaseModel):
@@ -362,52 +362,9 @@ async def get_device_flows(
             ip_address = identity.get('ip_address', endpoint_id)
         
         # Get flows where this device is source or destination (by MAC address or IP)
-        if ip_address:
-            query = """
-                SELECT 
-                    id, src_ip, dst_ip, src_port, dst_port, protocol,
-                    bytes, packets, flow_start, flow_end, switch_id,
-                    src_sgt, dst_sgt, src_mac, dst_mac, vlan_id
-                FROM netflow
-                WHERE (src_ip = ? OR dst_ip = ? OR src_mac = ? OR dst_mac = ?)
-                ORDER BY flow_start DESC
-                LIMIT ? OFFSET ?
-            """
-            params = (ip_address, ip_address, endpoint_id, endpoint_id, limit, offset)
-            count_query = """
-                SELECT COUNT(*)
-                FROM netflow
-                WHERE (src_ip = ? OR dst_ip = ? OR src_mac = ? OR dst_mac = ?)
-            """
-            count_params = (ip_address, ip_address, endpoint_id, endpoint_id)
-        else:
-            # If no IP found, search by MAC only
-            query = """
-                SELECT 
-                    id, src_ip, dst_ip, src_port, dst_port, protocol,
-                    bytes, packets, flow_start, flow_end, switch_id,
-                    src_sgt, dst_sgt, src_mac, dst_mac, vlan_id
-                FROM netflow
-                WHERE (src_mac = ? OR dst_mac = ?)
-                ORDER BY flow_start DESC
-                LIMIT ? OFFSET ?
-            """
-            params = (endpoint_id, endpoint_id, limit, offset)
-            count_query = """
-                SELECT COUNT(*)
-                FROM netflow
-                WHERE (src_mac = ? OR dst_mac = ?)
-            """
-            count_params = (endpoint_id, endpoint_id)
-        
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        
-        # Get total count
-        count_cursor = conn.execute(count_query, count_params)
-        total_count = count_cursor.fetchone()[0]
-        
-        flows = [dict(row) for row in rows]
+        flows, total_count = db.get_endpoint_flows(
+            endpoint_id, ip_address=ip_address, limit=limit, offset=offset,
+        )
         
         return {
             "flows": flows,
@@ -4,11 +4,12 @@ NetFlow Ingestion Endpoints
 Receives NetFlow/IPFIX data from collectors and stores it.
 """
 
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Header, Request
 from pydantic import BaseModel, Field
 from typing import List, Optional
 import logging
 
+from clarion.ingest.flow_batch import decode_flow_batch
 from clarion.storage import get_database
 
 logger = logging.getLogger(__name__)
@@ -51,32 +52,50 @@ async def receive_netflow(batch: NetFlowBatch):
     logger.info(f"Received {len(batch.records)} NetFlow records")
     
     db = get_database()
-    stored_count = 0
-    
-    for record in batch.records:
-        db.store_netflow(
-            src_ip=record.src_ip,
-            dst_ip=record.dst_ip,
-            src_port=record.src_port,
-            dst_port=record.dst_port,
-            protocol=record.protocol,
-            bytes=record.bytes,
-            packets=record.packets,
-            flow_start=record.flow_start,
-            flow_end=record.flow_end,
-            switch_id=record.switch_id or batch.switch_id,
-            src_sgt=record.src_sgt,
-            dst_sgt=record.dst_sgt,
-            src_mac=record.src_mac,
-            dst_mac=record.dst_mac,
-            vlan_id=record.vlan_id,
-        )
-        stored_count += 1
+    stored_count = db.store_netflow_bulk(
+        [record.model_dump() for record in batch.records],
+        switch_id=batch.switch_id,
+    )
     
     return {
         "status": "received",
         "records_received": len(batch.records),
         "records_stored": stored_count,
+        "records_rejected": len(batch.records) - stored_count,
+    }
+
+
+@router.post("/netflow/batch")
+async def receive_netflow_batch(
+    request: Request,
+    x_switch_id: Optional[str] = Header(None),
+):
+    """
+    Receive a columnar NetFlow batch from a collector.
+    
+    The body is the binary format from clarion.ingest.flow_batch
+    (Content-Type: application/x-clarion-flow-batch). Records are
+    decoded from column arrays and stored without per-record
+    validation models; X-Switch-ID sets the default switch ID. Rows
+    the database rejects (implausible flow_start) are counted in
+    records_rejected.
+    """
+    body = await request.body()
+    try:
+        batch = decode_flow_batch(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid flow batch: {e}")
+    
+    logger.info(f"Received {len(batch)} NetFlow records (columnar batch)")
+    
+    db = get_database()
+    stored_count = db.store_netflow_rows(batch.to_rows(switch_id=x_switch_id))
+    
+    return {
+        "status": "received",
+        "records_received": len(batch),
+        "records_stored": stored_count,
+        "records_rejected": len(batch) - stored_count,
     }
 
 
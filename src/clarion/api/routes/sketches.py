@@ -4,16 +4,20 @@ Edge Sketch Ingestion Endpoints
 Receives sketches from edge devices and stores them for processing.
 """
 
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Header, Request
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 from datetime import datetime
 import logging
+import zlib
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Largest binary sketch batch accepted, both as sent and after gunzip
+MAX_SKETCH_BATCH_BYTES = 64 * 1024 * 1024
+
 
 class EdgeSketchData(BaseModel):
     """Edge sketch data model."""
@@ -38,6 +42,7 @@ class SketchBatch(BaseModel):
     sketches: List[EdgeSketchData]
 
 
+from clarion.sketches.edge_format import decode_sketch_batch
 from clarion.storage import get_database
 
 
@@ -53,30 +58,12 @@ async def receive_sketches(batch: SketchBatch):
     )
     
     db = get_database()
-    stored_count = 0
-    new_endpoints = []
-    
-    # Store each sketch in database and track first-seen
-    for sketch in batch.sketches:
-        sketch_id, is_new = db.store_sketch(
-            endpoint_id=sketch.endpoint_id,
-            switch_id=sketch.switch_id,
-            unique_peers=sketch.unique_peers,
-            unique_ports=sketch.unique_ports,
-            bytes_in=sketch.bytes_in,
-            bytes_out=sketch.bytes_out,
-            flow_count=sketch.flow_count,
-            first_seen=sketch.first_seen,
-            last_seen=sketch.last_seen,
-            active_hours=sketch.active_hours,
-            local_cluster_id=sketch.local_cluster_id,
-        )
-        stored_count += 1
-        if is_new:
-            new_endpoints.append(sketch.endpoint_id)
     
-    # Get total sketches for this switch
-    all_sketches = db.list_sketches(switch_id=batch.switch_id)
+    # Single-transaction upsert; returns endpoints new to their switch
+    new_endpoints = db.store_sketches_bulk(
+        [sketch.model_dump() for sketch in batch.sketches]
+    )
+    stored_count = len(batch.sketches)
     
     return {
         "status": "received",
@@ -85,27 +72,98 @@ async def receive_sketches(batch: SketchBatch):
         "sketches_stored": stored_count,
         "new_endpoints": new_endpoints,
         "new_endpoint_count": len(new_endpoints),
-        "total_sketches": len(all_sketches),
+        "total_sketches": db.count_sketches(switch_id=batch.switch_id),
     }
 
 
 @router.post("/sketches/binary")
 async def receive_sketches_binary(
-    content: bytes = Body(...),
-    x_switch_id: Optional[str] = None,
-    x_sketch_count: Optional[str] = None,
+    request: Request,
+    x_switch_id: Optional[str] = Header(None),
+    x_sketch_count: Optional[str] = Header(None),
+    x_sketch_total: Optional[str] = Header(None),
+    x_sync_mode: Optional[str] = Header(None),
 ):
     """
     Receive binary-encoded sketches.
     
-    More efficient than JSON for large batches.
+    More efficient than JSON for large batches. The payload is a uint32
+    sketch count followed by uint32 length-prefixed EdgeSketch.to_bytes()
+    frames (optionally gzip-compressed). Each frame is stored verbatim
+    in sketch_data so the full HLL/CMS state is kept server-side.
+    
+    Edge agents send only changed sketches (X-Sync-Mode: delta) along
+    with the size of their store (X-Sketch-Total). If this switch has
+    fewer stored sketches than that, the response asks for a full resync.
+    Payloads over MAX_SKETCH_BATCH_BYTES (compressed or not) get a 413.
     """
-    # TODO: Implement binary deserialization
-    # For now, return success
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"Sketch payload exceeds {MAX_SKETCH_BATCH_BYTES} bytes",
+    )
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > MAX_SKETCH_BATCH_BYTES:
+        raise too_large
+    content = await request.body()
+    if len(content) > MAX_SKETCH_BATCH_BYTES:
+        raise too_large
+    
+    if request.headers.get("content-encoding", "").lower() == "gzip":
+        # Inflate at most one byte past the limit, so a gzip bomb is
+        # rejected without materializing it
+        decompressor = zlib.decompressobj(wbits=31)
+        try:
+            inflated = decompressor.decompress(content, MAX_SKETCH_BATCH_BYTES + 1)
+        except zlib.error as e:
+            raise HTTPException(status_code=400, detail=f"Invalid gzip payload: {e}") from e
+        if len(inflated) > MAX_SKETCH_BATCH_BYTES or decompressor.unconsumed_tail:
+            raise too_large
+        if not decompressor.eof or decompressor.unused_data:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid gzip payload: truncated or has trailing data",
+            )
+        content = inflated
+    
+    try:
+        frames = decode_sketch_batch(content)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid binary sketch payload: {e}") from e
+    
+    if x_sketch_count is not None and x_sketch_count != str(len(frames)):
+        logger.warning(
+            f"X-Sketch-Count {x_sketch_count} does not match {len(frames)} decoded sketches"
+        )
+    
+    switch_id = x_switch_id or (frames[0].switch_id if frames else None)
+    logger.info(
+        f"Received {len(frames)} binary sketches ({len(content)} bytes) from switch {switch_id}"
+    )
+    
+    db = get_database()
+    new_endpoints = db.store_sketches_bulk([frame.to_row() for frame in frames])
+    total_sketches = db.count_sketches(switch_id=switch_id) if switch_id else 0
+    
+    resync_required = False
+    if x_sync_mode == "delta" and x_sketch_total and x_sketch_total.isdigit():
+        resync_required = total_sketches < int(x_sketch_total)
+        if resync_required:
+            logger.info(
+                f"Switch {switch_id} holds {x_sketch_total} sketches but only "
+                f"{total_sketches} are stored; requesting full resync"
+            )
+    
     return {
         "status": "received",
         "format": "binary",
         "size_bytes": len(content),
+        "switch_id": switch_id,
+        "sketches_received": len(frames),
+        "sketches_stored": len(frames),
+        "new_endpoints": new_endpoints,
+        "new_endpoint_count": len(new_endpoints),
+        "total_sketches": total_sketches,
+        "resync_required": resync_required,
     }
 
 
@@ -116,8 +174,8 @@ async def list_sketches(switch_id: Optional[str] = None, limit: int = 100):
     sketches = db.list_sketches(switch_id=switch_id, limit=limit)
     
     # Get unique switches
-    all_sketches = db.list_sketches(limit=10000)  # Get enough to find switches
-    switches = list(set(s['switch_id'] for s in all_sketches))
+    conn = db._get_connection()
+    switches = [row[0] for row in conn.execute("SELECT DISTINCT switch_id FROM sketches")]
     
     return {
         "count": len(sketches),
@@ -135,6 +193,33 @@ async def list_sketches(switch_id: Optional[str] = None, limit: int = 100):
     }
 
 
+@router.get("/sketches/global/{endpoint_id}")
+async def get_global_sketch(endpoint_id: str):
+    """
+    Get an endpoint's behavior merged across every switch that reported it.
+    
+    Maintained incrementally at ingest, so this is a single-row lookup.
+    """
+    db = get_database()
+    sketch = db.get_global_sketch(endpoint_id)
+    if not sketch:
+        raise HTTPException(status_code=404, detail=f"No sketches for endpoint {endpoint_id}")
+    
+    return {
+        "endpoint_id": sketch['endpoint_id'],
+        "unique_peers": sketch['unique_peers'],
+        "unique_ports": sketch['unique_ports'],
+        "bytes_in": sketch['bytes_in'],
+        "bytes_out": sketch['bytes_out'],
+        "flow_count": sketch['flow_count'],
+        "first_seen": sketch['first_seen'],
+        "last_seen": sketch['last_seen'],
+        "active_hours": sketch['active_hours'],
+        "switch_count": sketch['switch_count'],
+        "has_sketch_data": sketch['sketch_data'] is not None,
+    }
+
+
 @router.get("/sketches/stats")
 async def sketch_stats():
     """Get statistics about stored sketches."""
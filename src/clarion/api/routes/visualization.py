@@ -8,6 +8,7 @@ from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Any
 import logging
+import time
 import numpy as np
 
 try:
@@ -17,6 +18,7 @@ try:
 except ImportError:
     HAS_SKLEARN = False
 
+from clarion.policy.matrix import load_policy_matrix
 from clarion.storage import get_database
 
 logger = logging.getLogger(__name__)
@@ -65,6 +67,10 @@ class FlowGraphLink(BaseModel):
 async def get_flow_graph_data(
     limit: int = Query(500, ge=1, le=5000, description="Maximum number of flows to process"),
     include_locations: bool = Query(True, description="Include location hierarchy"),
+    hours: Optional[int] = Query(
+        None, ge=1, le=24 * 90,
+        description="Summarize the last N hours from traffic rollups (limit applies to conversations)",
+    ),
 ):
     """
     Get flow graph data with enriched node information including locations.
@@ -79,8 +85,13 @@ async def get_flow_graph_data(
     conn = db._get_connection()
     
     try:
-        # Get recent flows
-        flows = db.get_recent_netflow(limit=limit)
+        if hours:
+            # Per-conversation totals from the minute/hour rollups
+            since = int(time.time()) - hours * 3600
+            flows = db.get_netflow_summary(since=since, limit=limit)
+        else:
+            # Get recent flows
+            flows = db.get_recent_netflow(limit=limit)
         
         if not flows:
             return {
@@ -165,6 +176,8 @@ async def get_flow_graph_data(
             ip_flows = ip_to_flows.get(ip, [])
             bytes_in = sum(f.get('bytes', 0) for f in ip_flows if f.get('dst_ip') == ip)
             bytes_out = sum(f.get('bytes', 0) for f in ip_flows if f.get('src_ip') == ip)
+            # Rollup rows stand for flow_count flows; raw records for one
+            flow_count = sum(f.get('flow_count', 1) for f in ip_flows)
             
             # Determine device type
             device_type = None
@@ -197,7 +210,7 @@ async def get_flow_graph_data(
                 'sgt_value': sgt_value,
                 'location_path': location_path,
                 'switch_id': device_info.get('switch_id') if device_info else None,
-                'flow_count': len(ip_flows),
+                'flow_count': flow_count,
                 'bytes_in': bytes_in,
                 'bytes_out': bytes_out,
             }
@@ -223,7 +236,7 @@ async def get_flow_graph_data(
                     'ports': set(),
                 }
             
-            link_map[key]['flow_count'] += 1
+            link_map[key]['flow_count'] += flow.get('flow_count', 1)
             link_map[key]['total_bytes'] += flow.get('bytes', 0)
             link_map[key]['protocols'].add(flow.get('protocol', 0))
             if flow.get('dst_port'):
@@ -278,18 +291,27 @@ async def visualize_clusters(request: ClusterVisualizationRequest):
 
 
 @router.get("/matrix/heatmap")
-async def policy_matrix_heatmap():
+async def policy_matrix_heatmap(
+    window: str = Query("day", description="Live matrix window: hour, day or week"),
+):
     """
     Get policy matrix data for heatmap visualization.
     
-    Returns SGT × SGT matrix with flow counts.
+    Returns SGT × SGT matrix with flow counts, read from the live matrix
+    maintained at NetFlow ingest.
     """
-    # TODO: Return actual policy matrix
+    try:
+        matrix = load_policy_matrix(get_database(), window=window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    src_sgts, dst_sgts, counts = matrix.to_heatmap_data()
     return {
-        "src_sgts": [],
-        "dst_sgts": [],
-        "matrix": [],
-        "message": "Policy matrix heatmap - requires policy generation",
+        "src_sgts": src_sgts,
+        "dst_sgts": dst_sgts,
+        "sgt_names": {sgt: matrix.sgt_names.get(sgt, f"SGT-{sgt}") for sgt in src_sgts},
+        "matrix": counts,
+        "window": window,
     }
 
 
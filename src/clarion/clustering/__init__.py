@@ -17,6 +17,7 @@ from clarion.clustering.sgt_mapper import SGTMapper, SGTRecommendation
 from clarion.clustering.explanation import generate_cluster_explanation
 from clarion.clustering.sgt_lifecycle import SGTLifecycleManager
 from clarion.clustering.incremental import IncrementalClusterer
+from clarion.clustering.centroid_model import CentroidModel
 from clarion.clustering.confidence import ConfidenceScorer
 from clarion.clustering.user_clusterer import UserClusterer, UserCluster, cluster_users
 from clarion.clustering.user_traffic_clusterer import (
@@ -37,6 +38,7 @@ __all__ = [
     "generate_cluster_explanation",
     "SGTLifecycleManager",
     "IncrementalClusterer",
+    "CentroidModel",
     "ConfidenceScorer",
     "UserClusterer",
     "UserCluster",
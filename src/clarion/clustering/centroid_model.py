@@ -0,0 +1,286 @@
+"""
+Centroid Model - Persisted scaler and centroids for incremental assignment.
+
+EndpointClusterer clusters on StandardScaler-normalized features, so
+assigning a new endpoint to an existing cluster is only meaningful after
+applying the same scaler. CentroidModel keeps the fitted scaler (mean and
+scale) together with the per-cluster centroids in normalized space, and
+serializes them as one versioned binary artifact:
+
+    <4sBII> magic "CCTM", format version, n_clusters, n_features
+    n_clusters int64 cluster IDs, SGT values, member counts (-1 = none)
+    n_features float64 scaler mean, then scaler scale
+    n_clusters × n_features float32 centroids (row-major)
+
+A loaded model answers nearest-centroid queries for a batch of feature
+rows, using a BallTree once there are enough centroids for it to beat a
+single brute-force matrix product.
+"""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+
+# Serialization framing: magic, version, n_clusters, n_features
+_MAGIC = b"CCTM"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBII")
+_NONE = -1
+
+# Above this many centroids, nearest() queries a BallTree instead of
+# computing the full (n, k) distance matrix
+TREE_MIN_CENTROIDS = 256
+
+
+@dataclass
+class CentroidModel:
+    """
+    Fitted feature scaler plus cluster centroids in normalized space.
+
+    Example:
+        >>> model = CentroidModel.fit(features, labels, scaler.mean_, scaler.scale_)
+        >>> data = model.to_bytes()
+        >>> model = CentroidModel.from_bytes(data)
+        >>> positions, distances = model.nearest(model.transform(new_features))
+        >>> cluster_ids = model.cluster_ids[positions]
+    """
+    cluster_ids: np.ndarray  # (k,) int64
+    centroids: np.ndarray  # (k, d) float32, normalized feature space
+    scaler_mean: np.ndarray  # (d,) float64
+    scaler_scale: np.ndarray  # (d,) float64
+    sgt_values: np.ndarray  # (k,) int64, -1 = no SGT
+    member_counts: np.ndarray  # (k,) int64, -1 = unknown
+    version: Optional[int] = None  # Assigned when stored in the database
+
+    _tree: Any = field(default=None, init=False, repr=False, compare=False)
+
+    @classmethod
+    def fit(
+        cls,
+        features: np.ndarray,
+        labels: np.ndarray,
+        scaler_mean: Optional[np.ndarray] = None,
+        scaler_scale: Optional[np.ndarray] = None,
+        sgt_mapping: Optional[Dict[int, int]] = None,
+    ) -> CentroidModel:
+        """
+        Build a model from raw feature rows and their cluster labels.
+
+        Args:
+            features: (n, d) raw feature matrix (FeatureVector.to_array rows)
+            labels: Cluster label per row (-1 = noise, excluded)
+            scaler_mean: Fitted scaler mean (None = no normalization)
+            scaler_scale: Fitted scaler scale (None = no normalization)
+            sgt_mapping: Optional dict mapping cluster_id -> sgt_value
+
+        Returns:
+            CentroidModel with one centroid per non-noise cluster
+        """
+        features = np.asarray(features, dtype=np.float64)
+        labels = np.asarray(labels)
+        n_features = features.shape[1]
+
+        mean = np.zeros(n_features) if scaler_mean is None else np.asarray(scaler_mean, dtype=np.float64)
+        scale = np.ones(n_features) if scaler_scale is None else np.asarray(scaler_scale, dtype=np.float64)
+        normalized = (features - mean) / scale
+
+        cluster_ids = np.unique(labels[labels != -1]).astype(np.int64)
+        centroids = np.empty((len(cluster_ids), n_features), dtype=np.float32)
+        member_counts = np.empty(len(cluster_ids), dtype=np.int64)
+        for i, cluster_id in enumerate(cluster_ids):
+            members = labels == cluster_id
+            centroids[i] = normalized[members].mean(axis=0)
+            member_counts[i] = int(members.sum())
+
+        sgt_mapping = sgt_mapping or {}
+        sgt_values = np.array(
+            [sgt_mapping.get(int(cid), _NONE) for cid in cluster_ids], dtype=np.int64
+        )
+
+        return cls(
+            cluster_ids=cluster_ids,
+            centroids=centroids,
+            scaler_mean=mean,
+            scaler_scale=scale,
+            sgt_values=sgt_values,
+            member_counts=member_counts,
+        )
+
+    @classmethod
+    def from_centroids(
+        cls,
+        centroids: Dict[int, np.ndarray],
+        metadata: Dict[int, Dict[str, Any]],
+        scaler_mean: Optional[np.ndarray] = None,
+        scaler_scale: Optional[np.ndarray] = None,
+        version: Optional[int] = None,
+    ) -> CentroidModel:
+        """
+        Build a model from per-cluster centroid vectors.
+
+        Args:
+            centroids: cluster_id -> centroid (already in normalized space)
+            metadata: cluster_id -> dict with optional sgt_value/member_count
+            scaler_mean: Scaler mean the centroids were built with
+                        (None = no normalization)
+            scaler_scale: Scaler scale (None = no normalization)
+            version: Database model version to attach
+
+        Returns:
+            CentroidModel over the given centroids
+        """
+        cluster_ids = list(centroids)
+        matrix = np.stack([np.asarray(centroids[cid], dtype=np.float32) for cid in cluster_ids])
+        n_features = matrix.shape[1]
+
+        def field_values(name: str) -> np.ndarray:
+            values = [metadata.get(cid, {}).get(name) for cid in cluster_ids]
+            return np.array([_NONE if v is None else v for v in values], dtype=np.int64)
+
+        return cls(
+            cluster_ids=np.array(cluster_ids, dtype=np.int64),
+            centroids=matrix,
+            scaler_mean=np.zeros(n_features) if scaler_mean is None else scaler_mean,
+            scaler_scale=np.ones(n_features) if scaler_scale is None else scaler_scale,
+            sgt_values=field_values('sgt_value'),
+            member_counts=field_values('member_count'),
+            version=version,
+        )
+
+    @property
+    def n_clusters(self) -> int:
+        """Number of centroids."""
+        return len(self.cluster_ids)
+
+    @property
+    def n_features(self) -> int:
+        """Feature dimensionality."""
+        return len(self.scaler_mean)
+
+    def sgt_value(self, position: int) -> Optional[int]:
+        """SGT value of the centroid at a position (None if unmapped)."""
+        value = int(self.sgt_values[position])
+        return None if value == _NONE else value
+
+    def member_count(self, position: int) -> Optional[int]:
+        """Member count of the centroid at a position (None if unknown)."""
+        value = int(self.member_counts[position])
+        return None if value == _NONE else value
+
+    def transform(self, features: np.ndarray) -> np.ndarray:
+        """Normalize raw feature rows with the persisted scaler."""
+        return (np.asarray(features, dtype=np.float64) - self.scaler_mean) / self.scaler_scale
+
+    def nearest(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the nearest centroid for each normalized feature row.
+
+        Args:
+            features: (n, d) normalized feature matrix
+
+        Returns:
+            Tuple of (centroid positions, Euclidean distances), one per row
+        """
+        features = np.asarray(features, dtype=np.float64)
+        centroids = self.centroids.astype(np.float64)
+
+        if self.n_clusters >= TREE_MIN_CENTROIDS:
+            if self._tree is None:
+                from sklearn.neighbors import BallTree
+                self._tree = BallTree(centroids)
+            _, positions = self._tree.query(features, k=1)
+            positions = positions[:, 0]
+        else:
+            # Squared distances via |x|^2 - 2 x.c + |c|^2 in one matrix product
+            sq_distances = (
+                np.einsum('ij,ij->i', features, features)[:, None]
+                - 2.0 * features @ centroids.T
+                + np.einsum('ij,ij->i', centroids, centroids)[None, :]
+            )
+            positions = np.argmin(sq_distances, axis=1)
+
+        # Exact distance to the chosen centroid
+        distances = np.linalg.norm(features - centroids[positions], axis=1)
+        return positions, distances
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize to bytes for storage.
+
+        Returns:
+            Serialized model (see module docstring for the layout)
+        """
+        header = _HEADER.pack(_MAGIC, _VERSION, self.n_clusters, self.n_features)
+        return b"".join((
+            header,
+            self.cluster_ids.astype("<i8").tobytes(),
+            self.sgt_values.astype("<i8").tobytes(),
+            self.member_counts.astype("<i8").tobytes(),
+            self.scaler_mean.astype("<f8").tobytes(),
+            self.scaler_scale.astype("<f8").tobytes(),
+            self.centroids.astype("<f4").tobytes(),
+        ))
+
+    @classmethod
+    def from_bytes(
+        cls,
+        data: Union[bytes, bytearray, memoryview],
+        version: Optional[int] = None,
+    ) -> CentroidModel:
+        """
+        Deserialize from bytes.
+
+        Args:
+            data: Serialized model bytes (from to_bytes)
+            version: Database model version to attach
+
+        Returns:
+            Reconstructed CentroidModel
+
+        Raises:
+            ValueError: If the data is malformed
+        """
+        data = memoryview(data)
+        if len(data) < _HEADER.size:
+            raise ValueError("Centroid model data too short for header")
+        magic, fmt_version, n_clusters, n_features = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError(f"Invalid centroid model magic: {bytes(magic)!r}")
+        if fmt_version != _VERSION:
+            raise ValueError(f"Unsupported centroid model version: {fmt_version}")
+
+        expected = _HEADER.size + 8 * (3 * n_clusters + 2 * n_features) + 4 * n_clusters * n_features
+        if len(data) != expected:
+            raise ValueError(
+                f"Centroid model has {len(data)} bytes, expected {expected}"
+            )
+
+        offset = _HEADER.size
+
+        def take(dtype: str, count: int) -> np.ndarray:
+            nonlocal offset
+            array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            return array.astype(dtype[1:])
+
+        cluster_ids = take("<i8", n_clusters)
+        sgt_values = take("<i8", n_clusters)
+        member_counts = take("<i8", n_clusters)
+        scaler_mean = take("<f8", n_features)
+        scaler_scale = take("<f8", n_features)
+        centroids = take("<f4", n_clusters * n_features).reshape(n_clusters, n_features)
+
+        return cls(
+            cluster_ids=cluster_ids,
+            centroids=centroids,
+            scaler_mean=scaler_mean,
+            scaler_scale=scaler_scale,
+            sgt_values=sgt_values,
+            member_counts=member_counts,
+            version=version,
+        )
@@ -3,6 +3,10 @@ Endpoint Clustering using HDBSCAN.
 
 Clusters endpoints based on behavioral features to identify
 natural groupings for SGT assignment.
+
+Large populations are clustered approximately: HDBSCAN is fitted on a
+sample stratified over MiniBatchKMeans cells, and the remaining endpoints
+are assigned with hdbscan.approximate_predict.
 """
 
 from __future__ import annotations
@@ -23,6 +27,14 @@ from clarion.clustering.confidence import ConfidenceScorer
 
 logger = logging.getLogger(__name__)
 
+# Smallest min_cluster_size used when HDBSCAN is fitted on a sample
+_MIN_SAMPLED_CLUSTER_SIZE = 5
+# Endpoints kept from each stratum (if it has that many) regardless of its
+# proportional share, so small behavioral groups survive sampling
+_MIN_PER_STRATUM = 10
+# Rows per hdbscan.approximate_predict call
+_PREDICT_CHUNK = 100_000
+
 
 @dataclass
 class ClusterResult:
@@ -51,6 +63,9 @@ class ClusterResult:
     # Confidence scores per endpoint (calculated after clustering)
     confidence_scores: Dict[str, float] = field(default_factory=dict)
     
+    # Endpoints HDBSCAN was fitted on (None = all, i.e. exact clustering)
+    sample_size: Optional[int] = None
+    
     def get_cluster_members(self, cluster_id: int) -> List[str]:
         """Get endpoint IDs for a specific cluster."""
         return [
@@ -75,6 +90,7 @@ class ClusterResult:
             "noise_ratio": self.n_noise / len(self.endpoint_ids) if self.endpoint_ids else 0,
             "silhouette": self.silhouette,
             "cluster_sizes": dict(self.cluster_sizes),
+            "sample_size": self.sample_size,
         }
 
 
@@ -88,6 +104,11 @@ class EndpointClusterer:
     - Identifies noise/outliers (cluster -1)
     - Provides soft cluster memberships
     
+    From approximate_threshold endpoints up, HDBSCAN runs on a stratified
+    sample of sample_size endpoints and the rest are assigned through
+    hdbscan.approximate_predict; the silhouette is always estimated on at
+    most silhouette_sample_size endpoints.
+    
     Example:
         >>> clusterer = EndpointClusterer()
         >>> result = clusterer.cluster(sketch_store)
@@ -100,6 +121,11 @@ class EndpointClusterer:
         min_samples: int = 10,
         cluster_selection_epsilon: float = 0.0,
         metric: str = "euclidean",
+        approximate_threshold: int = 50_000,
+        sample_size: int = 20_000,
+        n_strata: int = 256,
+        silhouette_sample_size: int = 10_000,
+        random_state: int = 42,
     ):
         """
         Initialize the clusterer.
@@ -109,11 +135,23 @@ class EndpointClusterer:
             min_samples: Minimum samples in neighborhood for core points
             cluster_selection_epsilon: Distance threshold for cluster merging
             metric: Distance metric (euclidean, manhattan, etc.)
+            approximate_threshold: Endpoint count from which cluster()
+                                   switches to approximate clustering
+            sample_size: Endpoints HDBSCAN is fitted on in approximate mode
+            n_strata: MiniBatchKMeans cells the sample is stratified over
+            silhouette_sample_size: Maximum endpoints used to estimate the
+                                    silhouette score
+            random_state: Seed for sampling and MiniBatchKMeans
         """
         self.min_cluster_size = min_cluster_size
         self.min_samples = min_samples
         self.cluster_selection_epsilon = cluster_selection_epsilon
         self.metric = metric
+        self.approximate_threshold = approximate_threshold
+        self.sample_size = sample_size
+        self.n_strata = n_strata
+        self.silhouette_sample_size = silhouette_sample_size
+        self.random_state = random_state
         
         self._clusterer: Optional[hdbscan.HDBSCAN] = None
         self._feature_extractor = FeatureExtractor()
@@ -122,6 +160,7 @@ class EndpointClusterer:
         self,
         store: SketchStore,
         features: Optional[List[FeatureVector]] = None,
+        approximate: Optional[bool] = None,
     ) -> ClusterResult:
         """
         Cluster endpoints in a sketch store.
@@ -129,6 +168,8 @@ class EndpointClusterer:
         Args:
             store: SketchStore with endpoint sketches
             features: Optional pre-extracted features
+            approximate: Force approximate (True) or exact (False)
+                         clustering; None decides by approximate_threshold
             
         Returns:
             ClusterResult with assignments
@@ -142,6 +183,27 @@ class EndpointClusterer:
         # Convert to matrix
         X, endpoint_ids = self._feature_extractor.to_matrix(features)
         
+        return self.cluster_matrix(X, endpoint_ids, approximate=approximate)
+    
+    def cluster_matrix(
+        self,
+        X: np.ndarray,
+        endpoint_ids: List[str],
+        approximate: Optional[bool] = None,
+    ) -> ClusterResult:
+        """
+        Cluster a normalized feature matrix.
+        
+        Args:
+            X: Feature matrix (n_endpoints, n_features), as from
+               FeatureExtractor.to_matrix()
+            endpoint_ids: Endpoint ID for each row
+            approximate: Force approximate (True) or exact (False)
+                         clustering; None decides by approximate_threshold
+            
+        Returns:
+            ClusterResult with assignments
+        """
         if len(X) == 0:
             logger.warning("No endpoints to cluster")
             return ClusterResult(
@@ -151,22 +213,14 @@ class EndpointClusterer:
                 n_noise=0,
             )
         
-        # Run HDBSCAN
-        logger.info(
-            f"Running HDBSCAN with min_cluster_size={self.min_cluster_size}, "
-            f"min_samples={self.min_samples}"
-        )
+        if approximate is None:
+            approximate = len(X) >= self.approximate_threshold
         
-        self._clusterer = hdbscan.HDBSCAN(
-            min_cluster_size=self.min_cluster_size,
-            min_samples=self.min_samples,
-            cluster_selection_epsilon=self.cluster_selection_epsilon,
-            metric=self.metric,
-            core_dist_n_jobs=-1,  # Use all cores
-        )
-        
-        labels = self._clusterer.fit_predict(X)
-        probabilities = self._clusterer.probabilities_
+        sample_size = None
+        if approximate and len(X) > self.sample_size:
+            labels, probabilities, sample_size = self._fit_predict_sampled(X)
+        else:
+            labels, probabilities = self._fit_predict(X)
         
         # Calculate metrics
         n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
@@ -177,16 +231,26 @@ class EndpointClusterer:
         if n_clusters > 1:
             # Exclude noise points for silhouette
             mask = labels != -1
-            if np.sum(mask) > 1:
+            n_clustered = int(np.sum(mask))
+            if n_clustered > 1:
                 try:
-                    silhouette = float(silhouette_score(X[mask], labels[mask]))
+                    # Exact silhouette is O(n^2); estimate it on a sample
+                    silhouette = float(silhouette_score(
+                        X[mask], labels[mask],
+                        sample_size=(
+                            self.silhouette_sample_size
+                            if n_clustered > self.silhouette_sample_size else None
+                        ),
+                        random_state=self.random_state,
+                    ))
                 except Exception as e:
                     logger.warning(f"Could not calculate silhouette: {e}")
         
         # Calculate cluster sizes
-        cluster_sizes = {}
-        for label in set(labels):
-            cluster_sizes[int(label)] = int(np.sum(labels == label))
+        unique_labels, inverse, counts = np.unique(
+            labels, return_inverse=True, return_counts=True,
+        )
+        cluster_sizes = dict(zip(unique_labels.tolist(), counts.tolist()))
         
         result = ClusterResult(
             labels=labels,
@@ -196,20 +260,17 @@ class EndpointClusterer:
             silhouette=silhouette,
             cluster_sizes=cluster_sizes,
             probabilities=probabilities,
+            sample_size=sample_size,
         )
         
         # Calculate confidence scores for each assignment
-        result.confidence_scores = {}
-        for i, (endpoint_id, cluster_id) in enumerate(zip(endpoint_ids, labels)):
-            prob = probabilities[i] if probabilities is not None else None
-            cluster_size = cluster_sizes.get(int(cluster_id))
-            conf = ConfidenceScorer.for_cluster_assignment(
-                cluster_id=int(cluster_id),
-                probability=float(prob) if prob is not None else None,
-                cluster_size=cluster_size,
-                silhouette=silhouette,
-            )
-            result.confidence_scores[endpoint_id] = conf
+        confidences = ConfidenceScorer.for_cluster_assignments(
+            labels,
+            cluster_sizes=counts[inverse.ravel()],
+            probabilities=probabilities,
+            silhouette=silhouette,
+        )
+        result.confidence_scores = dict(zip(endpoint_ids, confidences.tolist()))
         
         logger.info(
             f"Clustering complete: {n_clusters} clusters, "
@@ -219,6 +280,105 @@ class EndpointClusterer:
         
         return result
     
+    def _fit_predict(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Run HDBSCAN on every row; returns (labels, probabilities)."""
+        logger.info(
+            f"Running HDBSCAN with min_cluster_size={self.min_cluster_size}, "
+            f"min_samples={self.min_samples}"
+        )
+        
+        self._clusterer = hdbscan.HDBSCAN(
+            min_cluster_size=self.min_cluster_size,
+            min_samples=self.min_samples,
+            cluster_selection_epsilon=self.cluster_selection_epsilon,
+            metric=self.metric,
+            core_dist_n_jobs=-1,  # Use all cores
+        )
+        
+        labels = self._clusterer.fit_predict(X)
+        return labels, self._clusterer.probabilities_
+    
+    def _fit_predict_sampled(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Run HDBSCAN on a stratified sample and assign the remaining rows.
+        
+        min_cluster_size is scaled by the sampling ratio (at least
+        _MIN_SAMPLED_CLUSTER_SIZE) so clusters keep roughly the same
+        minimum population.
+        
+        Returns:
+            Tuple of (labels, probabilities, sample size); probabilities of
+            predicted rows are approximate_predict strengths
+        """
+        rng = np.random.default_rng(self.random_state)
+        sample = self._stratified_sample(X, rng)
+        ratio = len(sample) / len(X)
+        min_cluster_size = max(
+            _MIN_SAMPLED_CLUSTER_SIZE, int(round(self.min_cluster_size * ratio))
+        )
+        min_samples = min(self.min_samples, min_cluster_size)
+        
+        logger.info(
+            f"Running HDBSCAN on {len(sample)} of {len(X)} endpoints with "
+            f"min_cluster_size={min_cluster_size}, min_samples={min_samples}"
+        )
+        
+        self._clusterer = hdbscan.HDBSCAN(
+            min_cluster_size=min_cluster_size,
+            min_samples=min_samples,
+            cluster_selection_epsilon=self.cluster_selection_epsilon,
+            metric=self.metric,
+            core_dist_n_jobs=-1,  # Use all cores
+            prediction_data=True,
+        )
+        self._clusterer.fit(X[sample])
+        
+        labels = np.empty(len(X), dtype=self._clusterer.labels_.dtype)
+        probabilities = np.empty(len(X), dtype=np.float64)
+        labels[sample] = self._clusterer.labels_
+        probabilities[sample] = self._clusterer.probabilities_
+        
+        rest = np.setdiff1d(np.arange(len(X)), sample, assume_unique=True)
+        for start in range(0, len(rest), _PREDICT_CHUNK):
+            chunk = rest[start:start + _PREDICT_CHUNK]
+            chunk_labels, strengths = hdbscan.approximate_predict(self._clusterer, X[chunk])
+            labels[chunk] = chunk_labels
+            probabilities[chunk] = strengths
+        
+        return labels, probabilities, len(sample)
+    
+    def _stratified_sample(self, X: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """
+        Pick about sample_size row indices, stratified over MiniBatchKMeans cells.
+        
+        Each cell contributes its proportional share, and at least
+        _MIN_PER_STRATUM rows (or all of them if it has fewer).
+        
+        Returns:
+            Sorted row indices
+        """
+        n = len(X)
+        n_strata = min(self.n_strata, self.sample_size, n)
+        strata = MiniBatchKMeans(
+            n_clusters=n_strata,
+            batch_size=4096,
+            n_init=1,
+            random_state=self.random_state,
+        ).fit_predict(X)
+        
+        counts = np.bincount(strata, minlength=n_strata)
+        quotas = np.maximum(
+            np.floor(counts * (self.sample_size / n)),
+            np.minimum(counts, _MIN_PER_STRATUM),
+        ).astype(np.int64)
+        
+        # Shuffle, group by stratum, and keep the first quota rows of each
+        order = rng.permutation(n)
+        grouped = order[np.argsort(strata[order], kind="stable")]
+        starts = np.cumsum(counts) - counts
+        rank = np.arange(n) - np.repeat(starts, counts)
+        return np.sort(grouped[rank < np.repeat(quotas, counts)])
+    
     def apply_to_store(
         self,
         store: SketchStore,
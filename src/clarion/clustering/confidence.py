@@ -29,8 +29,23 @@ class ConfidenceScorer:
     - <0.4 = Very low confidence
     """
     
+    # Defaults shared by the scalar scorers and for_cluster_assignments()
+    DISTANCE_THRESHOLD = 2.0         # Distance at which confidence reaches 0
+    MIN_CLUSTER_SIZE = 10            # Smaller clusters are scored size / min
+    MAX_CLUSTER_SIZE = 1000          # Larger clusters may be heterogeneous
+    SMALL_CLUSTER_CAP = 0.7          # Ceiling for clusters below the minimum
+    LARGE_CLUSTER_CONFIDENCE = 0.9
+    NOISE_CONFIDENCE = 0.2
+    DEFAULT_CONFIDENCE = 0.5         # When no metric is available
+    WEIGHTS = {
+        'probability': 0.4,
+        'distance': 0.3,
+        'size': 0.2,
+        'silhouette': 0.1,
+    }
+    
     @staticmethod
-    def from_distance(distance: float, threshold: float = 2.0) -> float:
+    def from_distance(distance: float, threshold: float = DISTANCE_THRESHOLD) -> float:
         """
         Calculate confidence from distance to cluster centroid.
         
@@ -67,7 +82,11 @@ class ConfidenceScorer:
         return float(max(0.0, min(1.0, probability)))
     
     @staticmethod
-    def from_cluster_size(cluster_size: int, min_size: int = 10, max_size: int = 1000) -> float:
+    def from_cluster_size(
+        cluster_size: int,
+        min_size: int = MIN_CLUSTER_SIZE,
+        max_size: int = MAX_CLUSTER_SIZE,
+    ) -> float:
         """
         Calculate confidence based on cluster size.
         
@@ -83,11 +102,11 @@ class ConfidenceScorer:
         """
         if cluster_size < min_size:
             # Very small clusters are less reliable
-            return float(min(0.7, cluster_size / min_size))
+            return float(min(ConfidenceScorer.SMALL_CLUSTER_CAP, cluster_size / min_size))
         
         if cluster_size >= max_size:
             # Very large clusters might be too heterogeneous
-            return 0.9
+            return ConfidenceScorer.LARGE_CLUSTER_CONFIDENCE
         
         # Medium-sized clusters get high confidence
         return 1.0
@@ -120,7 +139,7 @@ class ConfidenceScorer:
         """
         Combine multiple confidence scores into a single score.
         
-        Uses weighted average with default weights:
+        Uses weighted average with default weights (WEIGHTS):
         - probability: 0.4 (highest weight - most reliable)
         - distance: 0.3
         - size: 0.2
@@ -136,35 +155,27 @@ class ConfidenceScorer:
         Returns:
             Combined confidence score (0.0-1.0)
         """
+        defaults = ConfidenceScorer.WEIGHTS
         if weights is None:
-            weights = {
-                'probability': 0.4,
-                'distance': 0.3,
-                'size': 0.2,
-                'silhouette': 0.1,
-            }
+            weights = defaults
         
         scores = []
         total_weight = 0.0
         
-        if probability_confidence is not None:
-            scores.append(('probability', probability_confidence, weights.get('probability', 0.4)))
-            total_weight += weights.get('probability', 0.4)
-        
-        if distance_confidence is not None:
-            scores.append(('distance', distance_confidence, weights.get('distance', 0.3)))
-            total_weight += weights.get('distance', 0.3)
-        
-        if size_confidence is not None:
-            scores.append(('size', size_confidence, weights.get('size', 0.2)))
-            total_weight += weights.get('size', 0.2)
-        
-        if silhouette_confidence is not None:
-            scores.append(('silhouette', silhouette_confidence, weights.get('silhouette', 0.1)))
-            total_weight += weights.get('silhouette', 0.1)
+        for name, confidence in (
+            ('probability', probability_confidence),
+            ('distance', distance_confidence),
+            ('size', size_confidence),
+            ('silhouette', silhouette_confidence),
+        ):
+            if confidence is not None:
+                weight = weights.get(name, defaults[name])
+                scores.append((name, confidence, weight))
+                total_weight += weight
         
         if not scores or total_weight == 0:
-            return 0.5  # Default to medium confidence if no scores provided
+            # Default to medium confidence if no scores provided
+            return ConfidenceScorer.DEFAULT_CONFIDENCE
         
         # Weighted average
         weighted_sum = sum(score * weight for _, score, weight in scores)
@@ -213,14 +224,13 @@ class ConfidenceScorer:
             probability: HDBSCAN membership probability
             cluster_size: Size of cluster
             silhouette: Cluster silhouette score
-            distance_threshold: Threshold for distance-based confidence
             
         Returns:
             Confidence score (0.0-1.0)
         """
         if cluster_id == -1:
             # Noise cluster always has low confidence
-            return 0.2
+            return ConfidenceScorer.NOISE_CONFIDENCE
         
         confidences = {}
         
@@ -237,7 +247,7 @@ class ConfidenceScorer:
             confidences['silhouette'] = ConfidenceScorer.from_silhouette_score(silhouette)
         
         if not confidences:
-            return 0.5  # Default if no metrics available
+            return ConfidenceScorer.DEFAULT_CONFIDENCE  # Default if no metrics available
         
         # Use combined if multiple metrics, otherwise use the single one
         if len(confidences) > 1:
@@ -249,6 +259,82 @@ class ConfidenceScorer:
             )
         else:
             return list(confidences.values())[0]
+
+    @staticmethod
+    def for_cluster_assignments(
+        cluster_ids: np.ndarray,
+        distances: Optional[np.ndarray] = None,
+        cluster_sizes: Optional[np.ndarray] = None,
+        probabilities: Optional[np.ndarray] = None,
+        silhouette: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Vectorized for_cluster_assignment() over arrays of assignments.
+        
+        Produces the same scores as calling for_cluster_assignment() for
+        each element. NaN in distances, cluster_sizes or probabilities
+        marks that metric as unavailable for the element.
+        
+        Args:
+            cluster_ids: Cluster IDs (-1 for noise)
+            distances: Distance to each assigned centroid
+            cluster_sizes: Size of each assigned cluster
+            probabilities: HDBSCAN membership probability per element
+            silhouette: Cluster silhouette score (shared by all elements)
+            
+        Returns:
+            Confidence scores (0.0-1.0), one per element
+        """
+        cs = ConfidenceScorer
+        weights = cs.WEIGHTS
+        cluster_ids = np.asarray(cluster_ids)
+        n = len(cluster_ids)
+        
+        # (scores, weight) in the order combined() accumulates them
+        parts = []
+        if probabilities is not None:
+            probabilities = np.asarray(probabilities, dtype=np.float64)
+            parts.append((np.clip(probabilities, 0.0, 1.0), weights['probability']))
+        if distances is not None:
+            # from_distance() with the default threshold
+            distances = np.asarray(distances, dtype=np.float64)
+            threshold = cs.DISTANCE_THRESHOLD
+            distance_confidence = np.where(
+                distances > threshold, 0.0, np.maximum(0.0, 1.0 - distances / threshold)
+            )
+            parts.append((
+                np.where(np.isnan(distances), np.nan, distance_confidence),
+                weights['distance'],
+            ))
+        if cluster_sizes is not None:
+            # from_cluster_size() with the default min_size and max_size
+            sizes = np.asarray(cluster_sizes, dtype=np.float64)
+            size_confidence = np.where(
+                sizes < cs.MIN_CLUSTER_SIZE,
+                np.minimum(cs.SMALL_CLUSTER_CAP, sizes / cs.MIN_CLUSTER_SIZE),
+                np.where(sizes >= cs.MAX_CLUSTER_SIZE, cs.LARGE_CLUSTER_CONFIDENCE, 1.0),
+            )
+            parts.append((np.where(np.isnan(sizes), np.nan, size_confidence), weights['size']))
+        if silhouette is not None:
+            parts.append((np.full(n, cs.from_silhouette_score(silhouette)), weights['silhouette']))
+        
+        count = np.zeros(n, dtype=np.int64)
+        single = np.full(n, cs.DEFAULT_CONFIDENCE)  # Default if no metrics available
+        weighted_sum = np.zeros(n)
+        total_weight = np.zeros(n)
+        for scores, weight in parts:
+            available = ~np.isnan(scores)
+            count += available
+            single = np.where(available, scores, single)
+            weighted_sum = np.where(available, weighted_sum + scores * weight, weighted_sum)
+            total_weight = np.where(available, total_weight + weight, total_weight)
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            combined = np.clip(weighted_sum / total_weight, 0.0, 1.0)
+        confidence = np.where(count > 1, combined, single)
+        
+        # Noise cluster always has low confidence
+        return np.where(cluster_ids == -1, cs.NOISE_CONFIDENCE, confidence)
     
     @staticmethod
     def for_sgt_assignment(
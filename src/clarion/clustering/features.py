@@ -315,15 +315,22 @@ class FeatureExtractor:
         - SIP: 5060 (UDP/TCP), 5061 (TLS)
         - RTP: 16384-32767 (dynamic range)
         
+        Uses the endpoint's tracked top ports (heavy hitters). Sketches
+        without port data (e.g. restored from summary counts) fall back
+        to a device-type heuristic.
+        
         Returns: 0.0 (no VoIP ports) to 1.0 (all traffic on VoIP ports)
         """
-        # VoIP ports: SIP (5060, 5061) and RTP range (16384-32767)
-        voip_ports = {5060, 5061}
-        rtp_min, rtp_max = 16384, 32767
-        
-        # We don't have port frequency breakdown in the sketch easily accessible
-        # So we'll use a heuristic: if device_type is phone and has low peer diversity,
-        # it's likely an IP phone using VoIP ports
+        total = sketch.top_ports.total()
+        if total > 0:
+            voip_flows = sum(
+                count for port_key, count in sketch.top_ports.top_k()
+                if self._is_voip_port(port_key)
+            )
+            return min(1.0, voip_flows / total)
+        
+        # No port breakdown available: if device_type is phone and has low
+        # peer diversity, it's likely an IP phone using VoIP ports
         device_type = (sketch.device_type or "").lower()
         is_phone_like = device_type in ("phone", "mobile", "voip", "ip-phone")
         
@@ -339,6 +346,16 @@ class FeatureExtractor:
         else:
             return 0.2  # Low likelihood (probably mobile phone)
     
+    @staticmethod
+    def _is_voip_port(port_key: str) -> bool:
+        """Check if a port key ("udp/5060", "listen:udp/20000") is SIP or RTP."""
+        # VoIP ports: SIP (5060, 5061) and RTP range (16384-32767)
+        port = port_key.rsplit("/", 1)[-1]
+        if not port.isdigit():
+            return False
+        port_num = int(port)
+        return port_num in (5060, 5061) or 16384 <= port_num <= 32767
+    
     def _calc_stationary_pattern(self, sketch: EndpointSketch) -> float:
         """
         Calculate stationary pattern score.
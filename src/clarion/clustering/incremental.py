@@ -3,7 +3,9 @@ Incremental Clustering - Fast path for assigning new endpoints to existing clust
 
 This module provides fast assignment of new endpoints to existing clusters
 without running full clustering, by using stored cluster centroids and
-nearest-neighbor assignment.
+nearest-neighbor assignment. Centroids and the feature scaler used during
+clustering are persisted together as a CentroidModel, so new endpoints are
+normalized exactly as the clustered ones were.
 """
 
 from __future__ import annotations
@@ -11,10 +13,12 @@ from __future__ import annotations
 from typing import Dict, List, Optional, Tuple, Any
 import logging
 import numpy as np
+from sklearn.preprocessing import StandardScaler
 
 from clarion.sketches import EndpointSketch
 from clarion.clustering.features import FeatureExtractor, FeatureVector
 from clarion.clustering.clusterer import ClusterResult
+from clarion.clustering.centroid_model import CentroidModel
 from clarion.clustering.confidence import ConfidenceScorer
 from clarion.storage import get_database
 
@@ -27,7 +31,7 @@ class IncrementalClusterer:
     
     Key features:
     - Fast assignment (<100ms per endpoint)
-    - Uses stored cluster centroids
+    - Uses stored cluster centroids and the persisted feature scaler
     - Calculates distance-based confidence scores
     - Handles noise/outliers (assigns to noise cluster if too far)
     
@@ -54,7 +58,8 @@ class IncrementalClusterer:
         Args:
             feature_extractor: FeatureExtractor instance (creates new if None)
             db: Database instance (uses get_database() if None)
-            max_distance_threshold: Maximum distance to assign (else assign to noise cluster -1)
+            max_distance_threshold: Maximum distance to assign (else assign to noise cluster -1),
+                                    in normalized feature space when a CentroidModel is loaded
         """
         self.feature_extractor = feature_extractor or FeatureExtractor()
         self.db = db or get_database()
@@ -64,14 +69,31 @@ class IncrementalClusterer:
         self._centroids: Dict[int, np.ndarray] = {}
         self._centroid_metadata: Dict[int, Dict[str, Any]] = {}
         self._loaded = False
+        
+        # Scaler (mean, scale) the centroids were built with; None = raw features
+        self._scaler: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self.model_version: Optional[int] = None
+        # In-memory model and nearest-neighbour index, rebuilt after updates
+        self._model: Optional[CentroidModel] = None
     
     def load_centroids(self) -> int:
         """
-        Load all cluster centroids from database.
+        Load cluster centroids from database.
+        
+        Uses the latest persisted CentroidModel (scaler plus normalized
+        centroids, one query) when there is one; otherwise falls back to
+        the cluster_centroids rows, compared against raw features.
         
         Returns:
             Number of centroids loaded
         """
+        stored = self.db.get_latest_cluster_model()
+        if stored:
+            model = CentroidModel.from_bytes(stored['model_data'], version=stored['version'])
+            self._set_model(model)
+            logger.info(f"Loaded centroid model v{model.version} with {model.n_clusters} centroids")
+            return model.n_clusters
+        
         centroids = self.db.list_all_centroids()
         
         self._centroids = {}
@@ -90,9 +112,41 @@ class IncrementalClusterer:
                 }
         
         self._loaded = True
+        self._scaler = None
+        self.model_version = None
+        self._model = None
         logger.info(f"Loaded {len(self._centroids)} cluster centroids")
         return len(self._centroids)
     
+    def _set_model(self, model: CentroidModel) -> None:
+        """Make a CentroidModel the in-memory centroid set."""
+        self._centroids = {}
+        self._centroid_metadata = {}
+        for position, cluster_id in enumerate(model.cluster_ids.tolist()):
+            self._centroids[cluster_id] = model.centroids[position]
+            self._centroid_metadata[cluster_id] = {
+                'sgt_value': model.sgt_value(position),
+                'member_count': model.member_count(position),
+            }
+        
+        self._scaler = (model.scaler_mean, model.scaler_scale)
+        self.model_version = model.version
+        self._model = model
+        self._loaded = True
+    
+    def _current_model(self) -> CentroidModel:
+        """Get the in-memory model, rebuilding it after centroid updates."""
+        if self._model is None:
+            mean, scale = self._scaler or (None, None)
+            self._model = CentroidModel.from_centroids(
+                self._centroids,
+                self._centroid_metadata,
+                scaler_mean=mean,
+                scaler_scale=scale,
+                version=self.model_version,
+            )
+        return self._model
+    
     def assign_endpoint(
         self,
         sketch: EndpointSketch,
@@ -111,98 +165,55 @@ class IncrementalClusterer:
             - confidence: Confidence score (0.0-1.0)
             - distance: Distance to nearest centroid
             - sgt_value: SGT value of assigned cluster (if available)
+            - endpoint_id: Endpoint ID of the sketch
             - distances: (optional) Dict of cluster_id -> distance
         """
-        if not self._loaded:
-            self.load_centroids()
-        
-        if not self._centroids:
-            logger.warning("No centroids available for incremental assignment")
-            return {
-                'cluster_id': -1,
-                'confidence': 0.0,
-                'distance': float('inf'),
-                'sgt_value': None,
-            }
-        
-        # Extract features from sketch
-        feature_vector = self.feature_extractor.extract(sketch)
-        feature_array = feature_vector.to_array()
-        
-        # Calculate distances to all centroids
-        distances = {}
-        for cluster_id, centroid in self._centroids.items():
-            distance = np.linalg.norm(feature_array - centroid)
-            distances[cluster_id] = float(distance)
-        
-        # Find nearest cluster
-        nearest_cluster_id = min(distances.keys(), key=lambda k: distances[k])
-        min_distance = distances[nearest_cluster_id]
-        
-        # Assign to noise cluster if too far
-        if min_distance > self.max_distance_threshold:
-            cluster_id = -1
-            confidence = 0.0
-        else:
-            cluster_id = nearest_cluster_id
-            # Use ConfidenceScorer for consistent confidence calculation
-            cluster_size = self._centroid_metadata.get(cluster_id, {}).get('member_count')
-            confidence = ConfidenceScorer.for_cluster_assignment(
-                cluster_id=cluster_id,
-                distance=min_distance,
-                cluster_size=cluster_size,
-            )
-        
-        # Get SGT value if available
-        sgt_value = None
-        if cluster_id in self._centroid_metadata:
-            sgt_value = self._centroid_metadata[cluster_id].get('sgt_value')
-        
-        result = {
-            'cluster_id': cluster_id,
-            'confidence': confidence,
-            'distance': min_distance,
-            'sgt_value': sgt_value,
-        }
-        
-        if return_distances:
-            result['distances'] = distances
-        
-        return result
+        return self._assign_batch([sketch], return_distances=return_distances)[0]
     
     def assign_endpoints_bulk(
         self,
         sketches: List[EndpointSketch],
         store_assignments: bool = True,
         update_centroids: bool = True,
+        vectorized: bool = True,
     ) -> List[Dict[str, Any]]:
         """
         Assign multiple endpoints in bulk.
         
+        The vectorized path builds one feature matrix for the batch, finds
+        every nearest centroid in a single matrix operation (or a BallTree
+        query when there are many centroids) and writes all assignments in
+        one transaction.
+        
         Args:
             sketches: List of EndpointSketch objects
             store_assignments: If True, store assignments in database
             update_centroids: If True, update centroids after assignment
+            vectorized: If False, assign one endpoint at a time via
+                       assign_endpoint()
             
         Returns:
             List of assignment dicts (same format as assign_endpoint)
         """
-        assignments = []
-        for sketch in sketches:
-            assignment = self.assign_endpoint(sketch)
-            assignment['endpoint_id'] = sketch.endpoint_id
-            assignments.append(assignment)
+        if vectorized:
+            assignments = self._assign_batch(sketches)
+        else:
+            assignments = []
+            for sketch in sketches:
+                assignment = self.assign_endpoint(sketch)
+                assignment['endpoint_id'] = sketch.endpoint_id
+                assignments.append(assignment)
         
-        # Store assignments in database
+        # Store assignments in database (noise assignments are not stored)
         if store_assignments:
-            for assignment in assignments:
-                if assignment['cluster_id'] != -1:  # Don't store noise assignments
-                    self.db.assign_endpoint_to_cluster(
-                        endpoint_id=assignment['endpoint_id'],
-                        cluster_id=assignment['cluster_id'],
-                        confidence=assignment['confidence'],
-                        assigned_by='incremental',
-                    )
+            self.db.assign_endpoints_to_clusters_bulk(
+                [
+                    (a['endpoint_id'], a['cluster_id'], a['confidence'])
+                    for a in assignments
+                    if a['cluster_id'] != -1
+                ],
+                assigned_by='incremental',
+            )
         
         # Update centroids if requested
         if update_centroids:
@@ -211,6 +222,72 @@ class IncrementalClusterer:
         logger.info(f"Assigned {len(assignments)} endpoints incrementally")
         return assignments
     
+    def _assign_batch(
+        self,
+        sketches: List[EndpointSketch],
+        return_distances: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Assign a batch of sketches to their nearest centroids.
+        
+        Features are extracted into one matrix, normalized with the model's
+        scaler and matched against the model's nearest-neighbour index.
+        """
+        if not self._loaded:
+            self.load_centroids()
+        
+        if not self._centroids:
+            logger.warning("No centroids available for incremental assignment")
+            return [
+                {
+                    'cluster_id': -1,
+                    'confidence': 0.0,
+                    'distance': float('inf'),
+                    'sgt_value': None,
+                    'endpoint_id': sketch.endpoint_id,
+                }
+                for sketch in sketches
+            ]
+        if not sketches:
+            return []
+        
+        model = self._current_model()
+        features = model.transform(np.array([
+            self.feature_extractor.extract(sketch).to_array() for sketch in sketches
+        ]))
+        if features.shape[1] != model.n_features:
+            raise ValueError(
+                f"Centroids have {model.n_features} features, "
+                f"extractor produced {features.shape[1]}"
+            )
+        
+        positions, distances = model.nearest(features)
+        nearest_ids = model.cluster_ids[positions]
+        sizes = np.where(model.member_counts < 0, np.nan, model.member_counts)[positions]
+        confidences = ConfidenceScorer.for_cluster_assignments(nearest_ids, distances, sizes)
+        
+        # Assign to noise cluster if too far
+        too_far = distances > self.max_distance_threshold
+        assigned_ids = np.where(too_far, -1, nearest_ids)
+        confidences = np.where(too_far, 0.0, confidences)
+        
+        assignments = []
+        for row, (sketch, cluster_id, position) in enumerate(
+            zip(sketches, assigned_ids.tolist(), positions.tolist())
+        ):
+            assignment = {
+                'cluster_id': cluster_id,
+                'confidence': float(confidences[row]),
+                'distance': float(distances[row]),
+                'sgt_value': model.sgt_value(position) if cluster_id != -1 else None,
+                'endpoint_id': sketch.endpoint_id,
+            }
+            if return_distances:
+                all_distances = np.linalg.norm(features[row] - model.centroids, axis=1)
+                assignment['distances'] = dict(zip(model.cluster_ids.tolist(), all_distances.tolist()))
+            assignments.append(assignment)
+        return assignments
+    
     def assign_and_store(
         self,
         sketch: EndpointSketch,
@@ -254,24 +331,7 @@ class IncrementalClusterer:
         Args:
             cluster_id: Cluster ID to update
         """
-        # Get all endpoints in this cluster from database
-        conn = self.db._get_connection()
-        cursor = conn.execute("""
-            SELECT endpoint_id FROM cluster_assignments 
-            WHERE cluster_id = ?
-        """, (cluster_id,))
-        endpoint_ids = [row[0] for row in cursor.fetchall()]
-        
-        if not endpoint_ids:
-            return
-        
-        # Get sketches for these endpoints (would need to load from database)
-        # For MVP, we'll use a simpler approach: keep existing centroid
-        # In full implementation, we'd recalculate from all member sketches
-        
-        # For now, just update the member count
-        self.db.update_centroid_member_count(cluster_id, len(endpoint_ids))
-        logger.debug(f"Updated member count for cluster {cluster_id} to {len(endpoint_ids)}")
+        self._update_member_counts([cluster_id])
     
     def _update_centroids_after_assignment(self, assignments: List[Dict[str, Any]]) -> None:
         """
@@ -285,8 +345,42 @@ class IncrementalClusterer:
             if assignment['cluster_id'] != -1:
                 clusters_to_update.add(assignment['cluster_id'])
         
-        for cluster_id in clusters_to_update:
-            self._update_centroid_for_cluster(cluster_id)
+        self._update_member_counts(sorted(clusters_to_update))
+    
+    def _update_member_counts(self, cluster_ids: List[int]) -> None:
+        """
+        Refresh member counts from cluster_assignments.
+        
+        Centroids are kept as they are (recalculating them would need
+        every member's sketch). Counts go to the cluster_centroids rows,
+        the cache and, when a CentroidModel is loaded, the stored model
+        version, which is patched in place so a reload keeps them.
+        
+        Args:
+            cluster_ids: Cluster IDs to refresh
+        """
+        conn = self.db._get_connection()
+        counts = {}
+        for cluster_id in cluster_ids:
+            count = conn.execute("""
+                SELECT COUNT(*) FROM cluster_assignments 
+                WHERE cluster_id = ?
+            """, (cluster_id,)).fetchone()[0]
+            if count:
+                counts[cluster_id] = count
+        
+        if not counts:
+            return
+        
+        for cluster_id, count in counts.items():
+            self.db.update_centroid_member_count(cluster_id, count)
+            if cluster_id in self._centroid_metadata:
+                self._centroid_metadata[cluster_id]['member_count'] = count
+            logger.debug(f"Updated member count for cluster {cluster_id} to {count}")
+        self._model = None
+        
+        if self.model_version is not None:
+            self.db.update_cluster_model(self.model_version, self._current_model().to_bytes())
     
     def update_centroid(
         self,
@@ -298,19 +392,20 @@ class IncrementalClusterer:
         """
         Update a cluster centroid in database and cache.
         
+        When a CentroidModel is loaded, the updated centroid set is stored
+        as a new model version (a stored model takes precedence over the
+        cluster_centroids rows on reload); otherwise only the centroid
+        row is written.
+        
         Args:
             cluster_id: Cluster ID
-            feature_vector: New centroid feature vector
+            feature_vector: New centroid feature vector (in the loaded
+                            model's normalized feature space)
             sgt_value: Optional SGT value
             member_count: Optional member count
         """
-        # Store in database
-        self.db.store_cluster_centroid(
-            cluster_id=cluster_id,
-            feature_vector=feature_vector,
-            sgt_value=sgt_value,
-            member_count=member_count or 0,
-        )
+        if not self._loaded:
+            self.load_centroids()
         
         # Update cache
         self._centroids[cluster_id] = np.array(feature_vector, dtype=np.float32)
@@ -318,6 +413,18 @@ class IncrementalClusterer:
             self._centroid_metadata[cluster_id] = {}
         self._centroid_metadata[cluster_id]['sgt_value'] = sgt_value
         self._centroid_metadata[cluster_id]['member_count'] = member_count or 0
+        self._model = None
+        
+        # Store in database
+        if self.model_version is not None:
+            self._store_model(self._current_model())
+        else:
+            self.db.store_cluster_centroid(
+                cluster_id=cluster_id,
+                feature_vector=feature_vector,
+                sgt_value=sgt_value,
+                member_count=member_count or 0,
+            )
         
         logger.info(f"Updated centroid for cluster {cluster_id}")
     
@@ -329,7 +436,8 @@ class IncrementalClusterer:
             cluster_id: Cluster ID
             
         Returns:
-            Centroid feature vector as numpy array, or None if not found
+            Centroid feature vector as numpy array (normalized when a
+            CentroidModel is loaded), or None if not found
         """
         if not self._loaded:
             self.load_centroids()
@@ -347,23 +455,32 @@ class IncrementalClusterer:
         self._centroids: Dict[int, np.ndarray] = {}
         self._centroid_metadata: Dict[int, Dict[str, Any]] = {}
         self._loaded = False
+        self._scaler = None
+        self.model_version = None
+        self._model = None
     
     def store_centroids_from_clustering(
         self,
         cluster_result: ClusterResult,
         feature_vectors: List[FeatureVector],
         sgt_mapping: Optional[Dict[int, int]] = None,
+        scaler: Optional[StandardScaler] = None,
     ) -> int:
         """
         Store cluster centroids from a full clustering result.
         
         This should be called after running full clustering to store centroids
-        for future incremental assignments.
+        for future incremental assignments. The scaler and the normalized
+        centroids are persisted together as a new CentroidModel version and
+        become the in-memory model.
         
         Args:
             cluster_result: ClusterResult from full clustering
             feature_vectors: FeatureVector objects (one per endpoint)
             sgt_mapping: Optional dict mapping cluster_id -> sgt_value
+            scaler: Scaler fitted during clustering; if None, one is fitted
+                    on feature_vectors exactly as FeatureExtractor.to_matrix
+                    does (skipped when the extractor does not normalize)
             
         Returns:
             Number of centroids stored
@@ -372,41 +489,37 @@ class IncrementalClusterer:
             raise ValueError("Feature vectors must match endpoint IDs")
         
         # Build feature matrix - FeatureVector has to_array() method
-        feature_matrix = np.array([fv.to_array() for fv in feature_vectors], dtype=np.float32)
-        
-        # Calculate centroids for each cluster
-        stored_count = 0
-        # Convert numpy int64 to Python int for SQLite compatibility
-        unique_cluster_ids = set(int(cid) for cid in set(cluster_result.labels))
-        for cluster_id in unique_cluster_ids:
-            if cluster_id == -1:
-                continue  # Skip noise cluster
-            
-            # Get members of this cluster
-            member_indices = np.where(cluster_result.labels == cluster_id)[0]
-            if len(member_indices) == 0:
-                continue
-            
-            # Calculate centroid (mean of all members)
-            cluster_features = feature_matrix[member_indices]
-            centroid = np.mean(cluster_features, axis=0)
-            # Convert numpy array to Python list of floats for JSON serialization
-            centroid_list = [float(x) for x in centroid.tolist()]
-            
-            # Get SGT value if mapping provided
-            sgt_value = None
-            if sgt_mapping:
-                sgt_value = sgt_mapping.get(cluster_id)
-            
-            # Store centroid
-            self.update_centroid(
-                cluster_id=cluster_id,
-                feature_vector=centroid_list,
-                sgt_value=sgt_value,
-                member_count=len(member_indices),
-            )
-            stored_count += 1
+        feature_matrix = np.array([fv.to_array() for fv in feature_vectors])
+        if scaler is None and self.feature_extractor.normalize:
+            scaler = StandardScaler().fit(feature_matrix)
+        
+        model = CentroidModel.fit(
+            feature_matrix,
+            cluster_result.labels,
+            scaler_mean=scaler.mean_ if scaler is not None else None,
+            scaler_scale=scaler.scale_ if scaler is not None else None,
+            sgt_mapping=sgt_mapping,
+        )
         
-        logger.info(f"Stored {stored_count} cluster centroids from clustering result")
-        return stored_count
-
+        self._store_model(model)
+        
+        logger.info(
+            f"Stored {model.n_clusters} cluster centroids from clustering result "
+            f"as model v{model.version}"
+        )
+        return model.n_clusters
+    
+    def _store_model(self, model: CentroidModel) -> None:
+        """Persist a model as a new version and make it the in-memory model."""
+        # Convert numpy values to Python types for SQLite/JSON
+        centroids = [
+            {
+                'cluster_id': int(cluster_id),
+                'feature_vector': [float(x) for x in model.centroids[position].tolist()],
+                'sgt_value': model.sgt_value(position),
+                'member_count': model.member_count(position),
+            }
+            for position, cluster_id in enumerate(model.cluster_ids.tolist())
+        ]
+        model.version = self.db.store_cluster_model(model.to_bytes(), centroids)
+        self._set_model(model)
@@ -45,6 +45,60 @@ class DataFiles:
         return missing
 
 
+@dataclass
+class DatabaseSettings:
+    """
+    SQLite connection profile, applied to every connection at open time.
+    
+    Defaults favour concurrent API reads alongside collector writes:
+    WAL lets readers proceed while a writer commits, and synchronous=NORMAL
+    only fsyncs at checkpoints (still durable against application crashes).
+    """
+    
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    mmap_size: int = 256 * 1024 * 1024       # Bytes of the DB file to memory-map
+    cache_size_kb: int = 64 * 1024           # Page cache per connection (KiB)
+    temp_store: str = "MEMORY"
+    busy_timeout_ms: int = 5000              # Wait this long on a locked DB
+    maintenance_interval_seconds: int = 300  # WAL checkpoint + optimize (0 = off)
+    netflow_retention_days: int = 30         # Applied by maintenance (0 = keep all)
+    
+    JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+    SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+    TEMP_STORES = ("DEFAULT", "FILE", "MEMORY")
+    
+    def __post_init__(self):
+        """Normalize and validate values (they are interpolated into PRAGMAs)."""
+        self.journal_mode = self.journal_mode.upper()
+        self.synchronous = self.synchronous.upper()
+        self.temp_store = self.temp_store.upper()
+        if self.journal_mode not in self.JOURNAL_MODES:
+            raise ValueError(f"Invalid journal_mode: {self.journal_mode}")
+        if self.synchronous not in self.SYNCHRONOUS_MODES:
+            raise ValueError(f"Invalid synchronous mode: {self.synchronous}")
+        if self.temp_store not in self.TEMP_STORES:
+            raise ValueError(f"Invalid temp_store: {self.temp_store}")
+    
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        """Create settings from CLARION_DB_* environment variables."""
+        settings = {}
+        for name, env_var, cast in (
+            ("journal_mode", "CLARION_DB_JOURNAL_MODE", str),
+            ("synchronous", "CLARION_DB_SYNCHRONOUS", str),
+            ("mmap_size", "CLARION_DB_MMAP_SIZE", int),
+            ("cache_size_kb", "CLARION_DB_CACHE_SIZE_KB", int),
+            ("temp_store", "CLARION_DB_TEMP_STORE", str),
+            ("busy_timeout_ms", "CLARION_DB_BUSY_TIMEOUT_MS", int),
+            ("maintenance_interval_seconds", "CLARION_DB_MAINTENANCE_INTERVAL", int),
+            ("netflow_retention_days", "CLARION_DB_NETFLOW_RETENTION_DAYS", int),
+        ):
+            if value := os.environ.get(env_var):
+                settings[name] = cast(value)
+        return cls(**settings)
+
+
 @dataclass
 class ClarionConfig:
     """Main configuration for Clarion."""
@@ -72,6 +126,9 @@ class ClarionConfig:
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     
+    # Database settings
+    database: DatabaseSettings = field(default_factory=DatabaseSettings)
+    
     @classmethod
     def from_env(cls) -> "ClarionConfig":
         """Create config from environment variables."""
@@ -97,6 +154,8 @@ class ClarionConfig:
         
         if api_port := os.environ.get("CLARION_API_PORT"):
             config.api_port = int(api_port)
+        
+        config.database = DatabaseSettings.from_env()
             
         return config
 
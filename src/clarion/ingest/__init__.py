@@ -8,6 +8,7 @@ Key components:
 - ClarionDataset: Container for all data tables
 - SketchBuilder: Convert flows to EndpointSketches
 - SketchStore: In-memory storage for sketches
+- decode_flow_batch: Decode columnar NetFlow batches from collectors
 """
 
 from clarion.ingest.loader import (
@@ -20,6 +21,11 @@ from clarion.ingest.sketch_builder import (
     SketchStore,
     build_sketches,
 )
+from clarion.ingest.flow_batch import (
+    FlowColumnBatch,
+    decode_flow_batch,
+    encode_flow_batch,
+)
 
 __all__ = [
     "DataLoader",
@@ -28,4 +34,7 @@ __all__ = [
     "SketchBuilder",
     "SketchStore",
     "build_sketches",
+    "FlowColumnBatch",
+    "decode_flow_batch",
+    "encode_flow_batch",
 ]
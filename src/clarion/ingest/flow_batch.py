@@ -0,0 +1,260 @@
+"""
+Columnar NetFlow batch format (collector -> backend).
+
+JSON batches cost an encode per record on the collector and a pydantic
+validation per record on the backend. The columnar format carries a
+batch as fixed-width arrays instead, decoded here with np.frombuffer
+and turned into database rows without per-record objects.
+
+Layout (little-endian unless noted):
+
+    header   <4sBBHII  magic "CNFB", version, flags, reserved,
+                       record count, body length (uncompressed)
+    body     (zlib-compressed when flags & FLAG_ZLIB)
+             one array per column in FLOW_BATCH_COLUMNS order, each
+             `count` values wide. IPv4 addresses are uint32 in network
+             byte order; nullable integers use -1 for NULL; MAC and
+             switch_id columns are int32 indexes into the string
+             table (-1 = NULL)
+             string table: uint32 count, uint32 length, then the
+             strings as UTF-8 joined by NUL
+
+The collector's encoder lives in clarion_collector/flow_batch.py.
+"""
+
+from __future__ import annotations
+
+import socket
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+FLOW_BATCH_MAGIC = b"CNFB"
+FLOW_BATCH_VERSION = 1
+FLOW_BATCH_CONTENT_TYPE = "application/x-clarion-flow-batch"
+FLAG_ZLIB = 0x01
+
+# Upper bounds on a batch, checked before the body is inflated or decoded
+MAX_FLOW_BATCH_RECORDS = 1_000_000
+MAX_FLOW_BATCH_BODY = 64 * 1024 * 1024
+
+_HEADER = struct.Struct("<4sBBHII")
+_STRING_TABLE = struct.Struct("<II")
+
+# Dotted-quad octet strings, indexed by octet value
+_OCTETS = np.array([str(i) for i in range(256)], dtype=object)
+
+# (column, dtype) in wire order
+FLOW_BATCH_COLUMNS = (
+    ("src_ip", ">u4"),
+    ("dst_ip", ">u4"),
+    ("src_port", "<u2"),
+    ("dst_port", "<u2"),
+    ("protocol", "u1"),
+    ("bytes", "<u8"),
+    ("packets", "<u8"),
+    ("flow_start", "<u4"),
+    ("flow_end", "<u4"),
+    ("src_sgt", "<i4"),
+    ("dst_sgt", "<i4"),
+    ("vlan_id", "<i4"),
+    ("src_mac", "<i4"),
+    ("dst_mac", "<i4"),
+    ("switch_id", "<i4"),
+)
+
+_STRING_COLUMNS = ("src_mac", "dst_mac", "switch_id")
+
+
+def _format_ipv4(values: np.ndarray) -> List[str]:
+    """Dotted-quad strings for uint32 addresses, formatting each distinct value once."""
+    unique, inverse = np.unique(values.astype(np.uint32), return_inverse=True)
+    formatted = (
+        _OCTETS[unique >> 24] + "." + _OCTETS[(unique >> 16) & 0xFF] + "."
+        + _OCTETS[(unique >> 8) & 0xFF] + "." + _OCTETS[unique & 0xFF]
+    )
+    return formatted[inverse.reshape(-1)].tolist()
+
+
+def _nullable(values: np.ndarray) -> List[Optional[int]]:
+    """Python ints with -1 mapped to None."""
+    out = values.astype(object)
+    out[values < 0] = None
+    return out.tolist()
+
+
+@dataclass
+class FlowColumnBatch:
+    """A decoded columnar batch (arrays are read-only views of the payload)."""
+
+    columns: Dict[str, np.ndarray]
+    strings: List[str]
+
+    def __len__(self) -> int:
+        return len(self.columns["src_ip"])
+
+    def _strings(self, column: str, default: Optional[str] = None) -> List[Optional[str]]:
+        table = np.array(self.strings + [default], dtype=object)
+        return table[self.columns[column]].tolist()  # -1 selects the default
+
+    def to_rows(self, switch_id: Optional[str] = None) -> List[Tuple]:
+        """
+        Database rows in ClarionDatabase.store_netflow_rows() column order.
+
+        Args:
+            switch_id: Default switch ID for records without one
+        """
+        c = self.columns
+        return list(zip(
+            _format_ipv4(c["src_ip"]),
+            _format_ipv4(c["dst_ip"]),
+            c["src_port"].tolist(),
+            c["dst_port"].tolist(),
+            c["protocol"].tolist(),
+            c["bytes"].tolist(),
+            c["packets"].tolist(),
+            c["flow_start"].tolist(),
+            c["flow_end"].tolist(),
+            self._strings("switch_id", switch_id),
+            _nullable(c["src_sgt"]),
+            _nullable(c["dst_sgt"]),
+            self._strings("src_mac"),
+            self._strings("dst_mac"),
+            _nullable(c["vlan_id"]),
+        ))
+
+
+def decode_flow_batch(data: Union[bytes, bytearray, memoryview]) -> FlowColumnBatch:
+    """
+    Decode a columnar NetFlow batch.
+
+    Args:
+        data: Request body
+
+    Returns:
+        FlowColumnBatch
+
+    Raises:
+        ValueError: If the batch is truncated, corrupt or of an unknown version
+    """
+    view = memoryview(data)
+    if len(view) < _HEADER.size:
+        raise ValueError("Flow batch too short for header")
+    magic, version, flags, _, count, body_length = _HEADER.unpack_from(view)
+    if magic != FLOW_BATCH_MAGIC:
+        raise ValueError(f"Invalid flow batch magic: {bytes(magic)!r}")
+    if version != FLOW_BATCH_VERSION:
+        raise ValueError(f"Unsupported flow batch version: {version}")
+
+    if count > MAX_FLOW_BATCH_RECORDS:
+        raise ValueError(f"Flow batch has {count} records, limit is {MAX_FLOW_BATCH_RECORDS}")
+    if body_length > MAX_FLOW_BATCH_BODY:
+        raise ValueError(f"Flow batch body is {body_length} bytes, limit is {MAX_FLOW_BATCH_BODY}")
+
+    body = view[_HEADER.size:]
+    if flags & FLAG_ZLIB:
+        # Inflate at most one byte past the declared length, so a
+        # compression bomb is caught without materializing it
+        decompressor = zlib.decompressobj()
+        try:
+            inflated = decompressor.decompress(body, body_length + 1)
+        except zlib.error as e:
+            raise ValueError(f"Invalid flow batch compression: {e}") from e
+        if len(inflated) > body_length or decompressor.unconsumed_tail:
+            raise ValueError(f"Flow batch body inflates past {body_length} bytes")
+        if not decompressor.eof or decompressor.unused_data:
+            raise ValueError("Flow batch compressed body is truncated or has trailing data")
+        body = memoryview(inflated)
+    if len(body) != body_length:
+        raise ValueError(f"Flow batch body is {len(body)} bytes, header says {body_length}")
+
+    columns: Dict[str, np.ndarray] = {}
+    offset = 0
+    for name, dtype in FLOW_BATCH_COLUMNS:
+        width = np.dtype(dtype).itemsize * count
+        if offset + width > len(body):
+            raise ValueError(f"Flow batch truncated in column {name}")
+        columns[name] = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+        offset += width
+
+    if offset + _STRING_TABLE.size > len(body):
+        raise ValueError("Flow batch truncated before string table")
+    n_strings, table_length = _STRING_TABLE.unpack_from(body, offset)
+    offset += _STRING_TABLE.size
+    if offset + table_length != len(body):
+        raise ValueError(f"Flow batch string table is {len(body) - offset} bytes, header says {table_length}")
+    try:
+        strings = str(body[offset:], "utf-8").split("\0") if n_strings else []
+    except UnicodeDecodeError as e:
+        raise ValueError(f"Invalid flow batch string table: {e}") from e
+    if len(strings) != n_strings:
+        raise ValueError(f"Flow batch string table has {len(strings)} strings, header says {n_strings}")
+
+    for name in _STRING_COLUMNS:
+        index = columns[name]
+        if count and (index.min() < -1 or index.max() >= n_strings):
+            raise ValueError(f"Flow batch column {name} references a missing string")
+
+    return FlowColumnBatch(columns=columns, strings=strings)
+
+
+def encode_flow_batch(records: Sequence[Dict[str, Any]], compress: bool = True) -> bytes:
+    """
+    Encode NetFlow record dicts as a columnar batch.
+
+    Args:
+        records: Dicts with the /api/netflow/netflow record fields
+        compress: zlib-compress the body
+
+    Returns:
+        Serialized batch
+
+    Raises:
+        ValueError: If an address is not IPv4 or a string contains NUL
+    """
+    strings: Dict[str, int] = {}
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        return strings.setdefault(value, len(strings))
+
+    def ipv4(value: str) -> int:
+        try:
+            return int.from_bytes(socket.inet_aton(value), "big")
+        except (OSError, TypeError) as e:
+            raise ValueError(f"Not an IPv4 address: {value!r}") from e
+
+    def nullable(value: Optional[int]) -> int:
+        return -1 if value is None else value
+
+    converters = {
+        "src_ip": ipv4, "dst_ip": ipv4,
+        "src_sgt": nullable, "dst_sgt": nullable, "vlan_id": nullable,
+        "src_mac": intern, "dst_mac": intern, "switch_id": intern,
+    }
+    parts = []
+    for name, dtype in FLOW_BATCH_COLUMNS:
+        convert = converters.get(name)
+        values = [r.get(name) for r in records]
+        if convert is not None:
+            values = [convert(v) for v in values]
+        parts.append(np.asarray(values, dtype=dtype).tobytes())
+
+    if any("\0" in value for value in strings):
+        raise ValueError("Flow batch strings cannot contain NUL")
+    table = "\0".join(strings).encode("utf-8")
+    parts.append(_STRING_TABLE.pack(len(strings), len(table)))
+    parts.append(table)
+    body = b"".join(parts)
+
+    flags = 0
+    payload = body
+    if compress:
+        flags |= FLAG_ZLIB
+        payload = zlib.compress(body, 1)
+    return _HEADER.pack(FLOW_BATCH_MAGIC, FLOW_BATCH_VERSION, flags, 0, len(records), len(body)) + payload
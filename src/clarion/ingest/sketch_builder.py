@@ -13,6 +13,7 @@ from datetime import datetime
 from typing import Dict, Iterator, List, Optional, Tuple
 import logging
 
+import numpy as np
 import pandas as pd
 
 from clarion.sketches import EndpointSketch
@@ -94,6 +95,17 @@ class SketchBuilder:
     Processes flows and updates sketches for source endpoints.
     Can optionally resolve services by destination IP/port.
     
+    Two build modes are available:
+    - columnar (default): groups flows by src_mac and computes
+      per-endpoint aggregates and sketch updates in bulk
+    - row-by-row: streams each flow through EndpointSketch.record_flow,
+      mirroring how an edge device ingests flows
+    
+    Both modes produce identical SketchStores. The one exception is the
+    heavy-hitter summaries of endpoints with more distinct ports/services
+    than the summary capacity: the columnar path feeds exact per-key
+    totals, so its top-k is at least as accurate as streaming order.
+    
     Example:
         >>> builder = SketchBuilder()
         >>> store = builder.build_from_dataset(dataset)
@@ -118,6 +130,7 @@ class SketchBuilder:
         dataset: ClarionDataset,
         batch_size: int = 10000,
         progress_callback: Optional[callable] = None,
+        columnar: bool = True,
     ) -> SketchStore:
         """
         Build sketches from a ClarionDataset.
@@ -129,6 +142,8 @@ class SketchBuilder:
             dataset: The loaded dataset
             batch_size: Number of flows to process per batch
             progress_callback: Optional callback(processed, total) for progress
+            columnar: Use the vectorized columnar build (default) instead
+                     of processing flows one row at a time
             
         Returns:
             SketchStore with all endpoint sketches
@@ -145,6 +160,16 @@ class SketchBuilder:
         
         logger.info(f"Building sketches from {total_flows:,} flows")
         
+        if columnar:
+            self._build_columnar(
+                flows, store, mac_to_device, batch_size, progress_callback
+            )
+            logger.info(
+                f"Built {len(store)} sketches from {total_flows:,} flows "
+                f"(memory: {store.memory_bytes() / 1024 / 1024:.1f}MB)"
+            )
+            return store
+        
         # Process in batches
         for batch_start in range(0, total_flows, batch_size):
             batch_end = min(batch_start + batch_size, total_flows)
@@ -171,6 +196,180 @@ class SketchBuilder:
         
         return store
     
+    def _build_columnar(
+        self,
+        flows: pd.DataFrame,
+        store: SketchStore,
+        mac_to_device: Dict[str, str],
+        batch_size: int,
+        progress_callback: Optional[callable] = None,
+    ) -> None:
+        """
+        Build sketches with grouped, vectorized operations.
+        
+        Aggregates (bytes, packets, flow_count, first/last seen, active
+        hours) are computed with a single groupby. HLLs are fed each
+        endpoint's distinct values and CMSs and heavy hitters its per-key
+        counts, which leaves them in the state row-by-row ingestion would.
+        
+        Args:
+            flows: Flow records
+            store: SketchStore to populate
+            mac_to_device: MAC → device_id lookup
+            batch_size: Flow interval between progress callbacks
+            progress_callback: Optional callback(processed, total)
+        """
+        total_flows = len(flows)
+        flows = flows[flows["src_mac"].notna()]
+        if flows.empty:
+            self._flows_processed = total_flows
+            if progress_callback:
+                progress_callback(total_flows, total_flows)
+            return
+        
+        timestamps = flows["start_time"]
+        if not pd.api.types.is_datetime64_any_dtype(timestamps):
+            timestamps = pd.to_datetime(timestamps)
+        
+        port_keys = flows["proto"].astype(str) + "/" + flows["dst_port"].astype(str)
+        frame = pd.DataFrame({
+            "src_mac": flows["src_mac"],
+            "switch_id": flows["exporter_switch_id"],
+            "dst_ip": flows["dst_ip"],
+            "port_key": port_keys,
+            "service": pd.Series(self._lookup_services(flows), index=flows.index),
+            "bytes": flows["bytes"],
+            "packets": flows["packets"],
+            "start_time": timestamps,
+            "hour": timestamps.dt.hour,
+        }).reset_index(drop=True)
+        
+        # First occurrence per endpoint fixes store order and switch_id,
+        # matching get_or_create on the first flow seen
+        first_rows = frame.drop_duplicates("src_mac")
+        
+        agg = frame.groupby("src_mac", sort=False).agg(
+            bytes=("bytes", "sum"),
+            packets=("packets", "sum"),
+            flow_count=("src_mac", "size"),
+            first_seen=("start_time", "min"),
+            last_seen=("start_time", "max"),
+        )
+        
+        # OR of distinct hour bits == sum of distinct hour bits
+        hours = frame[["src_mac", "hour"]].dropna().drop_duplicates()
+        hour_bits = np.left_shift(1, hours["hour"].to_numpy(dtype=np.int64))
+        active_hours = pd.Series(hour_bits, index=hours["src_mac"].to_numpy()) \
+            .groupby(level=0, sort=False).sum()
+        
+        peers = self._group_values(frame.drop_duplicates(["src_mac", "dst_ip"]), "dst_ip")
+        ports = self._group_counts(frame, "port_key")
+        services = self._group_counts(frame[frame["service"].notna()], "service")
+        
+        first_seen_col = agg["first_seen"].astype(object).where(agg["first_seen"].notna(), None)
+        last_seen_col = agg["last_seen"].astype(object).where(agg["last_seen"].notna(), None)
+        
+        processed = 0
+        next_report = batch_size
+        for src_mac, switch_id, total_bytes, total_packets, flow_count, first_seen, last_seen in zip(
+            agg.index,
+            first_rows["switch_id"],
+            agg["bytes"].to_numpy(),
+            agg["packets"].to_numpy(),
+            agg["flow_count"].to_numpy(),
+            first_seen_col,
+            last_seen_col,
+        ):
+            sketch = store.get_or_create(endpoint_id=src_mac, switch_id=switch_id)
+            if sketch.device_id is None and src_mac in mac_to_device:
+                sketch.device_id = mac_to_device[src_mac]
+            
+            sketch.unique_peers.add_many(peers[src_mac])
+            port_keys, port_counts = ports[src_mac]
+            sketch.unique_ports.add_many(port_keys)
+            sketch.port_frequency.add_many(port_keys, port_counts)
+            sketch.top_ports.add_many(port_keys, port_counts)
+            if src_mac in services:
+                service_names, service_counts = services[src_mac]
+                sketch.unique_services.add_many(service_names)
+                sketch.service_frequency.add_many(service_names, service_counts)
+                sketch.top_services.add_many(service_names, service_counts)
+            
+            flow_count = int(flow_count)
+            sketch.bytes_out += int(total_bytes)
+            sketch.packets_out += int(total_packets)
+            sketch.flow_count += flow_count
+            
+            if first_seen is not None:
+                first_seen = first_seen.to_pydatetime()
+                last_seen = last_seen.to_pydatetime()
+                if sketch.first_seen is None or first_seen < sketch.first_seen:
+                    sketch.first_seen = first_seen
+                if sketch.last_seen is None or last_seen > sketch.last_seen:
+                    sketch.last_seen = last_seen
+                sketch.active_hours |= int(active_hours.get(src_mac, 0))
+            
+            sketch.version += flow_count
+            
+            processed += flow_count
+            if progress_callback and processed >= next_report:
+                progress_callback(processed, total_flows)
+                next_report = (processed // batch_size + 1) * batch_size
+        
+        self._flows_processed = total_flows
+        if progress_callback:
+            progress_callback(total_flows, total_flows)
+    
+    @staticmethod
+    def _group_values(frame: pd.DataFrame, column: str) -> Dict[str, np.ndarray]:
+        """Map each src_mac to the array of its values in column."""
+        return {
+            mac: values.to_numpy()
+            for mac, values in frame.groupby("src_mac", sort=False)[column]
+        }
+    
+    @staticmethod
+    def _group_counts(
+        frame: pd.DataFrame,
+        column: str,
+    ) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Map each src_mac to (distinct values, occurrence counts) of column."""
+        counts = frame.groupby(["src_mac", column], sort=False).size()
+        result = {}
+        for mac, group in counts.groupby(level=0, sort=False):
+            result[mac] = (
+                group.index.get_level_values(1).to_numpy(),
+                group.to_numpy(),
+            )
+        return result
+    
+    def _lookup_services(self, flows: pd.DataFrame) -> np.ndarray:
+        """
+        Vectorized equivalent of _lookup_service over a flow table.
+        
+        Returns:
+            Object array of service names (None where unresolved)
+        """
+        dst_ip = flows["dst_ip"]
+        
+        # Well-known port fallback, evaluated once per distinct (port, proto)
+        pairs = pd.MultiIndex.from_arrays([flows["dst_port"], flows["proto"]])
+        codes, uniques = pairs.factorize()
+        fallback = np.array(
+            [self._port_to_service(port, proto) for port, proto in uniques] + [None],
+            dtype=object,
+        )[codes]
+        
+        if not self.service_lookup:
+            return fallback
+        
+        in_lookup = dst_ip.isin(list(self.service_lookup.keys())).to_numpy()
+        by_ip = dst_ip.map(self.service_lookup).to_numpy(dtype=object)
+        services = np.where(in_lookup, by_ip, fallback)
+        # Only truthy names are recorded, as in record_flow
+        services[~pd.notna(services) | (services == "")] = None
+        return services
+    
     def _process_flow(
         self,
         flow: pd.Series,
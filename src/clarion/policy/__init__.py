@@ -11,7 +11,7 @@ Key components:
 - CustomizationSession: Human-in-the-loop review and modification
 """
 
-from clarion.policy.matrix import PolicyMatrix, MatrixCell, build_policy_matrix
+from clarion.policy.matrix import PolicyMatrix, MatrixCell, build_policy_matrix, load_policy_matrix
 from clarion.policy.sgacl import SGACLGenerator, SGACLRule, SGACLPolicy
 from clarion.policy.impact import ImpactAnalyzer, ImpactReport
 from clarion.policy.exporter import ISEExporter, PolicyExport
@@ -46,6 +46,7 @@ __all__ = [
     "PolicyMatrix",
     "MatrixCell",
     "build_policy_matrix",
+    "load_policy_matrix",
     # SGACL
     "SGACLGenerator",
     "SGACLRule",
@@ -9,10 +9,12 @@ from __future__ import annotations
 
 from collections import defaultdict
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
 import logging
+import time
 
+import numpy as np
 import pandas as pd
 
 from clarion.sketches import EndpointSketch
@@ -21,8 +23,17 @@ from clarion.ingest.sketch_builder import SketchStore
 from clarion.clustering.clusterer import ClusterResult
 from clarion.clustering.sgt_mapper import SGTTaxonomy, SGTRecommendation
 
+if TYPE_CHECKING:
+    from clarion.storage.database import ClarionDatabase
+
 logger = logging.getLogger(__name__)
 
+# Windows for the live matrix (see load_policy_matrix), in seconds
+MATRIX_WINDOWS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+
+# IP protocol numbers as named in MatrixCell port keys ("tcp/443")
+_PROTOCOL_NAMES = {1: "icmp", 6: "tcp", 17: "udp", 47: "gre", 50: "esp", 58: "icmpv6", 132: "sctp"}
+
 
 @dataclass
 class MatrixCell:
@@ -230,15 +241,23 @@ class PolicyMatrixBuilder:
         store: SketchStore,
         cluster_result: ClusterResult,
         sample_flows: Optional[int] = None,
+        columnar: bool = True,
     ) -> PolicyMatrix:
         """
         Build the policy matrix from flow data.
         
+        SGTs are resolved per flow in priority order: the flow's own
+        non-zero src_sgt/dst_sgt, then the endpoint's cluster SGT; for
+        destinations, via ip_assignments (IP → MAC → cluster), the flow's
+        dst_mac, the service catalog (SGT 10) and finally 0 (Unknown).
+        
         Args:
             dataset: Dataset with flows
             store: SketchStore with sketches
             cluster_result: Cluster assignments
             sample_flows: Optional limit on flows to process
+            columnar: Resolve SGTs with precomputed lookups and build cells
+                     with one groupby (default) instead of row by row
             
         Returns:
             PolicyMatrix with observed traffic
@@ -256,6 +275,211 @@ class PolicyMatrixBuilder:
             cluster_result.labels
         ))
         
+        # Process flows
+        flows = dataset.flows
+        if sample_flows:
+            flows = flows.head(sample_flows)
+        
+        if columnar:
+            processed, skipped = self._build_columnar(
+                matrix, flows, dataset, endpoint_to_cluster
+            )
+        else:
+            processed, skipped = self._build_rows(
+                matrix, flows, dataset, store, endpoint_to_cluster
+            )
+        
+        logger.info(
+            f"Built policy matrix: {matrix.n_cells} cells, "
+            f"{processed} flows processed, {skipped} skipped"
+        )
+        
+        return matrix
+    
+    def _build_columnar(
+        self,
+        matrix: PolicyMatrix,
+        flows: pd.DataFrame,
+        dataset: ClarionDataset,
+        endpoint_to_cluster: Dict[str, int],
+    ) -> Tuple[int, int]:
+        """
+        Fill the matrix with vectorized SGT resolution and grouped cells.
+        
+        Produces the same matrix as _build_rows: every lookup the row path
+        does per flow is precomputed once as a dict and applied with
+        Series.map, then cells, port counts and unique endpoint counts
+        come from groupby aggregations.
+        
+        Returns:
+            Tuple of (processed, skipped) flow counts
+        """
+        total = len(flows)
+        flows = flows[flows["src_mac"].notna()].reset_index(drop=True)
+        
+        # MAC → SGT through the endpoint's cluster (clusters without an SGT omitted)
+        mac_to_sgt = {
+            mac: self._cluster_to_sgt[cluster]
+            for mac, cluster in endpoint_to_cluster.items()
+            if cluster in self._cluster_to_sgt
+        }
+        
+        # Source: flow SGT (non-zero) → cluster SGT; unknown MACs fall back
+        # to the SGT of cluster -1, if the taxonomy has one
+        src_sgt = flows["src_mac"].map(mac_to_sgt)
+        if -1 in self._cluster_to_sgt:
+            src_sgt = src_sgt.where(
+                flows["src_mac"].isin(list(endpoint_to_cluster)), self._cluster_to_sgt[-1]
+            )
+        src_sgt = self._flow_sgt(flows, "src_sgt").fillna(src_sgt)
+        
+        resolved = src_sgt.notna()
+        flows = flows[resolved]
+        src_sgt = src_sgt[resolved]
+        
+        # Destination: flow SGT (non-zero), else resolve from the IP
+        dst_sgt = self._flow_sgt(flows, "dst_sgt")
+        unresolved = dst_sgt.isna()
+        if unresolved.any():
+            dst_sgt = dst_sgt.fillna(
+                self._resolve_dst_sgts(flows[unresolved], dataset, endpoint_to_cluster, mac_to_sgt)
+            )
+            if dst_sgt.isna().any():
+                # Last resort: SGT 0 (Unknown)
+                dst_sgt = dst_sgt.fillna(0)
+                matrix.add_sgt_name(0, "Unknown")
+        
+        cells = pd.DataFrame({
+            "src_sgt": src_sgt.astype("int64"),
+            "dst_sgt": dst_sgt.astype("int64"),
+            "proto": flows["proto"],
+            "dst_port": flows["dst_port"],
+            "bytes": flows["bytes"],
+            "start_time": flows["start_time"],
+            "src_mac": flows["src_mac"],
+            "dst_ip": flows["dst_ip"],
+        })
+        
+        # One row per (cell, port) in first-seen order, as the row path inserts them
+        ports = cells.groupby(
+            ["src_sgt", "dst_sgt", "proto", "dst_port"], sort=False, dropna=False
+        ).agg(
+            flows=("bytes", "size"),
+            bytes=("bytes", "sum"),
+            first_seen=("start_time", "min"),
+            last_seen=("start_time", "max"),
+        )
+        for (src, dst, proto, port), row in zip(ports.index, ports.itertuples(index=False)):
+            cell = matrix.get_or_create_cell(int(src), int(dst))
+            cell.observed_ports[f"{proto}/{port}"] = int(row.flows)
+            cell.total_flows += int(row.flows)
+            cell.total_bytes += int(row.bytes)
+            for timestamp in (row.first_seen, row.last_seen):
+                if pd.isna(timestamp):
+                    continue
+                if hasattr(timestamp, 'to_pydatetime'):
+                    timestamp = timestamp.to_pydatetime()
+                if cell.first_seen is None or timestamp < cell.first_seen:
+                    cell.first_seen = timestamp
+                if cell.last_seen is None or timestamp > cell.last_seen:
+                    cell.last_seen = timestamp
+        
+        # Unique endpoints per cell
+        endpoints = cells.groupby(["src_sgt", "dst_sgt"], sort=False).agg(
+            unique_src=("src_mac", "nunique"),
+            unique_dst=("dst_ip", "nunique"),
+        )
+        for (src, dst), row in zip(endpoints.index, endpoints.itertuples(index=False)):
+            cell = matrix.cells[(int(src), int(dst))]
+            cell.unique_src_endpoints = int(row.unique_src)
+            cell.unique_dst_endpoints = int(row.unique_dst)
+        
+        # Service names of each cell's destinations
+        service_lookup = self._build_service_lookup(dataset)
+        if service_lookup:
+            pairs = cells.loc[
+                cells["dst_ip"].isin(list(service_lookup)), ["src_sgt", "dst_sgt", "dst_ip"]
+            ].drop_duplicates()
+            for src, dst, dst_ip in pairs.itertuples(index=False):
+                service_name = service_lookup[dst_ip]
+                if service_name:
+                    matrix.cells[(int(src), int(dst))].services.add(service_name)
+        
+        matrix.total_flows += len(cells)
+        matrix.total_bytes += int(cells["bytes"].sum())
+        
+        return len(cells), total - len(cells)
+    
+    @staticmethod
+    def _flow_sgt(flows: pd.DataFrame, column: str) -> pd.Series:
+        """SGTs carried by the flows themselves (NaN when missing or 0)."""
+        if column not in flows.columns:
+            return pd.Series(np.nan, index=flows.index)
+        sgt = np.trunc(pd.to_numeric(flows[column], errors="coerce").astype("float64"))
+        return sgt.where(sgt != 0)
+    
+    def _resolve_dst_sgts(
+        self,
+        flows: pd.DataFrame,
+        dataset: ClarionDataset,
+        endpoint_to_cluster: Dict[str, int],
+        mac_to_sgt: Dict[str, int],
+    ) -> pd.Series:
+        """
+        Vectorized destination resolution (NaN where unresolved).
+        
+        Mirrors the row path: the ip_assignments IP → MAC lookup (last
+        binding wins), then _resolve_dst_sgt's order of flow dst_mac,
+        first ip_assignments binding, and service catalog.
+        """
+        dst_ip = flows["dst_ip"]
+        ip_assignments = dataset.ip_assignments
+        
+        # IP → MAC → cluster SGT, last binding per IP
+        quick = pd.Series(np.nan, index=flows.index)
+        first_binding = pd.Series(np.nan, index=flows.index)
+        if not ip_assignments.empty:
+            ip_to_mac: Dict[str, str] = {}
+            for ip, mac in zip(ip_assignments["ip"].astype(str), ip_assignments["mac"].astype(str)):
+                if ip and mac:
+                    ip_to_mac[ip] = mac
+            quick = dst_ip.map(ip_to_mac).map(mac_to_sgt)
+            
+            # First binding per IP
+            first = ip_assignments.drop_duplicates("ip", keep="first")
+            first_binding = dst_ip.map(dict(zip(first["ip"], first["mac"]))).map(mac_to_sgt)
+        
+        # Known services default to SGT 10 (Servers)
+        fallback = first_binding
+        services = getattr(dataset, "services", None)
+        if services is not None and not services.empty:
+            fallback = fallback.fillna(
+                pd.Series(np.where(dst_ip.isin(services["ip"]), 10.0, np.nan), index=flows.index)
+            )
+        
+        # A flow dst_mac belonging to a clustered endpoint decides outright,
+        # even when that cluster has no SGT
+        if "dst_mac" in flows.columns:
+            dst_mac = flows["dst_mac"]
+            known_mac = dst_mac.notna() & dst_mac.isin(list(endpoint_to_cluster))
+            fallback = dst_mac.map(mac_to_sgt).where(known_mac, fallback)
+        
+        return quick.fillna(fallback).astype("float64")
+    
+    def _build_rows(
+        self,
+        matrix: PolicyMatrix,
+        flows: pd.DataFrame,
+        dataset: ClarionDataset,
+        store: SketchStore,
+        endpoint_to_cluster: Dict[str, int],
+    ) -> Tuple[int, int]:
+        """
+        Fill the matrix one flow at a time.
+        
+        Returns:
+            Tuple of (processed, skipped) flow counts
+        """
         # Build MAC → endpoint lookup for flows
         mac_to_endpoint = {s.endpoint_id: s for s in store}
         
@@ -271,12 +495,6 @@ class PolicyMatrixBuilder:
         # Build service IP → service name lookup
         service_lookup = self._build_service_lookup(dataset)
         
-        # Process flows
-        flows = dataset.flows
-        if sample_flows:
-            flows = flows.head(sample_flows)
-        
-        total_flows = len(flows)
         processed = 0
         skipped = 0
         
@@ -370,12 +588,7 @@ class PolicyMatrixBuilder:
             if key in matrix.cells:
                 matrix.cells[key].unique_dst_endpoints = len(endpoints)
         
-        logger.info(
-            f"Built policy matrix: {matrix.n_cells} cells, "
-            f"{processed} flows processed, {skipped} skipped"
-        )
-        
-        return matrix
+        return processed, skipped
     
     def _resolve_dst_sgt(
         self,
@@ -471,3 +684,61 @@ def build_policy_matrix(
     builder = PolicyMatrixBuilder(taxonomy)
     return builder.build(dataset, store, cluster_result)
 
+
+def load_policy_matrix(
+    db: "ClarionDatabase",
+    window: Optional[str] = None,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+) -> PolicyMatrix:
+    """
+    Load the live policy matrix maintained at NetFlow ingest.
+    
+    Reads pre-aggregated hourly cells from the database instead of
+    rebuilding from flows, so it is cheap enough to serve per request.
+    Unique endpoint counts are HyperLogLog estimates and cells carry no
+    service names.
+    
+    Args:
+        db: Database holding the live matrix
+        window: One of MATRIX_WINDOWS ("hour", "day", "week"), ending now;
+               overrides since
+        since: Window start (unix seconds), resolved to its hour bucket
+        until: Window end (unix seconds, exclusive)
+        
+    Returns:
+        PolicyMatrix with SGT names from the SGT registry
+        
+    Raises:
+        ValueError: If the window is unknown
+    """
+    if window is not None:
+        if window not in MATRIX_WINDOWS:
+            raise ValueError(
+                f"Unknown matrix window {window!r}, expected one of {', '.join(MATRIX_WINDOWS)}"
+            )
+        since = int(time.time()) - MATRIX_WINDOWS[window]
+    
+    matrix = PolicyMatrix()
+    for sgt in db.list_sgts(active_only=False):
+        matrix.add_sgt_name(sgt["sgt_value"], sgt["sgt_name"])
+    matrix.sgt_names.setdefault(0, "Unknown")
+    
+    for row in db.get_policy_matrix_cells(since=since, until=until):
+        cell = matrix.get_or_create_cell(row["src_sgt"], row["dst_sgt"])
+        for port in row["ports"]:
+            proto = _PROTOCOL_NAMES.get(port["protocol"], str(port["protocol"]))
+            cell.observed_ports[f"{proto}/{port['dst_port']}"] = port["flow_count"]
+        cell.total_flows = row["flow_count"]
+        cell.total_bytes = row["bytes"]
+        cell.unique_src_endpoints = row["unique_src_endpoints"]
+        cell.unique_dst_endpoints = row["unique_dst_endpoints"]
+        if row["first_seen"] is not None:
+            cell.first_seen = datetime.fromtimestamp(row["first_seen"], tz=timezone.utc)
+        if row["last_seen"] is not None:
+            cell.last_seen = datetime.fromtimestamp(row["last_seen"], tz=timezone.utc)
+        
+        matrix.total_flows += cell.total_flows
+        matrix.total_bytes += cell.total_bytes
+    
+    return matrix
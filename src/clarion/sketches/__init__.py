@@ -8,16 +8,33 @@ Key structures:
 - EndpointSketch: Complete behavioral fingerprint per endpoint (~10KB)
 - HyperLogLog: Cardinality estimation (unique peers, services)
 - CountMinSketch: Frequency distribution (port usage, service access)
+- SpaceSavingSketch: Heavy hitters (actual top-k ports/services)
+- decode_sketch_batch: Decoder for binary sketch batches from edge agents
+- MergedEdgeSketch: Per-endpoint union of edge sketches across switches
 """
 
 from clarion.sketches.endpoint_sketch import EndpointSketch
 from clarion.sketches.hyperloglog import HyperLogLogSketch
 from clarion.sketches.countmin import CountMinSketch
+from clarion.sketches.spacesaving import SpaceSavingSketch
+from clarion.sketches.edge_format import (
+    EdgeSketchFrame,
+    MergedEdgeSketch,
+    decode_edge_sketch,
+    decode_sketch_batch,
+    encode_edge_sketch,
+)
 
 __all__ = [
     "EndpointSketch",
     "HyperLogLogSketch",
     "CountMinSketch",
+    "SpaceSavingSketch",
+    "EdgeSketchFrame",
+    "MergedEdgeSketch",
+    "decode_edge_sketch",
+    "decode_sketch_batch",
+    "encode_edge_sketch",
 ]
 
 
@@ -1,22 +1,27 @@
 """
-Count-Min Sketch wrapper for frequency estimation.
+Count-Min Sketch for frequency estimation.
 
 Count-Min Sketch estimates the frequency of items in a stream using
 fixed memory. Perfect for tracking port usage distribution or
 service access patterns.
 
-Memory: width × depth × 4 bytes (32-bit counters)
-Default: 1000 × 5 = ~20KB
+Each key is hashed once to 64 bits; the column for row i is derived by
+double hashing ((h1 + i * h2) mod width), so batches of keys update or
+query the whole counter matrix in a single vectorized step.
+
+Memory: width × depth × 8 bytes (64-bit counters)
+Default: 1000 × 5 = ~40KB
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Tuple, Union
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
 
-from datasketch import MinHash
 import numpy as np
 
+from clarion.sketches.hashing import hash64, hash64_array
+
 
 @dataclass
 class CountMinSketch:
@@ -28,7 +33,12 @@ class CountMinSketch:
     - Track service access frequency (which services are accessed most?)
     - Track destination IP frequency (who does this endpoint talk to most?)
     
-    Memory: ~20KB per instance (default parameters)
+    With conservative=True, each update only raises the counters that
+    are below the key's new estimate (conservative update). Estimates
+    still never undercount, but collisions inflate them far less, which
+    keeps small-width sketches usable for ranking.
+    
+    Memory: ~40KB per instance (default parameters)
     
     Example:
         >>> cms = CountMinSketch(name="port_frequency")
@@ -41,6 +51,7 @@ class CountMinSketch:
     name: str
     width: int = 1000   # Number of counters per row
     depth: int = 5      # Number of hash functions
+    conservative: bool = False  # Use conservative update
     _counters: np.ndarray = field(default=None, repr=False)
     _total_count: int = field(default=0, repr=False)
     
@@ -48,17 +59,37 @@ class CountMinSketch:
         """Initialize the counter array."""
         if self._counters is None:
             self._counters = np.zeros((self.depth, self.width), dtype=np.int64)
+        self._row_index = np.arange(self.depth)
+        self._row_seeds = self._row_index.astype(np.uint64)
+    
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Derive per-row column indices from 64-bit key hashes.
+        
+        Args:
+            hashes: np.uint64 array of shape (n,)
+        
+        Returns:
+            np.intp array of shape (depth, n)
+        """
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        with np.errstate(over="ignore"):
+            combined = h1[np.newaxis, :] + self._row_seeds[:, np.newaxis] * h2[np.newaxis, :]
+        return (combined % np.uint64(self.width)).astype(np.intp)
     
-    def _hash(self, item: str, seed: int) -> int:
+    def _item_columns(self, item: Union[str, int]) -> List[int]:
         """
-        Hash function for Count-Min Sketch.
+        Column index in each row for a single item (converted to string).
         
-        Uses simple polynomial hashing with different seeds.
+        Scalar counterpart of _columns; h1 + i * h2 stays below 2^64 for
+        any realistic depth, so plain ints give identical indices without
+        per-call array overhead.
         """
-        h = seed
-        for char in item:
-            h = (h * 31 + ord(char)) & 0xFFFFFFFF
-        return h % self.width
+        h = hash64(str(item))
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
     
     def add(self, item: Union[str, int], count: int = 1) -> None:
         """
@@ -68,12 +99,62 @@ class CountMinSketch:
             item: Item to add (will be converted to string)
             count: Number of occurrences to add (default 1)
         """
-        item_str = str(item)
-        for i in range(self.depth):
-            idx = self._hash(item_str, seed=i * 1000003)
-            self._counters[i, idx] += count
+        cols = self._item_columns(item)
+        counters = self._counters
+        if self.conservative:
+            estimate = min(counters[i, col] for i, col in enumerate(cols)) + count
+            for i, col in enumerate(cols):
+                if counters[i, col] < estimate:
+                    counters[i, col] = estimate
+        else:
+            for i, col in enumerate(cols):
+                counters[i, col] += count
         self._total_count += count
     
+    def add_many(
+        self,
+        items: Sequence[Union[str, int]],
+        counts: Optional[Iterable[int]] = None,
+    ) -> None:
+        """
+        Add a batch of items with optional per-item counts.
+        
+        Each item is hashed once and the counter matrix is updated with
+        one scatter operation per row. With standard updates the result
+        is identical to calling add() for every (item, count) pair.
+        With conservative updates, repeated items are combined first and
+        all estimates are taken from the counters as they were before the
+        batch, so the result is an upper bound that may differ slightly
+        from applying the items one at a time.
+        
+        Args:
+            items: Items to add (will be converted to strings)
+            counts: Per-item counts (default 1 for each item)
+        """
+        if len(items) == 0:
+            return
+        if counts is None:
+            counts_arr = np.ones(len(items), dtype=np.int64)
+        else:
+            counts_arr = np.asarray(counts, dtype=np.int64)
+        
+        hashes = hash64_array(str(item) for item in items)
+        
+        if self.conservative:
+            hashes, inverse = np.unique(hashes, return_inverse=True)
+            counts_arr = np.bincount(inverse, weights=counts_arr).astype(np.int64)
+            cols = self._columns(hashes)
+            estimates = self._counters[self._row_index[:, np.newaxis], cols].min(axis=0)
+            targets = estimates + counts_arr
+            for i in range(self.depth):
+                np.maximum.at(self._counters[i], cols[i], targets)
+        else:
+            cols = self._columns(hashes)
+            for i in range(self.depth):
+                np.add.at(self._counters[i], cols[i], counts_arr)
+        
+        self._total_count += int(counts_arr.sum())
+    
     def get(self, item: Union[str, int]) -> int:
         """
         Get estimated frequency for an item.
@@ -83,16 +164,26 @@ class CountMinSketch:
         
         Args:
             item: Item to query
-            
+        
         Returns:
             Estimated frequency (may overestimate due to collisions)
         """
-        item_str = str(item)
-        counts = []
-        for i in range(self.depth):
-            idx = self._hash(item_str, seed=i * 1000003)
-            counts.append(self._counters[i, idx])
-        return int(min(counts))
+        return int(min(self._counters[i, col] for i, col in enumerate(self._item_columns(item))))
+    
+    def get_many(self, items: Sequence[Union[str, int]]) -> np.ndarray:
+        """
+        Get estimated frequencies for a batch of items.
+        
+        Args:
+            items: Items to query (will be converted to strings)
+        
+        Returns:
+            np.int64 array of estimates, aligned with items
+        """
+        if len(items) == 0:
+            return np.zeros(0, dtype=np.int64)
+        cols = self._columns(hash64_array(str(item) for item in items))
+        return self._counters[self._row_index[:, np.newaxis], cols].min(axis=0)
     
     def total(self) -> int:
         """
@@ -113,11 +204,12 @@ class CountMinSketch:
         Args:
             candidates: List of candidate items to check
             k: Number of top items to return
-            
+        
         Returns:
             List of (item, count) tuples sorted by count descending
         """
-        counts = [(item, self.get(item)) for item in candidates]
+        estimates = self.get_many(candidates)
+        counts = [(item, int(count)) for item, count in zip(candidates, estimates)]
         counts.sort(key=lambda x: -x[1])
         return counts[:k]
     
@@ -127,7 +219,7 @@ class CountMinSketch:
         
         Args:
             other: Another CountMinSketch to merge
-            
+        
         Returns:
             Self (for chaining)
         """
@@ -151,12 +243,13 @@ class CountMinSketch:
     
     @classmethod
     def from_bytes(
-        cls, 
-        name: str, 
-        data: bytes, 
-        width: int = 1000, 
+        cls,
+        name: str,
+        data: bytes,
+        width: int = 1000,
         depth: int = 5,
-        total_count: int = 0
+        total_count: int = 0,
+        conservative: bool = False,
     ) -> CountMinSketch:
         """
         Deserialize from bytes.
@@ -167,12 +260,13 @@ class CountMinSketch:
             width: Width parameter (must match serialized)
             depth: Depth parameter (must match serialized)
             total_count: Total count value
-            
+            conservative: Whether to use conservative update going forward
+        
         Returns:
             Reconstructed CountMinSketch
         """
         counters = np.frombuffer(data, dtype=np.int64).reshape((depth, width))
-        sketch = cls(name=name, width=width, depth=depth)
+        sketch = cls(name=name, width=width, depth=depth, conservative=conservative)
         sketch._counters = counters.copy()
         sketch._total_count = total_count
         return sketch
@@ -194,5 +288,3 @@ class CountMinSketch:
     
     def __repr__(self) -> str:
         return f"CountMinSketch(name='{self.name}', total={self._total_count})"
-
-
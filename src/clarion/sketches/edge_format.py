@@ -0,0 +1,361 @@
+"""
+Decoder for the binary sketch format produced by edge agents.
+
+Edge agents (edge/clarion_edge) serialize each EdgeSketch as:
+
+    <III> header length, peers HLL length, ports HLL length
+    JSON header (endpoint/switch IDs and scalar counters)
+    peers HLL: precision byte + 2^precision uint8 registers
+    ports HLL: same layout
+    CMS: <HH> width, depth + depth × width uint32 counters
+
+and batch them as a uint32 sketch count followed by uint32
+length-prefixed sketch frames. Decoding works on memoryview slices of
+the request body, so registers and counters are exposed as NumPy views
+without copying and each frame can be persisted as-is.
+
+MergedEdgeSketch folds per-switch snapshots of one endpoint into a
+global sketch in the same format (HLL register max, CMS counter sum).
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+
+_U32 = struct.Struct("<I")
+_U32_MAX = 0xFFFFFFFF
+_SKETCH_HEADER = struct.Struct("<III")
+_CMS_HEADER = struct.Struct("<HH")
+
+_REQUIRED_FIELDS = (
+    "endpoint_id", "switch_id", "bytes_in", "bytes_out", "flow_count",
+    "first_seen", "last_seen", "active_hours",
+)
+
+
+def edge_hll_count(registers: np.ndarray) -> int:
+    """
+    Estimate cardinality from edge HLL registers.
+
+    Mirrors EdgeHyperLogLog.count() (harmonic mean with small-range
+    linear counting, truncated to int) so binary and JSON uploads
+    report the same value.
+
+    Args:
+        registers: np.uint8 register array
+
+    Returns:
+        Estimated number of unique items
+    """
+    m = registers.size
+    if m == 0:
+        return 0
+    if m == 16:
+        alpha = 0.673
+    elif m == 32:
+        alpha = 0.697
+    elif m == 64:
+        alpha = 0.709
+    else:
+        alpha = 0.7213 / (1 + 1.079 / m)
+
+    indicator = float(np.ldexp(1.0, -registers.astype(np.int32)).sum())
+    raw_estimate = alpha * m * m / indicator
+    if raw_estimate <= 2.5 * m:
+        zeros = int(m - np.count_nonzero(registers))
+        if zeros > 0:
+            return int(m * math.log(m / zeros))
+    return int(raw_estimate)
+
+
+@dataclass
+class EdgeSketchFrame:
+    """
+    One decoded edge sketch, backed by the received buffer.
+
+    `raw` is the complete serialized sketch (suitable for
+    sketches.sketch_data); the register and counter arrays are
+    read-only views into it.
+    """
+
+    header: Dict[str, Any]
+    raw: memoryview
+    peers_registers: np.ndarray
+    ports_registers: np.ndarray
+    port_counters: np.ndarray  # uint32, shape (depth, width)
+
+    @property
+    def endpoint_id(self) -> str:
+        return self.header["endpoint_id"]
+
+    @property
+    def switch_id(self) -> str:
+        return self.header["switch_id"]
+
+    def unique_peers(self) -> int:
+        """Estimated unique destination IPs."""
+        return edge_hll_count(self.peers_registers)
+
+    def unique_ports(self) -> int:
+        """Estimated unique ports."""
+        return edge_hll_count(self.ports_registers)
+
+    def to_row(self) -> Dict[str, Any]:
+        """Sketch row for ClarionDatabase.store_sketches_bulk()."""
+        header = self.header
+        return {
+            "endpoint_id": header["endpoint_id"],
+            "switch_id": header["switch_id"],
+            "unique_peers": self.unique_peers(),
+            "unique_ports": self.unique_ports(),
+            "bytes_in": header["bytes_in"],
+            "bytes_out": header["bytes_out"],
+            "flow_count": header["flow_count"],
+            "first_seen": header["first_seen"],
+            "last_seen": header["last_seen"],
+            "active_hours": header["active_hours"],
+            "local_cluster_id": header.get("local_cluster_id", -1),
+            "sketch_data": self.raw,
+        }
+
+
+def _decode_hll(data: memoryview, what: str) -> np.ndarray:
+    """Decode an edge HLL blob (precision byte + registers) to a register view."""
+    if len(data) < 1:
+        raise ValueError(f"{what} HLL is empty")
+    precision = data[0]
+    registers = np.frombuffer(data, dtype=np.uint8, offset=1)
+    if registers.size != 1 << precision:
+        raise ValueError(
+            f"{what} HLL has {registers.size} registers, expected {1 << precision}"
+        )
+    return registers
+
+
+def decode_edge_sketch(data: Union[bytes, bytearray, memoryview]) -> EdgeSketchFrame:
+    """
+    Decode one serialized EdgeSketch (EdgeSketch.to_bytes output).
+
+    Args:
+        data: Serialized sketch
+
+    Returns:
+        EdgeSketchFrame referencing `data` without copying
+
+    Raises:
+        ValueError: If the sketch is truncated or malformed
+    """
+    view = memoryview(data)
+    if len(view) < _SKETCH_HEADER.size:
+        raise ValueError("Edge sketch too short for header")
+    header_len, peers_len, ports_len = _SKETCH_HEADER.unpack_from(view)
+
+    offset = _SKETCH_HEADER.size
+    cms_offset = offset + header_len + peers_len + ports_len
+    if cms_offset + _CMS_HEADER.size > len(view):
+        raise ValueError("Edge sketch is truncated")
+
+    try:
+        header = json.loads(str(view[offset:offset + header_len], "utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid edge sketch header: {e}") from e
+    if not isinstance(header, dict):
+        raise ValueError("Edge sketch header must be a JSON object")
+    missing = [name for name in _REQUIRED_FIELDS if name not in header]
+    if missing:
+        raise ValueError(f"Edge sketch header missing fields: {', '.join(missing)}")
+    offset += header_len
+
+    peers = _decode_hll(view[offset:offset + peers_len], "peers")
+    offset += peers_len
+    ports = _decode_hll(view[offset:offset + ports_len], "ports")
+
+    width, depth = _CMS_HEADER.unpack_from(view, cms_offset)
+    counters_offset = cms_offset + _CMS_HEADER.size
+    if len(view) - counters_offset != width * depth * 4:
+        raise ValueError(
+            f"Edge CMS payload has {len(view) - counters_offset} bytes, "
+            f"expected {width * depth * 4}"
+        )
+    counters = np.frombuffer(
+        view, dtype="<u4", count=width * depth, offset=counters_offset
+    ).reshape(depth, width)
+
+    return EdgeSketchFrame(
+        header=header,
+        raw=view,
+        peers_registers=peers,
+        ports_registers=ports,
+        port_counters=counters,
+    )
+
+
+def decode_sketch_batch(data: Union[bytes, bytearray, memoryview]) -> List[EdgeSketchFrame]:
+    """
+    Decode a binary sketch batch (uint32 count + length-prefixed sketches).
+
+    Args:
+        data: Batch payload as sent to /api/edge/sketches/binary
+
+    Returns:
+        Decoded sketches in payload order
+
+    Raises:
+        ValueError: If the batch is truncated or malformed
+    """
+    view = memoryview(data)
+    if len(view) < _U32.size:
+        raise ValueError("Sketch batch too short for count")
+    (count,) = _U32.unpack_from(view)
+
+    offset = _U32.size
+    frames = []
+    for i in range(count):
+        if offset + _U32.size > len(view):
+            raise ValueError(f"Sketch batch truncated before sketch {i}")
+        (length,) = _U32.unpack_from(view, offset)
+        offset += _U32.size
+        if offset + length > len(view):
+            raise ValueError(f"Sketch batch truncated inside sketch {i}")
+        frames.append(decode_edge_sketch(view[offset:offset + length]))
+        offset += length
+
+    if offset != len(view):
+        raise ValueError(f"{len(view) - offset} trailing bytes after {count} sketches")
+    return frames
+
+
+def encode_edge_sketch(
+    header: Dict[str, Any],
+    peers_registers: np.ndarray,
+    ports_registers: np.ndarray,
+    port_counters: np.ndarray,
+) -> bytes:
+    """
+    Serialize sketch state in the EdgeSketch.to_bytes() format.
+
+    Args:
+        header: JSON header (must include the EdgeSketch scalar fields)
+        peers_registers: np.uint8 registers (size 2^precision)
+        ports_registers: np.uint8 registers (size 2^precision)
+        port_counters: Counter matrix of shape (depth, width)
+
+    Returns:
+        Serialized sketch
+    """
+    header_bytes = json.dumps(header).encode()
+    peers = bytes([peers_registers.size.bit_length() - 1]) + peers_registers.tobytes()
+    ports = bytes([ports_registers.size.bit_length() - 1]) + ports_registers.tobytes()
+    depth, width = port_counters.shape
+    return b"".join([
+        _SKETCH_HEADER.pack(len(header_bytes), len(peers), len(ports)),
+        header_bytes,
+        peers,
+        ports,
+        _CMS_HEADER.pack(width, depth),
+        np.ascontiguousarray(port_counters, dtype="<u4").tobytes(),
+    ])
+
+
+class MergedEdgeSketch:
+    """
+    Global sketch for one endpoint, merged across switches.
+
+    Follows EndpointSketch.merge semantics: HLL registers combine with an
+    elementwise max and CMS counters add. Edge uploads are cumulative
+    snapshots, so apply_update() adds only the counter growth since the
+    previous snapshot from the same switch; re-syncing a snapshot never
+    double-counts and history is never re-merged.
+    """
+
+    def __init__(
+        self,
+        peers_registers: np.ndarray,
+        ports_registers: np.ndarray,
+        port_counters: np.ndarray,
+    ):
+        self.peers_registers = peers_registers
+        self.ports_registers = ports_registers
+        self.port_counters = port_counters  # np.int64, shape (depth, width)
+
+    @classmethod
+    def from_frame(cls, frame: EdgeSketchFrame) -> MergedEdgeSketch:
+        """Create a writable copy of a decoded sketch."""
+        return cls(
+            peers_registers=frame.peers_registers.copy(),
+            ports_registers=frame.ports_registers.copy(),
+            port_counters=frame.port_counters.astype(np.int64),
+        )
+
+    @classmethod
+    def from_bytes(cls, data: Union[bytes, bytearray, memoryview]) -> MergedEdgeSketch:
+        """Load a merged sketch serialized with to_bytes()."""
+        return cls.from_frame(decode_edge_sketch(data))
+
+    def _check_compatible(self, frame: EdgeSketchFrame) -> None:
+        if (
+            frame.peers_registers.size != self.peers_registers.size
+            or frame.ports_registers.size != self.ports_registers.size
+            or frame.port_counters.shape != self.port_counters.shape
+        ):
+            raise ValueError(
+                f"Cannot merge edge sketch for {frame.endpoint_id}: "
+                f"precision or CMS dimensions differ"
+            )
+
+    def apply_update(
+        self,
+        update: EdgeSketchFrame,
+        previous: Optional[EdgeSketchFrame] = None,
+    ) -> None:
+        """
+        Fold a new snapshot from one switch into the merged sketch.
+
+        Args:
+            update: Latest snapshot from the switch
+            previous: The switch's prior snapshot, or None if this is its
+                     first snapshot (or the edge restarted and the update
+                     starts from zero)
+
+        Raises:
+            ValueError: If the sketch dimensions differ
+        """
+        self._check_compatible(update)
+        np.maximum(self.peers_registers, update.peers_registers, out=self.peers_registers)
+        np.maximum(self.ports_registers, update.ports_registers, out=self.ports_registers)
+
+        growth = update.port_counters.astype(np.int64)
+        if previous is not None:
+            self._check_compatible(previous)
+            growth -= previous.port_counters
+            np.maximum(growth, 0, out=growth)
+        self.port_counters += growth
+
+    def unique_peers(self) -> int:
+        """Estimated unique destination IPs across all switches."""
+        return edge_hll_count(self.peers_registers)
+
+    def unique_ports(self) -> int:
+        """Estimated unique ports across all switches."""
+        return edge_hll_count(self.ports_registers)
+
+    def to_bytes(self, header: Dict[str, Any]) -> bytes:
+        """
+        Serialize in the edge sketch format (counters saturate at 2^32-1).
+
+        Args:
+            header: JSON header with the merged scalar fields
+        """
+        return encode_edge_sketch(
+            header,
+            self.peers_registers,
+            self.ports_registers,
+            np.minimum(self.port_counters, _U32_MAX),
+        )
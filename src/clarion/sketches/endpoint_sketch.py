@@ -13,11 +13,26 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import json
+import struct
 
 from clarion.sketches.hyperloglog import HyperLogLogSketch
 from clarion.sketches.countmin import CountMinSketch
+from clarion.sketches.spacesaving import SpaceSavingSketch
+
+
+# to_bytes() framing: header length, then length-prefixed sketch blobs
+_LENGTH = struct.Struct("<I")
+_BLOB_FIELDS = (
+    "unique_peers",
+    "unique_services",
+    "unique_ports",
+    "port_frequency",
+    "service_frequency",
+    "top_ports",
+    "top_services",
+)
 
 
 @dataclass
@@ -32,10 +47,11 @@ class EndpointSketch:
     - Temporal: When is it active?
     
     Memory budget: ~10KB per endpoint
-    - unique_peers HLL: ~1.5KB
-    - unique_services HLL: ~1.5KB
+    - unique_peers HLL: ~4KB (uint8 registers, p=12)
+    - unique_services HLL: ~4KB
     - port_frequency CMS: ~5KB (reduced width)
     - service_frequency CMS: ~2KB (reduced width)
+    - top_ports / top_services heavy hitters: ~1KB (actual top-k keys)
     - Aggregates + metadata: ~1KB
     
     Example:
@@ -66,6 +82,10 @@ class EndpointSketch:
     port_frequency: CountMinSketch = field(default=None)
     service_frequency: CountMinSketch = field(default=None)
     
+    # Heavy hitters (Space-Saving) - keep the actual top-k keys
+    top_ports: SpaceSavingSketch = field(default=None)
+    top_services: SpaceSavingSketch = field(default=None)
+    
     # Volume aggregates
     bytes_in: int = 0
     bytes_out: int = 0
@@ -97,7 +117,7 @@ class EndpointSketch:
         if self.unique_peers is None:
             self.unique_peers = HyperLogLogSketch(
                 name=f"{self.endpoint_id}_peers",
-                precision=12  # ~1KB, ~4% error
+                precision=12  # 4KB, ~1.6% error
             )
         if self.unique_services is None:
             self.unique_services = HyperLogLogSketch(
@@ -107,7 +127,7 @@ class EndpointSketch:
         if self.unique_ports is None:
             self.unique_ports = HyperLogLogSketch(
                 name=f"{self.endpoint_id}_ports",
-                precision=10  # ~0.5KB
+                precision=10  # 1KB
             )
         if self.port_frequency is None:
             self.port_frequency = CountMinSketch(
@@ -121,6 +141,16 @@ class EndpointSketch:
                 width=200,  # Smaller - fewer services
                 depth=4
             )
+        if self.top_ports is None:
+            self.top_ports = SpaceSavingSketch(
+                name=f"{self.endpoint_id}_top_ports",
+                capacity=32
+            )
+        if self.top_services is None:
+            self.top_services = SpaceSavingSketch(
+                name=f"{self.endpoint_id}_top_services",
+                capacity=16
+            )
     
     def record_flow(
         self,
@@ -156,9 +186,11 @@ class EndpointSketch:
         if service_name:
             self.unique_services.add(service_name)
             self.service_frequency.add(service_name)
+            self.top_services.add(service_name)
         
         # Update frequency sketches
         self.port_frequency.add(port_key)
+        self.top_ports.add(port_key)
         
         # Update aggregates
         self.bytes_out += bytes_out
@@ -206,8 +238,9 @@ class EndpointSketch:
             timestamp: Flow timestamp
         """
         # Track that we received traffic on this port (server behavior)
-        port_key = f"{proto}/{dst_port}"
-        self.port_frequency.add(f"listen:{port_key}")
+        port_key = f"listen:{proto}/{dst_port}"
+        self.port_frequency.add(port_key)
+        self.top_ports.add(port_key)
         
         # Update inbound aggregates
         self.bytes_in += bytes_in
@@ -292,26 +325,48 @@ class EndpointSketch:
         """
         Get the top-k most used ports.
         
-        Note: Requires providing candidate ports since CMS doesn't
-        track keys. Uses common enterprise ports as candidates.
+        Keys come from the Space-Saving heavy hitters; each count is the
+        tighter of the heavy-hitter and Count-Min estimates (both only
+        overestimate).
         
         Args:
             k: Number of top ports to return
             
         Returns:
-            List of (port_key, count) tuples
+            List of (port_key, count) tuples, e.g. ("tcp/443", 120)
         """
-        # Common enterprise ports to check
-        candidates = [
-            "tcp/443", "tcp/80", "tcp/22", "tcp/445", "tcp/389",
-            "tcp/636", "tcp/88", "tcp/464", "tcp/135", "tcp/3389",
-            "tcp/8080", "tcp/8443", "tcp/3128", "tcp/53",
-            "udp/53", "udp/123", "udp/161", "udp/500", "udp/4500",
-            "tcp/25", "tcp/587", "tcp/993", "tcp/995", "tcp/143",
-            "tcp/1433", "tcp/3306", "tcp/5432", "tcp/1521",
-            "tcp/27017", "tcp/6379", "tcp/5672", "tcp/9092",
+        return self._top_keys(self.top_ports, self.port_frequency, k)
+    
+    def get_top_services(self, k: int = 5) -> List[Tuple[str, int]]:
+        """
+        Get the top-k most accessed services.
+        
+        Args:
+            k: Number of top services to return
+            
+        Returns:
+            List of (service_name, count) tuples
+        """
+        return self._top_keys(self.top_services, self.service_frequency, k)
+    
+    @staticmethod
+    def _top_keys(
+        heavy_hitters: SpaceSavingSketch,
+        frequency: CountMinSketch,
+        k: int,
+    ) -> List[Tuple[str, int]]:
+        """Rank heavy-hitter keys by min(heavy-hitter count, CMS estimate)."""
+        tracked = heavy_hitters.top_k()
+        if not tracked:
+            return []
+        keys = [key for key, _ in tracked]
+        estimates = frequency.get_many(keys)
+        counts = [
+            (key, int(min(count, estimate)))
+            for (key, count), estimate in zip(tracked, estimates)
         ]
-        return self.port_frequency.top_k(candidates, k)
+        counts.sort(key=lambda x: (-x[1], x[0]))
+        return counts[:k]
     
     # ─────────────────────────────────────────────────────────────────
     # Merge and sync
@@ -345,6 +400,10 @@ class EndpointSketch:
         self.port_frequency.merge(other.port_frequency)
         self.service_frequency.merge(other.service_frequency)
         
+        # Merge heavy hitters
+        self.top_ports.merge(other.top_ports)
+        self.top_services.merge(other.top_services)
+        
         # Sum aggregates
         self.bytes_in += other.bytes_in
         self.bytes_out += other.bytes_out
@@ -388,6 +447,8 @@ class EndpointSketch:
         total += self.unique_ports.memory_bytes()
         total += self.port_frequency.memory_bytes()
         total += self.service_frequency.memory_bytes()
+        total += self.top_ports.memory_bytes()
+        total += self.top_services.memory_bytes()
         total += 500  # Overhead for other fields
         return total
     
@@ -395,8 +456,9 @@ class EndpointSketch:
         """
         Convert to dictionary for JSON serialization.
         
-        Note: Sketches are converted to their counts/totals,
-        not the full sketch data. Use to_bytes() for full serialization.
+        Note: Sketches are converted to their counts/totals (plus the
+        top ports), not the full sketch data. Use to_bytes() for full
+        serialization.
         """
         return {
             "endpoint_id": self.endpoint_id,
@@ -415,6 +477,7 @@ class EndpointSketch:
             "last_seen": self.last_seen.isoformat() if self.last_seen else None,
             "active_hours": self.active_hours,
             "active_hour_count": self.active_hour_count,
+            "top_ports": self.get_top_ports(k=10),
             "local_cluster_id": self.local_cluster_id,
             "user_id": self.user_id,
             "username": self.username,
@@ -425,6 +488,137 @@ class EndpointSketch:
             "version": self.version,
         }
     
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the full sketch (including HLL/CMS/heavy-hitter state).
+        
+        Format: uint32 header length + JSON header (scalar fields and
+        sketch parameters), followed by one uint32-length-prefixed blob
+        per sketch structure.
+        
+        Returns:
+            Serialized sketch as bytes
+        """
+        header = json.dumps({
+            "endpoint_id": self.endpoint_id,
+            "switch_id": self.switch_id,
+            "device_id": self.device_id,
+            "bytes_in": int(self.bytes_in),
+            "bytes_out": int(self.bytes_out),
+            "packets_in": int(self.packets_in),
+            "packets_out": int(self.packets_out),
+            "flow_count": int(self.flow_count),
+            "first_seen": self.first_seen.isoformat() if self.first_seen else None,
+            "last_seen": self.last_seen.isoformat() if self.last_seen else None,
+            "active_hours": self.active_hours,
+            "local_cluster_id": self.local_cluster_id,
+            "version": self.version,
+            "user_id": self.user_id,
+            "username": self.username,
+            "ad_groups": self.ad_groups,
+            "ise_profile": self.ise_profile,
+            "device_type": self.device_type,
+            "cms": {
+                name: {
+                    "width": cms.width,
+                    "depth": cms.depth,
+                    "total": cms.total(),
+                    "conservative": cms.conservative,
+                }
+                for name, cms in (
+                    ("port_frequency", self.port_frequency),
+                    ("service_frequency", self.service_frequency),
+                )
+            },
+        }).encode()
+        
+        parts = [_LENGTH.pack(len(header)), header]
+        for name in _BLOB_FIELDS:
+            blob = getattr(self, name).to_bytes()
+            parts.append(_LENGTH.pack(len(blob)))
+            parts.append(blob)
+        return b"".join(parts)
+    
+    @classmethod
+    def from_bytes(cls, data: Union[bytes, bytearray, memoryview]) -> EndpointSketch:
+        """
+        Deserialize a sketch produced by to_bytes().
+        
+        Args:
+            data: Serialized sketch bytes
+            
+        Returns:
+            Reconstructed EndpointSketch (mergeable with live sketches)
+        """
+        data = memoryview(data)
+        offset = 0
+        
+        def next_chunk() -> memoryview:
+            nonlocal offset
+            (length,) = _LENGTH.unpack_from(data, offset)
+            offset += _LENGTH.size
+            chunk = data[offset:offset + length]
+            if len(chunk) != length:
+                raise ValueError("EndpointSketch data is truncated")
+            offset += length
+            return chunk
+        
+        header = json.loads(bytes(next_chunk()))
+        endpoint_id = header["endpoint_id"]
+        blobs = {name: next_chunk() for name in _BLOB_FIELDS}
+        cms_meta = header["cms"]
+        
+        def load_cms(name: str, suffix: str) -> CountMinSketch:
+            meta = cms_meta[name]
+            return CountMinSketch.from_bytes(
+                name=f"{endpoint_id}_{suffix}",
+                data=blobs[name],
+                width=meta["width"],
+                depth=meta["depth"],
+                total_count=meta["total"],
+                conservative=meta["conservative"],
+            )
+        
+        first_seen = header["first_seen"]
+        last_seen = header["last_seen"]
+        return cls(
+            endpoint_id=endpoint_id,
+            switch_id=header["switch_id"],
+            device_id=header["device_id"],
+            unique_peers=HyperLogLogSketch.from_bytes(
+                f"{endpoint_id}_peers", blobs["unique_peers"]
+            ),
+            unique_services=HyperLogLogSketch.from_bytes(
+                f"{endpoint_id}_services", blobs["unique_services"]
+            ),
+            unique_ports=HyperLogLogSketch.from_bytes(
+                f"{endpoint_id}_ports", blobs["unique_ports"]
+            ),
+            port_frequency=load_cms("port_frequency", "port_freq"),
+            service_frequency=load_cms("service_frequency", "service_freq"),
+            top_ports=SpaceSavingSketch.from_bytes(
+                f"{endpoint_id}_top_ports", blobs["top_ports"]
+            ),
+            top_services=SpaceSavingSketch.from_bytes(
+                f"{endpoint_id}_top_services", blobs["top_services"]
+            ),
+            bytes_in=header["bytes_in"],
+            bytes_out=header["bytes_out"],
+            packets_in=header["packets_in"],
+            packets_out=header["packets_out"],
+            flow_count=header["flow_count"],
+            first_seen=datetime.fromisoformat(first_seen) if first_seen else None,
+            last_seen=datetime.fromisoformat(last_seen) if last_seen else None,
+            active_hours=header["active_hours"],
+            local_cluster_id=header["local_cluster_id"],
+            version=header["version"],
+            user_id=header["user_id"],
+            username=header["username"],
+            ad_groups=header["ad_groups"],
+            ise_profile=header["ise_profile"],
+            device_type=header["device_type"],
+        )
+    
     def __repr__(self) -> str:
         return (
             f"EndpointSketch("
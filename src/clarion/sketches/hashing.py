@@ -0,0 +1,65 @@
+"""
+Deterministic 64-bit hashing shared by Clarion's server-side sketches.
+
+HyperLogLog and Count-Min Sketch hash each item exactly once with these
+functions and derive register/row indices from the result. Hashes are
+stable across processes (unlike built-in hash()), so sketches built on
+different hosts or before a restart can be merged.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Iterable, Union
+
+import numpy as np
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def hash64(item: Union[str, bytes, int]) -> int:
+    """
+    Deterministic 64-bit hash of a single item.
+    
+    Integers go through the splitmix64 finalizer (matching the vectorized
+    path in hash64_array); strings and bytes are hashed with an 8-byte
+    BLAKE2b digest.
+    
+    Args:
+        item: Item to hash
+    
+    Returns:
+        Unsigned 64-bit hash value
+    """
+    if isinstance(item, (int, np.integer)) and not isinstance(item, bool):
+        z = (int(item) + 0x9E3779B97F4A7C15) & _MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+        return z ^ (z >> 31)
+    if isinstance(item, str):
+        item = item.encode("utf-8")
+    elif not isinstance(item, (bytes, bytearray, memoryview)):
+        item = str(item).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(item, digest_size=8).digest(), "little")
+
+
+def hash64_array(items: Union[np.ndarray, Iterable[Union[str, bytes, int]]]) -> np.ndarray:
+    """
+    Hash a batch of items to a np.uint64 array.
+    
+    Integer arrays are hashed fully vectorized with splitmix64; other
+    items fall back to hash64() per element.
+    
+    Args:
+        items: Integer array or iterable of items
+    
+    Returns:
+        np.uint64 array of hashes, same as hash64() applied per item
+    """
+    if isinstance(items, np.ndarray) and np.issubdtype(items.dtype, np.integer):
+        with np.errstate(over="ignore"):
+            z = items.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+            z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            return z ^ (z >> np.uint64(31))
+    return np.fromiter((hash64(item) for item in items), dtype=np.uint64)
@@ -1,35 +1,64 @@
 """
-HyperLogLog wrapper for cardinality estimation.
+HyperLogLog for cardinality estimation.
 
 HyperLogLog estimates the number of unique items in a stream using
 fixed memory (~1KB for 2% error). Perfect for counting unique peers
 or services an endpoint communicates with.
 
-Memory: ~1.5KB for p=14 (default)
-Error: ~2% standard error
+Registers are a flat np.uint8 array indexed by the top `precision` bits
+of a 64-bit hash, so merging is an elementwise max and serialization is
+a direct buffer copy.
+
+Memory: 2^p bytes (16KB for p=14, 4KB for p=12)
+Error: ~1.04 / sqrt(2^p) standard error (~0.8% for p=14, ~1.6% for p=12)
 """
 
 from __future__ import annotations
 
-import hashlib
+import math
+import struct
 from dataclasses import dataclass, field
-from typing import Any, Union
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from clarion.sketches.hashing import hash64, hash64_array
+
 
-from datasketch import HyperLogLog
+# Serialization framing: magic, version, precision, encoding
+_MAGIC = b"CHLL"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBBB")
+_ENCODING_DENSE = 0
+_ENCODING_SPARSE = 1
+_SPARSE_ENTRY = np.dtype([("index", "<u2"), ("rank", "u1")])
+
+MIN_PRECISION = 4
+MAX_PRECISION = 16
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Exact bit length of each element of a np.uint64 array."""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    # frexp exponent == bit length for integers < 2^53 (0 for 0)
+    _, high_bits = np.frexp(high)
+    _, low_bits = np.frexp(low)
+    return np.where(high_bits > 0, high_bits + 32, low_bits)
 
 
 @dataclass
 class HyperLogLogSketch:
     """
-    Wrapper around datasketch HyperLogLog for endpoint behavioral tracking.
+    Register-array HyperLogLog for endpoint behavioral tracking.
     
     Use cases:
     - Count unique destination IPs (peer diversity)
     - Count unique services accessed
     - Count unique ports used
     
-    Memory: ~1.5KB per instance (p=14)
-    Error: ~2% standard error for cardinality
+    Memory: 2^precision bytes (~16KB for p=14)
+    Error: ~1.04 / sqrt(2^precision) standard error
     
     Example:
         >>> hll = HyperLogLogSketch(name="unique_peers")
@@ -40,13 +69,18 @@ class HyperLogLogSketch:
     """
     
     name: str
-    precision: int = 14  # 2^14 = 16384 registers, ~1.5KB
-    _hll: HyperLogLog = field(default=None, repr=False)
+    precision: int = 14  # 2^14 = 16384 registers
+    _registers: np.ndarray = field(default=None, repr=False)
     
     def __post_init__(self):
-        """Initialize the underlying HyperLogLog."""
-        if self._hll is None:
-            self._hll = HyperLogLog(p=self.precision)
+        """Validate precision and allocate registers."""
+        if not MIN_PRECISION <= self.precision <= MAX_PRECISION:
+            raise ValueError(
+                f"HLL precision must be between {MIN_PRECISION} and "
+                f"{MAX_PRECISION}, got {self.precision}"
+            )
+        if self._registers is None:
+            self._registers = np.zeros(1 << self.precision, dtype=np.uint8)
     
     def add(self, item: Union[str, bytes, int]) -> None:
         """
@@ -55,20 +89,60 @@ class HyperLogLogSketch:
         Args:
             item: Item to add (string, bytes, or int)
         """
-        if isinstance(item, int):
-            item = str(item)
-        if isinstance(item, str):
-            item = item.encode('utf-8')
-        self._hll.update(item)
+        h = hash64(item)
+        p = self.precision
+        index = h >> (64 - p)
+        remaining = h & ((1 << (64 - p)) - 1)
+        rank = (64 - p) - remaining.bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+    
+    def add_many(self, items: Union[np.ndarray, Iterable[Union[str, bytes, int]]]) -> None:
+        """
+        Add a batch of items to the sketch.
+        
+        Items are hashed in one pass (fully vectorized for integer
+        arrays) and the registers are updated with a single scatter-max,
+        so the result is identical to calling add() for every item.
+        
+        Args:
+            items: Integer array or iterable of items
+        """
+        hashes = hash64_array(items)
+        if hashes.size == 0:
+            return
+        
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        remaining = hashes & np.uint64((1 << (64 - p)) - 1)
+        ranks = ((64 - p) - _bit_length(remaining) + 1).astype(np.uint8)
+        np.maximum.at(self._registers, index, ranks)
     
     def count(self) -> int:
         """
         Get estimated cardinality (unique count).
         
+        Uses the standard HLL estimator with linear counting for small
+        cardinalities. No large-range correction is needed with a 64-bit
+        hash.
+        
         Returns:
             Estimated number of unique items added
         """
-        return int(self._hll.count())
+        m = self._registers.size
+        zeros = int(m - np.count_nonzero(self._registers))
+        if zeros == m:
+            return 0
+        
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        
+        estimate = alpha * m * m / float(np.ldexp(1.0, -self._registers.astype(np.int32)).sum())
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
     
     def merge(self, other: HyperLogLogSketch) -> HyperLogLogSketch:
         """
@@ -79,7 +153,7 @@ class HyperLogLogSketch:
         
         Args:
             other: Another HyperLogLogSketch to merge
-            
+        
         Returns:
             Self (for chaining)
         """
@@ -88,41 +162,92 @@ class HyperLogLogSketch:
                 f"Cannot merge HLLs with different precision: "
                 f"{self.precision} vs {other.precision}"
             )
-        self._hll.merge(other._hll)
+        np.maximum(self._registers, other._registers, out=self._registers)
         return self
     
     def to_bytes(self) -> bytes:
         """
         Serialize to bytes for storage/transmission.
         
+        Format: 7-byte header (magic "CHLL", version, precision,
+        encoding) followed by either the raw register array (dense) or
+        (uint16 index, uint8 rank) pairs for non-zero registers (sparse),
+        whichever is smaller.
+        
         Returns:
             Serialized HyperLogLog as bytes
         """
-        return bytes(self._hll.digest())
+        nonzero = np.flatnonzero(self._registers)
+        if nonzero.size * _SPARSE_ENTRY.itemsize < self._registers.size:
+            entries = np.empty(nonzero.size, dtype=_SPARSE_ENTRY)
+            entries["index"] = nonzero
+            entries["rank"] = self._registers[nonzero]
+            header = _HEADER.pack(_MAGIC, _VERSION, self.precision, _ENCODING_SPARSE)
+            return header + entries.tobytes()
+        
+        header = _HEADER.pack(_MAGIC, _VERSION, self.precision, _ENCODING_DENSE)
+        return header + self._registers.tobytes()
     
     @classmethod
-    def from_bytes(cls, name: str, data: bytes, precision: int = 14) -> HyperLogLogSketch:
+    def from_bytes(
+        cls,
+        name: str,
+        data: Union[bytes, bytearray, memoryview],
+        precision: Optional[int] = None,
+    ) -> HyperLogLogSketch:
         """
         Deserialize from bytes.
         
         Args:
             name: Name for the sketch
-            data: Serialized HyperLogLog bytes
-            precision: Precision parameter (must match serialized)
-            
+            data: Serialized HyperLogLog bytes (from to_bytes)
+            precision: Expected precision; validated against the header
+                      if given
+        
         Returns:
             Reconstructed HyperLogLogSketch
+        
+        Raises:
+            ValueError: If the data is malformed or precision mismatches
         """
-        hll = HyperLogLog(p=precision)
-        # datasketch uses hashvalues for digest, we need to restore
-        # For now, return empty - full serialization needs custom impl
-        sketch = cls(name=name, precision=precision)
-        # TODO: Implement proper deserialization
+        data = memoryview(data)
+        if len(data) < _HEADER.size:
+            raise ValueError("HLL data too short for header")
+        magic, version, stored_precision, encoding = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError(f"Invalid HLL magic: {bytes(magic)!r}")
+        if version != _VERSION:
+            raise ValueError(f"Unsupported HLL serialization version: {version}")
+        if precision is not None and precision != stored_precision:
+            raise ValueError(
+                f"HLL precision mismatch: expected {precision}, got {stored_precision}"
+            )
+        
+        sketch = cls(name=name, precision=stored_precision)
+        payload = data[_HEADER.size:]
+        
+        if encoding == _ENCODING_DENSE:
+            if len(payload) != sketch._registers.size:
+                raise ValueError(
+                    f"Dense HLL payload has {len(payload)} bytes, "
+                    f"expected {sketch._registers.size}"
+                )
+            sketch._registers[:] = np.frombuffer(payload, dtype=np.uint8)
+        elif encoding == _ENCODING_SPARSE:
+            if len(payload) % _SPARSE_ENTRY.itemsize:
+                raise ValueError("Sparse HLL payload is truncated")
+            entries = np.frombuffer(payload, dtype=_SPARSE_ENTRY)
+            if entries.size and int(entries["index"].max()) >= sketch._registers.size:
+                raise ValueError("Sparse HLL register index out of range")
+            sketch._registers[entries["index"]] = entries["rank"]
+        else:
+            raise ValueError(f"Unknown HLL encoding: {encoding}")
+        
         return sketch
     
     def clear(self) -> None:
         """Reset the sketch to empty state."""
-        self._hll = HyperLogLog(p=self.precision)
+        self._registers[:] = 0
     
     def memory_bytes(self) -> int:
         """
@@ -132,9 +257,7 @@ class HyperLogLogSketch:
             Estimated memory usage
         """
         # 2^p registers, each 1 byte + overhead
-        return (2 ** self.precision) + 100
+        return self._registers.nbytes + 100
     
     def __repr__(self) -> str:
         return f"HyperLogLogSketch(name='{self.name}', count≈{self.count()})"
-
-
@@ -0,0 +1,290 @@
+"""
+Space-Saving heavy-hitters summary for top-k tracking.
+
+Count-Min Sketch answers "how often did X occur?" but cannot list which
+keys were seen. Space-Saving keeps the actual keys of the k most frequent
+items in bounded memory, so an endpoint's real top ports and services
+can be read back without candidate lists or raw flows.
+
+Guarantees (capacity k, stream total N):
+- Any item with true frequency > N/k is tracked
+- Tracked counts overestimate by at most their recorded error (≤ N/k)
+
+Memory: ~capacity × (key length + 16) bytes
+"""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+
+# Serialization framing: magic, version, capacity, entry count, total
+_MAGIC = b"CSSK"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBHHQ")
+_ENTRY = struct.Struct("<QQH")
+
+
+@dataclass
+class SpaceSavingSketch:
+    """
+    Bounded-memory heavy-hitters summary (Space-Saving algorithm).
+    
+    Use cases:
+    - Track an endpoint's most-used ports ("tcp/443", "udp/5060")
+    - Track its most-accessed services
+    
+    Summaries with equal capacity merge with the mergeable-summaries rule,
+    so per-switch views of the same endpoint combine into one.
+    
+    Example:
+        >>> ss = SpaceSavingSketch(name="top_ports", capacity=32)
+        >>> ss.add("tcp/443", count=100)
+        >>> ss.add("udp/53", count=20)
+        >>> ss.top_k(1)  # [("tcp/443", 100)]
+    """
+    
+    name: str
+    capacity: int = 32  # Number of keys tracked
+    _counts: Dict[str, int] = field(default_factory=dict, repr=False)
+    _errors: Dict[str, int] = field(default_factory=dict, repr=False)
+    _total_count: int = field(default=0, repr=False)
+    
+    def __post_init__(self):
+        """Validate capacity."""
+        if not 1 <= self.capacity <= 0xFFFF:
+            raise ValueError(f"Space-Saving capacity must be 1-65535, got {self.capacity}")
+    
+    def add(self, item: Union[str, int], count: int = 1) -> None:
+        """
+        Add an item with optional count.
+        
+        When the summary is full, the item with the smallest count is
+        replaced and the newcomer inherits that count as its error bound.
+        
+        Args:
+            item: Item to add (will be converted to string)
+            count: Number of occurrences to add (default 1)
+        """
+        key = str(item)
+        self._total_count += count
+        
+        if key in self._counts:
+            self._counts[key] += count
+            return
+        
+        if len(self._counts) < self.capacity:
+            self._counts[key] = count
+            self._errors[key] = 0
+            return
+        
+        victim = min(self._counts, key=self._counts.__getitem__)
+        floor = self._counts.pop(victim)
+        del self._errors[victim]
+        self._counts[key] = floor + count
+        self._errors[key] = floor
+    
+    def add_many(
+        self,
+        items: Sequence[Union[str, int]],
+        counts: Optional[Iterable[int]] = None,
+    ) -> None:
+        """
+        Add a batch of items with optional per-item counts.
+        
+        Duplicates are combined and applied in descending count order,
+        which gives the tightest error bounds for pre-aggregated input.
+        If the summary never overflows the result equals calling add()
+        for each item.
+        
+        Args:
+            items: Items to add (will be converted to strings)
+            counts: Per-item counts (default 1 for each item)
+        """
+        if counts is None:
+            counts = [1] * len(items)
+        
+        combined: Dict[str, int] = {}
+        for item, count in zip(items, counts):
+            key = str(item)
+            combined[key] = combined.get(key, 0) + int(count)
+        
+        for key, count in sorted(combined.items(), key=lambda kv: (-kv[1], kv[0])):
+            self.add(key, count)
+    
+    def get(self, item: Union[str, int]) -> int:
+        """
+        Get the tracked count for an item.
+        
+        Args:
+            item: Item to query
+        
+        Returns:
+            Estimated count (upper bound) if tracked, else 0
+        """
+        return self._counts.get(str(item), 0)
+    
+    def error(self, item: Union[str, int]) -> int:
+        """Maximum overestimate of a tracked item's count (0 if exact or untracked)."""
+        return self._errors.get(str(item), 0)
+    
+    def top_k(self, k: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Get the k most frequent tracked items.
+        
+        Args:
+            k: Number of items to return (default: all tracked)
+        
+        Returns:
+            List of (item, count) tuples sorted by count descending
+        """
+        ranked = sorted(self._counts.items(), key=lambda kv: (-kv[1], kv[0]))
+        return ranked if k is None else ranked[:k]
+    
+    def total(self) -> int:
+        """
+        Get total count of all items added.
+        
+        Returns:
+            Total count
+        """
+        return self._total_count
+    
+    def merge(self, other: SpaceSavingSketch) -> SpaceSavingSketch:
+        """
+        Merge another Space-Saving summary into this one.
+        
+        Keys missing from a full summary are credited with that summary's
+        minimum count (their maximum possible frequency there), then the
+        top `capacity` keys are kept.
+        
+        Args:
+            other: Another SpaceSavingSketch to merge
+        
+        Returns:
+            Self (for chaining)
+        """
+        if self.capacity != other.capacity:
+            raise ValueError(
+                f"Cannot merge Space-Saving summaries with different capacity: "
+                f"{self.capacity} vs {other.capacity}"
+            )
+        
+        self_floor = self._floor()
+        other_floor = other._floor()
+        
+        counts: Dict[str, int] = {}
+        errors: Dict[str, int] = {}
+        for key in set(self._counts) | set(other._counts):
+            if key in self._counts:
+                count, err = self._counts[key], self._errors[key]
+            else:
+                count, err = self_floor, self_floor
+            if key in other._counts:
+                count += other._counts[key]
+                err += other._errors[key]
+            else:
+                count += other_floor
+                err += other_floor
+            counts[key] = count
+            errors[key] = err
+        
+        keep = sorted(counts, key=lambda key: (-counts[key], key))[:self.capacity]
+        self._counts = {key: counts[key] for key in keep}
+        self._errors = {key: errors[key] for key in keep}
+        self._total_count += other._total_count
+        return self
+    
+    def _floor(self) -> int:
+        """Smallest tracked count if full (bound on any untracked key), else 0."""
+        if len(self._counts) < self.capacity:
+            return 0
+        return min(self._counts.values())
+    
+    def to_bytes(self) -> bytes:
+        """
+        Serialize to bytes for storage/transmission.
+        
+        Format: header (magic "CSSK", version, capacity, entry count,
+        total) followed by (count, error, key length, utf-8 key) entries
+        in rank order.
+        
+        Returns:
+            Serialized summary as bytes
+        """
+        parts = [
+            _HEADER.pack(_MAGIC, _VERSION, self.capacity, len(self._counts), self._total_count)
+        ]
+        for key, count in self.top_k():
+            encoded = key.encode("utf-8")
+            parts.append(_ENTRY.pack(count, self._errors[key], len(encoded)))
+            parts.append(encoded)
+        return b"".join(parts)
+    
+    @classmethod
+    def from_bytes(
+        cls,
+        name: str,
+        data: Union[bytes, bytearray, memoryview],
+    ) -> SpaceSavingSketch:
+        """
+        Deserialize from bytes.
+        
+        Args:
+            name: Name for the summary
+            data: Serialized bytes (from to_bytes)
+        
+        Returns:
+            Reconstructed SpaceSavingSketch
+        
+        Raises:
+            ValueError: If the data is malformed
+        """
+        data = memoryview(data)
+        if len(data) < _HEADER.size:
+            raise ValueError("Space-Saving data too short for header")
+        magic, version, capacity, n_entries, total = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError(f"Invalid Space-Saving magic: {bytes(magic)!r}")
+        if version != _VERSION:
+            raise ValueError(f"Unsupported Space-Saving serialization version: {version}")
+        
+        sketch = cls(name=name, capacity=capacity)
+        sketch._total_count = total
+        offset = _HEADER.size
+        for _ in range(n_entries):
+            if offset + _ENTRY.size > len(data):
+                raise ValueError("Space-Saving data is truncated")
+            count, err, key_len = _ENTRY.unpack_from(data, offset)
+            offset += _ENTRY.size
+            if offset + key_len > len(data):
+                raise ValueError("Space-Saving data is truncated")
+            key = bytes(data[offset:offset + key_len]).decode("utf-8")
+            offset += key_len
+            sketch._counts[key] = count
+            sketch._errors[key] = err
+        return sketch
+    
+    def clear(self) -> None:
+        """Reset the summary to empty state."""
+        self._counts.clear()
+        self._errors.clear()
+        self._total_count = 0
+    
+    def memory_bytes(self) -> int:
+        """
+        Approximate memory usage in bytes.
+        
+        Returns:
+            Estimated memory usage
+        """
+        # Key bytes + two 8-byte counters per entry + overhead
+        return sum(len(key) + 16 for key in self._counts) + 100
+    
+    def __repr__(self) -> str:
+        return (
+            f"SpaceSavingSketch(name='{self.name}', "
+            f"tracked={len(self._counts)}/{self.capacity}, total={self._total_count})"
+        )
@@ -9,16 +9,147 @@ from __future__ import annotations
 import json
 import sqlite3
 import logging
+from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from contextlib import contextmanager
 import threading
 
+from clarion.config import DatabaseSettings
+from clarion.sketches.edge_format import MergedEdgeSketch, decode_edge_sketch
+from clarion.sketches.hyperloglog import HyperLogLogSketch
+
 logger = logging.getLogger(__name__)
 
-# Thread-local storage for database connections
-_local = threading.local()
+# NetFlow partition columns (id is added as INTEGER PRIMARY KEY AUTOINCREMENT)
+_NETFLOW_COLUMNS = (
+    ("src_ip", "TEXT NOT NULL"),
+    ("dst_ip", "TEXT NOT NULL"),
+    ("src_port", "INTEGER"),
+    ("dst_port", "INTEGER"),
+    ("protocol", "INTEGER"),
+    ("bytes", "INTEGER"),
+    ("packets", "INTEGER"),
+    ("flow_start", "INTEGER"),
+    ("flow_end", "INTEGER"),
+    ("switch_id", "TEXT"),
+    ("received_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
+    ("src_sgt", "INTEGER"),
+    ("dst_sgt", "INTEGER"),
+    ("src_mac", "TEXT"),
+    ("dst_mac", "TEXT"),
+    ("vlan_id", "INTEGER"),
+    ("src_location_id", "TEXT"),
+    ("dst_location_id", "TEXT"),
+    ("src_subnet_id", "TEXT"),
+    ("dst_subnet_id", "TEXT"),
+)
+_NETFLOW_SELECT_COLUMNS = ", ".join(["id"] + [name for name, _ in _NETFLOW_COLUMNS])
+
+# Columns written at ingest, in the order of store_netflow() row tuples
+_NETFLOW_INSERT_SQL = """
+    INSERT INTO {table} (
+        src_ip, dst_ip, src_port, dst_port, protocol,
+        bytes, packets, flow_start, flow_end, switch_id,
+        src_sgt, dst_sgt, src_mac, dst_mac, vlan_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_NETFLOW_PARTITION_SECONDS = 86400
+
+# Ingest guards: flows starting further than this past "now" (e.g.
+# millisecond timestamps) are rejected, as are rows that would need more
+# than _NETFLOW_MAX_NEW_PARTITIONS new daily partitions in one store call
+_NETFLOW_MAX_FUTURE_SECONDS = 86400
+_NETFLOW_MAX_NEW_PARTITIONS = 8
+
+# The `netflow` view spans only the newest partitions; SQLite caps a
+# compound SELECT at 500 terms
+_NETFLOW_VIEW_MAX_PARTITIONS = 400
+
+# Rollup tables and their bucket size in seconds. NULL ports, protocols
+# and SGTs are stored as -1 so they can be part of the primary key.
+_ROLLUP_MINUTE = "netflow_rollup_minute"
+_ROLLUP_HOUR = "netflow_rollup_hour"
+_ROLLUP_TABLES = ((_ROLLUP_MINUTE, 60), (_ROLLUP_HOUR, 3600))
+_ROLLUP_UPSERT_SQL = """
+    INSERT INTO {table} (
+        bucket_start, src_ip, dst_ip, dst_port, protocol, src_sgt, dst_sgt,
+        bytes, packets, flow_count, first_seen, last_seen
+    ) {source}
+    ON CONFLICT(bucket_start, src_ip, dst_ip, dst_port, protocol, src_sgt, dst_sgt)
+    DO UPDATE SET
+        bytes = bytes + excluded.bytes,
+        packets = packets + excluded.packets,
+        flow_count = flow_count + excluded.flow_count,
+        first_seen = MIN(first_seen, excluded.first_seen),
+        last_seen = MAX(last_seen, excluded.last_seen)
+"""
+
+# Live SGT x SGT policy matrix, maintained at ingest in hourly buckets.
+# Unique src/dst endpoints per cell are HyperLogLogs: at this precision a
+# cell-hour holds at most 1KB, and sparse encoding keeps small ones tiny.
+_MATRIX_CELLS = "policy_matrix_hour"
+_MATRIX_PORTS = "policy_matrix_ports_hour"
+_MATRIX_BUCKET_SECONDS = 3600
+_MATRIX_HLL_PRECISION = 10
+_MATRIX_CELL_UPSERT_SQL = f"""
+    INSERT INTO {_MATRIX_CELLS} (
+        bucket_start, src_sgt, dst_sgt, bytes, flow_count, first_seen, last_seen,
+        src_endpoints, dst_endpoints
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(bucket_start, src_sgt, dst_sgt)
+    DO UPDATE SET
+        bytes = bytes + excluded.bytes,
+        flow_count = flow_count + excluded.flow_count,
+        first_seen = MIN(first_seen, excluded.first_seen),
+        last_seen = MAX(last_seen, excluded.last_seen),
+        src_endpoints = excluded.src_endpoints,
+        dst_endpoints = excluded.dst_endpoints
+"""
+_MATRIX_PORT_UPSERT_SQL = f"""
+    INSERT INTO {_MATRIX_PORTS} (
+        bucket_start, src_sgt, dst_sgt, protocol, dst_port, bytes, flow_count
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(bucket_start, src_sgt, dst_sgt, protocol, dst_port)
+    DO UPDATE SET
+        bytes = bytes + excluded.bytes,
+        flow_count = flow_count + excluded.flow_count
+"""
+
+# Centroid model versions kept in cluster_models
+_CLUSTER_MODELS_RETAINED = 10
+
+
+def _rollup_segments(
+    since: Optional[int],
+    until: Optional[int],
+) -> List[Tuple[str, Optional[int], Optional[int]]]:
+    """
+    Split a [since, until) window into rollup table ranges.
+    
+    The window is widened to whole minutes; whole hours inside it are
+    read from the hour rollup and the edges from the minute rollup.
+    
+    Returns:
+        (table, bucket_start lower bound, upper bound) tuples; None
+        means unbounded
+    """
+    lo = None if since is None else since // 60 * 60
+    hi = None if until is None else -(-until // 60) * 60
+    hour_lo = None if lo is None else -(-lo // 3600) * 3600
+    hour_hi = None if hi is None else hi // 3600 * 3600
+    
+    if hour_lo is not None and hour_hi is not None and hour_lo >= hour_hi:
+        return [(_ROLLUP_MINUTE, lo, hi)]
+    
+    segments = [(_ROLLUP_HOUR, hour_lo, hour_hi)]
+    if lo is not None and lo < hour_lo:
+        segments.append((_ROLLUP_MINUTE, lo, hour_lo))
+    if hi is not None and hour_hi < hi:
+        segments.append((_ROLLUP_MINUTE, hour_hi, hi))
+    return segments
 
 
 class ClarionDatabase:
@@ -33,27 +164,128 @@ class ClarionDatabase:
     - identity: IP to identity mappings
     """
     
-    def __init__(self, db_path: str = "clarion.db"):
+    def __init__(
+        self,
+        db_path: str = "clarion.db",
+        settings: Optional[DatabaseSettings] = None,
+    ):
         """
         Initialize database.
         
         Args:
             db_path: Path to SQLite database file
+            settings: Connection profile (default: from CLARION_DB_* env vars)
         """
         self.db_path = Path(db_path)
+        self.settings = settings or DatabaseSettings.from_env()
+        # Thread-local storage for this database's connections
+        self._local = threading.local()
+        self._maintenance_stop: Optional[threading.Event] = None
+        self._maintenance_thread: Optional[threading.Thread] = None
         self._init_schema()
     
     def _get_connection(self) -> sqlite3.Connection:
         """Get thread-local database connection."""
-        if not hasattr(_local, 'connection') or _local.connection is None:
-            _local.connection = sqlite3.connect(
+        if getattr(self._local, 'connection', None) is None:
+            conn = sqlite3.connect(
                 str(self.db_path),
                 check_same_thread=False,
+                timeout=self.settings.busy_timeout_ms / 1000,
             )
-            _local.connection.row_factory = sqlite3.Row
-            # Enable foreign keys (SQLite requires explicit enable)
-            _local.connection.execute("PRAGMA foreign_keys = ON")
-        return _local.connection
+            conn.row_factory = sqlite3.Row
+            self._apply_connection_profile(conn)
+            self._local.connection = conn
+        return self._local.connection
+    
+    def _apply_connection_profile(self, conn: sqlite3.Connection) -> None:
+        """Apply the configured PRAGMA profile to a new connection."""
+        settings = self.settings
+        # Enable foreign keys (SQLite requires explicit enable)
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute(f"PRAGMA busy_timeout = {int(settings.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA journal_mode = {settings.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {settings.synchronous}")
+        conn.execute(f"PRAGMA mmap_size = {int(settings.mmap_size)}")
+        # Negative cache_size is in KiB rather than pages
+        conn.execute(f"PRAGMA cache_size = {-int(settings.cache_size_kb)}")
+        conn.execute(f"PRAGMA temp_store = {settings.temp_store}")
+    
+    def close(self) -> None:
+        """Close the calling thread's connection (reopened on next use)."""
+        conn = getattr(self._local, 'connection', None)
+        if conn is not None:
+            conn.close()
+            self._local.connection = None
+    
+    def run_maintenance(self) -> Dict[str, Any]:
+        """
+        Apply NetFlow retention, checkpoint the WAL and refresh query
+        planner statistics.
+        
+        A passive checkpoint copies committed WAL pages into the main
+        database without waiting on readers or writers, so it never
+        stalls ingest; it just keeps the WAL from growing unbounded.
+        
+        Returns:
+            Checkpoint result (busy flag, WAL pages, pages checkpointed)
+            and the number of NetFlow partitions dropped
+        """
+        partitions_dropped = self.apply_netflow_retention()
+        conn = self._get_connection()
+        busy, wal_pages, checkpointed = conn.execute(
+            "PRAGMA wal_checkpoint(PASSIVE)"
+        ).fetchone()
+        conn.execute("PRAGMA optimize")
+        return {
+            "busy": bool(busy),
+            "wal_pages": wal_pages,
+            "checkpointed_pages": checkpointed,
+            "netflow_partitions_dropped": partitions_dropped,
+        }
+    
+    def start_maintenance(self, interval_seconds: Optional[int] = None) -> bool:
+        """
+        Run run_maintenance() periodically on a background daemon thread.
+        
+        Args:
+            interval_seconds: Seconds between runs (default: from settings)
+            
+        Returns:
+            True if the maintenance thread is running
+        """
+        if interval_seconds is None:
+            interval_seconds = self.settings.maintenance_interval_seconds
+        if interval_seconds <= 0:
+            return False
+        if self._maintenance_thread is not None and self._maintenance_thread.is_alive():
+            return True
+        
+        stop = threading.Event()
+        
+        def _loop():
+            while not stop.wait(interval_seconds):
+                try:
+                    result = self.run_maintenance()
+                    logger.debug(f"Database maintenance: {result}")
+                except sqlite3.Error as e:
+                    logger.warning(f"Database maintenance failed: {e}")
+            self.close()
+        
+        self._maintenance_stop = stop
+        self._maintenance_thread = threading.Thread(
+            target=_loop, name="clarion-db-maintenance", daemon=True
+        )
+        self._maintenance_thread.start()
+        return True
+    
+    def stop_maintenance(self, timeout: Optional[float] = None) -> None:
+        """Stop the background maintenance thread, if running."""
+        if self._maintenance_stop is not None:
+            self._maintenance_stop.set()
+        if self._maintenance_thread is not None:
+            self._maintenance_thread.join(timeout)
+        self._maintenance_stop = None
+        self._maintenance_thread = None
     
     @contextmanager
     def transaction(self):
@@ -114,6 +346,24 @@ class ClarionDatabase:
             ON sketches(last_seen)
         """)
         
+        # Per-endpoint sketches merged across switches (maintained at ingest)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS endpoint_global_sketches (
+                endpoint_id TEXT PRIMARY KEY,
+                unique_peers INTEGER,
+                unique_ports INTEGER,
+                bytes_in INTEGER,
+                bytes_out INTEGER,
+                flow_count INTEGER,
+                first_seen INTEGER,
+                last_seen INTEGER,
+                active_hours INTEGER,
+                switch_count INTEGER,
+                sketch_data BLOB,  -- Merged sketch (edge format), NULL if no blobs received
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
         # Clusters table
         conn.execute("""
             CREATE TABLE IF NOT EXISTS clusters (
@@ -197,58 +447,11 @@ class ClarionDatabase:
             )
         """)
         
-        # NetFlow records (raw flow data)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS netflow (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                src_ip TEXT NOT NULL,
-                dst_ip TEXT NOT NULL,
-                src_port INTEGER,
-                dst_port INTEGER,
-                protocol INTEGER,
-                bytes INTEGER,
-                packets INTEGER,
-                flow_start INTEGER,
-                flow_end INTEGER,
-                switch_id TEXT,
-                received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Add SGT/MAC columns to netflow if they don't exist (migration for old databases)
-        try:
-            conn.execute("ALTER TABLE netflow ADD COLUMN src_sgt INTEGER")
-            conn.execute("ALTER TABLE netflow ADD COLUMN dst_sgt INTEGER")
-            conn.execute("ALTER TABLE netflow ADD COLUMN src_mac TEXT")
-            conn.execute("ALTER TABLE netflow ADD COLUMN dst_mac TEXT")
-            conn.execute("ALTER TABLE netflow ADD COLUMN vlan_id INTEGER")
-        except sqlite3.OperationalError:
-            # Columns may already exist (if table was created with newer schema)
-            pass
-        
-        # Create indexes for netflow (basic indexes first)
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_netflow_src 
-            ON netflow(src_ip, flow_start)
-        """)
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_netflow_dst 
-            ON netflow(dst_ip, flow_start)
-        """)
+        # NetFlow records (daily partitions, rollups and the netflow view)
+        self._init_netflow_schema(conn)
         
-        # Create indexes for SGT/MAC columns (only if columns exist)
-        try:
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_netflow_sgt 
-                ON netflow(src_sgt, dst_sgt, flow_start)
-            """)
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_netflow_mac 
-                ON netflow(src_mac, dst_mac)
-            """)
-        except sqlite3.OperationalError:
-            # Index creation may fail if columns don't exist (very old databases)
-            pass
+        # Live policy matrix (maintained from NetFlow at ingest)
+        self._init_policy_matrix_schema(conn)
         
         conn.commit()
         logger.info(f"Database schema initialized: {self.db_path}")
@@ -513,17 +716,486 @@ class ClarionDatabase:
                 # Column may already exist
                 pass
         
-        # Add location fields to existing netflow table (if not exists)
-        try:
-            conn.execute("ALTER TABLE netflow ADD COLUMN src_location_id TEXT")
-            conn.execute("ALTER TABLE netflow ADD COLUMN dst_location_id TEXT")
-            conn.execute("ALTER TABLE netflow ADD COLUMN src_subnet_id TEXT")
-            conn.execute("ALTER TABLE netflow ADD COLUMN dst_subnet_id TEXT")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_netflow_src_location ON netflow(src_location_id, flow_start)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_netflow_dst_location ON netflow(dst_location_id, flow_start)")
-        except sqlite3.OperationalError:
-            # Columns may already exist
-            pass
+    def _init_netflow_schema(self, conn: sqlite3.Connection):
+        """
+        Initialize time-partitioned NetFlow storage.
+        
+        Raw flows live in one table per UTC day (netflow_pYYYYMMDD) so
+        retention is a DROP TABLE instead of a long DELETE. A `netflow`
+        view unions all partitions for ad-hoc queries. Minute and hour
+        rollups keyed by (src, dst, port, proto, SGTs) are maintained at
+        ingest for windowed summaries.
+        """
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS netflow_partitions (
+                day_start INTEGER PRIMARY KEY,  -- UTC midnight (unix seconds)
+                table_name TEXT NOT NULL UNIQUE
+            )
+        """)
+        
+        for table, _ in _ROLLUP_TABLES:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    bucket_start INTEGER NOT NULL,
+                    src_ip TEXT NOT NULL,
+                    dst_ip TEXT NOT NULL,
+                    dst_port INTEGER NOT NULL,
+                    protocol INTEGER NOT NULL,
+                    src_sgt INTEGER NOT NULL,
+                    dst_sgt INTEGER NOT NULL,
+                    bytes INTEGER NOT NULL DEFAULT 0,
+                    packets INTEGER NOT NULL DEFAULT 0,
+                    flow_count INTEGER NOT NULL DEFAULT 0,
+                    first_seen INTEGER,
+                    last_seen INTEGER,
+                    PRIMARY KEY (bucket_start, src_ip, dst_ip, dst_port, protocol, src_sgt, dst_sgt)
+                ) WITHOUT ROWID
+            """)
+        
+        # Databases created before partitioning have a plain netflow table
+        cursor = conn.execute("""
+            SELECT type FROM sqlite_master WHERE name = 'netflow'
+        """)
+        row = cursor.fetchone()
+        if row and row[0] == "table":
+            self._migrate_legacy_netflow(conn)
+        
+        self._rebuild_netflow_view(conn)
+    
+    def _migrate_legacy_netflow(self, conn: sqlite3.Connection):
+        """Move rows from an unpartitioned netflow table into daily partitions."""
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(netflow)")}
+        for name, decl in _NETFLOW_COLUMNS:
+            if name not in existing:
+                # Only nullable columns were ever added after the fact
+                conn.execute(f"ALTER TABLE netflow ADD COLUMN {name} {decl}")
+        
+        day_expr = (
+            f"(COALESCE(flow_start, 0) / {_NETFLOW_PARTITION_SECONDS}) "
+            f"* {_NETFLOW_PARTITION_SECONDS}"
+        )
+        days = [row[0] for row in conn.execute(f"SELECT DISTINCT {day_expr} FROM netflow")]
+        for day_start in days:
+            table, _ = self._ensure_netflow_partition(conn, day_start)
+            conn.execute(f"""
+                INSERT INTO {table} ({_NETFLOW_SELECT_COLUMNS})
+                SELECT {_NETFLOW_SELECT_COLUMNS} FROM netflow
+                WHERE {day_expr} = ?
+            """, (day_start,))
+        
+        for table, bucket_seconds in _ROLLUP_TABLES:
+            conn.execute(_ROLLUP_UPSERT_SQL.format(table=table, source=f"""
+                SELECT
+                    (COALESCE(flow_start, 0) / {bucket_seconds}) * {bucket_seconds},
+                    src_ip, dst_ip,
+                    COALESCE(dst_port, -1), COALESCE(protocol, -1),
+                    COALESCE(src_sgt, -1), COALESCE(dst_sgt, -1),
+                    SUM(COALESCE(bytes, 0)), SUM(COALESCE(packets, 0)), COUNT(*),
+                    MIN(COALESCE(flow_start, 0)),
+                    MAX(COALESCE(flow_end, flow_start, 0))
+                FROM netflow
+                WHERE 1
+                GROUP BY 1, 2, 3, 4, 5, 6, 7
+            """))
+        
+        row_count = conn.execute("SELECT COUNT(*) FROM netflow").fetchone()[0]
+        conn.execute("DROP TABLE netflow")
+        logger.info(
+            f"Migrated {row_count} NetFlow records into {len(days)} daily partitions"
+        )
+    
+    def _init_policy_matrix_schema(self, conn: sqlite3.Connection):
+        """
+        Initialize the live SGT × SGT policy matrix.
+        
+        Per hour bucket and SGT pair: flow/byte counters, first/last
+        seen and HyperLogLog blobs of unique source and destination
+        endpoints; plus a per-port histogram. Windowed views sum whole
+        buckets, so GET /api/clustering/matrix needs no CSV rebuild.
+        """
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {_MATRIX_CELLS} (
+                bucket_start INTEGER NOT NULL,
+                src_sgt INTEGER NOT NULL,
+                dst_sgt INTEGER NOT NULL,
+                bytes INTEGER NOT NULL DEFAULT 0,
+                flow_count INTEGER NOT NULL DEFAULT 0,
+                first_seen INTEGER,
+                last_seen INTEGER,
+                src_endpoints BLOB,  -- HyperLogLogSketch.to_bytes()
+                dst_endpoints BLOB,
+                PRIMARY KEY (bucket_start, src_sgt, dst_sgt)
+            ) WITHOUT ROWID
+        """)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {_MATRIX_PORTS} (
+                bucket_start INTEGER NOT NULL,
+                src_sgt INTEGER NOT NULL,
+                dst_sgt INTEGER NOT NULL,
+                protocol INTEGER NOT NULL,  -- -1 when unknown
+                dst_port INTEGER NOT NULL,  -- -1 when unknown
+                bytes INTEGER NOT NULL DEFAULT 0,
+                flow_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (bucket_start, src_sgt, dst_sgt, protocol, dst_port)
+            ) WITHOUT ROWID
+        """)
+    
+    @staticmethod
+    def _netflow_day_start(flow_start: Optional[int]) -> int:
+        """UTC day (partition key) containing a flow start timestamp."""
+        return (int(flow_start or 0) // _NETFLOW_PARTITION_SECONDS) * _NETFLOW_PARTITION_SECONDS
+    
+    @staticmethod
+    def _netflow_start_valid(flow_start: Any, now: int) -> bool:
+        """Whether a flow start (Unix seconds, None = 0) can be partitioned."""
+        if flow_start is None:
+            return True
+        return (
+            isinstance(flow_start, int)
+            and 0 <= flow_start <= now + _NETFLOW_MAX_FUTURE_SECONDS
+        )
+    
+    @staticmethod
+    def _netflow_partition_name(day_start: int) -> str:
+        """Partition table name (netflow_pYYYYMMDD) for a UTC day start."""
+        # Civil date from days since the epoch (H. Hinnant's algorithm)
+        z = day_start // _NETFLOW_PARTITION_SECONDS + 719468
+        era = z // 146097
+        doe = z - era * 146097
+        yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+        doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+        mp = (5 * doy + 2) // 153
+        day = doy - (153 * mp + 2) // 5 + 1
+        month = mp + 3 if mp < 10 else mp - 9
+        year = yoe + era * 400 + (month <= 2)
+        return f"netflow_p{year:04d}{month:02d}{day:02d}"
+    
+    def _netflow_partition_table(
+        self,
+        conn: sqlite3.Connection,
+        day_start: int,
+    ) -> Optional[str]:
+        """Existing NetFlow partition table for a UTC day, if any."""
+        row = conn.execute("""
+            SELECT table_name FROM netflow_partitions WHERE day_start = ?
+        """, (day_start,)).fetchone()
+        return row[0] if row else None
+    
+    def _ensure_netflow_partition(
+        self,
+        conn: sqlite3.Connection,
+        day_start: int,
+    ) -> Tuple[str, bool]:
+        """
+        Get or create the NetFlow partition table for a UTC day.
+        
+        Returns:
+            Tuple of (table_name, created)
+        """
+        table = self._netflow_partition_table(conn, day_start)
+        if table is not None:
+            return table, False
+        
+        table = self._netflow_partition_name(day_start)
+        columns = ",\n".join(f"{name} {decl}" for name, decl in _NETFLOW_COLUMNS)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                {columns}
+            )
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_start ON {table}(flow_start)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_src ON {table}(src_ip, flow_start)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_dst ON {table}(dst_ip, flow_start)")
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_sgt ON {table}(src_sgt, dst_sgt, flow_start)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_mac ON {table}(src_mac, dst_mac)")
+        
+        # Start each day's ids in its own range so ids stay unique across partitions
+        conn.execute("""
+            INSERT INTO sqlite_sequence (name, seq)
+            SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?)
+        """, (table, (day_start // _NETFLOW_PARTITION_SECONDS) << 32, table))
+        conn.execute("""
+            INSERT INTO netflow_partitions (day_start, table_name) VALUES (?, ?)
+        """, (day_start, table))
+        return table, True
+    
+    def _rebuild_netflow_view(self, conn: sqlite3.Connection):
+        """
+        Recreate the `netflow` view as a UNION ALL of the newest partitions.
+        
+        The view is capped at _NETFLOW_VIEW_MAX_PARTITIONS days to stay
+        under SQLite's compound SELECT limit; queries over older data go
+        through _netflow_partition_tables() instead.
+        """
+        tables = [row[0] for row in conn.execute("""
+            SELECT table_name FROM netflow_partitions
+            ORDER BY day_start DESC
+            LIMIT ?
+        """, (_NETFLOW_VIEW_MAX_PARTITIONS,))]
+        if tables:
+            body = " UNION ALL ".join(
+                f"SELECT {_NETFLOW_SELECT_COLUMNS} FROM {table}" for table in tables
+            )
+        else:
+            body = "SELECT " + ", ".join(
+                f"NULL AS {name}" for name in _NETFLOW_SELECT_COLUMNS.split(", ")
+            ) + " WHERE 0"
+        conn.execute("DROP VIEW IF EXISTS netflow")
+        conn.execute(f"CREATE VIEW netflow AS {body}")
+    
+    def _netflow_partition_tables(
+        self,
+        conn: sqlite3.Connection,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> List[str]:
+        """Partitions overlapping [since, until), newest first."""
+        cursor = conn.execute("""
+            SELECT table_name FROM netflow_partitions
+            WHERE (? IS NULL OR day_start + ? > ?)
+              AND (? IS NULL OR day_start < ?)
+            ORDER BY day_start DESC
+        """, (since, _NETFLOW_PARTITION_SECONDS, since, until, until))
+        return [row[0] for row in cursor.fetchall()]
+    
+    def _update_netflow_rollups(self, conn: sqlite3.Connection, rows: List[Tuple]):
+        """Add NetFlow row tuples (store_netflow order) to the rollup tables."""
+        minute: Dict[Tuple, List[int]] = {}
+        for row in rows:
+            src_ip, dst_ip, _, dst_port, protocol, bytes_, packets, flow_start, flow_end = row[:9]
+            src_sgt, dst_sgt = row[10], row[11]
+            start = flow_start or 0
+            end = flow_end if flow_end is not None else start
+            key = (
+                start // 60 * 60, src_ip, dst_ip,
+                -1 if dst_port is None else dst_port,
+                -1 if protocol is None else protocol,
+                -1 if src_sgt is None else src_sgt,
+                -1 if dst_sgt is None else dst_sgt,
+            )
+            agg = minute.get(key)
+            if agg is None:
+                minute[key] = [bytes_ or 0, packets or 0, 1, start, end]
+            else:
+                agg[0] += bytes_ or 0
+                agg[1] += packets or 0
+                agg[2] += 1
+                agg[3] = min(agg[3], start)
+                agg[4] = max(agg[4], end)
+        
+        hour: Dict[Tuple, List[int]] = {}
+        for key, (bytes_, packets, count, first, last) in minute.items():
+            hour_key = (key[0] // 3600 * 3600,) + key[1:]
+            agg = hour.get(hour_key)
+            if agg is None:
+                hour[hour_key] = [bytes_, packets, count, first, last]
+            else:
+                agg[0] += bytes_
+                agg[1] += packets
+                agg[2] += count
+                agg[3] = min(agg[3], first)
+                agg[4] = max(agg[4], last)
+        
+        source = "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        for table, buckets in ((_ROLLUP_MINUTE, minute), (_ROLLUP_HOUR, hour)):
+            conn.executemany(
+                _ROLLUP_UPSERT_SQL.format(table=table, source=source),
+                [key + tuple(agg) for key, agg in buckets.items()],
+            )
+    
+    def _update_policy_matrix(self, conn: sqlite3.Connection, rows: List[Tuple]):
+        """
+        Add NetFlow row tuples (store_netflow order) to the live policy matrix.
+        
+        SGTs come from the flow itself when non-zero, otherwise from the
+        endpoint's sgt_membership (clustering, ISE or manual) by MAC, then
+        IP. As in PolicyMatrixBuilder, flows whose source SGT cannot be
+        resolved are skipped and unresolved destinations count as SGT 0.
+        """
+        unresolved = set()
+        for row in rows:
+            if not row[10]:
+                unresolved.update((row[12], row[0]))
+            if not row[11]:
+                unresolved.update((row[13], row[1]))
+        membership = self._lookup_sgt_membership(conn, unresolved)
+        
+        cells: Dict[Tuple[int, int, int], List[int]] = {}
+        src_endpoints: Dict[Tuple[int, int, int], List[str]] = defaultdict(list)
+        dst_endpoints: Dict[Tuple[int, int, int], List[str]] = defaultdict(list)
+        ports: Dict[Tuple[int, ...], List[int]] = {}
+        for row in rows:
+            src_ip, dst_ip, _, dst_port, protocol, bytes_, _, flow_start, flow_end = row[:9]
+            src_sgt, dst_sgt, src_mac, dst_mac = row[10:14]
+            if not src_sgt:
+                src_sgt = membership.get(src_mac) or membership.get(src_ip)
+                if not src_sgt:
+                    continue
+            if not dst_sgt:
+                dst_sgt = membership.get(dst_mac) or membership.get(dst_ip) or 0
+            
+            start = flow_start or 0
+            end = flow_end if flow_end is not None else start
+            key = (start // _MATRIX_BUCKET_SECONDS * _MATRIX_BUCKET_SECONDS, src_sgt, dst_sgt)
+            agg = cells.get(key)
+            if agg is None:
+                cells[key] = [bytes_ or 0, 1, start, end]
+            else:
+                agg[0] += bytes_ or 0
+                agg[1] += 1
+                agg[2] = min(agg[2], start)
+                agg[3] = max(agg[3], end)
+            src_endpoints[key].append(src_mac or src_ip)
+            dst_endpoints[key].append(dst_ip)
+            
+            port_key = key + (
+                -1 if protocol is None else protocol,
+                -1 if dst_port is None else dst_port,
+            )
+            port_agg = ports.get(port_key)
+            if port_agg is None:
+                ports[port_key] = [bytes_ or 0, 1]
+            else:
+                port_agg[0] += bytes_ or 0
+                port_agg[1] += 1
+        
+        if not cells:
+            return
+        
+        # Unique endpoint HLLs are read, merged and written back whole
+        cell_rows = []
+        for key, agg in cells.items():
+            existing = conn.execute(f"""
+                SELECT src_endpoints, dst_endpoints FROM {_MATRIX_CELLS}
+                WHERE bucket_start = ? AND src_sgt = ? AND dst_sgt = ?
+            """, key).fetchone()
+            blobs = []
+            for i, endpoints in enumerate((src_endpoints[key], dst_endpoints[key])):
+                if existing and existing[i]:
+                    hll = HyperLogLogSketch.from_bytes("endpoints", existing[i])
+                else:
+                    hll = HyperLogLogSketch(name="endpoints", precision=_MATRIX_HLL_PRECISION)
+                hll.add_many(endpoints)
+                blobs.append(hll.to_bytes())
+            cell_rows.append(key + tuple(agg) + tuple(blobs))
+        
+        conn.executemany(_MATRIX_CELL_UPSERT_SQL, cell_rows)
+        conn.executemany(
+            _MATRIX_PORT_UPSERT_SQL,
+            [key + tuple(agg) for key, agg in ports.items()],
+        )
+    
+    @staticmethod
+    def _lookup_sgt_membership(
+        conn: sqlite3.Connection,
+        endpoint_ids: set,
+    ) -> Dict[str, int]:
+        """Current SGT of each endpoint ID (MAC or IP) that has one."""
+        ids = [endpoint_id for endpoint_id in endpoint_ids if endpoint_id]
+        membership: Dict[str, int] = {}
+        # Stay under SQLite's default bound-parameter limit
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            cursor = conn.execute(f"""
+                SELECT endpoint_id, sgt_value FROM sgt_membership
+                WHERE endpoint_id IN ({", ".join("?" * len(chunk))})
+            """, chunk)
+            membership.update((row[0], row[1]) for row in cursor)
+        return membership
+    
+    def get_policy_matrix_cells(
+        self,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Get live SGT × SGT matrix cells for a time window.
+        
+        The window is resolved to whole hour buckets: every bucket that
+        overlaps [since, until) is included.
+        
+        Args:
+            since: Window start (unix seconds, inclusive)
+            until: Window end (unix seconds, exclusive)
+            
+        Returns:
+            List of dicts with src_sgt, dst_sgt, bytes, flow_count,
+            first_seen, last_seen, unique_src_endpoints,
+            unique_dst_endpoints (HyperLogLog estimates) and ports, a list
+            of {protocol, dst_port, bytes, flow_count} (None when unknown),
+            busiest first
+        """
+        conn = self._get_connection()
+        
+        where = "WHERE 1=1"
+        params: List[Any] = []
+        if since is not None:
+            where += " AND bucket_start >= ?"
+            params.append(since // _MATRIX_BUCKET_SECONDS * _MATRIX_BUCKET_SECONDS)
+        if until is not None:
+            where += " AND bucket_start < ?"
+            params.append(until)
+        
+        cells: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        hlls: Dict[Tuple[int, int], List[HyperLogLogSketch]] = {}
+        cursor = conn.execute(f"""
+            SELECT src_sgt, dst_sgt, bytes, flow_count, first_seen, last_seen,
+                   src_endpoints, dst_endpoints
+            FROM {_MATRIX_CELLS} {where}
+            ORDER BY src_sgt, dst_sgt, bucket_start
+        """, params)
+        for row in cursor:
+            key = (row["src_sgt"], row["dst_sgt"])
+            src_hll = HyperLogLogSketch.from_bytes("src_endpoints", row["src_endpoints"])
+            dst_hll = HyperLogLogSketch.from_bytes("dst_endpoints", row["dst_endpoints"])
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = {
+                    "src_sgt": key[0],
+                    "dst_sgt": key[1],
+                    "bytes": row["bytes"],
+                    "flow_count": row["flow_count"],
+                    "first_seen": row["first_seen"],
+                    "last_seen": row["last_seen"],
+                    "ports": [],
+                }
+                hlls[key] = [src_hll, dst_hll]
+            else:
+                cell["bytes"] += row["bytes"]
+                cell["flow_count"] += row["flow_count"]
+                cell["first_seen"] = min(cell["first_seen"], row["first_seen"])
+                cell["last_seen"] = max(cell["last_seen"], row["last_seen"])
+                hlls[key][0].merge(src_hll)
+                hlls[key][1].merge(dst_hll)
+        
+        for key, (src_hll, dst_hll) in hlls.items():
+            cells[key]["unique_src_endpoints"] = src_hll.count()
+            cells[key]["unique_dst_endpoints"] = dst_hll.count()
+        
+        cursor = conn.execute(f"""
+            SELECT src_sgt, dst_sgt,
+                   NULLIF(protocol, -1) AS protocol,
+                   NULLIF(dst_port, -1) AS dst_port,
+                   SUM(bytes) AS bytes,
+                   SUM(flow_count) AS flow_count
+            FROM {_MATRIX_PORTS} {where}
+            GROUP BY src_sgt, dst_sgt, protocol, dst_port
+            ORDER BY flow_count DESC
+        """, params)
+        for row in cursor:
+            cell = cells.get((row["src_sgt"], row["dst_sgt"]))
+            if cell is not None:
+                cell["ports"].append({
+                    "protocol": row["protocol"],
+                    "dst_port": row["dst_port"],
+                    "bytes": row["bytes"],
+                    "flow_count": row["flow_count"],
+                })
+        
+        return list(cells.values())
     
     # ========== Sketch Operations ==========
     
@@ -549,54 +1221,263 @@ class ClarionDatabase:
             Tuple of (sketch_id, is_new_endpoint) where is_new_endpoint is True
             if this endpoint was never seen before on this switch.
         """
+        new_endpoints = self.store_sketches_bulk([{
+            "endpoint_id": endpoint_id,
+            "switch_id": switch_id,
+            "unique_peers": unique_peers,
+            "unique_ports": unique_ports,
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "flow_count": flow_count,
+            "first_seen": first_seen,
+            "last_seen": last_seen,
+            "active_hours": active_hours,
+            "local_cluster_id": local_cluster_id,
+            "sketch_data": sketch_data,
+        }])
+        cursor = self._get_connection().execute("""
+            SELECT id FROM sketches WHERE endpoint_id = ? AND switch_id = ?
+        """, (endpoint_id, switch_id))
+        return cursor.fetchone()[0], bool(new_endpoints)
+    
+    def store_sketches_bulk(self, sketches: List[Dict[str, Any]]) -> List[str]:
+        """
+        Store or update a batch of sketches in a single transaction.
+        
+        Uses one executemany UPSERT keyed on (endpoint_id, switch_id).
+        Existing rows keep the earlier of the stored and incoming
+        first_seen, and a JSON upload (no sketch_data) keeps the stored
+        frame unless it shows an edge restart; all other columns take
+        the incoming values. The
+        endpoints' global sketches are updated in the same transaction
+        (see _merge_global_sketches).
+        
+        Args:
+            sketches: Dicts with the same fields as store_sketch()
+                     (sketch_data and local_cluster_id are optional)
+            
+        Returns:
+            Endpoint IDs that were never seen before on their switch,
+            in batch order
+        """
+        if not sketches:
+            return []
+        
+        rows = [
+            (
+                s["endpoint_id"], s["switch_id"],
+                s["unique_peers"], s["unique_ports"],
+                s["bytes_in"], s["bytes_out"], s["flow_count"],
+                s["first_seen"], s["last_seen"],
+                s["active_hours"], s.get("local_cluster_id", -1),
+                s.get("sketch_data"),
+            )
+            for s in sketches
+        ]
+        
         with self.transaction() as conn:
-            # Check if this endpoint already exists for this switch
+            # Diff incoming keys against existing rows before upserting
+            conn.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS incoming_sketch_keys (
+                    endpoint_id TEXT NOT NULL,
+                    switch_id TEXT NOT NULL
+                )
+            """)
+            conn.execute("DELETE FROM incoming_sketch_keys")
+            conn.executemany("""
+                INSERT INTO incoming_sketch_keys (endpoint_id, switch_id) VALUES (?, ?)
+            """, [(row[0], row[1]) for row in rows])
             cursor = conn.execute("""
-                SELECT id, first_seen FROM sketches 
-                WHERE endpoint_id = ? AND switch_id = ?
-            """, (endpoint_id, switch_id))
-            existing = cursor.fetchone()
+                SELECT i.endpoint_id
+                FROM incoming_sketch_keys i
+                LEFT JOIN sketches s
+                    ON s.endpoint_id = i.endpoint_id AND s.switch_id = i.switch_id
+                WHERE s.id IS NULL
+                GROUP BY i.endpoint_id, i.switch_id
+                ORDER BY MIN(i.rowid)
+            """)
+            new_endpoints = [row[0] for row in cursor.fetchall()]
             
-            is_new = existing is None
+            self._merge_global_sketches(conn, sketches)
+            conn.execute("DELETE FROM incoming_sketch_keys")
             
-            # If endpoint exists, preserve original first_seen unless new first_seen is earlier
-            if existing and first_seen < existing[1]:
-                # Update with earlier first_seen
-                cursor = conn.execute("""
-                    UPDATE sketches SET
-                        unique_peers = ?,
-                        unique_ports = ?,
-                        bytes_in = ?,
-                        bytes_out = ?,
-                        flow_count = ?,
-                        first_seen = ?,
-                        last_seen = ?,
-                        active_hours = ?,
-                        local_cluster_id = ?,
-                        sketch_data = ?
-                    WHERE endpoint_id = ? AND switch_id = ?
-                """, (
-                    unique_peers, unique_ports,
-                    bytes_in, bytes_out, flow_count,
-                    first_seen, last_seen,
-                    active_hours, local_cluster_id, sketch_data,
-                    endpoint_id, switch_id
-                ))
-                return existing[0], False
-            else:
-                # Insert new or replace
-                cursor = conn.execute("""
-                    INSERT OR REPLACE INTO sketches (
-                        endpoint_id, switch_id, unique_peers, unique_ports,
-                        bytes_in, bytes_out, flow_count, first_seen, last_seen,
-                        active_hours, local_cluster_id, sketch_data
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+            conn.executemany("""
+                INSERT INTO sketches (
                     endpoint_id, switch_id, unique_peers, unique_ports,
                     bytes_in, bytes_out, flow_count, first_seen, last_seen,
                     active_hours, local_cluster_id, sketch_data
-                ))
-                return cursor.lastrowid, is_new
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(endpoint_id, switch_id) DO UPDATE SET
+                    unique_peers = excluded.unique_peers,
+                    unique_ports = excluded.unique_ports,
+                    bytes_in = excluded.bytes_in,
+                    bytes_out = excluded.bytes_out,
+                    flow_count = excluded.flow_count,
+                    first_seen = MIN(
+                        COALESCE(sketches.first_seen, excluded.first_seen),
+                        COALESCE(excluded.first_seen, sketches.first_seen)
+                    ),
+                    last_seen = excluded.last_seen,
+                    active_hours = excluded.active_hours,
+                    local_cluster_id = excluded.local_cluster_id,
+                    sketch_data = CASE
+                        WHEN excluded.sketch_data IS NULL
+                         AND excluded.flow_count >= COALESCE(sketches.flow_count, 0)
+                        THEN sketches.sketch_data
+                        ELSE excluded.sketch_data
+                    END,
+                    received_at = CURRENT_TIMESTAMP
+            """, rows)
+        
+        return new_endpoints
+    
+    def _merge_global_sketches(self, conn: sqlite3.Connection, sketches: List[Dict[str, Any]]):
+        """
+        Fold incoming per-switch sketches into endpoint_global_sketches.
+        
+        Edge uploads are cumulative snapshots, so each one contributes
+        only its growth over the previous snapshot from the same switch
+        (read from `sketches` before the upsert): counters and byte/flow
+        totals add the difference, HLL registers take the max. A snapshot
+        whose flow_count went backwards means the edge restarted and is
+        added in full. Re-syncs therefore never double-count, roaming
+        endpoints sum across switches, and global reads never re-merge
+        history.
+        
+        Sketches without sketch_data (JSON uploads) update the totals;
+        their unique counts can only raise the global estimate. The
+        switch's last frame is kept across them (dropped on a restart),
+        so the next binary snapshot still adds only its counter growth.
+        
+        Expects incoming_sketch_keys to hold the batch keys.
+        """
+        previous = {
+            (row["endpoint_id"], row["switch_id"]): row
+            for row in conn.execute("""
+                SELECT s.endpoint_id, s.switch_id, s.bytes_in, s.bytes_out,
+                       s.flow_count, s.sketch_data
+                FROM sketches s
+                JOIN (SELECT DISTINCT endpoint_id, switch_id FROM incoming_sketch_keys) i
+                    ON s.endpoint_id = i.endpoint_id AND s.switch_id = i.switch_id
+            """)
+        }
+        merged = {
+            row["endpoint_id"]: dict(row)
+            for row in conn.execute("""
+                SELECT * FROM endpoint_global_sketches
+                WHERE endpoint_id IN (SELECT endpoint_id FROM incoming_sketch_keys)
+            """)
+        }
+        merged_sketches: Dict[str, MergedEdgeSketch] = {}
+        
+        for s in sketches:
+            endpoint_id = s["endpoint_id"]
+            key = (endpoint_id, s["switch_id"])
+            prev = previous.get(key)
+            
+            g = merged.get(endpoint_id)
+            if g is None:
+                g = merged[endpoint_id] = {
+                    "endpoint_id": endpoint_id,
+                    "unique_peers": 0, "unique_ports": 0,
+                    "bytes_in": 0, "bytes_out": 0, "flow_count": 0,
+                    "first_seen": None, "last_seen": None,
+                    "active_hours": 0, "switch_count": 0, "sketch_data": None,
+                }
+            if prev is None:
+                g["switch_count"] += 1
+            
+            restarted = prev is None or s["flow_count"] < (prev["flow_count"] or 0)
+            for field in ("bytes_in", "bytes_out", "flow_count"):
+                growth = s[field] if restarted else s[field] - (prev[field] or 0)
+                g[field] = (g[field] or 0) + max(growth, 0)
+            if s["first_seen"]:
+                g["first_seen"] = min(g["first_seen"] or s["first_seen"], s["first_seen"])
+            g["last_seen"] = max(g["last_seen"] or 0, s["last_seen"] or 0)
+            g["active_hours"] = (g["active_hours"] or 0) | (s["active_hours"] or 0)
+            g["unique_peers"] = max(g["unique_peers"] or 0, s["unique_peers"] or 0)
+            g["unique_ports"] = max(g["unique_ports"] or 0, s["unique_ports"] or 0)
+            
+            data = s.get("sketch_data")
+            if data is not None:
+                try:
+                    update = decode_edge_sketch(data)
+                    prev_frame = None
+                    if not restarted and prev["sketch_data"] is not None:
+                        prev_frame = decode_edge_sketch(prev["sketch_data"])
+                    sketch = merged_sketches.get(endpoint_id)
+                    if sketch is None and g["sketch_data"] is not None:
+                        sketch = MergedEdgeSketch.from_bytes(g["sketch_data"])
+                    if sketch is None:
+                        sketch = MergedEdgeSketch.from_frame(update)
+                    else:
+                        sketch.apply_update(update, prev_frame)
+                    merged_sketches[endpoint_id] = sketch
+                except ValueError as e:
+                    logger.warning(f"Skipping sketch merge for {endpoint_id}: {e}")
+            
+            if data is None and not restarted:
+                data = prev["sketch_data"]
+            previous[key] = {
+                "bytes_in": s["bytes_in"], "bytes_out": s["bytes_out"],
+                "flow_count": s["flow_count"], "sketch_data": data,
+            }
+        
+        for endpoint_id, sketch in merged_sketches.items():
+            g = merged[endpoint_id]
+            g["unique_peers"] = sketch.unique_peers()
+            g["unique_ports"] = sketch.unique_ports()
+            g["sketch_data"] = sketch.to_bytes({
+                "endpoint_id": endpoint_id,
+                "switch_id": "*",
+                **{field: g[field] or 0 for field in (
+                    "bytes_in", "bytes_out", "flow_count",
+                    "first_seen", "last_seen", "active_hours",
+                )},
+                "switch_count": g["switch_count"],
+            })
+        
+        conn.executemany("""
+            INSERT OR REPLACE INTO endpoint_global_sketches (
+                endpoint_id, unique_peers, unique_ports, bytes_in, bytes_out,
+                flow_count, first_seen, last_seen, active_hours, switch_count,
+                sketch_data, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, [
+            (
+                g["endpoint_id"], g["unique_peers"], g["unique_ports"],
+                g["bytes_in"], g["bytes_out"], g["flow_count"],
+                g["first_seen"], g["last_seen"], g["active_hours"],
+                g["switch_count"], g["sketch_data"],
+            )
+            for g in merged.values()
+        ])
+    
+    def get_global_sketch(self, endpoint_id: str) -> Optional[Dict]:
+        """
+        Get an endpoint's sketch merged across all switches.
+        
+        A single-row read: the merge is maintained incrementally at ingest.
+        """
+        conn = self._get_connection()
+        cursor = conn.execute("""
+            SELECT * FROM endpoint_global_sketches WHERE endpoint_id = ?
+        """, (endpoint_id,))
+        row = cursor.fetchone()
+        if row:
+            return dict(row)
+        return None
+    
+    def count_sketches(self, switch_id: Optional[str] = None) -> int:
+        """Count stored sketches, optionally for a single switch."""
+        conn = self._get_connection()
+        if switch_id:
+            cursor = conn.execute("""
+                SELECT COUNT(*) FROM sketches WHERE switch_id = ?
+            """, (switch_id,))
+        else:
+            cursor = conn.execute("SELECT COUNT(*) FROM sketches")
+        return cursor.fetchone()[0]
     
     def is_endpoint_first_seen(self, endpoint_id: str, switch_id: Optional[str] = None) -> bool:
         """
@@ -775,55 +1656,188 @@ class ClarionDatabase:
         dst_mac: Optional[str] = None,
         vlan_id: Optional[int] = None,
     ) -> int:
-        """Store a NetFlow record."""
+        """
+        Store a NetFlow record.
+        
+        Raises:
+            ValueError: If flow_start is not a plausible Unix timestamp
+                        in seconds
+        """
+        if not self._netflow_start_valid(flow_start, int(datetime.now().timestamp())):
+            raise ValueError(f"Invalid NetFlow flow_start: {flow_start!r}")
+        row = (
+            src_ip, dst_ip, src_port, dst_port, protocol,
+            bytes, packets, flow_start, flow_end, switch_id,
+            src_sgt, dst_sgt, src_mac, dst_mac, vlan_id
+        )
         with self.transaction() as conn:
-            cursor = conn.execute("""
-                INSERT INTO netflow (
-                    src_ip, dst_ip, src_port, dst_port, protocol,
-                    bytes, packets, flow_start, flow_end, switch_id,
-                    src_sgt, dst_sgt, src_mac, dst_mac, vlan_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                src_ip, dst_ip, src_port, dst_port, protocol,
-                bytes, packets, flow_start, flow_end, switch_id,
-                src_sgt, dst_sgt, src_mac, dst_mac, vlan_id
-            ))
+            table, created = self._ensure_netflow_partition(
+                conn, self._netflow_day_start(flow_start)
+            )
+            cursor = conn.execute(_NETFLOW_INSERT_SQL.format(table=table), row)
+            if created:
+                self._rebuild_netflow_view(conn)
+            self._update_netflow_rollups(conn, [row])
+            self._update_policy_matrix(conn, [row])
             return cursor.lastrowid
     
+    def store_netflow_bulk(
+        self,
+        records: List[Dict[str, Any]],
+        switch_id: Optional[str] = None,
+    ) -> int:
+        """
+        Store a batch of NetFlow records in a single transaction.
+        
+        Records are written to their daily partitions with one
+        executemany per day, and the minute/hour rollups and the live
+        policy matrix are updated from the pre-aggregated batch.
+        
+        Args:
+            records: Dicts with the same fields as store_netflow()
+                    (switch_id, SGT, MAC and VLAN fields are optional)
+            switch_id: Default switch ID for records without one
+            
+        Returns:
+            Number of records stored
+        """
+        return self.store_netflow_rows([
+            (
+                r["src_ip"], r["dst_ip"], r["src_port"], r["dst_port"], r["protocol"],
+                r["bytes"], r["packets"], r["flow_start"], r["flow_end"],
+                r.get("switch_id") or switch_id,
+                r.get("src_sgt"), r.get("dst_sgt"),
+                r.get("src_mac"), r.get("dst_mac"), r.get("vlan_id"),
+            )
+            for r in records
+        ])
+    
+    def store_netflow_rows(self, rows: List[Tuple]) -> int:
+        """
+        Store pre-built NetFlow rows in a single transaction.
+        
+        Used by the columnar batch endpoint, which builds rows straight
+        from decoded column arrays without per-record dicts.
+        
+        Rows are rejected (logged and counted, not stored) rather than
+        failing the batch when flow_start is not a plausible Unix
+        timestamp in seconds, or when their day would be one more new
+        partition than _NETFLOW_MAX_NEW_PARTITIONS allows. Newer days
+        get partitions first.
+        
+        Args:
+            rows: Tuples of (src_ip, dst_ip, src_port, dst_port, protocol,
+                  bytes, packets, flow_start, flow_end, switch_id,
+                  src_sgt, dst_sgt, src_mac, dst_mac, vlan_id)
+            
+        Returns:
+            Number of records stored
+        """
+        if not rows:
+            return 0
+        
+        now = int(datetime.now().timestamp())
+        rejected = 0
+        rows_by_day: Dict[int, List[Tuple]] = defaultdict(list)
+        for row in rows:
+            if self._netflow_start_valid(row[7], now):
+                rows_by_day[self._netflow_day_start(row[7])].append(row)
+            else:
+                rejected += 1
+        
+        stored: List[Tuple] = []
+        with self.transaction() as conn:
+            partitions_created = 0
+            for day_start in sorted(rows_by_day, reverse=True):
+                day_rows = rows_by_day[day_start]
+                table = self._netflow_partition_table(conn, day_start)
+                if table is None:
+                    if partitions_created >= _NETFLOW_MAX_NEW_PARTITIONS:
+                        rejected += len(day_rows)
+                        continue
+                    table, _ = self._ensure_netflow_partition(conn, day_start)
+                    partitions_created += 1
+                conn.executemany(_NETFLOW_INSERT_SQL.format(table=table), day_rows)
+                stored.extend(day_rows)
+            if partitions_created:
+                self._rebuild_netflow_view(conn)
+            if stored:
+                self._update_netflow_rollups(conn, stored)
+                self._update_policy_matrix(conn, stored)
+        
+        if rejected:
+            logger.warning(
+                f"Rejected {rejected} of {len(rows)} NetFlow records "
+                f"(implausible flow_start or too many new partitions)"
+            )
+        return len(stored)
+    
     def get_recent_netflow(
         self,
         limit: int = 1000,
         since: Optional[int] = None,
     ) -> List[Dict]:
-        """Get recent NetFlow records."""
+        """
+        Get recent NetFlow records.
+        
+        Partitions are read newest first and the scan stops as soon as
+        `limit` records are collected.
+        """
         conn = self._get_connection()
-        if since:
-            cursor = conn.execute("""
-                SELECT * FROM netflow 
-                WHERE flow_start >= ?
-                ORDER BY flow_start DESC
-                LIMIT ?
-            """, (since, limit))
-        else:
-            cursor = conn.execute("""
-                SELECT * FROM netflow 
-                ORDER BY flow_start DESC
-                LIMIT ?
-            """, (limit,))
+        records: List[Dict] = []
+        for table in self._netflow_partition_tables(conn, since=since):
+            remaining = limit - len(records)
+            if remaining <= 0:
+                break
+            if since:
+                cursor = conn.execute(f"""
+                    SELECT * FROM {table} 
+                    WHERE flow_start >= ?
+                    ORDER BY flow_start DESC
+                    LIMIT ?
+                """, (since, remaining))
+            else:
+                cursor = conn.execute(f"""
+                    SELECT * FROM {table} 
+                    ORDER BY flow_start DESC
+                    LIMIT ?
+                """, (remaining,))
+            records.extend(dict(row) for row in cursor.fetchall())
         
-        return [dict(row) for row in cursor.fetchall()]
+        return records
     
     def get_device_to_device_flows(
         self,
         src_device: Optional[str] = None,
         dst_device: Optional[str] = None,
         limit: int = 1000,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        aggregate: bool = False,
     ) -> List[Dict]:
-        """Get flows between specific devices (by IP or MAC)."""
+        """
+        Get flows between specific devices (by IP or MAC).
+        
+        Args:
+            src_device: Source IP/MAC (or prefix)
+            dst_device: Destination IP/MAC (or prefix)
+            limit: Maximum rows to return
+            since: Only flows starting at or after this time
+            until: Only flows starting before this time
+            aggregate: Return per-conversation totals from the rollups
+                      (see get_netflow_summary) instead of raw flows
+        """
+        if aggregate:
+            return self.get_netflow_summary(
+                since=since, until=until,
+                src_device=src_device, dst_device=dst_device,
+                limit=limit,
+            )
+        
         conn = self._get_connection()
         
-        query = "SELECT * FROM netflow WHERE 1=1"
-        params = []
+        query = "SELECT * FROM {table} WHERE 1=1"
+        params: List[Any] = []
         
         if src_device:
             query += " AND (src_ip = ? OR src_ip LIKE ?)"
@@ -833,10 +1847,152 @@ class ClarionDatabase:
             query += " AND (dst_ip = ? OR dst_ip LIKE ?)"
             params.extend([dst_device, f"{dst_device}%"])
         
+        if since is not None:
+            query += " AND flow_start >= ?"
+            params.append(since)
+        
+        if until is not None:
+            query += " AND flow_start < ?"
+            params.append(until)
+        
         query += " ORDER BY flow_start DESC LIMIT ?"
-        params.append(limit)
         
-        cursor = conn.execute(query, params)
+        flows: List[Dict] = []
+        for table in self._netflow_partition_tables(conn, since=since, until=until):
+            remaining = limit - len(flows)
+            if remaining <= 0:
+                break
+            cursor = conn.execute(query.format(table=table), params + [remaining])
+            flows.extend(dict(row) for row in cursor.fetchall())
+        return flows
+    
+    def get_endpoint_flows(
+        self,
+        mac_address: str,
+        ip_address: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> Tuple[List[Dict], int]:
+        """
+        Get a page of flows to or from an endpoint, newest first.
+        
+        Partitions are read newest first; a partition is only scanned
+        for rows once the page reaches it, and otherwise just counted.
+        
+        Args:
+            mac_address: Endpoint MAC address
+            ip_address: Endpoint IP address (None = match by MAC only)
+            limit: Maximum rows to return
+            offset: Rows to skip (across all partitions)
+        
+        Returns:
+            Tuple of (flows, total matching flows)
+        """
+        conn = self._get_connection()
+        
+        if ip_address:
+            where = "src_ip = ? OR dst_ip = ? OR src_mac = ? OR dst_mac = ?"
+            params: List[Any] = [ip_address, ip_address, mac_address, mac_address]
+        else:
+            where = "src_mac = ? OR dst_mac = ?"
+            params = [mac_address, mac_address]
+        
+        flows: List[Dict] = []
+        total = 0
+        skip = offset
+        for table in self._netflow_partition_tables(conn):
+            count = conn.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE ({where})", params
+            ).fetchone()[0]
+            total += count
+            if len(flows) >= limit or count == 0:
+                continue
+            if skip >= count:
+                skip -= count
+                continue
+            cursor = conn.execute(f"""
+                SELECT
+                    id, src_ip, dst_ip, src_port, dst_port, protocol,
+                    bytes, packets, flow_start, flow_end, switch_id,
+                    src_sgt, dst_sgt, src_mac, dst_mac, vlan_id
+                FROM {table}
+                WHERE ({where})
+                ORDER BY flow_start DESC
+                LIMIT ? OFFSET ?
+            """, params + [limit - len(flows), skip])
+            flows.extend(dict(row) for row in cursor.fetchall())
+            skip = 0
+        return flows, total
+    
+    def get_netflow_summary(
+        self,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        src_device: Optional[str] = None,
+        dst_device: Optional[str] = None,
+        limit: int = 1000,
+    ) -> List[Dict]:
+        """
+        Get per-conversation traffic totals from the rollup tables.
+        
+        Conversations are keyed by (src_ip, dst_ip, dst_port, protocol,
+        src_sgt, dst_sgt). The window is resolved to whole minutes: whole
+        hours come from the hour rollup and the edges from the minute
+        rollup, so long windows read a handful of rows per conversation
+        instead of every raw flow.
+        
+        Args:
+            since: Window start (unix seconds, inclusive)
+            until: Window end (unix seconds, exclusive)
+            src_device: Source IP (or prefix)
+            dst_device: Destination IP (or prefix)
+            limit: Maximum conversations to return (largest by bytes first)
+            
+        Returns:
+            List of dicts with the key columns plus bytes, packets,
+            flow_count, first_seen and last_seen
+        """
+        conn = self._get_connection()
+        
+        parts = []
+        params: List[Any] = []
+        for table, lo, hi in _rollup_segments(since, until):
+            part = f"""
+                SELECT src_ip, dst_ip, dst_port, protocol, src_sgt, dst_sgt,
+                       bytes, packets, flow_count, first_seen, last_seen
+                FROM {table} WHERE 1=1
+            """
+            if lo is not None:
+                part += " AND bucket_start >= ?"
+                params.append(lo)
+            if hi is not None:
+                part += " AND bucket_start < ?"
+                params.append(hi)
+            if src_device:
+                part += " AND (src_ip = ? OR src_ip LIKE ?)"
+                params.extend([src_device, f"{src_device}%"])
+            if dst_device:
+                part += " AND (dst_ip = ? OR dst_ip LIKE ?)"
+                params.extend([dst_device, f"{dst_device}%"])
+            parts.append(part)
+        
+        cursor = conn.execute(f"""
+            SELECT
+                src_ip, dst_ip,
+                NULLIF(dst_port, -1) AS dst_port,
+                NULLIF(protocol, -1) AS protocol,
+                NULLIF(src_sgt, -1) AS src_sgt,
+                NULLIF(dst_sgt, -1) AS dst_sgt,
+                SUM(bytes) AS bytes,
+                SUM(packets) AS packets,
+                SUM(flow_count) AS flow_count,
+                MIN(first_seen) AS first_seen,
+                MAX(last_seen) AS last_seen
+            FROM ({" UNION ALL ".join(parts)})
+            GROUP BY src_ip, dst_ip, dst_port, protocol, src_sgt, dst_sgt
+            ORDER BY bytes DESC
+            LIMIT ?
+        """, params + [limit])
         return [dict(row) for row in cursor.fetchall()]
     
     # ========== Cluster Operations ==========
@@ -878,7 +2034,36 @@ class ClarionDatabase:
                 (endpoint_id, cluster_id, confidence, assigned_by, assigned_at) 
                 VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
             """, (endpoint_id, cluster_id, confidence, assigned_by))
-    
+
+    def assign_endpoints_to_clusters_bulk(
+        self,
+        assignments: List[Tuple[str, int, Optional[float]]],
+        assigned_by: Optional[str] = None,
+    ) -> int:
+        """
+        Assign a batch of endpoints to clusters in a single transaction.
+
+        Args:
+            assignments: (endpoint_id, cluster_id, confidence) tuples
+            assigned_by: Assignment source recorded on every row
+
+        Returns:
+            Number of assignments written
+        """
+        if not assignments:
+            return 0
+
+        with self.transaction() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO cluster_assignments
+                (endpoint_id, cluster_id, confidence, assigned_by, assigned_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, [
+                (endpoint_id, cluster_id, confidence, assigned_by)
+                for endpoint_id, cluster_id, confidence in assignments
+            ])
+        return len(assignments)
+
     def get_clusters(self) -> List[Dict]:
         """Get all clusters."""
         conn = self._get_connection()
@@ -975,6 +2160,26 @@ class ClarionDatabase:
             return data
         return None
     
+    def apply_netflow_retention(self, days: Optional[int] = None) -> int:
+        """
+        Drop NetFlow data, rollups and policy matrix buckets older than
+        the retention period.
+        
+        Args:
+            days: Days to keep (default: settings.netflow_retention_days;
+                  0 = keep everything)
+            
+        Returns:
+            Number of partitions dropped
+        """
+        if days is None:
+            days = self.settings.netflow_retention_days
+        if days <= 0:
+            return 0
+        cutoff = int(datetime.now().timestamp()) - days * 86400
+        with self.transaction() as conn:
+            return self._drop_netflow_before(conn, cutoff)
+    
     def cleanup_old_data(self, days: int = 30):
         """Clean up data older than specified days."""
         cutoff = int((datetime.now().timestamp() - (days * 86400)))
@@ -984,14 +2189,55 @@ class ClarionDatabase:
             conn.execute("""
                 DELETE FROM sketches WHERE last_seen < ?
             """, (cutoff,))
-            
-            # Clean old netflow
             conn.execute("""
-                DELETE FROM netflow WHERE flow_start < ?
+                DELETE FROM endpoint_global_sketches WHERE last_seen < ?
             """, (cutoff,))
             
+            # Clean old netflow
+            self._drop_netflow_before(conn, cutoff)
+            
             logger.info(f"Cleaned up data older than {days} days")
     
+    def _drop_netflow_before(self, conn: sqlite3.Connection, cutoff: int) -> int:
+        """
+        Remove NetFlow data older than cutoff.
+        
+        Partitions entirely before the cutoff are dropped; only the day
+        containing the cutoff needs a (bounded) DELETE. Rollup and policy
+        matrix buckets are removed once they end at or before the cutoff.
+        
+        Returns:
+            Number of partitions dropped
+        """
+        cursor = conn.execute("""
+            SELECT day_start, table_name FROM netflow_partitions WHERE day_start < ?
+        """, (cutoff,))
+        dropped = 0
+        for day_start, table in cursor.fetchall():
+            if day_start + _NETFLOW_PARTITION_SECONDS <= cutoff:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.execute("""
+                    DELETE FROM netflow_partitions WHERE day_start = ?
+                """, (day_start,))
+                dropped += 1
+            else:
+                conn.execute(f"""
+                    DELETE FROM {table} WHERE flow_start < ?
+                """, (cutoff,))
+        if dropped:
+            self._rebuild_netflow_view(conn)
+            logger.info(f"Dropped {dropped} NetFlow partitions")
+        
+        for table, bucket_seconds in _ROLLUP_TABLES:
+            conn.execute(f"""
+                DELETE FROM {table} WHERE bucket_start <= ?
+            """, (cutoff - bucket_seconds,))
+        for table in (_MATRIX_CELLS, _MATRIX_PORTS):
+            conn.execute(f"""
+                DELETE FROM {table} WHERE bucket_start <= ?
+            """, (cutoff - _MATRIX_BUCKET_SECONDS,))
+        return dropped
+    
     # ========== MVP: SGT Registry Operations ==========
     
     def create_sgt(self, sgt_value: int, sgt_name: str, category: Optional[str] = None, 
@@ -1178,6 +2424,69 @@ class ClarionDatabase:
             results.append(data)
         return results
     
+    def store_cluster_model(self, model_data: bytes, centroids: List[Dict[str, Any]]) -> int:
+        """
+        Store a new centroid model version and its centroids.
+        
+        The serialized model and the cluster_centroids rows are replaced
+        in one transaction, so the table always mirrors the latest model.
+        Only the most recent _CLUSTER_MODELS_RETAINED versions are kept.
+        
+        Args:
+            model_data: Serialized CentroidModel
+            centroids: Dicts with cluster_id, feature_vector, sgt_value
+                      and member_count, one per centroid
+            
+        Returns:
+            New model version
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute("""
+                INSERT INTO cluster_models (n_clusters, model_data) VALUES (?, ?)
+            """, (len(centroids), model_data))
+            version = cursor.lastrowid
+            conn.execute("""
+                DELETE FROM cluster_models WHERE version <= ?
+            """, (version - _CLUSTER_MODELS_RETAINED,))
+            conn.execute("DELETE FROM cluster_centroids")
+            conn.executemany("""
+                INSERT INTO cluster_centroids
+                (cluster_id, sgt_value, feature_vector, member_count, updated_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, [
+                (
+                    c['cluster_id'], c.get('sgt_value'),
+                    json.dumps(c['feature_vector']), c.get('member_count', 0),
+                )
+                for c in centroids
+            ])
+        return version
+    
+    def update_cluster_model(self, version: int, model_data: bytes) -> bool:
+        """
+        Replace the serialized data of a stored centroid model version.
+        
+        For changes that keep the centroids in place (member counts);
+        moved centroids are stored as a new version instead.
+        
+        Returns:
+            True if the version exists
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute("""
+                UPDATE cluster_models SET model_data = ? WHERE version = ?
+            """, (model_data, version))
+            return cursor.rowcount > 0
+    
+    def get_latest_cluster_model(self) -> Optional[Dict]:
+        """Get the most recent centroid model (version, model_data, created_at)."""
+        conn = self._get_connection()
+        row = conn.execute("""
+            SELECT version, model_data, created_at FROM cluster_models
+            ORDER BY version DESC LIMIT 1
+        """).fetchone()
+        return dict(row) if row else None
+    
     def update_centroid_member_count(self, cluster_id: int, member_count: int) -> None:
         """Update the member count for a centroid."""
         with self.transaction() as conn:
@@ -1240,6 +2549,16 @@ class ClarionDatabase:
             )
         """)
         
+        # Centroid models: persisted scaler + centroids (see CentroidModel)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cluster_models (
+                version INTEGER PRIMARY KEY AUTOINCREMENT,
+                n_clusters INTEGER NOT NULL,
+                model_data BLOB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
         # Policy Recommendations
         conn.execute("""
             CREATE TABLE IF NOT EXISTS policy_recommendations (
@@ -0,0 +1,128 @@
+"""
+Performance benchmarks for edge agent sketches.
+
+Measures the per-switch flow rate (flows/sec) of EdgeSketch.record_flow,
+the hot path of the edge container, against the previous per-add MD5
+hashing (one digest per HLL add and one per CMS row).
+"""
+
+import hashlib
+import pytest
+from pathlib import Path
+import random
+import struct
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "edge"))
+
+from clarion_edge.sketch import EdgeCountMinSketch, EdgeHyperLogLog, EdgeSketch, EdgeSketchStore
+
+
+N_FLOWS = 50_000
+N_ENDPOINTS = 200
+
+
+class MD5HyperLogLog(EdgeHyperLogLog):
+    """EdgeHyperLogLog with the previous MD5 hash and rank loop."""
+
+    def add(self, item):
+        h = struct.unpack('<Q', hashlib.md5(str(item).encode()).digest()[:8])[0]
+        idx = h & (self.num_registers - 1)
+        remaining = h >> self.precision
+        rho = 1
+        while remaining & 1 == 0 and rho <= 64 - self.precision:
+            rho += 1
+            remaining >>= 1
+        self.registers[idx] = max(self.registers[idx], rho)
+
+
+class MD5CountMinSketch(EdgeCountMinSketch):
+    """EdgeCountMinSketch with the previous seeded MD5 hash per row."""
+
+    def add(self, item, count=1):
+        for i in range(self.depth):
+            h = hashlib.md5(f"{i}:{item}".encode()).digest()
+            self.counters[i * self.width + struct.unpack('<I', h[:4])[0] % self.width] += count
+        self._total += count
+
+
+def md5_record_flow(sketch: EdgeSketch, dst_ip, dst_port, proto, bytes_count, timestamp):
+    """EdgeSketch.record_flow as it was before single-hash updates."""
+    if sketch.first_seen == 0:
+        sketch.first_seen = timestamp
+    sketch.last_seen = timestamp
+    sketch.unique_peers.add(dst_ip)
+    sketch.unique_ports.add(f"{proto}/{dst_port}")
+    sketch.port_frequency.add(f"{proto}/{dst_port}")
+    sketch.bytes_out += bytes_count
+    sketch.flow_count += 1
+    from datetime import datetime
+    sketch.active_hours |= (1 << datetime.fromtimestamp(timestamp).hour)
+
+
+def make_flows(n_flows: int = N_FLOWS, seed: int = 42) -> list:
+    """Access-switch-like flows: a few servers and ports, plus random peers."""
+    rng = random.Random(seed)
+    macs = [f"00:11:22:33:{i // 256:02x}:{i % 256:02x}" for i in range(N_ENDPOINTS)]
+    servers = [f"10.0.1.{i}" for i in range(10, 30)]
+    ports = [80, 443, 53, 389, 445, 22, 3389, 8080, 8443]
+    start = 1_700_000_000
+    flows = []
+    for i in range(n_flows):
+        dst_ip = rng.choice(servers) if rng.random() < 0.7 else f"10.{rng.randint(1, 250)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+        dst_port = rng.choice(ports)
+        flows.append((
+            rng.choice(macs), dst_ip, dst_port,
+            "udp" if dst_port == 53 else "tcp",
+            rng.randint(64, 100_000), start + i,
+        ))
+    return flows
+
+
+@pytest.mark.benchmark
+def test_edge_record_flow_rate():
+    """Single-hash sketch updates should clearly beat per-add MD5."""
+    flows = make_flows()
+
+    legacy = {}
+    start = time.perf_counter()
+    for mac, dst_ip, dst_port, proto, bytes_count, ts in flows:
+        sketch = legacy.get(mac)
+        if sketch is None:
+            sketch = legacy[mac] = EdgeSketch(
+                endpoint_id=mac, switch_id="SW-1",
+                unique_peers=MD5HyperLogLog(), unique_ports=MD5HyperLogLog(),
+                port_frequency=MD5CountMinSketch(),
+            )
+        md5_record_flow(sketch, dst_ip, dst_port, proto, bytes_count, ts)
+    legacy_time = time.perf_counter() - start
+
+    store = EdgeSketchStore(max_endpoints=N_ENDPOINTS, switch_id="SW-1")
+    start = time.perf_counter()
+    for mac, dst_ip, dst_port, proto, bytes_count, ts in flows:
+        store.get_or_create(mac).record_flow(
+            dst_ip=dst_ip, dst_port=dst_port, proto=proto,
+            bytes_count=bytes_count, is_outbound=True, timestamp=ts,
+        )
+    fast_time = time.perf_counter() - start
+
+    legacy_rate = len(flows) / legacy_time
+    fast_rate = len(flows) / fast_time
+    print(
+        f"\nEdge record_flow ({len(flows)} flows, {N_ENDPOINTS} endpoints): "
+        f"md5={legacy_rate:,.0f} flows/s single-hash={fast_rate:,.0f} flows/s "
+        f"speedup={fast_rate / legacy_rate:.1f}x"
+    )
+
+    # Same sketch quality: cardinalities agree within HLL error
+    for sketch in store:
+        reference = legacy[sketch.endpoint_id]
+        assert sketch.flow_count == reference.flow_count
+        expected = reference.unique_peers.count()
+        assert abs(sketch.unique_peers.count() - expected) <= max(3, 0.1 * expected)
+
+    # Loose floor: the measured speedup is ~2x, too close to use as the bound
+    assert fast_rate > 1.2 * legacy_rate, (
+        f"Single-hash updates only {fast_rate / legacy_rate:.1f}x faster"
+    )
@@ -0,0 +1,93 @@
+"""
+Performance benchmarks for incremental cluster assignment.
+
+Compares vectorized bulk nearest-centroid assignment against assigning
+one endpoint at a time on synthetic centroids and sketches. Equivalence
+of the two paths is covered by tests/unit/test_clustering.py.
+"""
+
+import pytest
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from clarion.clustering.features import FeatureExtractor, FeatureVector
+from clarion.clustering.incremental import IncrementalClusterer
+from clarion.sketches import EndpointSketch
+from clarion.storage.database import ClarionDatabase
+
+
+def make_synthetic_sketches(n_endpoints: int, seed: int = 42):
+    """Build sketches with varied traffic volumes and peer counts."""
+    rng = np.random.default_rng(seed)
+    sketches = []
+    for i in range(n_endpoints):
+        sketch = EndpointSketch(endpoint_id=f"00:11:22:{i // 65536:02x}:{i // 256 % 256:02x}:{i % 256:02x}")
+        sketch.bytes_in = int(rng.integers(100, 1_000_000))
+        sketch.bytes_out = int(rng.integers(100, 1_000_000))
+        sketch.flow_count = int(rng.integers(1, 5000))
+        sketch.active_hours = int(rng.integers(0, 1 << 24))
+        for j in range(int(rng.integers(1, 20))):
+            sketch.unique_peers.add(f"10.0.{j}.{i % 256}")
+        sketches.append(sketch)
+    return sketches
+
+
+def make_incremental(db_path: Path, n_centroids: int, seed: int = 7) -> IncrementalClusterer:
+    """Build an IncrementalClusterer seeded with centroids near the sketches."""
+    rng = np.random.default_rng(seed)
+    extractor = FeatureExtractor()
+    anchors = np.array([
+        extractor.extract(s).to_array()
+        for s in make_synthetic_sketches(n_centroids, seed=seed)
+    ])
+    db = ClarionDatabase(str(db_path))
+    incremental = IncrementalClusterer(
+        feature_extractor=extractor,
+        db=db,
+        max_distance_threshold=4.0,
+    )
+    for cluster_id, anchor in enumerate(anchors):
+        # cluster_centroids.sgt_value references the SGT registry
+        db.create_sgt(2 + cluster_id, f"SGT-{cluster_id}")
+        noise = rng.normal(0.0, 0.1, len(FeatureVector.feature_names()))
+        incremental.update_centroid(
+            cluster_id=cluster_id,
+            feature_vector=[float(x) for x in anchor + noise],
+            sgt_value=2 + cluster_id,
+            member_count=int(rng.integers(1, 2000)),
+        )
+    incremental.load_centroids()
+    return incremental
+
+
+@pytest.mark.benchmark
+def test_bulk_assignment_speedup(tmp_path):
+    """Vectorized bulk assignment should be substantially faster."""
+    incremental = make_incremental(tmp_path / "clarion.db", n_centroids=64)
+    sketches = make_synthetic_sketches(5000)
+
+    start = time.perf_counter()
+    incremental.assign_endpoints_bulk(
+        sketches, store_assignments=False, update_centroids=False, vectorized=False,
+    )
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    incremental.assign_endpoints_bulk(
+        sketches, store_assignments=False, update_centroids=False,
+    )
+    bulk_time = time.perf_counter() - start
+
+    speedup = loop_time / bulk_time
+    print(
+        f"\nIncremental assignment ({len(sketches):,} endpoints, 64 centroids): "
+        f"loop={loop_time:.2f}s bulk={bulk_time:.2f}s speedup={speedup:.1f}x"
+    )
+
+    # Loose floor: the measured speedup is ~3x, too close to use as the bound
+    assert speedup > 1.5, f"Bulk assignment only {speedup:.1f}x faster"
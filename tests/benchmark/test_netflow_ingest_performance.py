@@ -0,0 +1,139 @@
+"""
+Performance benchmarks for NetFlow ingestion into SQLite.
+
+Measures the sustained ingest rate (records/sec) of per-record inserts
+versus single-transaction bulk inserts, and the cost of decoding JSON
+versus columnar batches from collectors, for sizing collectors.
+"""
+
+import json
+import pytest
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from clarion.ingest.flow_batch import decode_flow_batch, encode_flow_batch
+from clarion.storage.database import ClarionDatabase
+
+
+BATCH_SIZE = 1000
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fresh database in a temporary directory."""
+    database = ClarionDatabase(str(tmp_path / "clarion.db"))
+    yield database
+    database.close()
+
+
+def make_netflow_records(n_records: int, seed: int = 42) -> list:
+    """Build collector-style NetFlow record dicts."""
+    rng = np.random.default_rng(seed)
+    start = 1_700_000_000
+    records = []
+    for i in range(n_records):
+        a, b, c, d = (int(x) for x in rng.integers(1, 255, 4))
+        flow_start = start + i
+        records.append({
+            "src_ip": f"10.{a}.{b}.{c}",
+            "dst_ip": f"10.{d}.{c}.{b}",
+            "src_port": int(rng.integers(1024, 65535)),
+            "dst_port": int(rng.choice([443, 80, 53, 22, 445])),
+            "protocol": 6,
+            "bytes": int(rng.integers(64, 1_000_000)),
+            "packets": int(rng.integers(1, 1000)),
+            "flow_start": flow_start,
+            "flow_end": flow_start + 5,
+            "switch_id": "SW-1",
+            "src_sgt": None,
+            "dst_sgt": None,
+            "src_mac": f"00:11:22:33:{a:02x}:{b:02x}",
+            "dst_mac": None,
+            "vlan_id": 10,
+        })
+    return records
+
+
+def count_netflow(db: ClarionDatabase) -> int:
+    """Count stored NetFlow rows."""
+    return db._get_connection().execute("SELECT COUNT(*) FROM netflow").fetchone()[0]
+
+
+@pytest.mark.benchmark
+def test_bulk_netflow_ingest_rate(db):
+    """Bulk ingest should beat per-record inserts and report records/sec."""
+    single_records = make_netflow_records(BATCH_SIZE, seed=1)
+    start = time.perf_counter()
+    for record in single_records:
+        db.store_netflow(**record)
+    single_time = time.perf_counter() - start
+
+    n_batches = 20
+    batches = [make_netflow_records(BATCH_SIZE, seed=seed) for seed in range(n_batches)]
+    start = time.perf_counter()
+    for batch in batches:
+        db.store_netflow_bulk(batch)
+    bulk_time = time.perf_counter() - start
+
+    single_rate = BATCH_SIZE / single_time
+    bulk_rate = n_batches * BATCH_SIZE / bulk_time
+    print(
+        f"\nNetFlow ingest ({BATCH_SIZE}-record batches): "
+        f"per-record={single_rate:,.0f} rec/s bulk={bulk_rate:,.0f} rec/s "
+        f"speedup={bulk_rate / single_rate:.1f}x"
+    )
+
+    assert count_netflow(db) == (n_batches + 1) * BATCH_SIZE
+    assert bulk_rate > 2 * single_rate, (
+        f"Bulk ingest only {bulk_rate / single_rate:.1f}x faster"
+    )
+
+
+@pytest.mark.benchmark
+def test_columnar_batch_decode_rate():
+    """Columnar batches should decode to rows faster than JSON and be smaller."""
+    n_batches = 20
+    records = [make_netflow_records(BATCH_SIZE, seed=seed) for seed in range(n_batches)]
+    json_payloads = [json.dumps({"records": batch, "switch_id": "SW-1"}).encode() for batch in records]
+    columnar_payloads = [encode_flow_batch(batch) for batch in records]
+
+    start = time.perf_counter()
+    for payload in json_payloads:
+        batch = json.loads(payload)
+        json_rows = [
+            (
+                r["src_ip"], r["dst_ip"], r["src_port"], r["dst_port"], r["protocol"],
+                r["bytes"], r["packets"], r["flow_start"], r["flow_end"],
+                r.get("switch_id") or batch["switch_id"],
+                r.get("src_sgt"), r.get("dst_sgt"),
+                r.get("src_mac"), r.get("dst_mac"), r.get("vlan_id"),
+            )
+            for r in batch["records"]
+        ]
+    json_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for payload in columnar_payloads:
+        columnar_rows = decode_flow_batch(payload).to_rows(switch_id="SW-1")
+    columnar_time = time.perf_counter() - start
+
+    json_bytes = sum(len(p) for p in json_payloads) / n_batches
+    columnar_bytes = sum(len(p) for p in columnar_payloads) / n_batches
+    json_rate = n_batches * BATCH_SIZE / json_time
+    columnar_rate = n_batches * BATCH_SIZE / columnar_time
+    print(
+        f"\nNetFlow batch decode ({BATCH_SIZE}-record batches): "
+        f"json={json_rate:,.0f} rec/s ({json_bytes:,.0f} B/batch) "
+        f"columnar={columnar_rate:,.0f} rec/s ({columnar_bytes:,.0f} B/batch)"
+    )
+
+    assert columnar_rows == json_rows
+    assert columnar_bytes < json_bytes / 2
+    assert columnar_rate > json_rate, (
+        f"Columnar decode only {columnar_rate / json_rate:.2f}x the JSON rate"
+    )
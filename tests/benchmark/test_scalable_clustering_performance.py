@@ -0,0 +1,89 @@
+"""
+Performance benchmarks for approximate (sampled) HDBSCAN clustering.
+
+Compares EndpointClusterer's approximate mode against exact HDBSCAN on
+synthetic endpoint populations of 10k, 100k and 1M endpoints. Quality is
+measured as the adjusted Rand index against the generating groups and
+against the exact labels; exact HDBSCAN is skipped above
+EXACT_MAX_ENDPOINTS, where it no longer finishes in reasonable time.
+"""
+
+import pytest
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+from sklearn.metrics import adjusted_rand_score
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from clarion.clustering.clusterer import EndpointClusterer
+from clarion.clustering.features import FeatureVector
+
+
+EXACT_MAX_ENDPOINTS = 100_000
+
+SIZES = [
+    pytest.param(10_000, id="10k"),
+    pytest.param(100_000, id="100k", marks=pytest.mark.slow),
+    pytest.param(1_000_000, id="1M", marks=pytest.mark.slow),
+]
+
+
+def make_synthetic_matrix(n_endpoints: int, n_groups: int = 8, seed: int = 42):
+    """Build a normalized feature matrix of Gaussian behavioral groups."""
+    rng = np.random.default_rng(seed)
+    n_features = len(FeatureVector.feature_names())
+
+    centers = rng.normal(0.0, 4.0, size=(n_groups, n_features))
+    # Uneven group sizes, smallest ~4% of the population
+    weights = np.linspace(1.0, 4.0, n_groups)
+    truth = rng.choice(n_groups, n_endpoints, p=weights / weights.sum())
+    X = centers[truth] + rng.normal(0.0, 0.5, size=(n_endpoints, n_features))
+
+    endpoint_ids = [f"ep-{i}" for i in range(n_endpoints)]
+    return X, endpoint_ids, truth
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("n_endpoints", SIZES)
+def test_approximate_clustering_vs_exact(n_endpoints):
+    """Approximate clustering should match exact quality at a fraction of the time."""
+    X, endpoint_ids, truth = make_synthetic_matrix(n_endpoints)
+    clusterer = EndpointClusterer(min_cluster_size=50, min_samples=10, sample_size=5_000)
+
+    start = time.perf_counter()
+    approx = clusterer.cluster_matrix(X, endpoint_ids, approximate=True)
+    approx_time = time.perf_counter() - start
+    approx_ari = adjusted_rand_score(truth, approx.labels)
+
+    report = (
+        f"\nClustering ({n_endpoints:,} endpoints): "
+        f"approximate={approx_time:.2f}s ARI={approx_ari:.3f} "
+        f"clusters={approx.n_clusters} silhouette={approx.silhouette:.3f}"
+    )
+
+    assert approx.sample_size is not None
+    assert len(approx.labels) == n_endpoints
+    assert approx_ari > 0.9, f"Approximate ARI only {approx_ari:.3f}"
+
+    if n_endpoints <= EXACT_MAX_ENDPOINTS:
+        start = time.perf_counter()
+        exact = clusterer.cluster_matrix(X, endpoint_ids, approximate=False)
+        exact_time = time.perf_counter() - start
+        exact_ari = adjusted_rand_score(truth, exact.labels)
+        agreement = adjusted_rand_score(exact.labels, approx.labels)
+
+        report += (
+            f" | exact={exact_time:.2f}s ARI={exact_ari:.3f} "
+            f"clusters={exact.n_clusters} silhouette={exact.silhouette:.3f} "
+            f"agreement={agreement:.3f} speedup={exact_time / approx_time:.1f}x"
+        )
+
+        assert agreement > 0.9, f"Approximate vs exact ARI only {agreement:.3f}"
+        assert abs(approx.silhouette - exact.silhouette) < 0.1
+        if n_endpoints >= 100_000:
+            assert approx_time < exact_time
+
+    print(report)
@@ -87,7 +87,7 @@ def test_db():
 @pytest.fixture
 def sample_sketches(test_db):
     """Create sample sketches for testing."""
-    if not DATA_DIR.exists():
+    if not (DATA_DIR / "flows.csv").exists():
         pytest.skip(f"Synthetic data not found at {DATA_DIR}")
     
     # Load a small subset of data
@@ -339,6 +339,78 @@ class TestIncrementalClustering:
             assert endpoint_sgt is not None
             assert endpoint_sgt[1] == assignment['cluster_id']
 
+    @pytest.mark.parametrize("tree_min_centroids", [256, 1])
+    def test_bulk_assignment_matches_per_endpoint(
+        self, test_db, sample_sketches, monkeypatch, tree_min_centroids
+    ):
+        """Test that vectorized bulk assignment matches per-endpoint assignment."""
+        from clarion.clustering import centroid_model
+        from clarion.clustering.features import FeatureExtractor
+
+        monkeypatch.setattr(centroid_model, "TREE_MIN_CENTROIDS", tree_min_centroids)
+
+        clusterer = EndpointClusterer(min_cluster_size=5, min_samples=2)
+        result = clusterer.cluster(sample_sketches)
+        features = FeatureExtractor().extract_all(sample_sketches)
+
+        incremental = IncrementalClusterer(db=test_db, max_distance_threshold=3.0)
+        incremental.store_centroids_from_clustering(result, features)
+
+        sketches = list(sample_sketches)
+        expected = incremental.assign_endpoints_bulk(
+            sketches, store_assignments=False, update_centroids=False, vectorized=False,
+        )
+        actual = incremental.assign_endpoints_bulk(sketches, update_centroids=False)
+
+        assert len(actual) == len(expected)
+        for a, e in zip(actual, expected):
+            assert a['endpoint_id'] == e['endpoint_id']
+            assert a['cluster_id'] == e['cluster_id']
+            assert a['sgt_value'] == e['sgt_value']
+            assert a['distance'] == pytest.approx(e['distance'])
+            assert a['confidence'] == pytest.approx(e['confidence'])
+
+        # Every non-noise assignment is stored
+        stored = dict(test_db._get_connection().execute("""
+            SELECT endpoint_id, cluster_id FROM cluster_assignments
+            WHERE assigned_by = 'incremental'
+        """).fetchall())
+        assert stored == {
+            a['endpoint_id']: a['cluster_id'] for a in actual if a['cluster_id'] != -1
+        }
+
+    def test_centroid_model_persists_scaler(self, test_db, sample_sketches):
+        """Test that a reloaded model normalizes with the clustering scaler."""
+        import numpy as np
+        from clarion.clustering.features import FeatureExtractor
+
+        clusterer = EndpointClusterer(min_cluster_size=5, min_samples=2)
+        result = clusterer.cluster(sample_sketches)
+        features = FeatureExtractor().extract_all(sample_sketches)
+        scaler = clusterer._feature_extractor._scaler
+
+        IncrementalClusterer(db=test_db).store_centroids_from_clustering(
+            result, features, scaler=scaler,
+        )
+
+        incremental = IncrementalClusterer(db=test_db)
+        assert incremental.load_centroids() == result.n_clusters
+        assert incremental.model_version is not None
+        model = incremental._current_model()
+        np.testing.assert_allclose(model.scaler_mean, scaler.mean_)
+        np.testing.assert_allclose(model.scaler_scale, scaler.scale_)
+
+        # Clustered endpoints land in their own cluster in normalized space
+        assignments = incremental.assign_endpoints_bulk(
+            list(sample_sketches), store_assignments=False, update_centroids=False,
+        )
+        clustered = [
+            (a['cluster_id'], int(label))
+            for a, label in zip(assignments, result.labels) if label != -1
+        ]
+        agreement = sum(1 for assigned, label in clustered if assigned == label) / len(clustered)
+        assert agreement > 0.5
+
 
 class TestConfidenceAndExplanations:
     """Test confidence scoring and explanations."""
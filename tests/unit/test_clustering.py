@@ -4,7 +4,9 @@ Unit tests for Clarion clustering module.
 
 import pytest
 import numpy as np
+from collections import Counter
 from datetime import datetime
+from sklearn.preprocessing import StandardScaler
 
 from clarion.sketches import EndpointSketch
 from clarion.ingest.sketch_builder import SketchStore
@@ -12,6 +14,10 @@ from clarion.clustering.features import FeatureExtractor, FeatureVector
 from clarion.clustering.clusterer import EndpointClusterer, ClusterResult, LightweightClusterer
 from clarion.clustering.labeling import SemanticLabeler, ClusterLabel
 from clarion.clustering.sgt_mapper import SGTMapper, SGTRecommendation, SGTTaxonomy
+from clarion.clustering.centroid_model import CentroidModel
+from clarion.clustering.confidence import ConfidenceScorer
+from clarion.clustering.incremental import IncrementalClusterer
+from clarion.storage.database import ClarionDatabase
 
 
 @pytest.fixture
@@ -172,6 +178,42 @@ class TestEndpointClusterer:
         # Check that sketches have cluster assignments
         assigned = sum(1 for s in sample_sketches if s.local_cluster_id != -1)
         assert assigned > 0
+    
+    def test_confidence_matches_scalar_scoring(self, sample_sketches: SketchStore):
+        """Test vectorized confidences match per-endpoint ConfidenceScorer."""
+        clusterer = EndpointClusterer(min_cluster_size=10, min_samples=5)
+        result = clusterer.cluster(sample_sketches)
+        
+        for i, endpoint_id in enumerate(result.endpoint_ids):
+            label = int(result.labels[i])
+            expected = ConfidenceScorer.for_cluster_assignment(
+                cluster_id=label,
+                probability=float(result.probabilities[i]),
+                cluster_size=result.cluster_sizes[label],
+                silhouette=result.silhouette,
+            )
+            assert result.confidence_scores[endpoint_id] == pytest.approx(expected)
+    
+    def test_cluster_approximate(self, sample_sketches: SketchStore):
+        """Test sampled HDBSCAN assigns every endpoint."""
+        clusterer = EndpointClusterer(
+            min_cluster_size=10, min_samples=5, sample_size=60, n_strata=8,
+        )
+        result = clusterer.cluster(sample_sketches, approximate=True)
+        
+        assert result.sample_size is not None
+        assert result.sample_size < len(sample_sketches)
+        assert len(result.labels) == len(sample_sketches)
+        assert result.n_clusters >= 2
+        assert set(result.confidence_scores) == set(result.endpoint_ids)
+        assert result.summary()["sample_size"] == result.sample_size
+    
+    def test_cluster_below_threshold_is_exact(self, sample_sketches: SketchStore):
+        """Test small populations are clustered exactly by default."""
+        clusterer = EndpointClusterer(min_cluster_size=10, min_samples=5, sample_size=60)
+        result = clusterer.cluster(sample_sketches)
+        
+        assert result.sample_size is None
 
 
 class TestLightweightClusterer:
@@ -307,3 +349,200 @@ class TestSGTMapper:
         assert coverage > 0.5
 
 
+
+
+class TestConfidenceScorer:
+    """Tests for confidence scoring."""
+    
+    @pytest.mark.parametrize("silhouette", [None, 0.35])
+    def test_vectorized_matches_scalar(self, silhouette):
+        """Test for_cluster_assignments() matches for_cluster_assignment() per element."""
+        rng = np.random.default_rng(3)
+        n = 200
+        cluster_ids = rng.integers(-1, 5, size=n)
+        distances = rng.uniform(0.0, 3.0, size=n)
+        sizes = rng.choice([1, 4, 9, 10, 500, 999, 1000, 5000], size=n).astype(np.float64)
+        probabilities = rng.uniform(-0.1, 1.1, size=n)
+        # NaN marks a metric as unavailable for that element
+        distances[rng.random(n) < 0.3] = np.nan
+        sizes[rng.random(n) < 0.3] = np.nan
+        probabilities[rng.random(n) < 0.3] = np.nan
+        
+        actual = ConfidenceScorer.for_cluster_assignments(
+            cluster_ids, distances=distances, cluster_sizes=sizes,
+            probabilities=probabilities, silhouette=silhouette,
+        )
+        
+        def value(x):
+            return None if np.isnan(x) else float(x)
+        
+        for i in range(n):
+            size = value(sizes[i])
+            expected = ConfidenceScorer.for_cluster_assignment(
+                cluster_id=int(cluster_ids[i]),
+                distance=value(distances[i]),
+                probability=value(probabilities[i]),
+                cluster_size=None if size is None else int(size),
+                silhouette=silhouette,
+            )
+            assert actual[i] == pytest.approx(expected)
+
+
+class TestCentroidModel:
+    """Tests for the persisted scaler + centroid model."""
+    
+    @pytest.fixture
+    def model(self) -> CentroidModel:
+        rng = np.random.default_rng(0)
+        features = np.vstack([
+            rng.normal(loc, 0.5, size=(40, 4)) for loc in (0.0, 10.0, 20.0)
+        ])
+        labels = np.repeat([0, 1, 2], 40)
+        labels[0] = -1
+        scaler = StandardScaler().fit(features)
+        return CentroidModel.fit(features, labels, scaler.mean_, scaler.scale_, {1: 7})
+    
+    def test_fit(self, model: CentroidModel):
+        """Test centroids are per-cluster means in normalized space."""
+        assert model.n_clusters == 3
+        assert model.n_features == 4
+        assert model.member_count(0) == 39
+        assert model.sgt_value(0) is None
+        assert model.sgt_value(1) == 7
+    
+    def test_roundtrip(self, model: CentroidModel):
+        """Test binary serialization preserves the model."""
+        restored = CentroidModel.from_bytes(model.to_bytes(), version=3)
+        
+        assert restored.version == 3
+        np.testing.assert_array_equal(restored.cluster_ids, model.cluster_ids)
+        np.testing.assert_array_equal(restored.centroids, model.centroids)
+        np.testing.assert_array_equal(restored.scaler_mean, model.scaler_mean)
+        np.testing.assert_array_equal(restored.scaler_scale, model.scaler_scale)
+        np.testing.assert_array_equal(restored.sgt_values, model.sgt_values)
+        np.testing.assert_array_equal(restored.member_counts, model.member_counts)
+    
+    def test_from_bytes_rejects_truncated(self, model: CentroidModel):
+        """Test malformed data raises ValueError."""
+        with pytest.raises(ValueError):
+            CentroidModel.from_bytes(model.to_bytes()[:-1])
+    
+    @pytest.mark.parametrize("tree_min_centroids", [256, 1])
+    def test_nearest_matches_brute_force(self, model, monkeypatch, tree_min_centroids):
+        """Test nearest() agrees with brute force (matrix and BallTree paths)."""
+        from clarion.clustering import centroid_model
+        
+        monkeypatch.setattr(centroid_model, "TREE_MIN_CENTROIDS", tree_min_centroids)
+        features = model.transform(np.random.default_rng(1).normal(10.0, 8.0, size=(50, 4)))
+        
+        positions, distances = model.nearest(features)
+        
+        brute = np.linalg.norm(features[:, None, :] - model.centroids[None, :, :], axis=2)
+        np.testing.assert_array_equal(positions, brute.argmin(axis=1))
+        np.testing.assert_allclose(distances, brute.min(axis=1))
+
+
+def make_random_sketches(n_endpoints: int, seed: int) -> list:
+    """Build sketches with varied traffic volumes and peer counts."""
+    rng = np.random.default_rng(seed)
+    sketches = []
+    for i in range(n_endpoints):
+        sketch = EndpointSketch(endpoint_id=f"00:11:22:00:{i // 256:02x}:{i % 256:02x}")
+        sketch.bytes_in = int(rng.integers(100, 1_000_000))
+        sketch.bytes_out = int(rng.integers(100, 1_000_000))
+        sketch.flow_count = int(rng.integers(1, 5000))
+        sketch.active_hours = int(rng.integers(0, 1 << 24))
+        for j in range(int(rng.integers(1, 20))):
+            sketch.unique_peers.add(f"10.0.{j}.{i % 256}")
+        sketches.append(sketch)
+    return sketches
+
+
+class TestIncrementalClusterer:
+    """Tests for nearest-centroid assignment of new endpoints."""
+    
+    @pytest.fixture
+    def incremental(self, tmp_path) -> IncrementalClusterer:
+        db = ClarionDatabase(str(tmp_path / "clarion.db"))
+        extractor = FeatureExtractor()
+        incremental = IncrementalClusterer(
+            feature_extractor=extractor, db=db, max_distance_threshold=4.0,
+        )
+        rng = np.random.default_rng(7)
+        for cluster_id, sketch in enumerate(make_random_sketches(16, seed=7)):
+            sgt_value = 100 + cluster_id
+            db.create_sgt(sgt_value, f"SGT-{cluster_id}")
+            anchor = extractor.extract(sketch).to_array()
+            incremental.update_centroid(
+                cluster_id=cluster_id,
+                feature_vector=[float(x) for x in anchor + rng.normal(0.0, 0.1, len(anchor))],
+                sgt_value=sgt_value,
+                member_count=int(rng.integers(1, 2000)),
+            )
+        incremental.load_centroids()
+        yield incremental
+        db.close()
+    
+    @pytest.fixture
+    def modeled(self, tmp_path, sample_sketches) -> IncrementalClusterer:
+        db = ClarionDatabase(str(tmp_path / "modeled.db"))
+        result = EndpointClusterer(min_cluster_size=10, min_samples=5).cluster(sample_sketches)
+        features = FeatureExtractor().extract_all(sample_sketches)
+        incremental = IncrementalClusterer(db=db)
+        incremental.store_centroids_from_clustering(result, features)
+        yield incremental
+        db.close()
+    
+    def test_centroid_update_stored_as_new_model_version(self, modeled):
+        """Test update_centroid() changes survive a reload of the stored model."""
+        version = modeled.model_version
+        cluster_id = int(modeled._current_model().cluster_ids[0])
+        moved = [float(x) + 0.5 for x in modeled.get_centroid(cluster_id)]
+        
+        modeled.update_centroid(cluster_id, moved, member_count=42)
+        assert modeled.model_version > version
+        
+        reloaded = IncrementalClusterer(db=modeled.db)
+        reloaded.load_centroids()
+        assert reloaded.model_version == modeled.model_version
+        np.testing.assert_allclose(reloaded.get_centroid(cluster_id), moved, rtol=1e-6)
+        assert reloaded._centroid_metadata[cluster_id]['member_count'] == 42
+    
+    def test_member_counts_survive_reload(self, modeled, sample_sketches):
+        """Test member counts from new assignments are kept in the stored model."""
+        version = modeled.model_version
+        assignments = modeled.assign_endpoints_bulk(list(sample_sketches)[:10])
+        counts = Counter(a['cluster_id'] for a in assignments if a['cluster_id'] != -1)
+        assert counts
+        
+        reloaded = IncrementalClusterer(db=modeled.db)
+        reloaded.load_centroids()
+        assert reloaded.model_version == version
+        for cluster_id, count in counts.items():
+            assert reloaded._centroid_metadata[cluster_id]['member_count'] == count
+    
+    @pytest.mark.parametrize("tree_min_centroids", [256, 1])
+    def test_bulk_assignment_matches_per_endpoint(
+        self, incremental, monkeypatch, tree_min_centroids
+    ):
+        """Test vectorized bulk assignment matches assigning one at a time."""
+        from clarion.clustering import centroid_model
+        
+        monkeypatch.setattr(centroid_model, "TREE_MIN_CENTROIDS", tree_min_centroids)
+        sketches = make_random_sketches(300, seed=42)
+        
+        expected = incremental.assign_endpoints_bulk(
+            sketches, store_assignments=False, update_centroids=False, vectorized=False,
+        )
+        actual = incremental.assign_endpoints_bulk(
+            sketches, store_assignments=False, update_centroids=False,
+        )
+        
+        assert any(e['cluster_id'] != -1 for e in expected)
+        assert len(actual) == len(expected)
+        for a, e in zip(actual, expected):
+            assert (a['endpoint_id'], a['cluster_id'], a['sgt_value']) == (
+                e['endpoint_id'], e['cluster_id'], e['sgt_value']
+            )
+            assert a['distance'] == pytest.approx(e['distance'])
+            assert a['confidence'] == pytest.approx(e['confidence'])
@@ -0,0 +1,585 @@
+"""
+Unit tests for ClarionDatabase storage operations.
+"""
+
+import pytest
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from clarion.config import DatabaseSettings
+from clarion.sketches import decode_edge_sketch
+from clarion.storage import database as database_module
+from clarion.storage.database import ClarionDatabase
+
+# Edge agent package, for producing real binary sketches
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "edge"))
+from clarion_edge.sketch import EdgeSketch
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fresh database in a temporary directory."""
+    database = ClarionDatabase(str(tmp_path / "clarion.db"))
+    yield database
+    database.close()
+
+
+def make_sketch(endpoint_id: str, switch_id: str = "SW-1", **overrides) -> dict:
+    """Build a sketch row in the shape sent by edge agents."""
+    sketch = {
+        "endpoint_id": endpoint_id,
+        "switch_id": switch_id,
+        "unique_peers": 5,
+        "unique_ports": 3,
+        "bytes_in": 1000,
+        "bytes_out": 2000,
+        "flow_count": 10,
+        "first_seen": 1_700_000_000,
+        "last_seen": 1_700_003_600,
+        "active_hours": 0b11,
+        "local_cluster_id": -1,
+    }
+    sketch.update(overrides)
+    return sketch
+
+
+class TestConnectionProfile:
+    """Tests for the SQLite connection profile and maintenance."""
+
+    def pragma(self, db, name):
+        return db._get_connection().execute(f"PRAGMA {name}").fetchone()[0]
+
+    def test_default_profile_applied(self, db):
+        assert self.pragma(db, "journal_mode") == "wal"
+        assert self.pragma(db, "synchronous") == 1  # NORMAL
+        assert self.pragma(db, "temp_store") == 2  # MEMORY
+        assert self.pragma(db, "busy_timeout") == 5000
+        assert self.pragma(db, "cache_size") == -64 * 1024
+        assert self.pragma(db, "foreign_keys") == 1
+
+    def test_settings_from_env(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("CLARION_DB_SYNCHRONOUS", "full")
+        monkeypatch.setenv("CLARION_DB_BUSY_TIMEOUT_MS", "1234")
+        monkeypatch.setenv("CLARION_DB_MAINTENANCE_INTERVAL", "0")
+        settings = DatabaseSettings.from_env()
+        assert settings.synchronous == "FULL"
+        assert settings.maintenance_interval_seconds == 0
+
+        database = ClarionDatabase(str(tmp_path / "env.db"), settings=settings)
+        try:
+            assert self.pragma(database, "synchronous") == 2  # FULL
+            assert self.pragma(database, "busy_timeout") == 1234
+            assert not database.start_maintenance()
+        finally:
+            database.close()
+
+    def test_invalid_setting_rejected(self):
+        with pytest.raises(ValueError):
+            DatabaseSettings(synchronous="SOMETIMES")
+
+    def test_instances_use_separate_connections(self, db, tmp_path):
+        other = ClarionDatabase(str(tmp_path / "other.db"))
+        try:
+            other.store_sketches_bulk([make_sketch("bb:01")])
+            assert other.count_sketches() == 1
+            assert db.count_sketches() == 0
+        finally:
+            other.close()
+
+    def test_run_maintenance(self, db):
+        db.store_sketches_bulk([make_sketch("aa:01")])
+        result = db.run_maintenance()
+        assert not result["busy"]
+        assert result["checkpointed_pages"] == result["wal_pages"]
+
+    def test_maintenance_applies_netflow_retention(self, db):
+        db.store_netflow_bulk([{
+            "src_ip": "10.0.0.1", "dst_ip": "10.0.0.2", "src_port": 1,
+            "dst_port": 443, "protocol": 6, "bytes": 100, "packets": 1,
+            "flow_start": 1_700_006_400, "flow_end": 1_700_006_405,
+        }])
+        result = db.run_maintenance()
+        assert result["netflow_partitions_dropped"] == 1
+        assert db.get_recent_netflow() == []
+
+    def test_background_maintenance_starts_and_stops(self, db):
+        assert db.start_maintenance(interval_seconds=3600)
+        assert db.start_maintenance(interval_seconds=3600)
+        db.stop_maintenance(timeout=5)
+        assert db._maintenance_thread is None
+
+
+class TestSketchBulkStorage:
+    """Tests for bulk sketch upsert."""
+
+    def test_bulk_insert_reports_new_endpoints(self, db):
+        new = db.store_sketches_bulk([
+            make_sketch("aa:01"),
+            make_sketch("aa:02"),
+            make_sketch("aa:01", switch_id="SW-2"),
+        ])
+
+        assert new == ["aa:01", "aa:02", "aa:01"]
+        assert db.count_sketches() == 3
+        assert db.count_sketches(switch_id="SW-1") == 2
+
+    def test_bulk_upsert_updates_and_keeps_earliest_first_seen(self, db):
+        db.store_sketches_bulk([make_sketch("aa:01", first_seen=100)])
+        original_id = db.get_sketch("aa:01", "SW-1")["id"]
+
+        new = db.store_sketches_bulk([
+            make_sketch("aa:01", first_seen=200, flow_count=99),
+            make_sketch("aa:02"),
+        ])
+
+        assert new == ["aa:02"]
+        row = db.get_sketch("aa:01", "SW-1")
+        assert row["id"] == original_id
+        assert row["first_seen"] == 100
+        assert row["flow_count"] == 99
+
+        db.store_sketches_bulk([make_sketch("aa:01", first_seen=50)])
+        assert db.get_sketch("aa:01", "SW-1")["first_seen"] == 50
+
+    def test_bulk_matches_single_store(self, db):
+        db.store_sketch(**make_sketch("aa:01", first_seen=100))
+        new = db.store_sketches_bulk([make_sketch("aa:01"), make_sketch("aa:01")])
+
+        assert new == []
+        assert db.count_sketches() == 1
+        assert db.is_endpoint_first_seen("aa:02")
+        assert not db.is_endpoint_first_seen("aa:01")
+
+    def test_bulk_persists_sketch_data(self, db):
+        blob = memoryview(b"\x00\x01sketch-bytes")
+        db.store_sketches_bulk([make_sketch("aa:01", sketch_data=blob[2:])])
+        assert db.get_sketch("aa:01", "SW-1")["sketch_data"] == b"sketch-bytes"
+
+    def test_bulk_empty_batch(self, db):
+        assert db.store_sketches_bulk([]) == []
+        assert db.count_sketches() == 0
+
+
+class TestGlobalSketchMerge:
+    """Tests for incremental per-endpoint merge across switches."""
+
+    def record(self, sketch: EdgeSketch, peers, start: int = 0) -> EdgeSketch:
+        for i, peer in enumerate(peers):
+            sketch.record_flow(
+                dst_ip=peer, dst_port=443, proto="tcp", bytes_count=100,
+                is_outbound=True, timestamp=1_700_000_000 + start + i,
+            )
+        return sketch
+
+    def row(self, sketch: EdgeSketch) -> dict:
+        return decode_edge_sketch(sketch.to_bytes()).to_row()
+
+    def test_roaming_endpoint_merges_across_switches(self, db):
+        sw1 = self.record(EdgeSketch("aa:01", "SW-1"), [f"10.0.0.{i}" for i in range(40)])
+        sw2 = self.record(EdgeSketch("aa:01", "SW-2"), [f"10.0.0.{i}" for i in range(20, 80)])
+        db.store_sketches_bulk([self.row(sw1)])
+        db.store_sketches_bulk([self.row(sw2)])
+
+        union = EdgeSketch("aa:01", "SW-1")
+        union.merge(sw1)
+        union.merge(sw2)
+
+        merged = db.get_global_sketch("aa:01")
+        assert merged["switch_count"] == 2
+        assert merged["flow_count"] == 100
+        assert merged["unique_peers"] == union.unique_peers.count()
+        frame = decode_edge_sketch(merged["sketch_data"])
+        assert frame.port_counters.ravel().tolist() == list(union.port_frequency.counters)
+
+    def test_resync_and_growth_do_not_double_count(self, db):
+        sketch = self.record(EdgeSketch("aa:01", "SW-1"), [f"10.0.0.{i}" for i in range(10)])
+        db.store_sketches_bulk([self.row(sketch)])
+        db.store_sketches_bulk([self.row(sketch)])
+        assert db.get_global_sketch("aa:01")["flow_count"] == 10
+
+        self.record(sketch, [f"10.0.1.{i}" for i in range(5)], start=100)
+        db.store_sketches_bulk([self.row(sketch), self.row(sketch)])
+
+        merged = db.get_global_sketch("aa:01")
+        assert merged["flow_count"] == 15
+        assert merged["bytes_out"] == 1500
+        assert merged["unique_peers"] == sketch.unique_peers.count()
+        frame = decode_edge_sketch(merged["sketch_data"])
+        assert frame.port_counters.ravel().tolist() == list(sketch.port_frequency.counters)
+
+    def test_edge_restart_adds_new_snapshot(self, db):
+        before = self.record(EdgeSketch("aa:01", "SW-1"), ["10.0.0.1"] * 8)
+        db.store_sketches_bulk([self.row(before)])
+        after = self.record(EdgeSketch("aa:01", "SW-1"), ["10.0.0.2"] * 3, start=100)
+        db.store_sketches_bulk([self.row(after)])
+
+        merged = db.get_global_sketch("aa:01")
+        assert merged["flow_count"] == 11
+        assert merged["switch_count"] == 1
+        frame = decode_edge_sketch(merged["sketch_data"])
+        assert int(frame.port_counters[0].sum()) == 11
+
+    def test_json_uploads_merge_totals(self, db):
+        db.store_sketches_bulk([make_sketch("aa:01", flow_count=10, unique_peers=4)])
+        db.store_sketches_bulk([
+            make_sketch("aa:01", flow_count=12, unique_peers=3),
+            make_sketch("aa:01", switch_id="SW-2", flow_count=5, first_seen=10),
+        ])
+
+        merged = db.get_global_sketch("aa:01")
+        assert merged["flow_count"] == 17
+        assert merged["unique_peers"] == 5
+        assert merged["first_seen"] == 10
+        assert merged["switch_count"] == 2
+        assert merged["sketch_data"] is None
+
+    def test_json_upload_between_binary_snapshots(self, db):
+        sketch = self.record(EdgeSketch("aa:01", "SW-1"), [f"10.0.0.{i}" for i in range(10)])
+        db.store_sketches_bulk([self.row(sketch)])
+
+        self.record(sketch, [f"10.0.1.{i}" for i in range(3)], start=100)
+        json_row = self.row(sketch)
+        del json_row["sketch_data"]
+        db.store_sketches_bulk([json_row])
+
+        self.record(sketch, [f"10.0.2.{i}" for i in range(2)], start=200)
+        db.store_sketches_bulk([self.row(sketch)])
+
+        merged = db.get_global_sketch("aa:01")
+        assert merged["flow_count"] == 15
+        frame = decode_edge_sketch(merged["sketch_data"])
+        assert frame.port_counters.ravel().tolist() == list(sketch.port_frequency.counters)
+
+    def test_single_store_updates_global(self, db):
+        sketch_id, is_new = db.store_sketch(**make_sketch("aa:01"))
+        assert is_new
+        assert db.store_sketch(**make_sketch("aa:01")) == (sketch_id, False)
+        assert db.get_global_sketch("aa:01")["flow_count"] == 10
+
+
+class TestNetflowBulkStorage:
+    """Tests for bulk NetFlow inserts."""
+
+    def make_record(self, **overrides) -> dict:
+        record = {
+            "src_ip": "10.0.0.1",
+            "dst_ip": "10.0.0.2",
+            "src_port": 50000,
+            "dst_port": 443,
+            "protocol": 6,
+            "bytes": 1500,
+            "packets": 3,
+            "flow_start": 1_700_000_000,
+            "flow_end": 1_700_000_005,
+        }
+        record.update(overrides)
+        return record
+
+    def test_bulk_insert_applies_default_switch(self, db):
+        stored = db.store_netflow_bulk(
+            [
+                self.make_record(),
+                self.make_record(switch_id="SW-9", src_sgt=10, vlan_id=20),
+            ],
+            switch_id="SW-1",
+        )
+
+        assert stored == 2
+        rows = sorted(db.get_recent_netflow(), key=lambda r: r["switch_id"])
+        assert [r["switch_id"] for r in rows] == ["SW-1", "SW-9"]
+        assert rows[0]["src_sgt"] is None
+        assert rows[1]["src_sgt"] == 10
+        assert rows[1]["vlan_id"] == 20
+
+    def test_bulk_empty_batch(self, db):
+        assert db.store_netflow_bulk([]) == 0
+        assert db.get_recent_netflow() == []
+
+
+class TestNetflowPartitioning:
+    """Tests for daily NetFlow partitions, rollups and retention."""
+
+    DAY = 86400
+    BASE = 1_700_006_400  # 2023-11-15 00:00:00 UTC
+
+    def make_record(self, flow_start: int, **overrides) -> dict:
+        record = {
+            "src_ip": "10.0.0.1",
+            "dst_ip": "10.0.0.2",
+            "src_port": 50000,
+            "dst_port": 443,
+            "protocol": 6,
+            "bytes": 100,
+            "packets": 1,
+            "flow_start": flow_start,
+            "flow_end": flow_start + 5,
+        }
+        record.update(overrides)
+        return record
+
+    def partitions(self, db):
+        return [
+            row[0] for row in db._get_connection().execute(
+                "SELECT table_name FROM netflow_partitions ORDER BY day_start"
+            )
+        ]
+
+    def test_records_split_into_daily_partitions(self, db):
+        db.store_netflow_bulk([
+            self.make_record(self.BASE + 10),
+            self.make_record(self.BASE + self.DAY + 10),
+            self.make_record(self.BASE + self.DAY + 20),
+        ])
+        db.store_netflow(**self.make_record(self.BASE + 2 * self.DAY))
+
+        assert self.partitions(db) == [
+            "netflow_p20231115", "netflow_p20231116", "netflow_p20231117",
+        ]
+        conn = db._get_connection()
+        ids = [row[0] for row in conn.execute("SELECT id FROM netflow")]
+        assert len(ids) == len(set(ids)) == 4
+
+        recent = db.get_recent_netflow(limit=2)
+        assert [r["flow_start"] for r in recent] == [
+            self.BASE + 2 * self.DAY, self.BASE + self.DAY + 20,
+        ]
+        since = db.get_recent_netflow(since=self.BASE + self.DAY + 15)
+        assert len(since) == 2
+
+    def test_device_flows_pruned_by_window(self, db):
+        db.store_netflow_bulk([
+            self.make_record(self.BASE + 10, src_ip="10.0.0.7"),
+            self.make_record(self.BASE + self.DAY + 10, src_ip="10.0.0.7"),
+            self.make_record(self.BASE + self.DAY + 20, src_ip="10.0.0.8"),
+        ])
+
+        flows = db.get_device_to_device_flows(
+            src_device="10.0.0.7", since=self.BASE + self.DAY,
+        )
+        assert [f["flow_start"] for f in flows] == [self.BASE + self.DAY + 10]
+
+    def test_summary_matches_raw_flows(self, db):
+        records = []
+        for i in range(200):
+            records.append(self.make_record(
+                self.BASE + i * 97,
+                src_ip=f"10.0.0.{i % 3}",
+                dst_port=[443, 53][i % 2],
+                bytes=i,
+                src_sgt=10 if i % 5 else None,
+            ))
+        db.store_netflow_bulk(records)
+
+        since = self.BASE + 3600 + 120
+        until = self.BASE + 5 * 3600 + 360
+        summary = db.get_netflow_summary(since=since, until=until)
+
+        expected = {}
+        for r in records:
+            if since <= r["flow_start"] < until:
+                key = (r["src_ip"], r["dst_ip"], r["dst_port"], r["protocol"], r.get("src_sgt"))
+                totals = expected.setdefault(key, [0, 0])
+                totals[0] += r["bytes"]
+                totals[1] += 1
+        actual = {
+            (s["src_ip"], s["dst_ip"], s["dst_port"], s["protocol"], s["src_sgt"]):
+            [s["bytes"], s["flow_count"]]
+            for s in summary
+        }
+        assert actual == expected
+        assert summary[0]["bytes"] == max(v[0] for v in expected.values())
+
+        aggregated = db.get_device_to_device_flows(
+            src_device="10.0.0.1", since=since, until=until, aggregate=True,
+        )
+        assert {f["src_ip"] for f in aggregated} == {"10.0.0.1"}
+
+    def test_retention_drops_old_partitions(self, db):
+        db.store_netflow_bulk([
+            self.make_record(self.BASE + 10),
+            self.make_record(self.BASE + self.DAY + 10),
+            self.make_record(self.BASE + self.DAY + 7200),
+        ])
+        cutoff = self.BASE + self.DAY + 3600
+        db._drop_netflow_before(db._get_connection(), cutoff)
+        db._get_connection().commit()
+
+        assert self.partitions(db) == ["netflow_p20231116"]
+        remaining = db.get_recent_netflow()
+        assert [r["flow_start"] for r in remaining] == [self.BASE + self.DAY + 7200]
+        summary = db.get_netflow_summary()
+        assert sum(s["flow_count"] for s in summary) == 1
+
+    def test_partition_names(self, db):
+        for day_start in (0, 951_782_400, 1_700_006_400, 4_102_358_400):
+            day = datetime.fromtimestamp(day_start, tz=timezone.utc)
+            assert db._netflow_partition_name(day_start) == f"netflow_p{day:%Y%m%d}"
+
+    def test_implausible_flow_start_rejected(self, db):
+        stored = db.store_netflow_bulk([
+            self.make_record(self.BASE + 10),
+            self.make_record(1_700_000_000_000),  # milliseconds
+            self.make_record(-1),
+        ])
+        assert stored == 1
+        assert self.partitions(db) == ["netflow_p20231115"]
+        assert db.get_netflow_summary()[0]["flow_count"] == 1
+
+        with pytest.raises(ValueError):
+            db.store_netflow(**self.make_record(1_700_000_000_000))
+
+    def test_new_partitions_capped_per_batch(self, db):
+        days = database_module._NETFLOW_MAX_NEW_PARTITIONS + 4
+        stored = db.store_netflow_bulk([
+            self.make_record(self.BASE + i * self.DAY) for i in range(days)
+        ])
+        assert stored == database_module._NETFLOW_MAX_NEW_PARTITIONS
+        partitions = self.partitions(db)
+        assert len(partitions) == database_module._NETFLOW_MAX_NEW_PARTITIONS
+        assert partitions[-1] == db._netflow_partition_name(self.BASE + (days - 1) * self.DAY)
+
+        # Days that already have a partition are not limited
+        assert db.store_netflow_bulk([
+            self.make_record(self.BASE + (days - 1) * self.DAY + 60)
+        ]) == 1
+
+    def test_view_spans_newest_partitions(self, db, monkeypatch):
+        monkeypatch.setattr(database_module, "_NETFLOW_VIEW_MAX_PARTITIONS", 2)
+        for i in range(3):
+            db.store_netflow(**self.make_record(self.BASE + i * self.DAY))
+
+        conn = db._get_connection()
+        in_view = [row[0] for row in conn.execute(
+            "SELECT flow_start FROM netflow ORDER BY flow_start"
+        )]
+        assert in_view == [self.BASE + self.DAY, self.BASE + 2 * self.DAY]
+        assert len(db.get_recent_netflow()) == 3
+
+    def test_endpoint_flows_paginate_across_partitions(self, db):
+        db.store_netflow_bulk([
+            self.make_record(self.BASE + i * 3 * 3600, src_ip="10.0.0.7")
+            for i in range(20)
+        ] + [self.make_record(self.BASE + 60, src_ip="10.0.0.8")])
+
+        expected = sorted(
+            (self.BASE + i * 3 * 3600 for i in range(20)), reverse=True
+        )
+        pages = []
+        for offset in range(0, 20, 6):
+            flows, total = db.get_endpoint_flows(
+                "aa:bb:cc:dd:ee:ff", ip_address="10.0.0.7", limit=6, offset=offset,
+            )
+            assert total == 20
+            pages.extend(f["flow_start"] for f in flows)
+        assert pages == expected
+
+        flows, total = db.get_endpoint_flows("aa:bb:cc:dd:ee:ff")
+        assert (flows, total) == ([], 0)
+
+    def test_legacy_table_migrated(self, tmp_path):
+        path = tmp_path / "legacy.db"
+        conn = sqlite3.connect(path)
+        conn.execute("""
+            CREATE TABLE netflow (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                src_ip TEXT NOT NULL, dst_ip TEXT NOT NULL,
+                src_port INTEGER, dst_port INTEGER, protocol INTEGER,
+                bytes INTEGER, packets INTEGER,
+                flow_start INTEGER, flow_end INTEGER, switch_id TEXT,
+                received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.executemany("""
+            INSERT INTO netflow (src_ip, dst_ip, src_port, dst_port, protocol,
+                                 bytes, packets, flow_start, flow_end)
+            VALUES ('10.0.0.1', '10.0.0.2', 1, 443, 6, 100, 1, ?, ?)
+        """, [(self.BASE + 10, self.BASE + 15), (self.BASE + self.DAY, self.BASE + self.DAY)])
+        conn.commit()
+        conn.close()
+
+        database = ClarionDatabase(str(path))
+        try:
+            assert self.partitions(database) == ["netflow_p20231115", "netflow_p20231116"]
+            assert len(database.get_recent_netflow()) == 2
+            assert database.get_netflow_summary()[0]["flow_count"] == 2
+            database.store_netflow(**self.make_record(self.BASE + 20))
+            assert len(database.get_recent_netflow()) == 3
+        finally:
+            database.close()
+
+
+class TestLivePolicyMatrix:
+    """Tests for the policy matrix maintained at NetFlow ingest."""
+
+    BASE = 1_700_006_400  # 2023-11-15 00:00:00 UTC
+
+    def make_record(self, flow_start: int, **overrides) -> dict:
+        record = {
+            "src_ip": "10.0.0.1",
+            "dst_ip": "10.0.0.2",
+            "src_port": 50000,
+            "dst_port": 443,
+            "protocol": 6,
+            "bytes": 100,
+            "packets": 1,
+            "flow_start": flow_start,
+            "flow_end": flow_start + 5,
+            "src_sgt": 2,
+            "dst_sgt": 3,
+        }
+        record.update(overrides)
+        return record
+
+    def cells(self, db, **kwargs):
+        return {(c["src_sgt"], c["dst_sgt"]): c for c in db.get_policy_matrix_cells(**kwargs)}
+
+    def test_batches_accumulate_across_hours(self, db):
+        db.store_netflow_bulk([
+            self.make_record(self.BASE + 10),
+            self.make_record(self.BASE + 20, src_ip="10.0.0.5", dst_port=80),
+        ])
+        db.store_netflow_bulk([self.make_record(self.BASE + 3600, dst_ip="10.0.0.9")])
+        db.store_netflow(**self.make_record(self.BASE + 7300))
+
+        cell = self.cells(db)[(2, 3)]
+        assert cell["flow_count"] == 4
+        assert cell["bytes"] == 400
+        assert cell["first_seen"] == self.BASE + 10
+        assert cell["last_seen"] == self.BASE + 7305
+        assert cell["unique_src_endpoints"] == 2
+        assert cell["unique_dst_endpoints"] == 2
+        assert [(p["protocol"], p["dst_port"], p["flow_count"]) for p in cell["ports"]] == [
+            (6, 443, 3), (6, 80, 1),
+        ]
+
+        # Windows resolve to whole hour buckets
+        window = self.cells(db, since=self.BASE + 3700, until=self.BASE + 7200)[(2, 3)]
+        assert window["flow_count"] == 1
+        assert window["unique_dst_endpoints"] == 1
+
+    def test_sgts_resolved_from_membership(self, db):
+        db.create_sgt(5, "Printers")
+        db.assign_sgt_to_endpoint("aa:bb:cc:00:00:01", 5)
+        db.store_netflow_bulk([
+            self.make_record(self.BASE, src_sgt=None, dst_sgt=0, src_mac="aa:bb:cc:00:00:01"),
+            self.make_record(self.BASE, src_sgt=None, src_ip="10.9.9.9"),
+        ])
+
+        cells = self.cells(db)
+        # Unresolved destination counts as SGT 0; unresolved source is skipped
+        assert list(cells) == [(5, 0)]
+        assert cells[(5, 0)]["flow_count"] == 1
+
+    def test_retention_drops_old_buckets(self, db):
+        db.store_netflow_bulk([
+            self.make_record(self.BASE + 10),
+            self.make_record(self.BASE + 7200),
+        ])
+        db._drop_netflow_before(db._get_connection(), self.BASE + 3600)
+        db._get_connection().commit()
+
+        assert self.cells(db)[(2, 3)]["flow_count"] == 1
@@ -0,0 +1,169 @@
+"""
+Unit tests for the columnar NetFlow batch format.
+"""
+
+import pytest
+from pathlib import Path
+import struct
+import sys
+import zlib
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from clarion.ingest.flow_batch import (
+    MAX_FLOW_BATCH_BODY,
+    MAX_FLOW_BATCH_RECORDS,
+    decode_flow_batch,
+    encode_flow_batch,
+)
+from clarion.storage.database import ClarionDatabase
+
+# Collector package, for checking its encoder against the backend decoder
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "collector"))
+from clarion_collector.flow_batch import encode_flow_batch as collector_encode_flow_batch
+from clarion_collector.netflow_parser import NetFlowRecord
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fresh database in a temporary directory."""
+    database = ClarionDatabase(str(tmp_path / "clarion.db"))
+    yield database
+    database.close()
+
+
+def make_record(**overrides) -> dict:
+    record = {
+        "src_ip": "10.0.0.1",
+        "dst_ip": "192.168.1.20",
+        "src_port": 50000,
+        "dst_port": 443,
+        "protocol": 6,
+        "bytes": 5_000_000_000,
+        "packets": 3,
+        "flow_start": 1_700_000_000,
+        "flow_end": 1_700_000_005,
+        "switch_id": None,
+        "src_sgt": None,
+        "dst_sgt": None,
+        "src_mac": None,
+        "dst_mac": None,
+        "vlan_id": None,
+    }
+    record.update(overrides)
+    return record
+
+
+RECORDS = [
+    make_record(),
+    make_record(src_ip="10.0.0.2", switch_id="SW-9", src_sgt=10, dst_sgt=0,
+                src_mac="00:11:22:33:44:55", vlan_id=20),
+    make_record(src_ip="10.0.0.1", dst_port=53, protocol=17, dst_mac="00:11:22:33:44:55",
+                switch_id="SW-9", flow_start=1_700_090_000, flow_end=1_700_090_001),
+]
+
+
+def as_row(record: dict, switch_id=None) -> tuple:
+    return (
+        record["src_ip"], record["dst_ip"], record["src_port"], record["dst_port"],
+        record["protocol"], record["bytes"], record["packets"],
+        record["flow_start"], record["flow_end"], record["switch_id"] or switch_id,
+        record["src_sgt"], record["dst_sgt"], record["src_mac"], record["dst_mac"],
+        record["vlan_id"],
+    )
+
+
+class TestFlowBatchFormat:
+    """Tests for encoding and decoding columnar batches."""
+
+    @pytest.mark.parametrize("compress", [True, False])
+    def test_round_trip(self, compress):
+        batch = decode_flow_batch(encode_flow_batch(RECORDS, compress=compress))
+
+        assert len(batch) == 3
+        assert batch.to_rows(switch_id="SW-1") == [as_row(r, "SW-1") for r in RECORDS]
+
+    def test_empty_batch(self):
+        batch = decode_flow_batch(encode_flow_batch([]))
+        assert len(batch) == 0
+        assert batch.to_rows() == []
+
+    def test_collector_encoder_compatible(self):
+        records = []
+        for r in RECORDS:
+            record = NetFlowRecord()
+            for key, value in r.items():
+                setattr(record, key, value)
+            records.append(record)
+
+        payload = collector_encode_flow_batch(records, default_switch_id="unknown")
+        rows = decode_flow_batch(payload).to_rows()
+
+        assert rows == [as_row(r, "unknown") for r in RECORDS]
+        assert payload == encode_flow_batch(
+            [{**r, "switch_id": r["switch_id"] or "unknown"} for r in RECORDS]
+        )
+
+    def test_collector_encoder_rejects_ipv6(self):
+        record = NetFlowRecord()
+        record.src_ip, record.dst_ip = "2001:db8::1", "10.0.0.1"
+        with pytest.raises(ValueError):
+            collector_encode_flow_batch([record])
+
+    @pytest.mark.parametrize("mutate", [
+        lambda p: p[:10],                                    # Truncated header
+        lambda p: b"XXXX" + p[4:],                           # Bad magic
+        lambda p: p[:4] + b"\x09" + p[5:],                   # Unknown version
+        lambda p: p[:-3],                                    # Truncated body
+        lambda p: p + b"\x00",                               # Trailing bytes
+    ])
+    def test_malformed_batch_rejected(self, mutate):
+        payload = encode_flow_batch(RECORDS, compress=False)
+        with pytest.raises(ValueError):
+            decode_flow_batch(mutate(payload))
+
+    def test_compression_bomb_rejected(self):
+        header = struct.pack("<4sBBHII", b"CNFB", 1, 0x01, 0, 1, 100)
+        payload = header + zlib.compress(b"\0" * (16 * 1024 * 1024))
+        with pytest.raises(ValueError, match="inflates past"):
+            decode_flow_batch(payload)
+
+    @pytest.mark.parametrize("count, body_length", [
+        (MAX_FLOW_BATCH_RECORDS + 1, 0),
+        (0, MAX_FLOW_BATCH_BODY + 1),
+    ])
+    def test_oversized_header_rejected(self, count, body_length):
+        header = struct.pack("<4sBBHII", b"CNFB", 1, 0x01, 0, count, body_length)
+        with pytest.raises(ValueError, match="limit"):
+            decode_flow_batch(header + zlib.compress(b""))
+
+    def test_bad_string_index_rejected(self):
+        payload = bytearray(encode_flow_batch([make_record(switch_id="SW-1")], compress=False))
+        # switch_id is the last column, immediately before the string table
+        body_length = struct.unpack_from("<I", payload, 12)[0]
+        switch_offset = 16 + body_length - len(b"SW-1") - 8 - 4
+        struct.pack_into("<i", payload, switch_offset, 7)
+        with pytest.raises(ValueError):
+            decode_flow_batch(bytes(payload))
+
+
+class TestNetflowRowStorage:
+    """Tests for storing decoded rows."""
+
+    def test_rows_match_bulk_store(self, db, tmp_path):
+        stored = db.store_netflow_rows(decode_flow_batch(encode_flow_batch(RECORDS)).to_rows("SW-1"))
+
+        reference = ClarionDatabase(str(tmp_path / "reference.db"))
+        try:
+            reference.store_netflow_bulk(RECORDS, switch_id="SW-1")
+            expected = reference.get_recent_netflow()
+            expected_summary = reference.get_netflow_summary()
+        finally:
+            reference.close()
+
+        assert stored == 3
+        assert db.get_recent_netflow() == expected
+        assert db.get_netflow_summary() == expected_summary
+
+    def test_empty_rows(self, db):
+        assert db.store_netflow_rows([]) == 0
@@ -12,7 +12,13 @@ import pytest
 from datetime import datetime
 from typing import List
 
-from clarion.policy.matrix import PolicyMatrix, MatrixCell
+import numpy as np
+import pandas as pd
+
+from clarion.clustering.clusterer import ClusterResult
+from clarion.ingest.loader import ClarionDataset
+from clarion.ingest.sketch_builder import SketchStore
+from clarion.policy.matrix import PolicyMatrix, PolicyMatrixBuilder, MatrixCell
 from clarion.policy.sgacl import SGACLGenerator, SGACLRule, SGACLPolicy
 from clarion.policy.impact import ImpactAnalyzer, ImpactReport, BlockedTraffic
 from clarion.policy.exporter import ISEExporter, PolicyExport
@@ -181,6 +187,154 @@ class TestPolicyMatrix:
         assert summary["n_cells"] == 1
 
 
+def assert_matrices_identical(a: PolicyMatrix, b: PolicyMatrix) -> None:
+    """Assert two matrices hold identical cells, in the same cell and port order."""
+    assert list(a.cells) == list(b.cells)
+    for key, cell in a.cells.items():
+        assert cell.to_dict() == b.cells[key].to_dict(), key
+        assert list(cell.observed_ports) == list(b.cells[key].observed_ports), key
+    assert a.sgt_names == b.sgt_names
+    assert (a.total_flows, a.total_bytes) == (b.total_flows, b.total_bytes)
+
+
+class TestPolicyMatrixBuilder:
+    """Tests for PolicyMatrixBuilder."""
+    
+    @pytest.fixture
+    def inputs(self):
+        """Flows exercising every SGT resolution path."""
+        flows = pd.DataFrame({
+            "src_mac": ["m1", "m1", "m2", None, "m9", "m2", "m1", "m2", "m1", "m3"],
+            "dst_ip": ["10.0.0.2", "10.0.0.5", "10.0.0.9", "10.0.0.2", "10.0.0.2",
+                       "10.0.0.7", "10.0.0.8", "10.0.0.2", "10.0.0.5", "10.0.0.2"],
+            "dst_mac": [None, None, None, None, None, None, "m2", None, None, None],
+            "src_sgt": [0, 0, 0, 0, 0, 0, 0, 0, 30, 0],
+            "dst_sgt": [0, 0, 0, 0, 0, 40, 0, 0, 0, 0],
+            "dst_port": [443, 443, 53, 443, 443, 22, 445, 80, 443, 443],
+            "proto": ["tcp", "tcp", "udp", "tcp", "tcp", "tcp", "tcp", "tcp", "tcp", "tcp"],
+            "bytes": [100, 200, 50, 10, 10, 70, 30, 20, 5, 1],
+            "start_time": pd.date_range("2024-01-01", periods=10, freq="h", tz="UTC"),
+        })
+        empty = pd.DataFrame()
+        dataset = ClarionDataset(
+            flows=flows,
+            endpoints=empty,
+            ise_sessions=empty,
+            ip_assignments=pd.DataFrame({
+                "ip": ["10.0.0.2", "10.0.0.5", "10.0.0.5"],
+                "mac": ["m2", "m9", "m1"],
+            }),
+            ad_users=empty,
+            ad_groups=empty,
+            ad_group_membership=empty,
+            services=pd.DataFrame({"ip": ["10.0.0.5", "10.0.0.7"], "service_name": ["DNS", "SSH"]}),
+            switches=empty,
+            interfaces=empty,
+            trustsec_sgts=empty,
+        )
+        cluster_result = ClusterResult(
+            labels=np.array([0, 1, 2]),
+            endpoint_ids=["m1", "m2", "m3"],
+            n_clusters=3,
+            n_noise=0,
+        )
+        taxonomy = SGTTaxonomy(recommendations=[
+            SGTRecommendation(
+                cluster_id=cluster_id, sgt_value=sgt, sgt_name=name,
+                cluster_label=name, cluster_size=1, confidence=1.0,
+                justification="", endpoint_count=1,
+            )
+            for cluster_id, sgt, name in [(0, 10, "Servers"), (1, 20, "Users")]
+        ])
+        return dataset, cluster_result, taxonomy
+    
+    def test_columnar_matches_rows(self, inputs):
+        """The vectorized build produces the row-by-row matrix."""
+        dataset, cluster_result, taxonomy = inputs
+        builder = PolicyMatrixBuilder(taxonomy)
+        
+        rows = builder.build(dataset, SketchStore(), cluster_result, columnar=False)
+        columnar = builder.build(dataset, SketchStore(), cluster_result)
+        
+        assert_matrices_identical(rows, columnar)
+    
+    def test_columnar_matches_rows_on_random_flows(self):
+        """The vectorized build matches row-by-row on randomized flows."""
+        rng = np.random.default_rng(42)
+        n_endpoints, n_flows, n_clusters = 60, 1500, 5
+        macs = np.array([f"00:11:22:00:00:{i:02x}" for i in range(n_endpoints)])
+        ips = np.array([f"10.0.0.{i}" for i in range(n_endpoints)])
+        # Destinations: mostly known endpoints, some services, some unknown hosts
+        dst_pool = np.concatenate([ips, [f"10.9.0.{i}" for i in range(10)], ["10.8.0.1", "10.8.0.2"]])
+        
+        flows = pd.DataFrame({
+            "src_mac": macs[rng.integers(0, n_endpoints, n_flows)],
+            "dst_ip": dst_pool[rng.integers(0, len(dst_pool), n_flows)],
+            "dst_port": rng.choice([443, 80, 22, 445, 53], n_flows),
+            "proto": rng.choice(["tcp", "udp"], n_flows, p=[0.8, 0.2]),
+            "bytes": rng.integers(64, 1_000_000, n_flows),
+            "src_sgt": np.where(rng.random(n_flows) < 0.1, 100, 0),
+            "dst_sgt": np.zeros(n_flows, dtype=int),
+            "start_time": pd.Timestamp("2024-01-01", tz="UTC")
+            + pd.to_timedelta(rng.integers(0, 86400, n_flows), unit="s"),
+        })
+        empty = pd.DataFrame()
+        dataset = ClarionDataset(
+            flows=flows,
+            endpoints=empty,
+            ise_sessions=empty,
+            ip_assignments=pd.DataFrame({"ip": ips, "mac": macs}),
+            ad_users=empty,
+            ad_groups=empty,
+            ad_group_membership=empty,
+            services=pd.DataFrame({"ip": ["10.8.0.1", "10.8.0.2"], "service_name": ["AD-DC", "DNS"]}),
+            switches=empty,
+            interfaces=empty,
+            trustsec_sgts=empty,
+        )
+        labels = rng.integers(-1, n_clusters, n_endpoints)
+        cluster_result = ClusterResult(
+            labels=labels,
+            endpoint_ids=list(macs),
+            n_clusters=n_clusters,
+            n_noise=int((labels == -1).sum()),
+        )
+        taxonomy = SGTTaxonomy(recommendations=[
+            SGTRecommendation(
+                cluster_id=k, sgt_value=2 + k, sgt_name=f"Group-{k}",
+                cluster_label=f"Group-{k}", cluster_size=1, confidence=1.0,
+                justification="", endpoint_count=1,
+            )
+            for k in range(n_clusters)
+        ])
+        builder = PolicyMatrixBuilder(taxonomy)
+        
+        rows = builder.build(dataset, SketchStore(), cluster_result, columnar=False)
+        columnar = builder.build(dataset, SketchStore(), cluster_result)
+        
+        assert rows.n_cells > 0
+        assert_matrices_identical(rows, columnar)
+    
+    def test_sgt_resolution(self, inputs):
+        """Flow SGTs win, then cluster SGTs, IP bindings, services and Unknown."""
+        dataset, cluster_result, taxonomy = inputs
+        matrix = PolicyMatrixBuilder(taxonomy).build(dataset, SketchStore(), cluster_result)
+        
+        # m1 → 10.0.0.2 (bound to m2) and m1 → flow dst_mac m2
+        assert matrix.get_cell(10, 20).observed_ports == {"tcp/443": 1, "tcp/445": 1}
+        assert matrix.get_cell(20, 20).observed_ports == {"tcp/80": 1}
+        # 10.0.0.5: last binding (m1) wins the quick lookup
+        assert matrix.get_cell(10, 10).services == {"DNS"}
+        # Flow SGTs override cluster SGTs
+        assert matrix.get_cell(20, 40).total_bytes == 70
+        assert matrix.get_cell(30, 10).total_flows == 1
+        # 10.0.0.9 is unknown everywhere
+        assert matrix.get_cell(20, 0).dst_sgt_name == "Unknown"
+        # No src_mac, unclustered m9 and SGT-less cluster of m3 are skipped
+        assert matrix.total_flows == 7
+        assert matrix.get_cell(10, 20).unique_dst_endpoints == 2
+
+
 class TestSGACLRule:
     """Tests for SGACLRule."""
     
@@ -4,8 +4,23 @@ Unit tests for Clarion sketches module.
 
 import pytest
 from datetime import datetime
+from pathlib import Path
+import sys
 
-from clarion.sketches import EndpointSketch, HyperLogLogSketch, CountMinSketch
+import numpy as np
+
+from clarion.sketches import (
+    EndpointSketch,
+    HyperLogLogSketch,
+    CountMinSketch,
+    SpaceSavingSketch,
+    decode_edge_sketch,
+    decode_sketch_batch,
+)
+
+# Edge agent package, for producing real binary sketch payloads
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "edge"))
+from clarion_edge.sketch import EdgeSketch
 
 
 class TestHyperLogLogSketch:
@@ -68,6 +83,61 @@ class TestHyperLogLogSketch:
         # Should have ~200 unique items
         assert 180 <= hll1.count() <= 220
     
+    def test_add_many_matches_add(self):
+        """Test batched add leaves the same registers as per-item add."""
+        items = [f"10.0.0.{i}" for i in range(200)]
+        hll1 = HyperLogLogSketch(name="test1")
+        hll2 = HyperLogLogSketch(name="test2")
+        for item in items:
+            hll1.add(item)
+        hll2.add_many(items)
+        assert hll1.to_bytes() == hll2.to_bytes()
+        assert hll1.count() == hll2.count()
+    
+    def test_add_many_integer_array(self):
+        """Test vectorized integer hashing matches per-item add."""
+        values = np.arange(167772160, 167772160 + 500, dtype=np.uint32)  # 10.0.0.0/23
+        hll1 = HyperLogLogSketch(name="test1", precision=12)
+        hll2 = HyperLogLogSketch(name="test2", precision=12)
+        for value in values:
+            hll1.add(int(value))
+        hll2.add_many(values)
+        assert hll1.to_bytes() == hll2.to_bytes()
+        assert 450 <= hll2.count() <= 550
+    
+    def test_serialization_round_trip(self):
+        """Test to_bytes/from_bytes round-trips sparse and dense sketches."""
+        for n in (10, 20000):
+            hll = HyperLogLogSketch(name="test", precision=12)
+            hll.add_many(f"item_{i}" for i in range(n))
+            data = hll.to_bytes()
+            restored = HyperLogLogSketch.from_bytes("restored", data)
+            assert restored.precision == 12
+            assert restored.count() == hll.count()
+            assert restored.to_bytes() == data
+        # Sparse encoding keeps small sketches compact
+        small = HyperLogLogSketch(name="small", precision=12)
+        small.add("10.0.0.1")
+        assert len(small.to_bytes()) < 16
+    
+    def test_from_bytes_then_merge(self):
+        """Test restored sketches can be merged."""
+        hll1 = HyperLogLogSketch(name="test1")
+        hll2 = HyperLogLogSketch(name="test2")
+        hll1.add_many(f"a_{i}" for i in range(100))
+        hll2.add_many(f"b_{i}" for i in range(100))
+        restored = HyperLogLogSketch.from_bytes("restored", hll1.to_bytes())
+        restored.merge(HyperLogLogSketch.from_bytes("other", hll2.to_bytes()))
+        assert 180 <= restored.count() <= 220
+    
+    def test_from_bytes_rejects_bad_data(self):
+        """Test deserialization validates header and precision."""
+        hll = HyperLogLogSketch(name="test", precision=12)
+        with pytest.raises(ValueError):
+            HyperLogLogSketch.from_bytes("bad", b"junk")
+        with pytest.raises(ValueError):
+            HyperLogLogSketch.from_bytes("bad", hll.to_bytes(), precision=14)
+    
     def test_memory_bytes(self):
         """Test memory estimation."""
         hll = HyperLogLogSketch(name="test", precision=14)
@@ -130,6 +200,52 @@ class TestCountMinSketch:
         assert top[0][0] == "first"
         assert top[1][0] == "second"
     
+    def test_add_many_matches_add(self):
+        """Test batched add with counts matches per-item add."""
+        cms1 = CountMinSketch(name="test1", width=100, depth=4)
+        cms2 = CountMinSketch(name="test2", width=100, depth=4)
+        items = ["tcp/443", "tcp/80", "udp/53", "tcp/443"]
+        counts = [5, 3, 2, 7]
+        for item, count in zip(items, counts):
+            cms1.add(item, count=count)
+        cms2.add_many(items, counts)
+        assert cms1.to_bytes() == cms2.to_bytes()
+        assert cms2.total() == 17
+        assert cms2.get("tcp/443") >= 12
+    
+    def test_get_many(self):
+        """Test batched queries match single-item get."""
+        cms = CountMinSketch(name="test", width=500, depth=4)
+        cms.add_many([f"tcp/{port}" for port in range(1000, 1100)])
+        keys = ["tcp/1000", "tcp/1050", "udp/53"]
+        estimates = cms.get_many(keys)
+        assert list(estimates) == [cms.get(key) for key in keys]
+        assert estimates[0] >= 1
+    
+    def test_conservative_update_never_undercounts(self):
+        """Test conservative update stays an upper bound with less inflation."""
+        standard = CountMinSketch(name="standard", width=50, depth=4)
+        conservative = CountMinSketch(name="cu", width=50, depth=4, conservative=True)
+        keys = [f"tcp/{port}" for port in range(200)]
+        counts = [(i % 7) + 1 for i in range(200)]
+        for key, count in zip(keys, counts):
+            standard.add(key, count=count)
+            conservative.add(key, count=count)
+        
+        standard_est = standard.get_many(keys)
+        conservative_est = conservative.get_many(keys)
+        assert all(est >= true for est, true in zip(conservative_est, counts))
+        assert conservative_est.sum() <= standard_est.sum()
+        assert conservative.total() == sum(counts)
+    
+    def test_conservative_add_many(self):
+        """Test batched conservative update keeps estimates as upper bounds."""
+        cms = CountMinSketch(name="cu", width=50, depth=4, conservative=True)
+        keys = [f"udp/{port}" for port in range(100)] * 2
+        cms.add_many(keys, [3] * len(keys))
+        assert all(est >= 6 for est in cms.get_many(keys[:100]))
+        assert cms.total() == 600
+    
     def test_merge(self):
         """Test merging two CMS."""
         cms1 = CountMinSketch(name="test1", width=1000, depth=5)
@@ -152,6 +268,72 @@ class TestCountMinSketch:
         assert cms.get("item") == 0
 
 
+class TestSpaceSavingSketch:
+    """Tests for Space-Saving heavy-hitter tracking."""
+    
+    def test_exact_below_capacity(self):
+        """Test counts are exact while distinct keys fit."""
+        ss = SpaceSavingSketch(name="test", capacity=8)
+        ss.add("tcp/443", count=100)
+        ss.add("udp/53", count=20)
+        ss.add("tcp/443", count=5)
+        assert ss.top_k() == [("tcp/443", 105), ("udp/53", 20)]
+        assert ss.error("tcp/443") == 0
+        assert ss.total() == 125
+    
+    def test_heavy_hitters_survive_overflow(self):
+        """Test frequent keys stay tracked among many rare keys."""
+        ss = SpaceSavingSketch(name="test", capacity=8)
+        for i in range(2000):
+            ss.add("tcp/443")
+            if i % 2 == 0:
+                ss.add("udp/5060")
+            ss.add(f"tcp/{40000 + i}")  # one-off ephemeral ports
+        top = [key for key, _ in ss.top_k(2)]
+        assert top == ["tcp/443", "udp/5060"]
+        assert ss.get("tcp/443") >= 2000
+        assert len(ss.top_k()) == 8
+    
+    def test_add_many_matches_add(self):
+        """Test batched add equals per-item add below capacity."""
+        ss1 = SpaceSavingSketch(name="test1")
+        ss2 = SpaceSavingSketch(name="test2")
+        items = ["tcp/443", "tcp/80", "udp/53", "tcp/443"]
+        counts = [5, 3, 2, 7]
+        for item, count in zip(items, counts):
+            ss1.add(item, count=count)
+        ss2.add_many(items, counts)
+        assert ss1.to_bytes() == ss2.to_bytes()
+    
+    def test_merge(self):
+        """Test merging summaries from two switches."""
+        ss1 = SpaceSavingSketch(name="sw1", capacity=4)
+        ss2 = SpaceSavingSketch(name="sw2", capacity=4)
+        ss1.add("tcp/443", count=50)
+        ss1.add("udp/53", count=10)
+        ss2.add("tcp/443", count=30)
+        ss2.add("udp/5060", count=40)
+        ss1.merge(ss2)
+        assert ss1.top_k(2) == [("tcp/443", 80), ("udp/5060", 40)]
+        assert ss1.total() == 130
+    
+    def test_merge_different_capacity_fails(self):
+        """Test merging summaries with different capacity fails."""
+        with pytest.raises(ValueError):
+            SpaceSavingSketch(name="a", capacity=4).merge(SpaceSavingSketch(name="b", capacity=8))
+    
+    def test_serialization_round_trip(self):
+        """Test to_bytes/from_bytes round-trip."""
+        ss = SpaceSavingSketch(name="test", capacity=4)
+        for i in range(20):
+            ss.add(f"tcp/{i % 6}", count=i)
+        restored = SpaceSavingSketch.from_bytes("restored", ss.to_bytes())
+        assert restored.top_k() == ss.top_k()
+        assert restored.total() == ss.total()
+        assert restored.capacity == 4
+        assert all(restored.error(key) == ss.error(key) for key, _ in ss.top_k())
+
+
 class TestEndpointSketch:
     """Tests for EndpointSketch behavioral fingerprinting."""
     
@@ -284,6 +466,53 @@ class TestEndpointSketch:
         assert sketch1.bytes_out == 1500
         assert sketch1.peer_diversity >= 8  # ~10 unique peers
     
+    def test_get_top_ports(self):
+        """Test top ports come from tracked keys, not a candidate list."""
+        sketch = EndpointSketch(endpoint_id="aa:bb:cc:dd:ee:ff")
+        for i in range(30):
+            sketch.record_flow(dst_ip="10.0.0.1", dst_port=5060, proto="udp")
+        for i in range(10):
+            sketch.record_flow(dst_ip="10.0.0.2", dst_port=47808, proto="udp")
+        sketch.record_flow(dst_ip="10.0.0.3", dst_port=443, proto="tcp")
+        
+        top = sketch.get_top_ports(k=2)
+        assert top[0] == ("udp/5060", 30)
+        assert top[1] == ("udp/47808", 10)
+    
+    def test_merge_merges_top_ports(self):
+        """Test merged sketches combine heavy hitters."""
+        sketch1 = EndpointSketch(endpoint_id="aa:bb:cc:dd:ee:ff")
+        sketch2 = EndpointSketch(endpoint_id="aa:bb:cc:dd:ee:ff")
+        for _ in range(5):
+            sketch1.record_flow(dst_ip="10.0.0.1", dst_port=443, proto="tcp")
+            sketch2.record_flow(dst_ip="10.0.0.1", dst_port=443, proto="tcp")
+        sketch2.record_flow(dst_ip="10.0.0.1", dst_port=22, proto="tcp")
+        sketch1.merge(sketch2)
+        assert sketch1.get_top_ports(k=2) == [("tcp/443", 10), ("tcp/22", 1)]
+    
+    def test_bytes_round_trip(self):
+        """Test full sketch serialization keeps mergeable state."""
+        sketch = EndpointSketch(endpoint_id="aa:bb:cc:dd:ee:ff", switch_id="SW-1")
+        for i in range(20):
+            sketch.record_flow(
+                dst_ip=f"10.0.0.{i}",
+                dst_port=443 if i % 2 else 53,
+                proto="tcp" if i % 2 else "udp",
+                bytes_out=100,
+                service_name="HTTPS" if i % 2 else "DNS",
+                timestamp=datetime(2024, 1, 1, 9 + i % 3, 0),
+            )
+        sketch.ad_groups = ["Engineering-Users"]
+        
+        restored = EndpointSketch.from_bytes(sketch.to_bytes())
+        assert restored.to_dict() == sketch.to_dict()
+        assert restored.get_top_services(k=2) == sketch.get_top_services(k=2)
+        assert restored.port_frequency.get("tcp/443") == sketch.port_frequency.get("tcp/443")
+        
+        restored.merge(sketch)
+        assert restored.flow_count == 40
+        assert 17 <= restored.peer_diversity <= 23
+    
     def test_merge_different_endpoints_fails(self):
         """Test that merging different endpoints fails."""
         sketch1 = EndpointSketch(endpoint_id="aa:bb:cc:dd:ee:ff")
@@ -338,3 +567,67 @@ class TestEndpointSketch:
         assert d["ise_profile"] == "CorporateLaptop"
 
 
+
+
+class TestEdgeSketchDecoding:
+    """Tests for decoding binary sketch batches from edge agents."""
+    
+    def make_edge_sketch(self, endpoint_id: str, n_flows: int = 50) -> EdgeSketch:
+        sketch = EdgeSketch(endpoint_id=endpoint_id, switch_id="SW-1")
+        for i in range(n_flows):
+            sketch.record_flow(
+                dst_ip=f"10.0.{i % 7}.{i}",
+                dst_port=[443, 53, 22][i % 3],
+                proto="tcp",
+                bytes_count=100 + i,
+                is_outbound=i % 2 == 0,
+                timestamp=1_700_000_000 + i * 60,
+            )
+        return sketch
+    
+    def encode_batch(self, sketches) -> bytes:
+        """Same framing as EdgeAgent.get_serialized_sketches()."""
+        parts = [len(sketches).to_bytes(4, "little")]
+        for s in sketches:
+            data = s.to_bytes()
+            parts.append(len(data).to_bytes(4, "little"))
+            parts.append(data)
+        return b"".join(parts)
+    
+    def test_decode_matches_edge_sketch(self):
+        """Decoded frames match the edge sketches' own values."""
+        sketches = [self.make_edge_sketch("aa:01", 50), self.make_edge_sketch("aa:02", 5)]
+        payload = self.encode_batch(sketches)
+        
+        frames = decode_sketch_batch(payload)
+        
+        assert [f.endpoint_id for f in frames] == ["aa:01", "aa:02"]
+        for frame, sketch in zip(frames, sketches):
+            row = frame.to_row()
+            expected = sketch.to_dict()
+            for key in ("unique_peers", "unique_ports", "bytes_in", "bytes_out",
+                        "flow_count", "first_seen", "last_seen", "active_hours"):
+                assert row[key] == expected[key], key
+            assert bytes(row["sketch_data"]) == sketch.to_bytes()
+            assert frame.port_counters.shape == (4, 1024)
+            assert frame.port_counters.sum() == 4 * sketch.flow_count
+    
+    def test_decode_is_zero_copy(self):
+        """Register views share memory with the payload."""
+        payload = bytearray(self.encode_batch([self.make_edge_sketch("aa:01")]))
+        frame = decode_sketch_batch(payload)[0]
+        assert np.shares_memory(frame.peers_registers, np.frombuffer(payload, dtype=np.uint8))
+    
+    def test_decode_empty_batch(self):
+        """A zero-count batch decodes to no sketches."""
+        assert decode_sketch_batch((0).to_bytes(4, "little")) == []
+    
+    def test_decode_rejects_malformed(self):
+        """Truncated or padded payloads raise ValueError."""
+        payload = self.encode_batch([self.make_edge_sketch("aa:01")])
+        with pytest.raises(ValueError):
+            decode_sketch_batch(payload[:-1])
+        with pytest.raises(ValueError):
+            decode_sketch_batch(payload + b"\x00")
+        with pytest.raises(ValueError):
+            decode_edge_sketch(b"\x00" * 8)